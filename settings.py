@@ -2,3 +2,12 @@
 # BLAS library
 use_openblas = True
 use_accelerate = False  # mac-os only
+
+# OpenMP parallelism within a simulation
+use_openmp = False
+
+# threaded fftw (fftw3_omp) for large sideband transforms
+use_fftw_threads = False
+
+# range-reduced polynomial sines and cosines instead of the lookup table by default
+use_polynomial_trig = False
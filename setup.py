@@ -15,6 +15,9 @@ import numpy.distutils.system_info as sysinfo
 
 from settings import use_accelerate
 from settings import use_openblas
+from settings import use_fftw_threads
+from settings import use_openmp
+from settings import use_polynomial_trig
 
 try:
     from Cython.Build import cythonize
@@ -69,7 +72,7 @@ class Setup:
             ]
         )
         self.library_dirs += self.check_valid_path([join(loc, "Library", "lib")])
-        self.libraries += ["fftw3", "openblas"]
+        self.libraries += ["fftw3", "fftw3f", "openblas"]
         self.extra_compile_args = ["/O3", "-ffast-math", "/DUSE_OPENBLAS"]
         self.on_exit_message("openblas.lib", "fftw3.lib")
 
@@ -80,7 +83,7 @@ class Setup:
         self.include_dirs += self.check_valid_path([join(loc, "include")])
         self.library_dirs += self.check_valid_path([join(loc, "lib")])
         self.extra_compile_args = ["-O3", "-ffast-math", "-DUSE_OPENBLAS"]
-        self.libraries += ["fftw3", "openblas"]
+        self.libraries += ["fftw3", "fftw3f", "openblas"]
 
     def on_exit_message(self, blas_lib, fftw_lib):
         found_blas = self.check_if_lib_exists(blas_lib)
@@ -112,6 +115,31 @@ class Setup:
     #     self.libraries += libs
     #     self.BLAS_FOUND = True
 
+    def openmp_info(self):
+        """OpenMP parallelism over the sidebands and octants within a simulation."""
+        if sys.platform.startswith("win"):
+            self.extra_compile_args += ["/openmp"]
+        elif platform.system() == "Darwin":
+            self.extra_compile_args += ["-Xpreprocessor", "-fopenmp"]
+            self.extra_link_args += ["-lomp"]
+        else:
+            self.extra_compile_args += ["-fopenmp"]
+            self.extra_link_args += ["-fopenmp"]
+        print("Linking mrsimulator with OpenMP.")
+
+    def fftw_threads_info(self):
+        """Threaded fftw, from the fftw3_omp library, for large sideband transforms."""
+        self.libraries += ["fftw3_omp"]
+        flag = "/D" if sys.platform.startswith("win") else "-D"
+        self.extra_compile_args += [f"{flag}USE_FFTW_THREADS"]
+        print("Linking mrsimulator with the threaded fftw.")
+
+    def polynomial_trig_info(self):
+        """Range-reduced polynomial sines and cosines as the default trig method."""
+        flag = "/D" if sys.platform.startswith("win") else "-D"
+        self.extra_compile_args += [f"{flag}MRS_TRIG_POLYNOMIAL_DEFAULT"]
+        print("Using the polynomial sines and cosines by default.")
+
     def mkl_blas_info(self):
         mkl_info = np.__config__.blas_mkl_info
         if mkl_info == {}:
@@ -167,7 +195,7 @@ class LinuxSetup(Setup):
         ]
 
         self.library_dirs += ["/usr/lib64/", "/usr/lib/", "/usr/lib/x86_64-linux-gnu/"]
-        self.libraries += ["openblas", "fftw3"]
+        self.libraries += ["openblas", "fftw3", "fftw3f"]
         openblas_info = sysinfo.get_info("openblas")
         fftw3_info = sysinfo.get_info("fftw3")
 
@@ -269,7 +297,7 @@ class MacOSSetup(Setup):
         """fftw includes and lib are for brew installation"""
         fftw_include_dir = "/usr/local/opt/fftw/include"
         fftw_library_dir = "/usr/local/opt/fftw/lib"
-        fftw_library = "fftw3"
+        fftw_library = ["fftw3", "fftw3f"]
 
         if not exists(fftw_include_dir):
             print(message("fftw", "homebrew", "brew", ""))
@@ -278,7 +306,7 @@ class MacOSSetup(Setup):
         print("Linking mrsimulator with fftw library.")
         self.include_dirs += [fftw_include_dir]
         self.library_dirs += [fftw_library_dir]
-        self.libraries += [fftw_library]
+        self.libraries += fftw_library
 
 
 # get the version from file
@@ -310,6 +338,15 @@ if platform.system() == "Darwin":
 if platform.system() == "Linux":
     win = LinuxSetup()
 
+if use_openmp or use_fftw_threads:
+    win.openmp_info()
+
+if use_fftw_threads:
+    win.fftw_threads_info()
+
+if use_polynomial_trig:
+    win.polynomial_trig_info()
+
 extra_link_args = list(set(win.extra_link_args))
 extra_compile_args = list(set(win.extra_compile_args))
 library_dirs = list(set(win.library_dirs))
@@ -69,7 +69,7 @@ else:
     library_dirs += [join(conda_location, "lib")]
     extra_compile_args = ["-O3", "-ffast-math", "-DUSE_OPENBLAS"]
 
-libraries += ["fftw3", "openblas"]
+libraries += ["fftw3", "fftw3f", "openblas"]
 extra_link_args += ["-lm"]
 
 include_dirs = list(set(include_dirs))
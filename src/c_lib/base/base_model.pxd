@@ -10,6 +10,8 @@ from libcpp cimport bool as bool_t
 
 cdef extern from "tables/trig.h":
     void generate_table()
+    void MRS_set_trig_method(int method)
+    int MRS_get_trig_method()
 
 cdef extern from "angular_momentum.h":
     void wigner_d_matrices_from_exp_I_beta(int l, int n, bool_t half,
@@ -21,16 +23,83 @@ cdef extern from "schemes.h":
         unsigned int total_orientations
 
     ctypedef struct MRS_fftw_scheme:
-        pass
+        unsigned int n_threads
+        bool_t single_precision
+
+    ctypedef struct MRS_culling:
+        double cutoff
+        unsigned long long triangles
+        double discarded
+        double total
+
+    ctypedef struct MRS_refinement:
+        unsigned int depth
+        unsigned long long triangles
+        unsigned long long orientations
+
+    ctypedef struct MRS_workspace:
+        unsigned int n_threads
+        unsigned long long sidebands_interpolated
+        unsigned long long sidebands_skipped
+        unsigned long long pathways_simulated
+        unsigned long long pathways_merged
+        MRS_culling culling
+        MRS_refinement refinement
+        unsigned int rasterization
+
+    ctypedef struct MRS_averaging_scheme_cache_info:
+        unsigned int entries
+        size_t nbytes
+        size_t max_nbytes
+        unsigned long hits
+        unsigned long disk_hits
+        unsigned long misses
+        unsigned long evictions
 
     MRS_averaging_scheme *MRS_create_averaging_scheme(
                             unsigned int integration_density,
                             bool_t allow_fourth_rank,
                             unsigned int integration_volume)
+    MRS_averaging_scheme *MRS_create_averaging_scheme_from_alpha_beta(
+                            double *alpha, double *beta,
+                            double *weight, unsigned int n_angles,
+                            bool_t allow_fourth_rank)
     void MRS_free_averaging_scheme(MRS_averaging_scheme *scheme)
+    MRS_averaging_scheme *MRS_get_averaging_scheme(
+                            unsigned int integration_density,
+                            bool_t allow_fourth_rank,
+                            unsigned int integration_volume)
+    void MRS_release_averaging_scheme(MRS_averaging_scheme *scheme)
+    void MRS_set_averaging_scheme_cache_limit(size_t max_nbytes)
+    void MRS_set_averaging_scheme_cache_directory(const char *directory)
+    void MRS_clear_averaging_scheme_cache()
+    MRS_averaging_scheme_cache_info MRS_get_averaging_scheme_cache_info()
+    bool_t MRS_fftw_threads_enabled()
+    void MRS_set_fftw_threads(unsigned int n_threads, unsigned int min_size)
+    unsigned int MRS_get_fftw_threads(unsigned int size, unsigned int max_threads)
     MRS_fftw_scheme *create_fftw_scheme(unsigned int total_orientations,
-                                    unsigned int number_of_sidebands)
+                                    unsigned int number_of_sidebands,
+                                    unsigned int planner,
+                                    unsigned int n_threads)
+    MRS_fftw_scheme *create_fftwf_scheme(unsigned int total_orientations,
+                                    unsigned int number_of_sidebands,
+                                    unsigned int planner)
     void MRS_free_fftw_scheme(MRS_fftw_scheme *fftw_scheme)
+    MRS_workspace *MRS_create_workspace(MRS_averaging_scheme *scheme)
+    void MRS_free_workspace(MRS_workspace *workspace)
+    void MRS_set_workspace_threads(MRS_workspace *workspace,
+                                   MRS_averaging_scheme *scheme,
+                                   unsigned int n_threads)
+    bool_t MRS_openmp_enabled()
+
+
+cdef extern from "fftw3.h":
+    int fftw_import_wisdom_from_filename(const char *filename)
+    int fftw_export_wisdom_to_filename(const char *filename)
+    void fftw_forget_wisdom()
+    int fftwf_import_wisdom_from_filename(const char *filename)
+    int fftwf_export_wisdom_to_filename(const char *filename)
+    void fftwf_forget_wisdom()
 
 
 cdef extern from "mrsimulator.h":
@@ -46,6 +115,7 @@ cdef extern from "mrsimulator.h":
                           double rotor_angle_in_rad, double increment,
                           bool_t allow_fourth_rank)
     void MRS_free_plan(MRS_plan *plan)
+    void MRS_release_plan(MRS_plan *plan)
     void MRS_get_amplitudes_from_plan(MRS_plan *plan, bool_t refresh)
     void MRS_get_frequencies_from_plan(MRS_plan *plan, double R0, double complex *R2,
                                   double complex *R4, bool_t refresh)
@@ -102,6 +172,11 @@ cdef extern from "method.h":
         unsigned int n_dim,
         unsigned int number_of_sidebands)
 
+    void MRS_update_dimension_coordinates(MRS_dimension *dimension, int count,
+                                          double coordinates_offset, double increment)
+    int MRS_update_dimension_rotor_angles(MRS_dimension *dimension,
+                                          double *rotor_angle_in_rad)
+
     void MRS_free_dimension(MRS_dimension *dimensions, int n)
 
 
@@ -144,7 +219,42 @@ cdef extern from "simulation.h":
         MRS_dimension *dimensions,    # the dimensions within method.
         MRS_fftw_scheme *fftw_scheme, # the fftw scheme
         MRS_averaging_scheme *scheme, # the powder averaging scheme
+        MRS_workspace *workspace,     # the workspace buffers
+        bool_t interpolation,
+        bool_t *freq_contrib,
+        double *affine_matrix,
+        )
+
+    void __mrsimulator_batch(
+        double *spec,
+        bool_t decompose_spectrum,
+        unsigned int n_spin_systems,
+        site_struct *sites,
+        coupling_struct *couplings,
+        float *transition_pathways,     # Pointer to the packed transition pathways.
+        unsigned int *pathway_offset,   # the pathway offset per spin system.
+        unsigned int *pathway_count,    # the number of pathways per spin system.
+        double *weights,                # the spectrum scaling per spin system.
+        int n_dimension,                # the number of dimensions.
+        MRS_dimension *dimensions,      # the dimensions within method.
+        MRS_fftw_scheme *fftw_scheme,   # the fftw scheme
+        MRS_averaging_scheme *scheme,   # the powder averaging scheme
+        MRS_workspace *workspace,       # the workspace buffers
         bool_t interpolation,
         bool_t *freq_contrib,
         double *affine_matrix,
+        ) nogil
+
+    void __mrsimulator_anisotropy(
+        double *anisotropy,             # the bound per spin system and event.
+        unsigned int n_spin_systems,
+        site_struct *sites,
+        coupling_struct *couplings,
+        float *transition_pathways,     # Pointer to the packed transition pathways.
+        unsigned int *pathway_offset,   # the pathway offset per spin system.
+        unsigned int *pathway_count,    # the number of pathways per spin system.
+        unsigned int n_events,          # the total number of events.
+        double *magnetic_flux_density_in_T,
+        bool_t allow_fourth_rank,
+        bool_t *freq_contrib,
         )
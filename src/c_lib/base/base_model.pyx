@@ -1,14 +1,638 @@
 cimport base_model as clib
 from libcpp cimport bool as bool_t
 from numpy cimport ndarray
+from libc.stdlib cimport malloc, free
 import numpy as np
 import cython
+import os
 
 __author__ = "Deepansh J. Srivastava"
 __email__ = "srivastava.89@osu.edu"
 
 clib.generate_table()
 
+
+def set_averaging_scheme_cache_limit(size_t max_nbytes):
+    """Set the memory limit, in bytes, of the process-wide averaging scheme cache.
+
+    The least recently used schemes, which are not in use by a running simulation, are
+    evicted until the cache fits within the limit. The default limit is 256 MB.
+    """
+    clib.MRS_set_averaging_scheme_cache_limit(max_nbytes)
+
+
+def set_averaging_scheme_cache_directory(directory):
+    """Set the directory of the on-disk tier of the averaging scheme cache.
+
+    When set, the schemes missing from memory are loaded from the directory, and newly
+    created schemes are written to it. The directory is exported as the
+    ``MRSIMULATOR_SCHEME_CACHE_DIR`` environment variable, which is read at import, so
+    that the worker processes share the same on-disk tier. Use None to disable.
+    """
+    if directory is None:
+        os.environ.pop("MRSIMULATOR_SCHEME_CACHE_DIR", None)
+        clib.MRS_set_averaging_scheme_cache_directory(NULL)
+        return
+
+    directory = os.path.abspath(os.fspath(directory))
+    os.makedirs(directory, exist_ok=True)
+    os.environ["MRSIMULATOR_SCHEME_CACHE_DIR"] = directory
+    encoded = directory.encode()
+    clib.MRS_set_averaging_scheme_cache_directory(encoded)
+
+
+def clear_averaging_scheme_cache():
+    """Evict every averaging scheme, not in use, from the in-memory cache."""
+    clib.MRS_clear_averaging_scheme_cache()
+
+
+def averaging_scheme_cache_info():
+    """Return the counters of the process-wide averaging scheme cache as a dict."""
+    cdef clib.MRS_averaging_scheme_cache_info info
+    info = clib.MRS_get_averaging_scheme_cache_info()
+    return {
+        "entries": info.entries,
+        "nbytes": info.nbytes,
+        "max_nbytes": info.max_nbytes,
+        "hits": info.hits,
+        "disk_hits": info.disk_hits,
+        "misses": info.misses,
+        "evictions": info.evictions,
+    }
+
+
+def openmp_enabled():
+    """Return True if mrsimulator is compiled with OpenMP."""
+    return clib.MRS_openmp_enabled()
+
+
+if os.environ.get("MRSIMULATOR_SCHEME_CACHE_DIR", ""):
+    set_averaging_scheme_cache_directory(os.environ["MRSIMULATOR_SCHEME_CACHE_DIR"])
+
+
+# The fftw wisdom store. The fftw library accumulates one wisdom per precision, so the
+# store holds one file per precision, named by the prefix, `fftw` for the double and
+# `fftwf` for the single precision plans from the measure or patient planner.
+_fftw_wisdom = {"directory": None, "loaded": set(), "planned": set()}
+
+
+def _fftw_wisdom_filename(directory, prefix):
+    return os.path.join(directory, f"{prefix}.wisdom")
+
+
+cdef int _fftw_import_wisdom(prefix, path):
+    if prefix == "fftwf":
+        return clib.fftwf_import_wisdom_from_filename(path.encode())
+    return clib.fftw_import_wisdom_from_filename(path.encode())
+
+
+def set_fftw_wisdom_directory(directory):
+    """Set the directory of the fftw wisdom store.
+
+    The directory holds one wisdom file per precision, ``fftw.wisdom`` and
+    ``fftwf.wisdom``. The wisdom of a precision is loaded before planning a transform
+    with the ``measure`` or ``patient`` planner, and written to the directory with the
+    :func:`save_fftw_wisdom` function.
+    The directory is exported as the ``MRSIMULATOR_FFTW_WISDOM_DIR`` environment
+    variable, which is read at import. Use None to disable.
+    """
+    if directory is None:
+        os.environ.pop("MRSIMULATOR_FFTW_WISDOM_DIR", None)
+        _fftw_wisdom["directory"] = None
+        return
+
+    directory = os.path.abspath(os.fspath(directory))
+    os.makedirs(directory, exist_ok=True)
+    os.environ["MRSIMULATOR_FFTW_WISDOM_DIR"] = directory
+    _fftw_wisdom["directory"] = directory
+
+
+def load_fftw_wisdom(directory=None):
+    """Import the fftw wisdom files from the directory of the wisdom store.
+
+    :ivar directory:
+        The directory with the wisdom files. The default is the directory of the
+        wisdom store.
+    :return: The number of imported wisdom files.
+    """
+    directory = _fftw_wisdom["directory"] if directory is None else directory
+    if directory is None or not os.path.isdir(directory):
+        return 0
+
+    n_files = 0
+    for prefix in ["fftw", "fftwf"]:
+        path = _fftw_wisdom_filename(directory, prefix)
+        if os.path.isfile(path) and _fftw_import_wisdom(prefix, path):
+            _fftw_wisdom["loaded"].add(prefix)
+            n_files += 1
+    return n_files
+
+
+def save_fftw_wisdom(directory=None):
+    """Export the fftw wisdom, accumulated in this session, to the wisdom store.
+
+    One file is written for every precision planned with the ``measure`` or
+    ``patient`` planner, which holds the wisdom of all the transforms of the precision,
+    including the wisdom loaded from the store.
+
+    :ivar directory:
+        The directory of the wisdom files. The default is the directory of the wisdom
+        store.
+    :return: A list of the written filenames.
+    """
+    directory = _fftw_wisdom["directory"] if directory is None else directory
+    if directory is None:
+        raise ValueError("The fftw wisdom directory is not set.")
+    os.makedirs(directory, exist_ok=True)
+
+    filenames = []
+    for prefix in sorted(_fftw_wisdom["planned"]):
+        path = _fftw_wisdom_filename(directory, prefix)
+        if prefix == "fftwf":
+            exported = clib.fftwf_export_wisdom_to_filename(path.encode())
+        else:
+            exported = clib.fftw_export_wisdom_to_filename(path.encode())
+        if exported:
+            filenames.append(path)
+    return filenames
+
+
+def forget_fftw_wisdom():
+    """Forget the accumulated fftw wisdom of this session."""
+    clib.fftw_forget_wisdom()
+    clib.fftwf_forget_wisdom()
+    _fftw_wisdom["loaded"].clear()
+    _fftw_wisdom["planned"].clear()
+
+
+cdef _import_fftw_wisdom(prefix):
+    """Import the wisdom of a precision from the wisdom store, if not yet loaded."""
+    directory = _fftw_wisdom["directory"]
+    if directory is None or prefix in _fftw_wisdom["loaded"]:
+        return
+    path = _fftw_wisdom_filename(directory, prefix)
+    if os.path.isfile(path) and _fftw_import_wisdom(prefix, path):
+        _fftw_wisdom["loaded"].add(prefix)
+
+
+def fftw_threads_enabled():
+    """Return True if mrsimulator is compiled with the threaded fftw."""
+    return clib.MRS_fftw_threads_enabled()
+
+
+def set_fftw_threads(unsigned int n_threads, unsigned int min_size=4194304):
+    """Opt-in to the threaded fftw for large sideband transforms.
+
+    The sideband transform of a simulation is threaded when the product of the total
+    number of orientations and the number of sidebands is at least ``min_size``. The
+    number of threads is further limited to the cores available to a simulation, that
+    is, the number of cores divided by the number of parallel jobs. The setting applies
+    to the simulation plans updated afterwards, and is ignored unless mrsimulator is
+    compiled with the threaded fftw.
+
+    :ivar n_threads:
+        The maximum number of fftw threads. Use 1 to disable.
+    :ivar min_size:
+        The minimum size of a threaded transform. The default is 4194304.
+    """
+    clib.MRS_set_fftw_threads(n_threads, min_size)
+
+
+_trig_methods = ["table", "polynomial"]
+
+
+def set_trig_method(method):
+    """Select the evaluation of the sines and cosines of the simulation.
+
+    With ``table``, the sines and cosines are linearly interpolated from a lookup table
+    with a step of 1e-4 rad, at an error of about 1e-9. With ``polynomial``, they are
+    evaluated from range-reduced polynomials, at an error of about 1e-16 per radian of
+    the argument, in loops that vectorize. The default is ``table``, unless mrsimulator
+    is compiled with ``use_polynomial_trig = True`` in the `settings.py` file.
+
+    :ivar method:
+        The literal ``table`` or ``polynomial``.
+    """
+    if method not in _trig_methods:
+        raise ValueError(
+            f"{method} is an invalid trig method. The allowed values are "
+            f"{', '.join(_trig_methods)}."
+        )
+    clib.MRS_set_trig_method(_trig_methods.index(method))
+
+
+def get_trig_method():
+    """Return the evaluation of the sines and cosines, ``table`` or ``polynomial``."""
+    return _trig_methods[clib.MRS_get_trig_method()]
+
+
+if os.environ.get("MRSIMULATOR_FFTW_WISDOM_DIR", ""):
+    set_fftw_wisdom_directory(os.environ["MRSIMULATOR_FFTW_WISDOM_DIR"])
+    load_fftw_wisdom()
+
+
+cdef class SimulationPlan:
+    """A compiled simulation plan of a method.
+
+    The plan owns the averaging scheme, the fftw scheme, the workspace, the spectral
+    dimensions, and the event plans as C structures, which persist across simulations.
+    On update, only the structures invalidated by the changed method or config
+    attributes are rebuilt. The coordinates, fractions, and magnetic flux densities are
+    updated in place, and a change in the rotor angle only updates the affected event
+    plans.
+
+    :ivar rebuilds:
+        A dict with the number of times the averaging scheme, the fftw scheme, and the
+        dimensions were (re-)created, and the number of event plans updated in place
+        from a change in the rotor angle.
+    :ivar sideband_counts:
+        A dict with the number of sideband orders, or pairs of orders in two-dimensional
+        methods, that were interpolated, and that were skipped for falling outside the
+        spectral window, over all simulations with the plan.
+    :ivar pathway_counts:
+        A dict with the number of transition pathways that were simulated, and that
+        were merged into a simulated pathway with identical frequency components, over
+        all simulations with the plan.
+    :ivar culling:
+        A dict with the number of interpolation triangles skipped for an amplitude
+        below the ``amplitude_cutoff``, and the sums of the skipped and of all triangle
+        amplitudes, over all simulations with the plan. The ratio of the sums is the
+        fraction of the intensity discarded by the cutoff.
+    :ivar refinement:
+        A dict with the number of interpolation triangles subdivided by the adaptive
+        refinement, and the number of orientations evaluated at the midpoints of their
+        edges, over all simulations with the plan.
+    :ivar meridian:
+        The SimulationPlan of the spin systems whose frequencies only depend on the
+        polar angle β, see :func:`is_axially_symmetric`, which are averaged over the
+        meridian. The plan is created by :func:`one_d_spectrum` on the first simulation
+        with such spin systems, otherwise, None.
+    :ivar analytic:
+        The SimulationPlan of the spin systems whose tensors share a principal axis
+        system, see :func:`is_coaxial`, whose static spectra are integrated
+        analytically along β. The plan is created by :func:`one_d_spectrum` on the
+        first analytic simulation with such spin systems, otherwise, None.
+    """
+    cdef clib.MRS_averaging_scheme *averaging_scheme
+    cdef clib.MRS_fftw_scheme *fftw_scheme
+    cdef clib.MRS_workspace *workspace
+    cdef clib.MRS_dimension *dimensions
+    cdef readonly int n_dimension
+    cdef readonly unsigned int number_of_sidebands
+    cdef readonly unsigned int fftw_threads
+    cdef readonly unsigned int total_n_points
+    cdef readonly double norm
+    cdef readonly dict rebuilds
+    cdef ndarray freq_contrib
+    cdef ndarray affine_matrix
+    cdef object _scheme_key
+    cdef object _fftw_key
+    cdef object _dimension_key
+    cdef object _rotor_angles
+    cdef dict _sideband_counts
+    cdef dict _pathway_counts
+    cdef dict _culling
+    cdef dict _refinement
+    cdef public SimulationPlan meridian
+    cdef public SimulationPlan analytic
+
+    def __cinit__(self):
+        self.averaging_scheme = NULL
+        self.fftw_scheme = NULL
+        self.workspace = NULL
+        self.dimensions = NULL
+        self.n_dimension = 0
+
+    def __init__(self, method=None, **kwargs):
+        self.rebuilds = {
+            "averaging_scheme": 0, "fftw_scheme": 0, "dimensions": 0, "rotor_angle": 0
+        }
+        self._sideband_counts = {"interpolated": 0, "skipped": 0}
+        self._pathway_counts = {"simulated": 0, "merged": 0}
+        self._culling = {"triangles": 0, "discarded": 0.0, "total": 0.0}
+        self._refinement = {"triangles": 0, "orientations": 0}
+        if method is not None:
+            self.update(method, **kwargs)
+
+    def __dealloc__(self):
+        self._free_dimensions()
+        if self.fftw_scheme != NULL:
+            clib.MRS_free_fftw_scheme(self.fftw_scheme)
+        clib.MRS_free_workspace(self.workspace)
+        clib.MRS_release_averaging_scheme(self.averaging_scheme)
+
+    @property
+    def sideband_counts(self):
+        counts = dict(self._sideband_counts)
+        if self.workspace != NULL:
+            counts["interpolated"] += self.workspace.sidebands_interpolated
+            counts["skipped"] += self.workspace.sidebands_skipped
+        return counts
+
+    @property
+    def pathway_counts(self):
+        counts = dict(self._pathway_counts)
+        if self.workspace != NULL:
+            counts["simulated"] += self.workspace.pathways_simulated
+            counts["merged"] += self.workspace.pathways_merged
+        return counts
+
+    @property
+    def culling(self):
+        culling = dict(self._culling)
+        if self.workspace != NULL:
+            culling["triangles"] += self.workspace.culling.triangles
+            culling["discarded"] += self.workspace.culling.discarded
+            culling["total"] += self.workspace.culling.total
+        return culling
+
+    @property
+    def refinement(self):
+        refinement = dict(self._refinement)
+        if self.workspace != NULL:
+            refinement["triangles"] += self.workspace.refinement.triangles
+            refinement["orientations"] += self.workspace.refinement.orientations
+        return refinement
+
+    cdef _free_workspace(self):
+        if self.workspace != NULL:
+            self._sideband_counts = self.sideband_counts
+            self._pathway_counts = self.pathway_counts
+            self._culling = self.culling
+            self._refinement = self.refinement
+        clib.MRS_free_workspace(self.workspace)
+        self.workspace = NULL
+
+    cdef _free_dimensions(self):
+        if self.dimensions != NULL:
+            clib.MRS_free_dimension(self.dimensions, self.n_dimension)
+        self.dimensions = NULL
+        self._dimension_key = None
+
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    def update(self, method,
+            unsigned int number_of_sidebands=90,
+            unsigned int integration_density=72,
+            unsigned int integration_volume=1,
+            unsigned int fftw_planner=0,
+            unsigned int fftw_threads=1,
+            double amplitude_cutoff=0.0,
+            unsigned int precision=0,
+            bool_t fourth_rank=True,
+            quadrature=None,
+            unsigned int refinement_depth=0,
+            unsigned int rasterization=0):
+        """Update the plan for the given method and simulation config attributes.
+
+        Parameters
+        ----------
+
+        method: Method.
+            The method of the simulation.
+
+        number_of_sidebands: int (optional).
+            The number of sidebands. The default value is 90.
+
+        integration_density: int (optional).
+            The integration density of the octahedral mesh, the meridian, or the nodes
+            of α of the analytic scheme. The default value is 72.
+
+        integration_volume: int (optional).
+            0 for the octant, 1 for the hemisphere, 3 for the meridian of the spin
+            systems whose frequencies only depend on β, and 4 for the analytic scheme
+            of the static one-dimensional spectra. The default value is 1.
+
+        fftw_planner: int (optional).
+            The planner effort of the fftw transform over the sidebands, 0 for
+            estimate, 1 for measure, and 2 for patient. The default value is 0.
+
+        fftw_threads: int (optional).
+            The number of cores available to the simulation, which limits the threads
+            of a threaded fftw plan, see :func:`set_fftw_threads`. The default value
+            is 1.
+
+        amplitude_cutoff: float (optional).
+            The interpolation triangles with an amplitude below this fraction of the
+            largest triangle amplitude are skipped. The default value is 0.
+
+        precision: int (optional).
+            When 1, the sideband amplitudes are evaluated in single precision. The
+            default value is 0.
+
+        fourth_rank: bool (optional).
+            When False, or when no event selects the ``Quad2_4`` contribution of a
+            quadrupolar channel, the fourth-rank tensors are skipped. The default value
+            is True.
+
+        quadrature: tuple (optional).
+            The alpha, beta, and weight arrays of the orientations, whose frequencies
+            are binned, in place of the octahedral mesh. The default value is None.
+
+        refinement_depth: int (optional).
+            The maximum number of subdivisions of the triangles of the spectra without
+            sidebands, which spread over more than a bin. The default value is 0.
+
+        rasterization: int (optional).
+            When 1, the triangles of the two-dimensional spectra are rasterized by
+            area instead of the tent strips. The default value is 0.
+        """
+        cdef int i, j, k, n_updates
+        cdef ndarray[double] alpha, beta, weight
+        cdef int n_dimension = len(method.spectral_dimensions)
+        cdef ndarray[int] n_event
+        cdef ndarray[double] magnetic_flux_density_in_T, frac
+        cdef ndarray[double] srfiH
+        cdef ndarray[double] rair
+        cdef ndarray[int] cnt
+        cdef ndarray[double] coord_off
+        cdef ndarray[double] incre
+
+        # gyromagnetic ratio
+        gyromagnetic_ratio = method.channels[0].gyromagnetic_ratio
+        cdef double factor = 1.0
+        if gyromagnetic_ratio > 0.0:
+            factor = -1.0
+
+        cdef bool_t allow_fourth_rank = fourth_rank and _allow_fourth_rank(method)
+
+        total_n_points = 1
+        freq_contrib = np.asarray([])
+
+        fr = []
+        Bo = []
+        vr = []
+        th = []
+        event_i = []
+        count = []
+        increment = []
+        coordinates_offset = []
+
+        prev_n_sidebands = 0
+        for i, dim in enumerate(method.spectral_dimensions):
+            for event in dim.events:
+                freq_contrib = np.append(freq_contrib, event._freq_contrib_flags())
+                if event.rotor_frequency < 1.0e-3:
+                    sample_rotation_frequency_in_Hz = 1.0e9
+                    rotor_angle_in_rad = 0.0
+                    number_of_sidebands = 1
+                    if prev_n_sidebands == 0: prev_n_sidebands = 1
+                else:
+                    sample_rotation_frequency_in_Hz = event.rotor_frequency
+                    rotor_angle_in_rad = event.rotor_angle
+                    if prev_n_sidebands == 0: prev_n_sidebands = number_of_sidebands
+
+                if prev_n_sidebands != number_of_sidebands:
+                    raise ValueError(
+                        'The library does not support spectral dimensions '
+                        'containing both zero and non-zero rotor frequencies. '
+                        'Consider using a smaller value instead of zero.'
+                    )
+
+                fr.append(event.fraction) # fraction
+                Bo.append(event.magnetic_flux_density)  # in T
+                vr.append(sample_rotation_frequency_in_Hz) # in Hz
+                th.append(rotor_angle_in_rad) # in rad
+
+            total_n_points *= dim.count
+
+            count.append(dim.count)
+            offset = dim.spectral_width / 2.0
+            coordinates_offset.append(-dim.reference_offset * factor - offset)
+            increment.append(dim.spectral_width / dim.count)
+            event_i.append(len(dim.events))
+
+            dim.origin_offset = np.abs(Bo[0] * gyromagnetic_ratio * 1e6)
+
+        frac = np.asarray(fr, dtype=np.float64)
+        magnetic_flux_density_in_T = np.asarray(Bo, dtype=np.float64)
+        srfiH = np.asarray(vr, dtype=np.float64)
+        rair = np.asarray(th, dtype=np.float64)
+        cnt = np.asarray(count, dtype=np.int32)
+        incre = np.asarray(increment, dtype=np.float64)
+        coord_off = np.asarray(coordinates_offset, dtype=np.float64)
+        n_event = np.asarray(event_i, dtype=np.int32)
+
+    # averaging scheme from the process-wide cache ______________________________
+        scheme_key = (integration_density, allow_fourth_rank, integration_volume)
+        if quadrature is not None:
+            alpha, beta, weight = [
+                np.ascontiguousarray(item, dtype=np.float64) for item in quadrature
+            ]
+            scheme_key = (
+                alpha.tobytes(), beta.tobytes(), weight.tobytes(), allow_fourth_rank
+            )
+        if scheme_key != self._scheme_key:
+            self._free_dimensions()
+            clib.MRS_release_averaging_scheme(self.averaging_scheme)
+            if quadrature is not None:
+                # The schemes of the quadratures are not cached.
+                self.averaging_scheme = (
+                    clib.MRS_create_averaging_scheme_from_alpha_beta(
+                        &alpha[0], &beta[0], &weight[0], alpha.size, allow_fourth_rank
+                    )
+                )
+            else:
+                self.averaging_scheme = clib.MRS_get_averaging_scheme(
+                    integration_density=integration_density,
+                    allow_fourth_rank=allow_fourth_rank,
+                    integration_volume=integration_volume
+                )
+            self._free_workspace()
+            self.workspace = clib.MRS_create_workspace(self.averaging_scheme)
+            self._scheme_key = scheme_key
+            self.rebuilds["averaging_scheme"] += 1
+        self.workspace.culling.cutoff = amplitude_cutoff
+        self.workspace.refinement.depth = refinement_depth
+        self.workspace.rasterization = rasterization
+
+    # fftw scheme ________________________________________________________________
+        wisdom_prefix = "fftwf" if precision == 1 else "fftw"
+        fftw_threads = clib.MRS_get_fftw_threads(
+            self.averaging_scheme.total_orientations * number_of_sidebands, fftw_threads
+        )
+        fftw_key = (
+            scheme_key, number_of_sidebands, fftw_planner, fftw_threads, precision
+        )
+        if fftw_key != self._fftw_key:
+            if self.fftw_scheme != NULL:
+                clib.MRS_free_fftw_scheme(self.fftw_scheme)
+            if fftw_planner != 0:
+                _import_fftw_wisdom(wisdom_prefix)
+            if precision == 1:
+                self.fftw_scheme = clib.create_fftwf_scheme(
+                    self.averaging_scheme.total_orientations, number_of_sidebands,
+                    fftw_planner
+                )
+            else:
+                self.fftw_scheme = clib.create_fftw_scheme(
+                    self.averaging_scheme.total_orientations, number_of_sidebands,
+                    fftw_planner, fftw_threads
+                )
+            self.fftw_threads = self.fftw_scheme.n_threads
+            if fftw_planner != 0:
+                _fftw_wisdom["planned"].add(wisdom_prefix)
+            self._fftw_key = fftw_key
+            self.rebuilds["fftw_scheme"] += 1
+
+    # spectral dimensions ________________________________________________________
+        dimension_key = (scheme_key, number_of_sidebands, tuple(event_i), tuple(vr))
+        if dimension_key != self._dimension_key:
+            self._free_dimensions()
+        else:
+            j = 0
+            for i in range(n_dimension):
+                clib.MRS_update_dimension_coordinates(
+                    &self.dimensions[i], cnt[i], coord_off[i], incre[i]
+                )
+                for k in range(n_event[i]):
+                    self.dimensions[i].events[k].fraction = frac[j + k]
+                    self.dimensions[i].events[k].magnetic_flux_density_in_T = (
+                        magnetic_flux_density_in_T[j + k]
+                    )
+                if th[j: j + n_event[i]] != self._rotor_angles[j: j + n_event[i]]:
+                    n_updates = clib.MRS_update_dimension_rotor_angles(
+                        &self.dimensions[i], &rair[j]
+                    )
+                    if n_updates < 0:
+                        self._free_dimensions()
+                        break
+                    self.rebuilds["rotor_angle"] += n_updates
+                j += n_event[i]
+
+        if self.dimensions == NULL:
+            self.dimensions = clib.MRS_create_dimensions(self.averaging_scheme, &cnt[0],
+                &coord_off[0], &incre[0], &frac[0], &magnetic_flux_density_in_T[0],
+                &srfiH[0], &rair[0], &n_event[0], n_dimension, number_of_sidebands)
+            self.n_dimension = n_dimension
+            self._dimension_key = dimension_key
+            self.rebuilds["dimensions"] += 1
+        self._rotor_angles = th
+
+        self.number_of_sidebands = number_of_sidebands
+        self.total_n_points = total_n_points
+
+    # normalization factor for the spectrum
+        self.norm = np.prod(incre)
+
+    # frequency contrib
+        self.freq_contrib = np.asarray(freq_contrib, dtype=bool)
+
+    # affine transformation
+        if method.affine_matrix is None:
+            self.affine_matrix = np.asarray([1, 0, 0, 1], dtype=np.float64)
+        else:
+            increment_fraction = [incre/item for item in incre]
+            matrix = (
+                method.affine_matrix.ravel() * np.asarray(increment_fraction).ravel()
+            )
+            affine_matrix_c = np.asarray(matrix, dtype=np.float64)
+            if affine_matrix_c[2] != 0:
+                affine_matrix_c[2] /= affine_matrix_c[0]
+                affine_matrix_c[3] -=  affine_matrix_c[1]*affine_matrix_c[2]
+            self.affine_matrix = affine_matrix_c
+
+
 @cython.profile(False)
 @cython.boundscheck(False)
 @cython.wraparound(False)
@@ -19,7 +643,19 @@ def one_d_spectrum(method,
        unsigned int integration_density=72,
        unsigned int decompose_spectrum=0,
        unsigned int integration_volume=1,
-       bool_t interpolation=True):
+       bool_t interpolation=True,
+       unsigned int n_threads=1,
+       unsigned int fftw_planner=0,
+       unsigned int fftw_threads=1,
+       double integration_tolerance=0.002,
+       double amplitude_cutoff=0.0,
+       unsigned int precision=0,
+       quadrature=None,
+       bool_t beta_averaging=False,
+       bool_t analytic_static=False,
+       unsigned int refinement_depth=0,
+       unsigned int rasterization=0,
+       plan=None):
     """
 
     :ivar verbose:
@@ -39,473 +675,871 @@ def one_d_spectrum(method,
         spherical average. Presently we only use octahedral as the frequency1
         polyhedra. As the frequency of the geodesic polyhedron increases, the
         polyhedra approach a sphere geometry. A higher frequency will result in a
-        better powder averaging. The default value is 72.
-        Read more on the `Geodesic polyhedron <https://en.wikipedia.org/wiki/Geodesic_polyhedron>`_.
+        better powder averaging. The default value is 72. Read more on the
+        `Geodesic polyhedron <https://en.wikipedia.org/wiki/Geodesic_polyhedron>`_.
     :ivar decompose_spectrum:
         An unsigned integer. When value is 0, the spectum is a sum of spectrum from all
         spin systems. If value is 1, spectrum from individual spin systems is stored
         separately.
+    :ivar n_threads:
+        The number of OpenMP threads over the sidebands and octants within the
+        simulation of a spin system. The value is ignored unless mrsimulator is compiled
+        with OpenMP. The default value is 1.
+    :ivar fftw_planner:
+        The fftw planner effort for the sideband transform, where 0, 1, and 2 are the
+        estimate, measure, and patient planners, respectively. The default value is 0.
+    :ivar fftw_threads:
+        The number of cores available to a threaded fftw sideband transform. The value
+        is ignored unless the threaded fftw is enabled with :func:`set_fftw_threads`.
+        The default value is 1.
+    :ivar number_of_sidebands:
+        When the value is 0, the number of sidebands is estimated per spin system with
+        the :func:`estimate_number_of_sidebands` function.
+    :ivar integration_density:
+        When the value is 0, the integration density is estimated per spin system with
+        the :func:`estimate_integration_density` function.
+    :ivar integration_tolerance:
+        The relative tolerance of the estimated integration density. The default value
+        is 0.002.
+    :ivar amplitude_cutoff:
+        The interpolation triangles with an amplitude below the cutoff, relative to the
+        largest triangle amplitude, are skipped. The default value is 0, `i.e.`, every
+        triangle is interpolated.
+    :ivar precision:
+        When the value is 1, the sideband amplitudes are evaluated in single precision,
+        and the spectrum is returned as a float32 array. The default value is 0, `i.e.`,
+        double precision.
+    :ivar quadrature:
+        A tuple of the alpha, beta, and weight arrays of the orientations. When given,
+        the frequencies of the orientations are binned, and the integration density and
+        volume are not used. The default is None, `i.e.`, the octahedral mesh.
+    :ivar beta_averaging:
+        If true, the spin systems whose frequencies only depend on the polar angle β,
+        see :func:`is_axially_symmetric`, are averaged over the orientations along a
+        meridian, at 4 x ``integration_density`` orientations instead of the
+        ``integration_density`` squared orientations of the octahedral mesh. The value
+        is ignored when ``quadrature`` is given. The default is False.
+    :ivar analytic_static:
+        If true, and the method is a static one-dimensional method, the spin systems
+        whose tensors share a principal axis system, see :func:`is_coaxial`, are
+        integrated analytically along β, which gives the bin-integrated intensities of
+        the first-order shielding and the second-order quadrupolar powder patterns. The
+        value takes precedence over ``beta_averaging``, and is ignored when
+        ``quadrature`` is given. The default is False.
+    :ivar refinement_depth:
+        The maximum number of times the triangles of the octahedral mesh, whose
+        frequencies spread over more than a bin, are subdivided into four triangles at
+        the midpoints of their edges. Only the spectra without spinning sidebands, over
+        the octant or the hemisphere, are refined. The default value is 0, `i.e.`, no
+        refinement.
+    :ivar rasterization:
+        When the value is 1, the triangles of the octahedral mesh of the
+        two-dimensional spectra are rasterized by the area of their overlap with every
+        bin. The amplitude of a triangle is uniform over the triangle in the frequency
+        plane. The default value is 0, `i.e.`, the triangles are interpolated as the
+        tent strips along every row.
+    :ivar plan:
+        A SimulationPlan object. When given, the plan is updated for the method and
+        re-used, otherwise, a temporary plan is created for the simulation. When the
+        number of sidebands or the integration density is estimated, a dict of
+        SimulationPlan objects keyed by the (number of sidebands, integration density),
+        which is populated with the plans of every spin system group. The spin systems
+        averaged over the meridian, and integrated analytically, are simulated with the
+        ``meridian`` and ``analytic`` plans of the plans, respectively.
     """
 
 # observed spin _______________________________________________________
-    channel = method.channels[0].symbol
-    # spin quantum number of the observed spin
-    cdef double spin_quantum_number = method.channels[0].spin
-
     # gyromagnetic ratio
-    cdef gyromagnetic_ratio = method.channels[0].gyromagnetic_ratio
-    cdef double factor = 1.0
-    if gyromagnetic_ratio > 0.0:
-        factor = -1.0
-
-    # if verbose in [1, 11]:
-    #     print(f'Simulating {isotope} (I={spin_quantum_number})')
-    #     print(f'Larmor frequency (ω0 = - γ B0) = {larmor_frequency/1.0e6} MHz')
-    #     print((f'Recording {isotope} spectrum with {number_of_points} '
-    #             f'points over {spectral_width} Hz bandwidth'))
-    #     print((f"and a reference offset of {dimension['reference_offset']} Hz."))
-
-    # transitions of the observed spin
-    cdef int transition_increment
-    cdef ndarray[float, ndim=1] transition_pathway_c
-    cdef int number_of_transitions
-    # transition_pathway_c = np.asarray([-0.5, 0.5]).ravel()
-    # number_of_transitions = int(transition_pathway_c.size/2)
-    # else:
-    #     energy_level_count = int(2*spin_quantum_number+1)
-    #     number_of_transitions = energy_level_count-1
-    #     energy_states = np.arange(energy_level_count) - spin_quantum_number
-    #     transitions = [ [energy_states[i], energy_states[i+1]] for i in range(number_of_transitions)]
-    #     transition_pathway_c = np.asarray(transitions).ravel()
-
-    cdef bool_t allow_fourth_rank = 0
-    if spin_quantum_number > 0.5:
-        allow_fourth_rank = 1
-
-# create averaging scheme _____________________________________________________
-    cdef clib.MRS_averaging_scheme *the_averaging_scheme
-    the_averaging_scheme = clib.MRS_create_averaging_scheme(
-        integration_density=integration_density, allow_fourth_rank=allow_fourth_rank,
-        integration_volume=integration_volume
-    )
-
-# create spectral dimensions _______________________________________________
-    cdef int n_dimension = len(method.spectral_dimensions)
-    # if n_sequence > 1:
-    #     number_of_sidebands = 1
-
-    max_n_sidebands = number_of_sidebands
-
-    total_n_points = 1
-    cdef ndarray[int] n_event
-    cdef ndarray[double] magnetic_flux_density_in_T, frac
-    cdef ndarray[double] srfiH
-    cdef ndarray[double] rair
-    cdef ndarray[int] cnt
-    cdef ndarray[double] coord_off
-    cdef ndarray[double] incre
-    freq_contrib = np.asarray([])
-
-    fr = []
-    Bo = []
-    vr = []
-    th = []
-    event_i = []
-    count = []
-    increment = []
-    coordinates_offset = []
-
-    prev_n_sidebands = 0
-    for i, dim in enumerate(method.spectral_dimensions):
-        for event in dim.events:
-            freq_contrib = np.append(freq_contrib, event._freq_contrib_flags())
-            if event.rotor_frequency < 1.0e-3:
-                sample_rotation_frequency_in_Hz = 1.0e9
-                rotor_angle_in_rad = 0.0
-                number_of_sidebands = 1
-                if prev_n_sidebands == 0: prev_n_sidebands = 1
-            else:
-                sample_rotation_frequency_in_Hz = event.rotor_frequency
-                rotor_angle_in_rad = event.rotor_angle
-                if prev_n_sidebands == 0: prev_n_sidebands = number_of_sidebands
-
-            if prev_n_sidebands != number_of_sidebands:
-                raise ValueError(
-                    (
-                        'The library does not support spectral dimensions containing '
-                        'both zero and non-zero rotor frequencies. Consider using a '
-                        'smaller value instead of zero.'
-                    )
+    gyromagnetic_ratio = method.channels[0].gyromagnetic_ratio
+
+# spin systems packed as arrays _______________________________________________
+    packed = pack_spin_systems(method, spin_systems, verbose=verbose)
+    plan_kwargs = {
+        "integration_volume": integration_volume,
+        "fftw_planner": fftw_planner,
+        "fftw_threads": fftw_threads,
+        "amplitude_cutoff": amplitude_cutoff,
+        "precision": precision,
+        "fourth_rank": _allow_fourth_rank(method, packed),
+        "quadrature": quadrature,
+        "refinement_depth": refinement_depth,
+        "rasterization": rasterization,
+    }
+
+    # the integration volume per spin system, where the spin systems averaged over the
+    # meridian, or integrated analytically, are at the common principal axis system.
+    n_spin_systems = packed["abundance"].size
+    volumes = np.full(n_spin_systems, integration_volume)
+    if quadrature is None:
+        if beta_averaging:
+            volumes[is_axially_symmetric(packed)] = 3
+        if analytic_static and _is_static_one_d(method):
+            volumes[is_coaxial(packed)] = 4
+        _remove_common_orientation(packed, volumes != integration_volume)
+    uniform = np.all(volumes == integration_volume)
+
+    if number_of_sidebands != 0 and integration_density != 0 and uniform:
+        if plan is None:
+            plan = SimulationPlan()
+        plan.update(
+            method, number_of_sidebands=number_of_sidebands,
+            integration_density=integration_density, **plan_kwargs
+        )
+        amp = batch_spectrum(packed, plan, interpolation, decompose_spectrum, n_threads)
+        index = packed["index"]
+    else:
+        # The spin systems are grouped by the estimated number of sidebands and
+        # integration density, and every group is simulated with a plan of its own. The
+        # spin systems of a group, averaged over the meridian, or integrated
+        # analytically, are simulated with the meridian or analytic plan of the group.
+        plans = plan if isinstance(plan, dict) else {}
+        if isinstance(plan, SimulationPlan):
+            plans[(number_of_sidebands, integration_density)] = plan
+        n_sidebands = np.full(n_spin_systems, number_of_sidebands)
+        if number_of_sidebands == 0:
+            n_sidebands = estimate_number_of_sidebands(method, packed)
+        densities = np.full(n_spin_systems, integration_density)
+        if integration_density == 0:
+            for volume in np.unique(volumes).tolist():
+                selection = np.where(volumes == volume)[0]
+                densities[selection] = estimate_integration_density(
+                    method, take_spin_systems(packed, selection), integration_tolerance,
+                    n_sidebands[selection], volume
                 )
+        amp = np.zeros((0 if decompose_spectrum == 1 else 1, np.prod(method.shape())))
+        index = []
+        groups = sorted(set(zip(n_sidebands.tolist(), densities.tolist())))
+        for count, density in groups:
+            group_plan = plans.setdefault((count, density), SimulationPlan())
+            for volume in np.unique(volumes).tolist():
+                group = (n_sidebands == count) & (densities == density)
+                selection = np.where(group & (volumes == volume))[0]
+                if selection.size == 0:
+                    continue
+                sub_plan = _volume_plan(group_plan, volume, integration_volume)
+                plan_kwargs["integration_volume"] = volume
+                sub_plan.update(
+                    method, number_of_sidebands=count, integration_density=density,
+                    **plan_kwargs
+                )
+                group_packed = packed
+                if selection.size != n_spin_systems:
+                    group_packed = take_spin_systems(packed, selection)
+                group_amp = batch_spectrum(
+                    group_packed, sub_plan, interpolation, decompose_spectrum, n_threads
+                )
+                if decompose_spectrum == 1:
+                    amp = np.concatenate((amp, group_amp))
+                else:
+                    amp += group_amp
+                index += packed["index"][selection].tolist()
+
+    if decompose_spectrum == 1:
+        amp_individual = [[] for _ in spin_systems]
+        for i, item in enumerate(index):
+            amp_individual[item] = amp[i].reshape(method.shape())
+    else:
+        amp1 = amp[0]
 
-            fr.append(event.fraction) # fraction
-            Bo.append(event.magnetic_flux_density)  # in T
-            vr.append(sample_rotation_frequency_in_Hz) # in Hz
-            th.append(rotor_angle_in_rad) # in rad
-
-        total_n_points *= dim.count
-
-        count.append(dim.count)
-        offset = dim.spectral_width / 2.0
-        coordinates_offset.append(-dim.reference_offset * factor - offset)
-        increment.append(dim.spectral_width / dim.count)
-        event_i.append(len(dim.events))
-
-        dim.origin_offset = np.abs(Bo[0] * gyromagnetic_ratio * 1e6)
-
-    frac = np.asarray(fr, dtype=np.float64)
-    magnetic_flux_density_in_T = np.asarray(Bo, dtype=np.float64)
-    srfiH = np.asarray(vr, dtype=np.float64)
-    rair = np.asarray(th, dtype=np.float64)
-    cnt = np.asarray(count, dtype=np.int32)
-    incre = np.asarray(increment, dtype=np.float64)
-    coord_off = np.asarray(coordinates_offset, dtype=np.float64)
-    n_event = np.asarray(event_i, dtype=np.int32)
-
-    # create spectral_dimensions
-    dimensions = clib.MRS_create_dimensions(the_averaging_scheme, &cnt[0],
-        &coord_off[0], &incre[0], &frac[0], &magnetic_flux_density_in_T[0],
-        &srfiH[0], &rair[0], &n_event[0], n_dimension, number_of_sidebands)
-
-# normalization factor for the spectrum
-    norm = np.prod(incre)
+    # reverse the spectrum if gyromagnetic ratio is positive.
+    if decompose_spectrum == 1 and len(amp_individual) != 0:
+        if gyromagnetic_ratio < 0:
+            amp1 = [
+                np.fft.fftn(np.fft.ifftn(item).conj()).real for item in amp_individual
+            ]
+        else:
+            amp1 = amp_individual
+    else:
+        if decompose_spectrum == 1:
+            amp1 = np.zeros(np.prod(method.shape()), dtype=np.float64)
+        amp1.shape = method.shape()
+        if gyromagnetic_ratio < 0:
+            amp1 = np.fft.fftn(np.fft.ifftn(amp1).conj()).real
 
-# create fftw scheme __________________________________________________________
-    cdef clib.MRS_fftw_scheme *the_fftw_scheme
-    the_fftw_scheme = clib.create_fftw_scheme(the_averaging_scheme.total_orientations, number_of_sidebands)
+    if precision == 1:
+        if isinstance(amp1, list):
+            return [item.astype(np.float32) for item in amp1]
+        return amp1.astype(np.float32)
+    return amp1
 
-# _____________________________________________________________________________
 
-# frequency contrib
-    cdef ndarray[bool_t] freq_contrib_c = np.asarray(freq_contrib, dtype=bool)
+cdef SimulationPlan _volume_plan(SimulationPlan plan, unsigned int volume,
+                                 unsigned int integration_volume):
+    """Return the plan, or its meridian or analytic plan, for the integration volume."""
+    if volume == integration_volume:
+        return plan
+    if volume == 3:
+        if plan.meridian is None:
+            plan.meridian = SimulationPlan()
+        return plan.meridian
+    if plan.analytic is None:
+        plan.analytic = SimulationPlan()
+    return plan.analytic
+
+
+def pack_spin_systems(method, list spin_systems, int verbose=0):
+    """Pack the spin systems, observed by the method, as contiguous arrays.
+
+    The sites, couplings, and transition pathways from all observed spin systems are
+    concatenated into flat arrays, where the ``site_offset``, ``coupling_offset``,
+    ``pathway_offset``, and ``pathway_count`` arrays locate the entries of a spin
+    system. The ``index`` array holds the index of the observed spin systems within
+    the ``spin_systems`` list.
+
+    :ivar method:
+        The Method object.
+    :ivar spin_systems:
+        A list of SpinSystem objects.
+    :return: A dict of numpy arrays.
+    """
+    channel = method.channels[0].symbol
+    # spin quantum number of the observed spin
+    cdef double spin_quantum_number = method.channels[0].spin
+    cdef int i, i3, number_of_sites, number_of_couplings
+
+    index_, abundance_ = [], []
+    site_offset, coupling_offset = [0], [0]
+    pathway_offset, pathway_count = [], []
+    site_keys = ["spin", "gyromagnetic_ratio", "iso", "zeta", "eta", "Cq", "eta_q"]
+    sites = {key: [] for key in site_keys}
+    sites["ori"], sites["ori_q"] = [], []
+    couplings = {key: [] for key in ["iso_j", "zeta_j", "eta_j", "D", "eta_d"]}
+    couplings["site_index"], couplings["ori_j"], couplings["ori_d"] = [], [], []
+    pathways = []
+    n_pathway_values = 0
+
+    # transition pathways are shared between spin systems with the same isotopes.
+    pathway_cache = {}
 
-# affine transformation
-    cdef ndarray[double] affine_matrix_c
-    if method.affine_matrix is None:
-        affine_matrix_c = np.asarray([1, 0, 0, 1], dtype=np.float64)
-    else:
-        increment_fraction = [incre/item for item in incre]
-        matrix = method.affine_matrix.ravel() * np.asarray(increment_fraction).ravel()
-        affine_matrix_c = np.asarray(matrix, dtype=np.float64)
-        if affine_matrix_c[2] != 0:
-            affine_matrix_c[2] /= affine_matrix_c[0]
-            affine_matrix_c[3] -=  affine_matrix_c[1]*affine_matrix_c[2]
-
-    # B0 = dimension.magnetic_flux_density
-
-    # if verbose in [1, 11]:
-    #     text = "`one_d_spectrum` method simulation parameters."
-    #     len_ = len(text)
-    #     print(text)
-    #     print(f"{'-'*(len_-1)}")
-    #     print (f'Macroscopic magnetic flux density (B0) = {B0} T')
-    #     print (f'Sample rotation angle is (θ) = {rotor_angle_in_rad} rad')
-    #     print (f'Sample rotation frequency (𝜈r) = {sample_rotation_frequency_in_Hz} Hz')
-
-# sites _______________________________________________________________________________
-    p_isotopes = None
-
-    cdef int number_of_sites, number_of_couplings, p_number_of_sites=0
-    cdef ndarray[int] spin_index_ij
-    cdef ndarray[float] spin_i
-    cdef ndarray[double] gyromagnetic_ratio_i
-
-    # CSA
-    cdef ndarray[double] iso_n
-    cdef ndarray[double] zeta_n
-    cdef ndarray[double] eta_n
-    cdef ndarray[double] ori_n
-
-    # quad
-    cdef ndarray[double] Cq_e
-    cdef ndarray[double] eta_e
-    cdef ndarray[double] ori_e
-
-    # J-coupling
-    cdef ndarray[double] iso_j
-    cdef ndarray[double] zeta_j
-    cdef ndarray[double] eta_j
-    cdef ndarray[double] ori_j
-
-    # quad
-    cdef ndarray[double] D_d
-    cdef ndarray[double] eta_d
-    cdef ndarray[double] ori_d
-
-
-
-    cdef int trans__, pathway_increment, pathway_count, transition_count_per_pathway
-    cdef ndarray[double, ndim=1] amp
-    amp1 = np.zeros(total_n_points, dtype=np.float64)
-    amp_individual = []
-
-    cdef clib.site_struct sites_c
-    cdef clib.coupling_struct couplings_c
-
-    index_ = []
-
-    # -------------------------------------------------------------------------
-    # sample __________________________________________________________________
     for index, spin_sys in enumerate(spin_systems):
-        abundance = spin_sys.abundance
         isotopes = [site.isotope.symbol for site in spin_sys.sites]
         if channel not in isotopes:
-            if decompose_spectrum == 1:
-                amp_individual.append([])
             continue
 
-        # sub_sites = [site for site in spin_sys.sites if site.isotope.symbol == isotope]
         index_.append(index)
+        abundance_.append(spin_sys.abundance)
         number_of_sites = len(spin_sys.sites)
 
         # ------------------------------------------------------------------------
         #                          Site specification
         # ------------------------------------------------------------------------
-        # CSA
-        spin_i = np.empty(number_of_sites, dtype=np.float32)
-        gyromagnetic_ratio_i = np.empty(number_of_sites, dtype=np.float64)
-
-        iso_n = np.zeros(number_of_sites, dtype=np.float64)
-        zeta_n = np.zeros(number_of_sites, dtype=np.float64)
-        eta_n = np.zeros(number_of_sites, dtype=np.float64)
-        ori_n = np.zeros(3*number_of_sites, dtype=np.float64)
-
-        # Quad
-        Cq_e = np.zeros(number_of_sites, dtype=np.float64)
-        eta_e = np.zeros(number_of_sites, dtype=np.float64)
-        ori_e = np.zeros(3*number_of_sites, dtype=np.float64)
-
-        # Extract and assign site information from Site objects to C structure
-        # ---------------------------------------------------------------------
-        for i in range(number_of_sites):
-            site = spin_sys.sites[i]
-            spin_i[i] = site.isotope.spin
-            gyromagnetic_ratio_i[i] = site.isotope.gyromagnetic_ratio
-            i3 = 3*i
+        for site in spin_sys.sites:
+            sites["spin"].append(site.isotope.spin)
+            sites["gyromagnetic_ratio"].append(site.isotope.gyromagnetic_ratio)
 
             # CSA tensor
-            if site.isotropic_chemical_shift is not None:
-                iso_n[i] = site.isotropic_chemical_shift
+            iso = site.isotropic_chemical_shift
+            sites["iso"].append(0.0 if iso is None else float(iso))
 
+            zeta, eta, ori = 0.0, 0.0, [0.0, 0.0, 0.0]
             shielding = site.shielding_symmetric
             if shielding is not None:
-                if shielding.zeta is not None:
-                    zeta_n[i] = shielding.zeta
-                if shielding.eta is not None:
-                    eta_n[i] = shielding.eta
-                if shielding.alpha is not None:
-                    ori_n[i3] = shielding.alpha
-                if shielding.beta is not None:
-                    ori_n[i3+1] = shielding.beta
-                if shielding.gamma is not None:
-                    ori_n[i3+2] = shielding.gamma
-
-            # if verbose in [1, 11]:
-            #     text = ((
-            #         f"\n{isotope} site {i} from spin system {index} "
-            #         f"@ {abundance}% abundance"
-            #     ))
-            #     len_ = len(text)
-            #     print(text)
-            #     print(f"{'-'*(len_-1)}")
-            #     print(f'Isotropic chemical shift (δ) = {str(1e6*iso/larmor_frequency)} ppm')
-            #     print(f'Shielding anisotropy (ζ) = {str(1e6*zeta/larmor_frequency)} ppm')
-            #     print(f'Shielding asymmetry (η) = {eta}')
-            #     print(f'Shielding orientation = [alpha = {alpha}, beta = {beta}, gamma = {gamma}]')
+                zeta, eta, ori = _tensor_parameters(shielding, "zeta")
+            sites["zeta"].append(zeta)
+            sites["eta"].append(eta)
+            sites["ori"] += ori
 
             # quad tensor
-            if spin_quantum_number > 0.5:
-                quad = site.quadrupolar
-                if quad is not None:
-                    if quad.Cq is not None:
-                        Cq_e[i] = quad.Cq
-                    if quad.eta is not None:
-                        eta_e[i] = quad.eta
-                    if quad.alpha is not None:
-                        ori_e[i3] = quad.alpha
-                    if quad.beta is not None:
-                        ori_e[i3+1] = quad.beta
-                    if quad.gamma is not None:
-                        ori_e[i3+2] = quad.gamma
-
-                # if verbose in [1, 11]:
-                #     print(f'Quadrupolar coupling constant (Cq) = {Cq_e[i]/1e6} MHz')
-                #     print(f'Quadrupolar asymmetry (η) = {eta}')
-                #     print(f'Quadrupolar orientation = [alpha = {alpha}, beta = {beta}, gamma = {gamma}]')
-
-        # sites packed as c struct
-        sites_c.number_of_sites = number_of_sites
-        sites_c.spin = &spin_i[0]
-        sites_c.gyromagnetic_ratio = &gyromagnetic_ratio_i[0]
-
-        sites_c.isotropic_chemical_shift_in_ppm = &iso_n[0]
-        sites_c.shielding_symmetric_zeta_in_ppm = &zeta_n[0]
-        sites_c.shielding_symmetric_eta = &eta_n[0]
-        sites_c.shielding_orientation = &ori_n[0]
-
-        sites_c.quadrupolar_Cq_in_Hz = &Cq_e[0]
-        sites_c.quadrupolar_eta = &eta_e[0]
-        sites_c.quadrupolar_orientation = &ori_e[0]
+            Cq, eta, ori = 0.0, 0.0, [0.0, 0.0, 0.0]
+            quad = site.quadrupolar
+            if spin_quantum_number > 0.5 and quad is not None:
+                Cq, eta, ori = _tensor_parameters(quad, "Cq")
+            sites["Cq"].append(Cq)
+            sites["eta_q"].append(eta)
+            sites["ori_q"] += ori
+
+        site_offset.append(site_offset[-1] + number_of_sites)
+
         # ------------------------------------------------------------------------
         #                           Coupling specification
         # ------------------------------------------------------------------------
-        # J-coupling
-        couplings_c.number_of_couplings = 0
+        number_of_couplings = 0
         if spin_sys.couplings is not None:
             number_of_couplings = len(spin_sys.couplings)
-            spin_index_ij = np.zeros(2*number_of_couplings, dtype=np.int32)
-
-            iso_j = np.zeros(number_of_couplings, dtype=np.float64)
-            zeta_j = np.zeros(number_of_couplings, dtype=np.float64)
-            eta_j = np.zeros(number_of_couplings, dtype=np.float64)
-            ori_j = np.zeros(3*number_of_couplings, dtype=np.float64)
-
-            # Dipolar
-            D_d = np.zeros(number_of_couplings, dtype=np.float64)
-            eta_d = np.zeros(number_of_couplings, dtype=np.float64)
-            ori_d = np.zeros(3*number_of_couplings, dtype=np.float64)
-
-            # Extract and assign coupling information from Site objects to C structure
-            for i in range(number_of_couplings):
-                coupling = spin_sys.couplings[i]
-                spin_index_ij[2*i: 2*i+2] = coupling.site_index
-                i3 = 3*i
+            for coupling in spin_sys.couplings:
+                couplings["site_index"] += coupling.site_index
 
                 # J tensor
-                if coupling.isotropic_j is not None:
-                    iso_j[i] = coupling.isotropic_j
-
-                J_sym = coupling.j_symmetric
-                if J_sym is not None:
-                    if J_sym.zeta is not None:
-                        zeta_j[i] = J_sym.zeta
-                    if J_sym.eta is not None:
-                        eta_j[i] = J_sym.eta
-                    if J_sym.alpha is not None:
-                        ori_j[i3] = J_sym.alpha
-                    if J_sym.beta is not None:
-                        ori_j[i3+1] = J_sym.beta
-                    if J_sym.gamma is not None:
-                        ori_j[i3+2] = J_sym.gamma
+                iso = coupling.isotropic_j
+                couplings["iso_j"].append(0.0 if iso is None else float(iso))
+
+                zeta, eta, ori = 0.0, 0.0, [0.0, 0.0, 0.0]
+                if coupling.j_symmetric is not None:
+                    zeta, eta, ori = _tensor_parameters(coupling.j_symmetric, "zeta")
+                couplings["zeta_j"].append(zeta)
+                couplings["eta_j"].append(eta)
+                couplings["ori_j"] += ori
 
                 # dipolar tensor
-                dipolar = coupling.dipolar
-                if dipolar is not None:
-                    if dipolar.D is not None:
-                        D_d[i] = dipolar.D
-                    if dipolar.eta is not None:
-                        eta_d[i] = dipolar.eta
-                    if dipolar.alpha is not None:
-                        ori_d[i3] = dipolar.alpha
-                    if dipolar.beta is not None:
-                        ori_d[i3+1] = dipolar.beta
-                    if dipolar.gamma is not None:
-                        ori_d[i3+2] = dipolar.gamma
+                D, eta, ori = 0.0, 0.0, [0.0, 0.0, 0.0]
+                if coupling.dipolar is not None:
+                    D, eta, ori = _tensor_parameters(coupling.dipolar, "D")
+                couplings["D"].append(D)
+                couplings["eta_d"].append(eta)
+                couplings["ori_d"] += ori
 
             if verbose in [1, 11]:
+                start = coupling_offset[-1]
                 print(f'N couplings = {number_of_couplings}')
-                print(f'site index J = {spin_index_ij}')
-                print(f'Isotropic J = {iso_j} Hz')
-                print(f'J anisotropy = {zeta_j} Hz')
-                print(f'J asymmetry = {eta_j}')
-                print(f'J orientation = {ori_j}')
-
-                print(f'Dipolar coupling constant = {D_d} Hz')
-                print(f'Dipolar asymmetry = {eta_d}')
-                print(f'Dipolar orientation = {ori_d}')
-
-            # couplings packed as c struct
-            couplings_c.number_of_couplings = number_of_couplings
-            couplings_c.site_index = &spin_index_ij[0]
-
-            couplings_c.isotropic_j_in_Hz = &iso_j[0]
-            couplings_c.j_symmetric_zeta_in_Hz = &zeta_j[0]
-            couplings_c.j_symmetric_eta = &eta_j[0]
-            couplings_c.j_orientation = &ori_j[0]
-
-            couplings_c.dipolar_coupling_in_Hz = &D_d[0]
-            couplings_c.dipolar_eta = &eta_d[0]
-            couplings_c.dipolar_orientation = &ori_d[0]
-
-
-        # Spectrum amplitude vector -------------------------------------------
-        amp = np.zeros(total_n_points)
-
-        # if number_of_sites == 0:
-        #     if decompose_spectrum == 1:
-        #         amp_individual.append([])
-        #     continue
-
-        if number_of_sites != p_number_of_sites and isotopes != p_isotopes:
-            transition_pathway = spin_sys.transition_pathways
-            if transition_pathway is None:
-                transition_pathway = np.asarray(method._get_transition_pathways_np(spin_sys))
-                transition_pathway_c = np.asarray(transition_pathway, dtype=np.float32).ravel()
-            else:
+                print(f'site index J = {couplings["site_index"][2*start:]}')
+                print(f'Isotropic J = {couplings["iso_j"][start:]} Hz')
+                print(f'J anisotropy = {couplings["zeta_j"][start:]} Hz')
+                print(f'J asymmetry = {couplings["eta_j"][start:]}')
+                print(f'J orientation = {couplings["ori_j"][3*start:]}')
+
+                print(f'Dipolar coupling constant = {couplings["D"][start:]} Hz')
+                print(f'Dipolar asymmetry = {couplings["eta_d"][start:]}')
+                print(f'Dipolar orientation = {couplings["ori_d"][3*start:]}')
+
+        coupling_offset.append(coupling_offset[-1] + number_of_couplings)
+
+        # ------------------------------------------------------------------------
+        #                           Transition pathways
+        # ------------------------------------------------------------------------
+        transition_pathway = spin_sys.transition_pathways
+        if transition_pathway is None:
+            key = tuple(isotopes)
+            if key not in pathway_cache:
+                transition_pathway = method._get_transition_pathways_np(spin_sys)
                 transition_pathway = np.asarray(transition_pathway)
-                # convert transition objects to list
-                lst = [item.tolist() for item in transition_pathway.ravel()]
-                transition_pathway_c = np.asarray(lst, dtype=np.float32).ravel()
-
-            pathway_count, transition_count_per_pathway = transition_pathway.shape[:2]
-            pathway_increment = 2*number_of_sites*transition_count_per_pathway
-
-            p_number_of_sites = number_of_sites
-            p_isotopes = isotopes
-
-        # if spin_sys.transitions is not None:
-        #     transition_pathway_c = np.asarray(
-        #         spin_sys.transitions, dtype=np.float32
-        #     ).ravel()
-        # else:
-        #     transition_pathway_c = np.asarray([0.5, -0.5], dtype=np.float32)
-
-        # the number 2 is because of single site transition [mi, mf]
-        # it dose not work for coupled sites.
-        # transition_increment = 2*number_of_sites
-        # number_of_transitions = int((transition_pathway_c.size)/transition_increment)
-
-        for trans__ in range(pathway_count):
-            clib.__mrsimulator_core(
-                # spectrum information and related amplitude
-                &amp[0],
-                &sites_c,
-                &couplings_c,
-                &transition_pathway_c[pathway_increment*trans__],
-                n_dimension,          # The total number of spectroscopic dimensions.
-                dimensions,           # Pointer to MRS_dimension structure
-                the_fftw_scheme,      # Pointer to the fftw scheme.
-                the_averaging_scheme, # Pointer to the powder averaging scheme.
-                interpolation,
-                &freq_contrib_c[0],
-                &affine_matrix_c[0],
+                pathway_cache[key] = (
+                    transition_pathway.shape[0],
+                    np.asarray(transition_pathway, dtype=np.float32).ravel()
                 )
+            count, transition_pathway_c = pathway_cache[key]
+        else:
+            transition_pathway = np.asarray(transition_pathway)
+            # convert transition objects to list
+            lst = [item.tolist() for item in transition_pathway.ravel()]
+            transition_pathway_c = np.asarray(lst, dtype=np.float32).ravel()
+            count = transition_pathway.shape[0]
+
+        pathways.append(transition_pathway_c)
+        pathway_offset.append(n_pathway_values)
+        pathway_count.append(count)
+        n_pathway_values += transition_pathway_c.size
+
+    as_double = lambda item: np.asarray(item, dtype=np.float64)
+    packed = {
+        "index": np.asarray(index_, dtype=int),
+        "abundance": as_double(abundance_),
+        "site_offset": np.asarray(site_offset, dtype=np.int32),
+        "coupling_offset": np.asarray(coupling_offset, dtype=np.int32),
+        "pathway_offset": np.asarray(pathway_offset, dtype=np.uint32),
+        "pathway_count": np.asarray(pathway_count, dtype=np.uint32),
+        "transition_pathways": (
+            np.concatenate(pathways) if pathways else np.zeros(0, dtype=np.float32)
+        ),
+        "spin": np.asarray(sites.pop("spin"), dtype=np.float32),
+        "site_index": np.asarray(couplings.pop("site_index"), dtype=np.int32),
+    }
+    packed.update({key: as_double(value) for key, value in sites.items()})
+    packed.update({key: as_double(value) for key, value in couplings.items()})
+    return packed
+
+
+def _tensor_parameters(tensor, size):
+    """Return the size, asymmetry, and orientation of the tensor with zero defaults."""
+    value = getattr(tensor, size)
+    orientation = [tensor.alpha, tensor.beta, tensor.gamma]
+    return (
+        0.0 if value is None else float(value),
+        0.0 if tensor.eta is None else float(tensor.eta),
+        [0.0 if item is None else float(item) for item in orientation],
+    )
 
-        temp = amp*abundance/norm
 
-        if decompose_spectrum == 1:
-            amp_individual.append(temp.reshape(method.shape()))
-        else:
-            amp1 += temp
-        # else:
-        #     if decompose_spectrum == 1:
-        #         amp_individual.append([])
+cdef class _SpinSystemStructs:
+    """The site and coupling c structs, one per spin system, from the packed arrays.
 
-    # reverse the spectrum if gyromagnetic ratio is positive.
-    if decompose_spectrum == 1 and len(amp_individual) != 0:
-        if gyromagnetic_ratio < 0:
-            amp1 = [np.fft.fftn(np.fft.ifftn(item).conj()).real for item in amp_individual]
+    The structs point into the packed arrays, which are kept alive with the object.
+    """
+    cdef clib.site_struct *sites
+    cdef clib.coupling_struct *couplings
+    cdef dict packed
+
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    def __cinit__(self, dict packed):
+        cdef unsigned int i, n_spin_systems = packed["abundance"].size
+        cdef int s, c
+        cdef ndarray[int] site_offset = packed["site_offset"]
+        cdef ndarray[int] coupling_offset = packed["coupling_offset"]
+
+        cdef ndarray[float] spin = packed["spin"]
+        cdef ndarray[double] gyromagnetic_ratio = packed["gyromagnetic_ratio"]
+        cdef ndarray[double] iso_n = packed["iso"]
+        cdef ndarray[double] zeta_n = packed["zeta"]
+        cdef ndarray[double] eta_n = packed["eta"]
+        cdef ndarray[double] ori_n = packed["ori"]
+        cdef ndarray[double] Cq_e = packed["Cq"]
+        cdef ndarray[double] eta_e = packed["eta_q"]
+        cdef ndarray[double] ori_e = packed["ori_q"]
+
+        cdef ndarray[int] spin_index_ij = packed["site_index"]
+        cdef ndarray[double] iso_j = packed["iso_j"]
+        cdef ndarray[double] zeta_j = packed["zeta_j"]
+        cdef ndarray[double] eta_j = packed["eta_j"]
+        cdef ndarray[double] ori_j = packed["ori_j"]
+        cdef ndarray[double] D_d = packed["D"]
+        cdef ndarray[double] eta_d = packed["eta_d"]
+        cdef ndarray[double] ori_d = packed["ori_d"]
+
+        self.packed = packed
+        self.sites = <clib.site_struct *> malloc(
+            n_spin_systems * sizeof(clib.site_struct))
+        self.couplings = <clib.coupling_struct *> malloc(
+            n_spin_systems * sizeof(clib.coupling_struct))
+
+        # sites and couplings of every spin system packed as c struct
+        for i in range(n_spin_systems):
+            s = site_offset[i]
+            self.sites[i].number_of_sites = site_offset[i + 1] - s
+            self.sites[i].spin = &spin[s]
+            self.sites[i].gyromagnetic_ratio = &gyromagnetic_ratio[s]
+            self.sites[i].isotropic_chemical_shift_in_ppm = &iso_n[s]
+            self.sites[i].shielding_symmetric_zeta_in_ppm = &zeta_n[s]
+            self.sites[i].shielding_symmetric_eta = &eta_n[s]
+            self.sites[i].shielding_orientation = &ori_n[3 * s]
+            self.sites[i].quadrupolar_Cq_in_Hz = &Cq_e[s]
+            self.sites[i].quadrupolar_eta = &eta_e[s]
+            self.sites[i].quadrupolar_orientation = &ori_e[3 * s]
+
+            c = coupling_offset[i]
+            self.couplings[i].number_of_couplings = coupling_offset[i + 1] - c
+            if self.couplings[i].number_of_couplings == 0:
+                continue
+            self.couplings[i].site_index = &spin_index_ij[2 * c]
+            self.couplings[i].isotropic_j_in_Hz = &iso_j[c]
+            self.couplings[i].j_symmetric_zeta_in_Hz = &zeta_j[c]
+            self.couplings[i].j_symmetric_eta = &eta_j[c]
+            self.couplings[i].j_orientation = &ori_j[3 * c]
+            self.couplings[i].dipolar_coupling_in_Hz = &D_d[c]
+            self.couplings[i].dipolar_eta = &eta_d[c]
+            self.couplings[i].dipolar_orientation = &ori_d[3 * c]
+
+    def __dealloc__(self):
+        free(self.sites)
+        free(self.couplings)
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def _allow_fourth_rank(method, dict packed=None):
+    """Return True when the fourth-rank tensors contribute to the frequencies.
+
+    The fourth-rank tensors are from the second-order quadrupolar interaction, and only
+    contribute to the quadrupolar channels, for the events with the ``Quad2_4``
+    frequency contribution, and, when ``packed`` is given, when a packed spin system
+    has a non-zero quadrupolar coupling constant.
+    """
+    if method.channels[0].spin <= 0.5:
+        return False
+    # Quad2_4 is the last of the six frequency contributions of an event.
+    events = [event for dim in method.spectral_dimensions for event in dim.events]
+    if not any(event._freq_contrib_flags()[5] for event in events):
+        return False
+    if packed is not None and not np.any(packed["Cq"]):
+        return False
+    return True
+
+
+cdef _anisotropy(method, dict packed):
+    """Return the bound of the anisotropic frequency of the packed spin systems as an
+    array of shape (number of spin systems, number of events)."""
+    cdef unsigned int n_spin_systems = packed["abundance"].size
+    events = [event for dim in method.spectral_dimensions for event in dim.events]
+    cdef unsigned int n_events = len(events)
+    cdef bool_t allow_fourth_rank = _allow_fourth_rank(method, packed)
+    cdef ndarray[double, ndim=2] anisotropy = np.zeros((n_spin_systems, n_events))
+    if n_spin_systems == 0:
+        return anisotropy
+
+    cdef ndarray[unsigned int] pathway_offset = packed["pathway_offset"]
+    cdef ndarray[unsigned int] pathway_count = packed["pathway_count"]
+    cdef ndarray[float] transition_pathways = packed["transition_pathways"]
+    cdef ndarray[double] B0 = np.asarray(
+        [event.magnetic_flux_density for event in events], dtype=np.float64
+    )
+    cdef ndarray[bool_t] freq_contrib_c = np.asarray(
+        np.concatenate([event._freq_contrib_flags() for event in events]), dtype=bool
+    )
+    cdef _SpinSystemStructs structs = _SpinSystemStructs(packed)
+
+    clib.__mrsimulator_anisotropy(
+        &anisotropy[0, 0], n_spin_systems, structs.sites, structs.couplings,
+        &transition_pathways[0], &pathway_offset[0], &pathway_count[0], n_events,
+        &B0[0], allow_fourth_rank, &freq_contrib_c[0],
+    )
+    return anisotropy
+
+
+cdef _common_orientation(dict packed):
+    """Return the boolean arrays, which are True for the packed spin systems whose
+    anisotropic tensors share the Euler angles, and for the packed spin systems with
+    an asymmetric anisotropic tensor, respectively."""
+    n_spin_systems = packed["abundance"].size
+    asymmetric = np.zeros(n_spin_systems, dtype=bool)
+    owners, orientations = [np.zeros(0, dtype=int)], [np.zeros((0, 3))]
+    tensors = [
+        ("site_offset", "zeta", "eta", "ori"),
+        ("site_offset", "Cq", "eta_q", "ori_q"),
+        ("coupling_offset", "zeta_j", "eta_j", "ori_j"),
+        ("coupling_offset", "D", "eta_d", "ori_d"),
+    ]
+    for offset, size, eta, ori in tensors:
+        owner = np.repeat(np.arange(n_spin_systems), np.diff(packed[offset]))
+        anisotropic = packed[size] != 0
+        asymmetric[owner[anisotropic & (packed[eta] != 0)]] = True
+        owners.append(owner[anisotropic])
+        orientations.append(packed[ori].reshape(-1, 3)[anisotropic])
+
+    # the Euler angles are shared when their minimum and maximum are equal.
+    owners, orientations = np.concatenate(owners), np.concatenate(orientations)
+    lower = np.full((n_spin_systems, 3), np.inf)
+    upper = np.full((n_spin_systems, 3), -np.inf)
+    np.minimum.at(lower, owners, orientations)
+    np.maximum.at(upper, owners, orientations)
+    return np.all(lower == upper, axis=1), asymmetric
+
+
+def is_coaxial(dict packed):
+    """Return a boolean array, which is True for the packed spin systems whose
+    anisotropic tensors share a principal axis system.
+
+    The anisotropic tensors share a principal axis system when all of them share the
+    Euler angles. In the common principal axis system, the static frequencies are a
+    quadratic in the cosine squared of the polar angle, β, of the powder orientation,
+    and are integrated analytically along β. The spin systems without an anisotropic
+    tensor are False.
+
+    :ivar packed:
+        A dict of arrays from the :func:`pack_spin_systems` function.
+    """
+    return _common_orientation(packed)[0]
+
+
+def is_axially_symmetric(dict packed):
+    """Return a boolean array, which is True for the packed spin systems whose
+    frequencies only depend on the polar angle, β, of the powder orientation.
+
+    The frequencies only depend on β when every anisotropic tensor of the spin system
+    is axially symmetric, with a zero asymmetry, and all anisotropic tensors share the
+    Euler angles, see :func:`is_coaxial`. The powder average is then independent of
+    the common orientation of the tensors, and is evaluated over the orientations along
+    a meridian. The spin systems without an anisotropic tensor are False.
+
+    :ivar packed:
+        A dict of arrays from the :func:`pack_spin_systems` function.
+    """
+    coaxial, asymmetric = _common_orientation(packed)
+    return coaxial & ~asymmetric
+
+
+def _is_static_one_d(method):
+    """Return True when the method has one spectral dimension, and every event is
+    static, where the frequencies of the coaxial spin systems are integrated
+    analytically along β."""
+    if len(method.spectral_dimensions) != 1:
+        return False
+    events = method.spectral_dimensions[0].events
+    return all(event.rotor_frequency < 1.0e-3 for event in events)
+
+
+cdef _remove_common_orientation(dict packed, selection):
+    """Zero the Euler angles of the tensors of the selected packed spin systems, in
+    place. The powder average is invariant to the rotation of all tensors, and the
+    meridian and the analytic orientations are in the common principal axis system at
+    zero Euler angles."""
+    n_spin_systems = packed["abundance"].size
+    for offset, ori in [
+        ("site_offset", "ori"),
+        ("site_offset", "ori_q"),
+        ("coupling_offset", "ori_j"),
+        ("coupling_offset", "ori_d"),
+    ]:
+        owner = np.repeat(np.arange(n_spin_systems), np.diff(packed[offset]))
+        packed[ori].reshape(-1, 3)[selection[owner]] = 0
+
+
+def estimate_number_of_sidebands(method, dict packed, unsigned int max_sidebands=1024):
+    """Estimate the number of sidebands required for every packed spin system.
+
+    The sideband transform samples a rotor period at as many points as the number of
+    sidebands. The number of sidebands is estimated as the smallest power of two
+    spanning twice the bound of the anisotropic frequency over the rotor frequency,
+    where the bound is evaluated from the norm of the second- and fourth-rank frequency
+    components over all transition pathways and events.
+
+    :ivar method:
+        The Method object.
+    :ivar packed:
+        A dict of arrays from the :func:`pack_spin_systems` function.
+    :ivar max_sidebands:
+        The maximum number of sidebands. The default is 1024.
+    :return: An array with the number of sidebands per packed spin system.
+    """
+    anisotropy = _anisotropy(method, packed)
+    if anisotropy.shape[0] == 0:
+        return np.zeros(0, dtype=int)
+
+    # the static events are simulated without sidebands.
+    events = [event for dim in method.spectral_dimensions for event in dim.events]
+    rotor_frequency = np.asarray([event.rotor_frequency for event in events])
+    spinning = rotor_frequency >= 1.0e-3
+    if not np.any(spinning):
+        return np.ones(anisotropy.shape[0], dtype=int)
+
+    span = 2.0 * anisotropy[:, spinning] / rotor_frequency[spinning]
+    span = np.ceil(span.max(axis=1)).clip(min=1, max=max_sidebands)
+    n_sidebands = 2 ** np.ceil(np.log2(span)).astype(int)
+    return np.minimum(n_sidebands, max_sidebands)
+
+
+# The integration densities searched for the automatic integration density. Every
+# density is compared against twice the density.
+_integration_densities = [8, 12, 16, 24, 32, 48, 64, 96, 128, 192, 256]
+
+# The cache of the automatic integration densities, keyed by the method, the anisotropy
+# class, and the search parameters.
+_integration_density_cache = {"densities": {}, "hits": 0, "misses": 0}
+
+
+def clear_integration_density_cache():
+    """Clear the cache of the automatic integration densities, and reset its hit and
+    miss counts."""
+    _integration_density_cache["densities"].clear()
+    _integration_density_cache["hits"] = 0
+    _integration_density_cache["misses"] = 0
+
+
+def integration_density_cache_info():
+    """Return the number of entries, hits, and misses of the automatic integration
+    density cache as a dict."""
+    return {
+        "entries": len(_integration_density_cache["densities"]),
+        "hits": _integration_density_cache["hits"],
+        "misses": _integration_density_cache["misses"],
+    }
+
+
+def _method_key(method):
+    """Return a hashable key of the method attributes affecting the lineshape."""
+    dimensions = tuple(
+        (dim.count, dim.spectral_width, dim.reference_offset) for dim in
+        method.spectral_dimensions
+    )
+    events = tuple(
+        (
+            event.fraction, event.magnetic_flux_density, event.rotor_frequency,
+            event.rotor_angle, tuple(event._freq_contrib_flags()),
+            repr(event.transition_query),
+        )
+        for dim in method.spectral_dimensions for event in dim.events
+    )
+    affine_matrix = (
+        None if method.affine_matrix is None
+        else tuple(np.asarray(method.affine_matrix).ravel())
+    )
+    return (method.channels[0].symbol, dimensions, events, affine_matrix)
+
+
+def _search_integration_density(method, dict packed, double tolerance,
+                                unsigned int number_of_sidebands,
+                                unsigned int integration_volume,
+                                unsigned int max_density):
+    """Return the smallest integration density, for which the spectrum of the packed
+    spin systems is within the tolerance of the spectrum at twice the density."""
+    spectra = {}
+
+    def spectrum(density):
+        if density not in spectra:
+            plan = SimulationPlan(
+                method, number_of_sidebands=number_of_sidebands,
+                integration_density=density, integration_volume=integration_volume
+            )
+            spectra[density] = batch_spectrum(packed, plan)[0]
+        return spectra[density]
+
+    densities = [item for item in _integration_densities if item < max_density]
+    for density in densities:
+        coarse, fine = spectrum(density), spectrum(2 * density)
+        norm = np.abs(fine).sum()
+        if norm == 0 or np.abs(coarse - fine).sum() <= tolerance * norm:
+            return density
+    return max_density
+
+
+def estimate_integration_density(method, dict packed, double tolerance,
+                                 number_of_sidebands=64,
+                                 unsigned int integration_volume=0,
+                                 unsigned int max_density=256):
+    """Estimate the integration density for every packed spin system.
+
+    The spin systems are classified by the number of spectral increments spanned by
+    the bound of their anisotropic frequency, on a log2 scale, and by the number of
+    sidebands. For every class, the integration densities are searched in increasing
+    order with the spin system of the largest anisotropy in the class, until the
+    spectrum agrees with the spectrum at twice the density within the tolerance. The
+    searched densities are cached per method and class.
+
+    :ivar method:
+        The Method object.
+    :ivar packed:
+        A dict of arrays from the :func:`pack_spin_systems` function.
+    :ivar tolerance:
+        The relative tolerance, as the sum of the absolute difference of the spectra
+        relative to the sum of the absolute spectrum.
+    :ivar number_of_sidebands:
+        The number of sidebands, or an array of the number of sidebands per packed
+        spin system. The default is 64.
+    :ivar integration_volume:
+        The integration volume, where 0, 1, 3, and 4 are the octant, the hemisphere,
+        the meridian, and the analytic scheme. The default is 0.
+    :ivar max_density:
+        The maximum integration density. The default is 256.
+    :return: An array with the integration density per packed spin system.
+    """
+    anisotropy = _anisotropy(method, packed)
+    n_spin_systems = anisotropy.shape[0]
+    n_sidebands = np.broadcast_to(number_of_sidebands, n_spin_systems)
+    densities = np.zeros(n_spin_systems, dtype=int)
+    if n_spin_systems == 0:
+        return densities
+
+    # the anisotropy class, where -1 is for spin systems without an anisotropy.
+    dims = method.spectral_dimensions
+    increment = min(dim.spectral_width / dim.count for dim in dims)
+    span = anisotropy.max(axis=1) / increment
+    anisotropy_class = np.full(n_spin_systems, -1)
+    anisotropic = span > 0
+    anisotropy_class[anisotropic] = np.ceil(np.log2(np.maximum(span[anisotropic], 1)))
+
+    method_key = _method_key(method)
+    cache = _integration_density_cache["densities"]
+    classes = set(zip(anisotropy_class.tolist(), n_sidebands.tolist()))
+    for class_, count in classes:
+        selection = np.where((anisotropy_class == class_) & (n_sidebands == count))[0]
+        key = (method_key, class_, count, tolerance, integration_volume, max_density)
+        if key in cache:
+            _integration_density_cache["hits"] += 1
         else:
-            amp1 = amp_individual
-    else:
-        amp1.shape = method.shape()
-        if gyromagnetic_ratio < 0:
-            amp1 = np.fft.fftn(np.fft.ifftn(amp1).conj()).real
+            _integration_density_cache["misses"] += 1
+            representative = selection[np.argmax(span[selection])]
+            cache[key] = _search_integration_density(
+                method, take_spin_systems(packed, [representative]), tolerance, count,
+                integration_volume, max_density
+            )
+        densities[selection] = cache[key]
+    return densities
+
+
+def take_spin_systems(dict packed, selection):
+    """Return the packed arrays of the selected packed spin systems.
+
+    :ivar packed:
+        A dict of arrays from the :func:`pack_spin_systems` function.
+    :ivar selection:
+        A list of indexes of the spin systems within the packed arrays.
+    """
+    selection = np.asarray(selection, dtype=int)
+    site_offset = packed["site_offset"]
+    coupling_offset = packed["coupling_offset"]
+    pathway_offset = np.append(
+        packed["pathway_offset"], packed["transition_pathways"].size
+    )
 
-    clib.MRS_free_dimension(dimensions, n_dimension)
-    clib.MRS_free_averaging_scheme(the_averaging_scheme)
-    clib.MRS_free_fftw_scheme(the_fftw_scheme)
-    return amp1
+    def take(offset, stride=1):
+        return np.concatenate(
+            [np.arange(stride * offset[i], stride * offset[i + 1]) for i in selection]
+            + [np.zeros(0, dtype=int)]
+        )
+
+    site, site_3 = take(site_offset), take(site_offset, 3)
+    coupling, coupling_3 = take(coupling_offset), take(coupling_offset, 3)
+    coupling_2, pathway = take(coupling_offset, 2), take(pathway_offset)
+
+    taken = {
+        "index": packed["index"][selection],
+        "abundance": packed["abundance"][selection],
+        "pathway_count": packed["pathway_count"][selection],
+        "transition_pathways": packed["transition_pathways"][pathway],
+        "site_index": packed["site_index"][coupling_2],
+    }
+    counts = [np.diff(item)[selection] for item in [site_offset, coupling_offset]]
+    taken["site_offset"] = np.append(0, np.cumsum(counts[0])).astype(np.int32)
+    taken["coupling_offset"] = np.append(0, np.cumsum(counts[1])).astype(np.int32)
+    sizes = np.diff(pathway_offset)[selection]
+    taken["pathway_offset"] = np.cumsum(np.append(0, sizes))[:-1].astype(np.uint32)
+
+    for key in ["spin", "gyromagnetic_ratio", "iso", "zeta", "eta", "Cq", "eta_q"]:
+        taken[key] = packed[key][site]
+    for key in ["ori", "ori_q"]:
+        taken[key] = packed[key][site_3]
+    for key in ["iso_j", "zeta_j", "eta_j", "D", "eta_d"]:
+        taken[key] = packed[key][coupling]
+    for key in ["ori_j", "ori_d"]:
+        taken[key] = packed[key][coupling_3]
+    return taken
+
+
+@cython.profile(False)
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def batch_spectrum(dict packed, SimulationPlan plan, bool_t interpolation=True,
+                   unsigned int decompose_spectrum=0, unsigned int n_threads=1):
+    """Simulate the spectra from the packed spin systems with the GIL released.
+
+    :ivar packed:
+        A dict of arrays from the :func:`pack_spin_systems` function.
+    :ivar plan:
+        A SimulationPlan object, updated for the method. A plan is not thread-safe.
+        Concurrent calls must use separate plans.
+    :ivar interpolation:
+        If true, perform interpolation of the frequencies.
+    :ivar decompose_spectrum:
+        When value is 0, the spectrum is a sum of spectrum from all spin systems, and
+        the returned array is of shape (1, total_n_points). When value is 1, the
+        returned array is of shape (n_spin_systems, total_n_points).
+    :ivar n_threads:
+        The number of OpenMP threads within the simulation of a spin system.
+    """
+    cdef unsigned int i, n_spin_systems = packed["abundance"].size
+    cdef unsigned int n_spectra = n_spin_systems if decompose_spectrum == 1 else 1
+    cdef ndarray[double, ndim=2] amp = np.zeros((n_spectra, plan.total_n_points))
+    if n_spin_systems == 0:
+        return amp
+
+    cdef ndarray[unsigned int] pathway_offset = packed["pathway_offset"]
+    cdef ndarray[unsigned int] pathway_count = packed["pathway_count"]
+    cdef ndarray[float] transition_pathways = packed["transition_pathways"]
+    cdef ndarray[double] weights = packed["abundance"] / plan.norm
+    cdef ndarray[bool_t] freq_contrib_c = plan.freq_contrib
+    cdef ndarray[double] affine_matrix_c = plan.affine_matrix
+    cdef _SpinSystemStructs structs = _SpinSystemStructs(packed)
+
+    clib.MRS_set_workspace_threads(plan.workspace, plan.averaging_scheme, n_threads)
+    with nogil:
+        clib.__mrsimulator_batch(
+            &amp[0, 0],
+            decompose_spectrum == 1,
+            n_spin_systems,
+            structs.sites,
+            structs.couplings,
+            &transition_pathways[0],
+            &pathway_offset[0],
+            &pathway_count[0],
+            &weights[0],
+            plan.n_dimension,      # The total number of spectroscopic dimensions.
+            plan.dimensions,       # Pointer to MRS_dimension structure
+            plan.fftw_scheme,      # Pointer to the fftw scheme.
+            plan.averaging_scheme, # Pointer to the powder averaging scheme.
+            plan.workspace,        # Pointer to the workspace buffers.
+            interpolation,
+            &freq_contrib_c[0],
+            &affine_matrix_c[0],
+        )
+    return amp
 
 
 @cython.profile(False)
@@ -10,8 +10,10 @@
 #include "simulation.h"
 
 void one_dimensional_averaging(MRS_dimension *dimensions, MRS_averaging_scheme *scheme,
-                               MRS_fftw_scheme *fftw_scheme, double *spec);
+                               MRS_fftw_scheme *fftw_scheme, MRS_workspace *workspace,
+                               double *spec);
 
 void two_dimensional_averaging(MRS_dimension *dimensions, MRS_averaging_scheme *scheme,
-                               MRS_fftw_scheme *fftw_scheme, double *spec,
-                               unsigned int number_of_sidebands, double *affine_matrix);
+                               MRS_fftw_scheme *fftw_scheme, MRS_workspace *workspace,
+                               double *spec, unsigned int number_of_sidebands,
+                               double *affine_matrix);
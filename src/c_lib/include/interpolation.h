@@ -9,6 +9,23 @@
 
 #include "config.h"
 
+#ifndef interpolation_h
+#define interpolation_h
+
+/**
+ * @struct MRS_culling
+ * The amplitude threshold below which the triangles of the octahedron interpolation
+ * are skipped, and the amplitudes accumulated from the skipped triangles.
+ */
+typedef struct MRS_culling {
+  double cutoff;    /**< The threshold relative to the largest triangle amplitude. */
+  double threshold; /**< The absolute threshold of the triangle amplitudes. */
+
+  unsigned long long triangles; /**< The number of skipped triangles. */
+  double discarded;             /**< The sum of the skipped triangle amplitudes. */
+  double total;                 /**< The sum of all triangle amplitudes. */
+} MRS_culling;
+
 /**
  * @brief Create a triangle with coordinates (f1, f2, f2) onto a 1D grid.
  *
@@ -41,6 +58,35 @@ extern int triangle_interpolation2D(double *f11, double *f12, double *f13, doubl
                                     double *f22, double *f23, double *amp, double *spec,
                                     int m0, int m1);
 
+/**
+ * @brief Rasterize a triangle with vertices (v0, v1, v2) onto a 2D grid, where the
+ * amplitude is uniform over the triangle, and every bin receives the amplitude in
+ * proportion to the area of its overlap with the triangle. The bin p holds the
+ * coordinates from p to p + 1. The triangles without an area, which are the delta
+ * lines along a dimension and the collinear triangles, are interpolated with the
+ * triangle_interpolation2D.
+ *
+ * @param grid A pointer to the starting index of a two-dimensional array.
+ * @param v0 A pointer to the (row, column) coordinates of the first vertex.
+ * @param v1 A pointer to the (row, column) coordinates of the second vertex.
+ * @param v2 A pointer to the (row, column) coordinates of the third vertex.
+ * @param amp A pointer to the amplitude of the triangle.
+ * @param rows An interger with the rows in the 2D grid.
+ * @param columns An interger with the columns in the 2D grid.
+ */
+extern void rasterization(double *grid, double *v0, double *v1, double *v2, double *amp,
+                          int rows, int columns);
+
+/**
+ * @brief Return the sum of the triangle amplitudes over the region of an octant, where
+ * the amplitude of a triangle is the sum of its three vertex amplitudes.
+ *
+ * @param nt Number of triangles along the edge of the octant.
+ * @param amp A pointer to the amplitudes at octant coordinates.
+ * @param stride Stride setp for the amplitudes (amp) array.
+ */
+double octahedronAmplitudeSum(const unsigned int nt, double *amp, int stride);
+
 /**
  * @brief Sum amplitudes from the triangles interpolations over the region of an octant.
  * The samplings over the octant is as per Alderman and Grand scheme.
@@ -55,8 +101,181 @@ extern int triangle_interpolation2D(double *f11, double *f12, double *f13, doubl
 void octahedronDeltaInterpolation(const unsigned int nt, double *freq, double *amp,
                                   int stride, int n_spec, double *spec);
 
+/**
+ * The instruction sets of the batched triangle interpolation kernel. MRS_ISA_SCALAR
+ * selects the scalar reference kernel, and MRS_ISA_GENERIC the batched kernel compiled
+ * for the baseline instruction set.
+ */
+enum MRS_isa {
+  MRS_ISA_SCALAR = 0,
+  MRS_ISA_GENERIC = 1,
+  MRS_ISA_SSE41 = 2,
+  MRS_ISA_AVX2 = 3,
+  MRS_ISA_AVX512 = 4,
+};
+
+/**
+ * @brief Return 1 if the instruction set is supported by the running cpu, else 0.
+ */
+extern int MRS_interpolation_isa_supported(int isa);
+
+/**
+ * @brief Select the instruction set of the triangle interpolation kernel. An
+ * unsupported instruction set falls back to the next supported one, and a negative
+ * value selects the best supported. Returns the selected instruction set.
+ */
+extern int MRS_set_interpolation_isa(int isa);
+
+/**
+ * @brief The instruction set of the triangle interpolation kernel. Defaults to the best
+ * supported by the running cpu.
+ */
+extern int MRS_get_interpolation_isa();
+
+/**
+ * @brief The name of the instruction set.
+ */
+extern const char *MRS_interpolation_isa_name(int isa);
+
+/**
+ * @brief The octahedronInterpolation with the scalar reference kernel, one triangle at
+ * a time.
+ */
+extern void octahedronScalarInterpolation(double *spec, double *freq,
+                                          const unsigned int nt, double *amp, int stride,
+                                          int m);
+
 extern void octahedronInterpolation(double *spec, double *freq, const unsigned int nt,
                                     double *amp, int stride, int m);
 
 extern void octahedronInterpolation2D(double *spec, double *freq1, double *freq2,
                                       int nt, double *amp, int stride, int m0, int m1);
+
+/**
+ * @brief The octahedronInterpolation, skipping the triangles with an absolute
+ * amplitude below the culling threshold. The culling counts are accumulated in the
+ * culling struct. When culling is NULL, every triangle is interpolated.
+ */
+extern void octahedronCulledInterpolation(double *spec, double *freq,
+                                          const unsigned int nt, double *amp, int stride,
+                                          int m, MRS_culling *culling);
+
+/**
+ * @brief The octahedronInterpolation2D, skipping the triangles with an absolute
+ * amplitude below the culling threshold. The culling counts are accumulated in the
+ * culling struct. When culling is NULL, every triangle is interpolated.
+ */
+extern void octahedronCulledInterpolation2D(double *spec, double *freq1, double *freq2,
+                                            int nt, double *amp, int stride, int m0,
+                                            int m1, MRS_culling *culling);
+
+/**
+ * @brief The octahedronCulledInterpolation2D, where every triangle is rasterized by
+ * the area of its overlap with the bins of the 2D grid, see rasterization.
+ */
+extern void octahedronRasterization2D(double *spec, double *freq1, double *freq2, int nt,
+                                      double *amp, int stride, int m0, int m1,
+                                      MRS_culling *culling);
+
+/**
+ * @brief Bin the frequencies of the orientations without a triangle mesh onto a 1D
+ * grid. The amplitude of every frequency is split between the two nearest bins, as in
+ * the delta function interpolation.
+ *
+ * @param spec A pointer to the starting index of a one-dimensional array.
+ * @param freq A pointer to the normalized frequencies of the orientations.
+ * @param n The number of orientations.
+ * @param amp A pointer to the amplitudes of the orientations.
+ * @param m The number of points on the 1D grid.
+ */
+extern void histogramInterpolation(double *spec, double *freq, const unsigned int n,
+                                   double *amp, int m);
+
+/**
+ * @brief Bin the frequency pairs of the orientations without a triangle mesh onto a 2D
+ * grid. The amplitude of every pair is split bilinearly between the four nearest bins.
+ *
+ * @param spec A pointer to the starting index of a two-dimensional array.
+ * @param freq1 A pointer to the normalized frequencies along the first dimension.
+ * @param freq2 A pointer to the normalized frequencies along the second dimension.
+ * @param n The number of orientations.
+ * @param amp A pointer to the amplitudes of the orientations.
+ * @param m0 The number of rows in the 2D grid.
+ * @param m1 The number of columns in the 2D grid.
+ */
+extern void histogramInterpolation2D(double *spec, double *freq1, double *freq2,
+                                     const unsigned int n, double *amp, int m0, int m1);
+
+/**
+ * @brief The sum of the segment amplitudes over the nt segments of a meridian, where
+ * the amplitude of a segment is the sum of its two vertex amplitudes.
+ *
+ * @param nt The number of segments.
+ * @param amp A pointer to the nt + 1 vertex amplitudes.
+ */
+extern double meridianAmplitudeSum(const unsigned int nt, double *amp);
+
+/**
+ * @brief Add the sum of the segment amplitudes over a meridian, as a delta function at
+ * the given frequency, to the 1D grid.
+ */
+extern void meridianDeltaInterpolation(const unsigned int nt, double *freq,
+                                       double *amp, int n_spec, double *spec);
+
+/**
+ * @brief Interpolate the frequencies along a meridian onto a 1D grid. The amplitude of
+ * every segment, the sum of its two vertex amplitudes, is spread between the
+ * frequencies of its two vertices, at a density varying linearly between the vertices.
+ *
+ * @param spec A pointer to the starting index of a one-dimensional array.
+ * @param freq A pointer to the normalized frequencies of the nt + 1 vertices.
+ * @param nt The number of segments.
+ * @param amp A pointer to the amplitudes of the nt + 1 vertices.
+ * @param m The number of points on the 1D grid.
+ */
+extern void meridianInterpolation(double *spec, double *freq, const unsigned int nt,
+                                  double *amp, int m);
+
+/**
+ * @brief Interpolate the frequency pairs along a meridian onto a 2D grid. The amplitude
+ * of every segment is spread along the line between the frequency pairs of its two
+ * vertices, at a density varying linearly between the vertices, and split between the
+ * bins crossed by the line. A constant frequency along a dimension is split between
+ * the two nearest bins, as a delta function.
+ *
+ * @param spec A pointer to the starting index of a two-dimensional array.
+ * @param freq1 A pointer to the normalized frequencies along the first dimension.
+ * @param freq2 A pointer to the normalized frequencies along the second dimension.
+ * @param nt The number of segments.
+ * @param amp A pointer to the amplitudes of the nt + 1 vertices.
+ * @param m0 The number of rows in the 2D grid.
+ * @param m1 The number of columns in the 2D grid.
+ */
+extern void meridianInterpolation2D(double *spec, double *freq1, double *freq2,
+                                    const unsigned int nt, double *amp, int m0, int m1);
+
+/**
+ * @brief Add the sum of the amplitudes of the nine orientations of an analytic scheme,
+ * as a delta function at the given frequency, to the 1D grid.
+ */
+extern void analyticDeltaInterpolation(double *freq, double *amp, int n_spec,
+                                       double *spec);
+
+/**
+ * @brief Integrate the frequencies of an analytic scheme onto a 1D grid. The
+ * frequencies at the nine orientations, at α = 0, π/4, and π/2, and cos²(β) = 0, 1/2,
+ * and 1, give the frequency along β, a quadratic in cos²(β), at the nodes of α. The
+ * amplitude of a node is distributed over the bins by the exact measure of cos(β) whose
+ * frequency falls within the bin. The nodes of α are at least nt, and as many as keep
+ * the lineshape edges of adjacent nodes within a fraction of a bin.
+ *
+ * @param spec A pointer to the starting index of a one-dimensional array.
+ * @param freq A pointer to the normalized frequencies of the nine orientations.
+ * @param nt The minimum number of nodes of α.
+ * @param amp A pointer to the amplitudes of the nine orientations.
+ * @param m The number of points on the 1D grid.
+ */
+extern void analyticInterpolation(double *spec, double *freq, const unsigned int nt,
+                                  double *amp, int m);
+
+#endif /* interpolation_h */
@@ -38,7 +38,8 @@ typedef struct MRS_dimension {
 } MRS_dimension;
 
 /**
- * @brief Free the memory allocation for the MRS event.
+ * @brief Free the memory allocation for the MRS event, and release the event reference
+ * to the plan.
  *
  * @param the_event The pointer to the MRS_event structs.
  */
@@ -74,7 +75,33 @@ MRS_dimension *MRS_create_dimensions(
     unsigned int n_dim, unsigned int number_of_sidebands);
 
 /**
- * @brief Free the memory allocation for the MRS dimensions.
+ * @brief Update the coordinates of the MRS dimension in place.
+ *
+ * @param dimension The pointer to the MRS_dimension struct.
+ * @param count The number of coordinates along the dimension.
+ * @param coordinates_offset The start coordinate of the dimension.
+ * @param increment The increment of coordinates along the dimension.
+ */
+void MRS_update_dimension_coordinates(MRS_dimension *dimension, int count,
+                                      double coordinates_offset, double increment);
+
+/**
+ * @brief Update the rotor angle of the events within the MRS dimension in place.
+ *
+ * The event plans are updated with MRS_plan_update_from_rotor_angle_in_rad(). An
+ * in-place update is not possible when the events sharing a plan are assigned different
+ * rotor angles. In this case, the dimension is left unchanged and must be re-created.
+ *
+ * @param dimension The pointer to the MRS_dimension struct.
+ * @param rotor_angle_in_rad Pointer to the rotor angle array of the events.
+ * @return The number of updated plans, or -1 if the dimension must be re-created.
+ */
+int MRS_update_dimension_rotor_angles(MRS_dimension *dimension,
+                                      double *rotor_angle_in_rad);
+
+/**
+ * @brief Free the memory allocation for the MRS dimensions, including the events and
+ * the array of dimensions.
  *
  * @param dimensions The pointer to an array of MRS_dimension structs.
  * @param	n An interger defining the number of MRS_dimension structs in `dimensions`.
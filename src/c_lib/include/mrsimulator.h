@@ -73,6 +73,8 @@ struct MRS_plan {
   complex128 *pre_phase_2;     // buffer for 2nk rank sideband phase calculation.
   complex128 *pre_phase_4;     // buffer for 4th rank sideband phase calculation.
   double buffer;               // buffer for temporary storage.
+  double isotropic_amplitude;  // centerband amplitude of an isotropic spin system.
+  unsigned int ref_count;      // # of owners holding a reference to the plan.
 };
 
 typedef struct MRS_plan MRS_plan;
@@ -97,12 +99,22 @@ MRS_plan *MRS_create_plan(MRS_averaging_scheme *scheme,
                           bool allow_fourth_rank);
 
 /**
- * @brief Release the memory allocated for the given mrsimulator plan.
+ * @brief Release the memory allocated for the given mrsimulator plan, including the
+ * plan struct, regardless of the references held to the plan.
  *
  * @param plan The pointer to the MRS_plan.
  */
 void MRS_free_plan(MRS_plan *plan);
 
+/**
+ * @brief Release a reference to the mrsimulator plan. The plan is freed when the last
+ * reference is released. A new plan holds one reference, and the events sharing a plan
+ * hold one reference each.
+ *
+ * @param plan The pointer to the MRS_plan.
+ */
+void MRS_release_plan(MRS_plan *plan);
+
 /* Update the MRS plan when sample rotation frequency is changed. */
 void MRS_plan_update_from_sample_rotation_frequency_in_Hz(
     MRS_plan *plan, double increment, double sample_rotation_frequency_in_Hz);
@@ -113,16 +125,18 @@ void MRS_plan_update_from_rotor_angle_in_rad(MRS_plan *plan, double rotor_angle_
 
 /**
  * Free the memory from the mrsimulator plan associated with the wigner
- * d^l_{m,0}(rotor_angle_in_rad) vectors. Here, l=2 or 4.
+ * d^l_{m,0}(rotor_angle_in_rad) vectors, here, l=2 or 4, and the pre_phase_2 and
+ * pre_phase_4 sideband phase multipliers.
  */
 void MRS_plan_free_rotor_angle_in_rad(MRS_plan *plan);
 
 /**
  * @brief Return a copy of the mrsimulator plan.
  *
+ * The copy owns its buffers and tables, and holds a single reference.
+ *
  * @param plan The pointer to the plan to be copied.
  * @return MRS_plan = A pointer to the copied plan.
- * This function is incomplete.
  */
 MRS_plan *MRS_copy_plan(MRS_plan *plan);
 
@@ -140,11 +154,13 @@ MRS_plan *MRS_copy_plan(MRS_plan *plan);
  *            MRS_averaging_scheme.
  * @param plan A pointer to the mrsimulator plan of type MRS_plan.
  * @param fftw_scheme A pointer to the fftw scheme of type MRS_fftw_scheme.
+ * @param workspace A pointer to the workspace of type MRS_workspace.
  * @param refresh If true, zero the output array before proceeding, else add to
  *            the existing array.
  */
 void MRS_get_amplitudes_from_plan(MRS_averaging_scheme *scheme, MRS_plan *plan,
-                                  MRS_fftw_scheme *fftw_scheme, bool refresh);
+                                  MRS_fftw_scheme *fftw_scheme,
+                                  MRS_workspace *workspace, bool refresh);
 
 // Important: `method.h` header file must be included after defining MRS_plan.
 #include "method.h"
@@ -157,6 +173,7 @@ void MRS_get_amplitudes_from_plan(MRS_averaging_scheme *scheme, MRS_plan *plan,
  * @param scheme The pointer to the powder averaging scheme of type
  *      MRS_averaging_scheme.
  * @param plan A pointer to the mrsimulator plan of type MRS_plan.
+ * @param workspace A pointer to the workspace of type MRS_workspace.
  * @param R0 The irreducible zeroth-rank frequency component.
  * @param R2 A pointer to an array of second-rank frequency components. The frequency
  *      components are the product of the size of interaction, spatial symmetry
@@ -171,10 +188,35 @@ void MRS_get_amplitudes_from_plan(MRS_averaging_scheme *scheme, MRS_plan *plan,
  * @param fraction A float representing the fraction of dimension during an event.
  */
 void MRS_get_normalized_frequencies_from_plan(MRS_averaging_scheme *scheme,
-                                              MRS_plan *plan, double R0, complex128 *R2,
+                                              MRS_plan *plan, MRS_workspace *workspace,
+                                              double R0, complex128 *R2,
                                               complex128 *R4, bool refresh,
                                               MRS_dimension *dim, double fraction);
 
+/**
+ * @brief Set the tensor basis of a spin system on the workspace. The second- and
+ * fourth-rank tensors of the transitions of a spin system are linear combinations of a
+ * few site and coupling tensors. The orthonormal basis spanning the tensors is rotated
+ * over all orientations once, after which
+ * MRS_get_normalized_frequencies_from_plan() evaluates the rotated tensors of every
+ * transition as a linear combination of the rotated basis tensors. The basis of a rank
+ * is only set when it is cheaper than rotating the tensors of every transition.
+ *
+ * @param scheme The pointer to the powder averaging scheme of type
+ *      MRS_averaging_scheme.
+ * @param workspace A pointer to the workspace of type MRS_workspace.
+ * @param n_octants The number of octants of the plans using the workspace.
+ * @param n_tensors The number of tensors, one per transition and event.
+ * @param R2 A pointer to the second-rank tensors, a complex128 array of shape
+ *      `n_tensors x 5`.
+ * @param R4 A pointer to the fourth-rank tensors, a complex128 array of shape
+ *      `n_tensors x 9`, or NULL to skip the fourth-rank basis.
+ */
+void MRS_set_workspace_tensor_basis(MRS_averaging_scheme *scheme,
+                                    MRS_workspace *workspace, unsigned int n_octants,
+                                    unsigned int n_tensors, complex128 *R2,
+                                    complex128 *R4);
+
 void MRS_get_frequencies_from_plan(MRS_averaging_scheme *scheme, MRS_plan *plan,
                                    double R0, complex128 *R2, complex128 *R4,
                                    bool refresh, MRS_dimension *dim);
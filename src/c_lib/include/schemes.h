@@ -27,30 +27,44 @@
  * n_2, \beta_i)@f$, and fourth-rank, @f$d^4(n_1, n_2, \beta_i)@f$, matrices at every
  * orientation angle @f$\beta_i@f$,
  *   - pre-calculating the exponent, @f$\exp(-im\alpha_i)@f$, at every azimuthal angle,
- *     @f$\alpha_i@f$ and for @f$m \in [-4, 0]@f$, and
- *   - allocating buffers for storing and computing frequencies.
+ *     @f$\alpha_i@f$ and for @f$m \in [-4, 0]@f$.
  *
  * Creating a new orientation averaging scheme adds an overhead to the computation. Once
  * created, however, the scheme may be re-used for as long as required. This is
  * especially efficient when performing a batch simulation, such as simulations from
- * thousands of sites.
+ * thousands of sites. The scheme is read-only during a simulation, and may be shared
+ * between threads. The buffers for computing frequencies are held by MRS_workspace.
  */
 typedef struct MRS_averaging_scheme {
   unsigned int total_orientations; /**< The total number of orientations. */
 
   /** \privatesection */
-  unsigned int integration_density;  //  # triangles along the edge of the octahedron.
-  unsigned int integration_volume;   //  0-octant, 1-hemisphere, 2-sphere.
+  unsigned int integration_density;  //  # triangles along the edge, 0 if no mesh.
+  unsigned int integration_volume;   //  0-octant, 1-hemisphere, 2-sphere, 3-meridian,
+                                     //  4-analytic.
   unsigned int octant_orientations;  //  # unique orientations on the face of an octant.
   double *amplitudes;                //  array of amplitude scaling per orientation.
   complex128 *exp_Im_alpha;          //  array of cos_alpha per orientation.
-  complex128 *w2;                    //  buffer for 2nd rank frequency calculation.
-  complex128 *w4;                    //  buffer for 4nd rank frequency calculation.
   double *wigner_2j_matrices;        //  wigner-d 2j matrix per orientation.
   double *wigner_4j_matrices;        //  wigner-d 4j matrix per orientation.
   bool allow_fourth_rank;  //  If true, compute wigner matrices for wigner-d 4j.
+  unsigned int ref_count;  //  # of owners holding a reference to the scheme.
 } MRS_averaging_scheme;
 
+/**
+ * @struct MRS_averaging_scheme_cache_info
+ * Counters describing the state of the process-wide averaging scheme cache.
+ */
+typedef struct MRS_averaging_scheme_cache_info {
+  unsigned int entries;    /**< The number of schemes held in the cache. */
+  size_t nbytes;           /**< The memory held by the cached schemes in bytes. */
+  size_t max_nbytes;       /**< The memory limit of the cache in bytes. */
+  unsigned long hits;      /**< The number of requests served from memory. */
+  unsigned long disk_hits; /**< The number of requests served from the disk tier. */
+  unsigned long misses;    /**< The number of requests that created a new scheme. */
+  unsigned long evictions; /**< The number of schemes evicted from the cache. */
+} MRS_averaging_scheme_cache_info;
+
 // typedef struct MRS_averaging_scheme;
 
 /**
@@ -67,7 +81,14 @@ typedef struct MRS_averaging_scheme {
  *
  * @param allow_fourth_rank If true, the scheme also calculates matrices for fourth-rank
  * tensors.
- * @param integration_volume An enumeration. 0=octant, 1=hemisphere
+ * @param integration_volume An enumeration. 0=octant, 1=hemisphere, 3=meridian,
+ * 4=analytic. The meridian scheme holds `4 x integration_density + 1` orientations at
+ * α = 0, equally spaced in β from 0 to π/2, for the spin systems whose frequencies only
+ * depend on β. Its frequencies are interpolated over the segments between adjacent
+ * orientations. The analytic scheme holds the nine orientations at α = 0, π/4, and
+ * π/2, and cos²(β) = 0, 1/2, and 1, for the static spectra of the spin systems whose
+ * tensors share a principal axis system. Its frequencies are integrated analytically
+ * along β at no fewer than `integration_density` nodes of α.
  */
 MRS_averaging_scheme *MRS_create_averaging_scheme(unsigned int integration_density,
                                                   bool allow_fourth_rank,
@@ -76,6 +97,12 @@ MRS_averaging_scheme *MRS_create_averaging_scheme(unsigned int integration_densi
 /**
  * Create a new orientation averaging scheme from given alpha and beta.
  *
+ * The orientations, for example, from the ZCW or REPULSION quadratures, have no
+ * triangle mesh. The scheme has a zero `integration_density`, and the frequencies of
+ * its orientations are binned onto the spectrum instead of interpolated. The weights
+ * are copied and normalized to the scale of the octahedral schemes. The scheme is not
+ * cached, and is freed with MRS_release_averaging_scheme().
+ *
  * @param alpha A pointer to an array of size `n_angles` holding the alpha values of
  * type double.
  * @param beta A pointer to an array of size `n_angles` holding the beta values of type
@@ -98,6 +125,64 @@ MRS_averaging_scheme *MRS_create_averaging_scheme_from_alpha_beta(
  */
 void MRS_free_averaging_scheme(MRS_averaging_scheme *scheme);
 
+/**
+ * Return the number of bytes held by the averaging scheme.
+ *
+ * @param scheme A pointer to the MRS_averaging_scheme.
+ */
+size_t MRS_averaging_scheme_nbytes(MRS_averaging_scheme *scheme);
+
+/**
+ * Get an orientation averaging scheme from the process-wide scheme cache.
+ *
+ * The cache is keyed on the `integration_density`, `allow_fourth_rank`, and
+ * `integration_volume` arguments. When a matching scheme exists, the scheme is shared,
+ * otherwise, the scheme is loaded from the on-disk tier, if enabled, or created. Every
+ * scheme returned from this function must be handed back with
+ * MRS_release_averaging_scheme(). The cache is not thread-safe; call the cache
+ * functions from a single thread at a time.
+ *
+ * @param integration_density The number of triangles along the edge of an octahedron.
+ * @param allow_fourth_rank If true, the scheme also calculates matrices for fourth-rank
+ * tensors.
+ * @param integration_volume An enumeration. 0=octant, 1=hemisphere, 3=meridian,
+ * 4=analytic
+ */
+MRS_averaging_scheme *MRS_get_averaging_scheme(unsigned int integration_density,
+                                               bool allow_fourth_rank,
+                                               unsigned int integration_volume);
+
+/**
+ * Release a reference to the averaging scheme. The scheme is freed when the last
+ * reference is released. Cached schemes stay in memory, for re-use, until evicted.
+ *
+ * @param scheme A pointer to the MRS_averaging_scheme.
+ */
+void MRS_release_averaging_scheme(MRS_averaging_scheme *scheme);
+
+/**
+ * Set the memory limit of the averaging scheme cache. The least recently used schemes,
+ * which are no longer referenced, are evicted until the cache fits within the limit.
+ *
+ * @param max_nbytes The memory limit in bytes.
+ */
+void MRS_set_averaging_scheme_cache_limit(size_t max_nbytes);
+
+/**
+ * Set the directory of the on-disk tier of the averaging scheme cache. The schemes
+ * missing from memory are first looked up from this directory, and newly created
+ * schemes are written to it. A NULL or an empty directory disables the on-disk tier.
+ *
+ * @param directory A path to an existing directory.
+ */
+void MRS_set_averaging_scheme_cache_directory(const char *directory);
+
+/** Evict every scheme, which is no longer referenced, from the cache. */
+void MRS_clear_averaging_scheme_cache();
+
+/** Return the counters of the averaging scheme cache. */
+MRS_averaging_scheme_cache_info MRS_get_averaging_scheme_cache_info();
+
 #endif  // averaging_scheme_h
 
 #ifndef fftw_scheme_h
@@ -105,16 +190,212 @@ void MRS_free_averaging_scheme(MRS_averaging_scheme *scheme);
 #include "fftw3.h"
 
 typedef struct MRS_fftw_scheme {
+  unsigned int n_threads; /**< The number of threads of the fftw plan. */
+  bool single_precision;  /**< If true, the sideband transform in single precision. */
+
   /** \privatesection */
   /** The buffer to hold the sideband amplitudes as stride 2 array after mrsimulator
    * processing. */
   fftw_complex *vector;     // holds the amplitude of sidebands.
   fftw_plan the_fftw_plan;  //  The plan for fftw routine.
+
+  /** The single precision buffer and plan. */
+  fftwf_complex *vector_f;    // holds the amplitude of sidebands in single precision.
+  fftwf_plan the_fftwf_plan;  // The plan for the single precision fftw routine.
 } MRS_fftw_scheme;
 
+/** Return true if the library is compiled with the threaded fftw. */
+bool MRS_fftw_threads_enabled();
+
+/**
+ * Opt-in to the threaded fftw for the sideband transforms with at least `min_size`
+ * complex values. The setting applies to the fftw schemes created afterwards, and is
+ * ignored unless the library is compiled with the threaded fftw (USE_FFTW_THREADS).
+ *
+ * @param n_threads The maximum number of fftw threads. Use 1 to disable.
+ * @param min_size The minimum size, total_orientations x number_of_sidebands, of a
+ *      threaded transform.
+ */
+void MRS_set_fftw_threads(unsigned int n_threads, unsigned int min_size);
+
+/**
+ * Return the number of fftw threads for a transform of the given size, limited to at
+ * most `max_threads`, the number of cores available to the caller.
+ */
+unsigned int MRS_get_fftw_threads(unsigned int size, unsigned int max_threads);
+
+/**
+ * Create the fftw scheme for the sideband transforms over all orientations.
+ *
+ * @param total_orientations The total number of orientations.
+ * @param number_of_sidebands The number of sidebands.
+ * @param planner The fftw planner effort, 0-estimate, 1-measure, and 2-patient. The
+ *      plans from the measure and patient planners are re-used from the fftw wisdom.
+ * @param n_threads The number of threads of the fftw plan, from MRS_get_fftw_threads.
+ */
 MRS_fftw_scheme *create_fftw_scheme(unsigned int total_orientations,
-                                    unsigned int number_of_sidebands);
+                                    unsigned int number_of_sidebands,
+                                    unsigned int planner, unsigned int n_threads);
+
+/**
+ * Create the single precision fftw scheme for the sideband transforms over all
+ * orientations. The sideband phases, exponents, and transforms are evaluated in single
+ * precision, and the single precision transforms are not threaded.
+ *
+ * @param total_orientations The total number of orientations.
+ * @param number_of_sidebands The number of sidebands.
+ * @param planner The fftw planner effort, 0-estimate, 1-measure, and 2-patient.
+ */
+MRS_fftw_scheme *create_fftwf_scheme(unsigned int total_orientations,
+                                     unsigned int number_of_sidebands,
+                                     unsigned int planner);
 
+/**
+ * Free the fftw plan, the buffers, and the fftw scheme.
+ *
+ * @param fftw_scheme A pointer to the MRS_fftw_scheme.
+ */
 void MRS_free_fftw_scheme(MRS_fftw_scheme *fftw_scheme);
 
 #endif  // fftw_scheme_h
+
+#ifndef workspace_h
+#define workspace_h
+
+/**
+ * The scratch buffers of the workspace arena. Every buffer is allocated on first use,
+ * grown when a larger buffer is requested, and re-used by all later simulations with
+ * the workspace.
+ */
+typedef enum MRS_workspace_buffer {
+  MRS_BUFFER_SPECTRUM,          //  the spectrum of a spin system.
+  MRS_BUFFER_PATHWAY_SPECTRUM,  //  the spectrum of a merged transition pathway.
+  MRS_BUFFER_MULTIPLICITY,      //  the multiplicities of the transition pathways.
+  MRS_BUFFER_COMPONENTS,        //  the R0, R2, and R4 components of the pathways.
+  MRS_BUFFER_PATHWAY_KEYS,      //  the packed components of the pathways.
+  MRS_BUFFER_PATHWAY_TABLE,     //  the hash table of the pathways.
+  MRS_BUFFER_AMPLITUDES,        //  the sideband amplitudes of the two dimensions.
+  MRS_BUFFER_ORDERS,            //  the sideband orders in the window.
+  MRS_BUFFER_PAIRS,             //  the pairs of sideband orders in the window.
+  MRS_BUFFER_TRIANGLES,         //  the triangles of two levels of the refinement.
+  MRS_BUFFER_REFINEMENT,        //  the orientations of a level of the refinement.
+  MRS_WORKSPACE_BUFFERS         //  the number of buffers.
+} MRS_workspace_buffer;
+
+/**
+ * @struct MRS_refinement
+ * The adaptive refinement of the octahedron triangles. The triangles whose frequencies
+ * spread over more than a bin, or deviate from the linear interpolation, are subdivided
+ * into four, up to `depth` times, at the frequencies evaluated at the midpoints of
+ * their edges.
+ */
+typedef struct MRS_refinement {
+  unsigned int depth; /**< The maximum number of subdivisions, 0 for no refinement. */
+
+  unsigned long long triangles;    /**< The number of subdivided triangles. */
+  unsigned long long orientations; /**< The number of evaluated midpoints. */
+
+  /** \privatesection */
+  complex128 R2[5];  //  the 2nd rank tensor of the dimension, in the frequency units.
+  complex128 R4[9];  //  the 4th rank tensor of the dimension, in the frequency units.
+  bool fourth_rank;  //  if true, the 4th rank tensor is live.
+} MRS_refinement;
+
+/**
+ * @struct MRS_workspace
+ * The buffers for computing the frequencies over all orientations of an averaging
+ * scheme. Unlike the averaging scheme, a workspace is modified during a simulation.
+ * Concurrent simulations, sharing an averaging scheme, must use separate workspaces.
+ */
+typedef struct MRS_workspace {
+  unsigned int n_threads; /**< The number of threads within a simulation. */
+
+  /** The number of sideband orders (1D) or pairs of orders (2D) interpolated, and
+   * skipped for falling outside the spectral window, over the workspace lifetime. */
+  unsigned long long sidebands_interpolated;
+  unsigned long long sidebands_skipped;
+
+  /** The number of transition pathways simulated, and merged into a simulated pathway
+   * with identical frequency components, over the workspace lifetime. */
+  unsigned long long pathways_simulated;
+  unsigned long long pathways_merged;
+
+  /** The amplitude culling of the interpolated triangles. The triangles are culled
+   * when the relative cutoff is positive. */
+  MRS_culling culling;
+
+  /** The adaptive refinement of the triangles of the static spectra. */
+  MRS_refinement refinement;
+
+  /** The interpolation of the triangles of the two-dimensional spectra, where 0 is the
+   * tent strips, and 1 is the area-exact rasterization. */
+  unsigned int rasterization;
+
+  /** \privatesection */
+  complex128 *w2;              //  buffer for 2nd rank frequency calculation.
+  complex128 *w4;              //  buffer for 4nd rank frequency calculation.
+  bool fourth_rank;            //  if true, the 4th rank tensors of the event are live.
+  unsigned int n_basis2;       //  # of 2nd rank basis tensors of the spin system.
+  unsigned int n_basis4;       //  # of 4th rank basis tensors of the spin system.
+  double basis2[50];           //  orthonormal 2nd rank basis tensors, 5 x 10 doubles.
+  double basis4[162];          //  orthonormal 4th rank basis tensors, 9 x 18 doubles.
+  complex128 *basis_w2;        //  the 2nd rank basis tensors rotated to rotor frame.
+  complex128 *basis_w4;        //  the 4th rank basis tensors rotated to rotor frame.
+  double *thread_frequencies;  //  per-thread buffer for the frequencies and amplitudes.
+  double *thread_spectra;      //  per-thread buffer for the spectrum.
+  unsigned int spectrum_size;  //  size of the spectrum in thread_spectra per thread.
+  void *buffers[MRS_WORKSPACE_BUFFERS];         //  the scratch buffers of the arena.
+  size_t buffer_nbytes[MRS_WORKSPACE_BUFFERS];  //  the size of the scratch buffers.
+} MRS_workspace;
+
+/**
+ * Create a new workspace for simulations with the given averaging scheme.
+ *
+ * @param scheme A pointer to the MRS_averaging_scheme.
+ */
+MRS_workspace *MRS_create_workspace(MRS_averaging_scheme *scheme);
+
+/**
+ * Free the memory allocated for the workspace.
+ *
+ * @param workspace A pointer to the MRS_workspace.
+ */
+void MRS_free_workspace(MRS_workspace *workspace);
+
+/**
+ * Set the number of threads within a simulation. When compiled with OpenMP and
+ * `n_threads` is greater than one, the sidebands and octants are interpolated in
+ * parallel over separate per-thread spectra, which are then summed in thread order.
+ *
+ * @param workspace A pointer to the MRS_workspace.
+ * @param scheme A pointer to the MRS_averaging_scheme used with the workspace.
+ * @param n_threads The number of threads.
+ */
+void MRS_set_workspace_threads(MRS_workspace *workspace, MRS_averaging_scheme *scheme,
+                               unsigned int n_threads);
+
+/**
+ * Return the per-thread spectrum buffers of the workspace, each of length `size`, and
+ * all set to zero.
+ *
+ * @param workspace A pointer to the MRS_workspace.
+ * @param size The number of points in the spectrum.
+ */
+double *MRS_get_workspace_thread_spectra(MRS_workspace *workspace, unsigned int size);
+
+/**
+ * Return a scratch buffer from the workspace arena of at least `nbytes` bytes. The
+ * content of the buffer is undefined, and is only valid until the next request of the
+ * same buffer.
+ *
+ * @param workspace A pointer to the MRS_workspace.
+ * @param buffer The scratch buffer of type MRS_workspace_buffer.
+ * @param nbytes The minimum size of the buffer in bytes.
+ */
+void *MRS_get_workspace_buffer(MRS_workspace *workspace, MRS_workspace_buffer buffer,
+                               size_t nbytes);
+
+/** Return true if the library is compiled with OpenMP. */
+bool MRS_openmp_enabled(void);
+
+#endif  // workspace_h
@@ -50,6 +50,7 @@ extern void __mrsimulator_core(
     MRS_dimension *dimensions,     // Pointer to MRS_dimension structure.
     MRS_fftw_scheme *fftw_scheme,  // Pointer to the fftw scheme.
     MRS_averaging_scheme *scheme,  // Pointer to the powder averaging scheme.
+    MRS_workspace *workspace,      // Pointer to the workspace buffers.
     bool interpolation,            // If true, perform a 1D interpolation.
 
     /**
@@ -69,3 +70,52 @@ extern void __mrsimulator_core(
     bool *freq_contrib,
     double *affine_matrix  // Affine transformation matrix.
 );
+
+/**
+ * Simulate the spectra from a batch of spin systems.
+ *
+ * The spin systems are given as arrays of site_struct and coupling_struct, one per spin
+ * system, and the transition pathways of all spin systems are packed into a single
+ * array. The function does not call into python, and is safe to call without the GIL.
+ * Concurrent calls must use separate dimensions, fftw scheme, and workspace, whereas
+ * the averaging scheme is read-only and may be shared.
+ */
+extern void __mrsimulator_batch(
+    double *spec,                 // Pointer to the spectrum array.
+    bool decompose_spectrum,      // If true, store the spectrum per spin system.
+    unsigned int n_spin_systems,  // The number of spin systems.
+    site_struct *sites,           // Pointer to the sites, one per spin system.
+    coupling_struct *couplings,   // Pointer to the couplings, one per spin system.
+    float *transition_pathways,   // Pointer to the packed transition pathways.
+    unsigned int *pathway_offset,  // The offset of the pathways per spin system.
+    unsigned int *pathway_count,   // The number of pathways per spin system.
+    double *weights,               // The spectrum scaling factor per spin system.
+    int n_dimension,               // The total number of spectroscopic dimensions.
+    MRS_dimension *dimensions,     // Pointer to MRS_dimension structure.
+    MRS_fftw_scheme *fftw_scheme,  // Pointer to the fftw scheme.
+    MRS_averaging_scheme *scheme,  // Pointer to the powder averaging scheme.
+    MRS_workspace *workspace,      // Pointer to the workspace buffers.
+    bool interpolation,            // If true, perform a 1D interpolation.
+    bool *freq_contrib,            // The pointer to freq contribs boolean.
+    double *affine_matrix          // Affine transformation matrix.
+);
+
+/**
+ * Evaluate an upper bound of the anisotropic frequency, in Hz, of every spin system
+ * and event, over all transition pathways. The bound is evaluated from the norm of the
+ * second- and fourth-rank frequency components, which are invariant under rotation,
+ * and is used to estimate the number of sidebands required for a simulation.
+ */
+extern void __mrsimulator_anisotropy(
+    double *anisotropy,  // The bound of shape (n_spin_systems, n_events).
+    unsigned int n_spin_systems,  // The number of spin systems.
+    site_struct *sites,           // Pointer to the sites, one per spin system.
+    coupling_struct *couplings,   // Pointer to the couplings, one per spin system.
+    float *transition_pathways,   // Pointer to the packed transition pathways.
+    unsigned int *pathway_offset,  // The offset of the pathways per spin system.
+    unsigned int *pathway_count,   // The number of pathways per spin system.
+    unsigned int n_events,         // The total number of events.
+    double *magnetic_flux_density_in_T,  // The magnetic flux density per event.
+    bool allow_fourth_rank,              // If true, include the 4th rank components.
+    bool *freq_contrib                   // The pointer to freq contribs boolean.
+);
@@ -1,14 +1,25 @@
 #ifndef __tables__
 #define __tables__
 
+/**
+ * The evaluation of the sines and cosines of the vm routines. MRS_TRIG_TABLE linearly
+ * interpolates the cos_table and sin_table lookup tables, and MRS_TRIG_POLYNOMIAL
+ * evaluates the range-reduced polynomials of vm_sincos_polynomial(). The default is
+ * the lookup table, unless compiled with MRS_TRIG_POLYNOMIAL_DEFAULT.
+ */
+#define MRS_TRIG_TABLE 0
+#define MRS_TRIG_POLYNOMIAL 1
+
 double cos_table[62833];
 double sin_table[62833];
 double table_precision_inverse;
+int trig_method;
 
 static inline void generate_table() {
   extern double cos_table[62833];
   extern double sin_table[62833];
   extern double table_precision_inverse;
+  extern int trig_method;
 
   int i, n = 62833;
   double precision = 0.0001;
@@ -21,6 +32,25 @@ static inline void generate_table() {
 
   cos_table[n - 1] = 1.0;
   sin_table[n - 1] = 0.0;
+
+#ifdef MRS_TRIG_POLYNOMIAL_DEFAULT
+  trig_method = MRS_TRIG_POLYNOMIAL;
+#else
+  trig_method = MRS_TRIG_TABLE;
+#endif
+}
+
+/** Select the evaluation of the sines and cosines, MRS_TRIG_TABLE or
+ * MRS_TRIG_POLYNOMIAL. */
+static inline void MRS_set_trig_method(int method) {
+  extern int trig_method;
+  trig_method = (method == MRS_TRIG_POLYNOMIAL) ? MRS_TRIG_POLYNOMIAL : MRS_TRIG_TABLE;
+}
+
+/** Return the evaluation of the sines and cosines. */
+static inline int MRS_get_trig_method() {
+  extern int trig_method;
+  return trig_method;
 }
 
 #endif /* __tables__ */
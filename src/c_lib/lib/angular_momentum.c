@@ -8,9 +8,6 @@
 
 #include "angular_momentum.h"
 
-complex128 IOTA = {0.0, 1.0};
-complex128 NEGATIVE_IOTA = {0.0, -1.0};
-
 /* calculate Wigner rotation matrices */
 
 /* This routine calculates the factorial of x */
@@ -527,7 +524,7 @@ void __wigner_rotation_2(const int l, const int n, const double *wigner,
   int orientation, two_l_pm, two_l_mm;
   int n1 = 2 * l + 1, m, mp, two_l = 2 * l, two_n1 = 2 * n1;
   double S1, S2, S3, *temp, scale;
-  double *temp_initial_vector = malloc_double(two_n1);
+  double temp_initial_vector[18];  // up to the fourth-rank, l = 4.
 
   // Spherical tensor symmetry relations.
   // Y_{l, m} = (-1)^m Y_{l,-m}(conj)           (1)
@@ -589,7 +586,6 @@ void __wigner_rotation_2(const int l, const int n, const double *wigner,
       R_out_ += 2;
     }
   }
-  free(temp_initial_vector);
 }
 
 // ✅ .. note: (wigner_dm0_vector) monitored with pytest .....................
@@ -756,10 +752,9 @@ void single_wigner_rotation(const int l, const double *euler_angles, const void
   double *R_in_ = (double *)R_in;
   double *R_out_ = (double *)R_out;
 
-  int n1 = 2 * l + 1, n2 = n1 * n1, m, mp, k, two_l = 2 * l, two_n1 = 2 * n1;
+  int n1 = 2 * l + 1, m, mp, k, two_l = 2 * l, two_n1 = 2 * n1;
   double real, imag, copy_real = 0.0, copy_imag = 0.0, a, b, c, d;
-  double *wigner = malloc_double(n2);
-  double *temp_initial_vector = malloc_double(two_n1);
+  double wigner[81], temp_initial_vector[18];  // up to the fourth-rank, l = 4.
 
   // get wigner matrix corresponding to beta angle
   wigner_d_matrices(l, 1, &euler_angles[1], wigner);
@@ -819,8 +814,6 @@ void single_wigner_rotation(const int l, const double *euler_angles, const void
       R_out_[m + 1] += wigner[k++] * temp_initial_vector[mp + 1];
     }
   }
-  free(wigner);
-  free(temp_initial_vector);
 
   real = cos(euler_angles[2]);
   imag = sin(euler_angles[2]);
@@ -850,6 +843,19 @@ void single_wigner_rotation(const int l, const double *euler_angles, const void
   }
 }
 
+// Multiply the R[-m] components of the rank l tensor, R, by (-i)^m, for m = 1 to l.
+static inline void __step_alpha_by_quarter_turn(const int l, complex128 *R) {
+  int m, k;
+  double real;
+  for (m = 1; m <= l; m++) {
+    for (k = 0; k < m; k++) {
+      real = R[l - m][0];
+      R[l - m][0] = R[l - m][1];
+      R[l - m][1] = -real;
+    }
+  }
+}
+
 /**
  * ❌ Performs wigner rotations on a batch of wigner matrices and initial tensor
  * orientation. The wigner matrices corresponds to the beta orientations. The
@@ -885,6 +891,10 @@ void __batch_wigner_rotation(const unsigned int octant_orientations,
                              complex128 *R2, double *wigner_4j_matrices, complex128 *R4,
                              complex128 *exp_Im_alpha, complex128 *w2, complex128 *w4) {
   unsigned int j, wigner_2j_inc, wigner_4j_inc, w2_increment, w4_increment;
+  complex128 R2_[5], R4_[9];
+
+  memcpy(R2_, R2, 5 * sizeof(complex128));
+  if (w4 != NULL) memcpy(R4_, R4, 9 * sizeof(complex128));
 
   w2_increment = 3 * octant_orientations;
   wigner_2j_inc = 5 * w2_increment;  // equal to 5 x 3 x octant_orientations;
@@ -895,22 +905,22 @@ void __batch_wigner_rotation(const unsigned int octant_orientations,
 
   for (j = 0; j < n_octants; j++) {
     /* Second-rank Wigner rotation from crystal/common frame to rotor frame. */
-    __wigner_rotation_2(2, octant_orientations, wigner_2j_matrices, exp_Im_alpha, R2,
+    __wigner_rotation_2(2, octant_orientations, wigner_2j_matrices, exp_Im_alpha, R2_,
                         w2);
     w2 += w2_increment;
     if (n_octants == 8) {
       __wigner_rotation_2(2, octant_orientations, &wigner_2j_matrices[wigner_2j_inc],
-                          exp_Im_alpha, R2, w2);
+                          exp_Im_alpha, R2_, w2);
       w2 += w2_increment;
     }
     if (w4 != NULL) {
       /* Fourth-rank Wigner rotation from crystal/common frame to rotor frame. */
-      __wigner_rotation_2(4, octant_orientations, wigner_4j_matrices, exp_Im_alpha, R4,
+      __wigner_rotation_2(4, octant_orientations, wigner_4j_matrices, exp_Im_alpha, R4_,
                           w4);
       w4 += w4_increment;
       if (n_octants == 8) {
         __wigner_rotation_2(4, octant_orientations, &wigner_4j_matrices[wigner_4j_inc],
-                            exp_Im_alpha, R4, w4);
+                            exp_Im_alpha, R4_, w4);
         w4 += w4_increment;
       }
     }
@@ -920,34 +930,18 @@ void __batch_wigner_rotation(const unsigned int octant_orientations,
      *
      * Stepping the alpha phase by π/2.
      *
-     * The array exp_Im_alpha is a two-dimensional array of shape
-     * `4 x number_of_sidebands`, where
+     * The rotation multiplies the R[-m] component of the tensor by exp(-I m alpha),
+     * read from the exp_Im_alpha array. When alpha += π/2,
      *
-     * exp_Im_alpha[m, :] = exp(I (4-m) alpha) for m=[0, 1, 2, 3]. When alpha += π/2
+     *    exp(-I m alpha) * exp(-I m π/2) = (-i)^m exp(-I m alpha),
      *
-     *    exp_Im_alpha[0, :] = exp(I 4alpha) * exp(I 4π/2) = exp(I 4alpha)
-     *    exp_Im_alpha[0, :] *= 1
-     *
-     *    exp_Im_alpha[1, :] = exp(I 3alpha) * exp(I 3π/2) = -i exp(I 3alpha)
-     *    exp_Im_alpha[1, :] *= -I
-     *
-     *    exp_Im_alpha[2, :] = exp(I 2alpha) * exp(I 2π/2) = -1 exp(I 2alpha)
-     *    exp_Im_alpha[2, :] *= -1
-     *
-     *    exp_Im_alpha[3, :] = exp(I 1alpha) * exp(I 1π/2) = i exp(I 1alpha)
-     *    exp_Im_alpha[3, :] *= I
-     *
-     * After four iterations, exp_Im_alpha restores to its original value.
+     * so the (-i)^m factor is applied to the local copies of R2 and R4 instead. The
+     * exp_Im_alpha array is shared by all the workspaces of a cached averaging scheme,
+     * and is only read here.
      */
     if (n_octants != 1) {
-      cblas_zscal(octant_orientations, (double *)NEGATIVE_IOTA,
-                  &(((double *)exp_Im_alpha)[6 * octant_orientations]), 1);
-      cblas_zdscal(octant_orientations, -1,
-                   &(((double *)exp_Im_alpha)[4 * octant_orientations]), 1);
-      if (w4 != NULL) {
-        cblas_zscal(octant_orientations, (double *)IOTA,
-                    &(((double *)exp_Im_alpha)[2 * octant_orientations]), 1);
-      }
+      __step_alpha_by_quarter_turn(2, R2_);
+      if (w4 != NULL) __step_alpha_by_quarter_turn(4, R4_);
     }
   }
 }
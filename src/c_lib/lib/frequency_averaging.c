@@ -9,6 +9,10 @@
 
 #include "frequency_averaging.h"
 
+#ifdef _OPENMP
+#include <omp.h>
+#endif
+
 // Multiply the amplitudes from each event to the amplitudes from the first event.
 static inline void __get_multi_event_amplitudes(int n_events, MRS_event *restrict event,
                                                 int size) {
@@ -20,18 +24,471 @@ static inline void __get_multi_event_amplitudes(int n_events, MRS_event *restric
   }
 }
 
+// Add the per-thread spectra to the spectrum in thread order.
+static inline void __reduce_thread_spectra(unsigned int n_threads, int size,
+                                           double *thread_spectra, double *spec) {
+  unsigned int thread;
+  for (thread = 0; thread < n_threads; thread++) {
+    cblas_daxpy(size, 1.0, &thread_spectra[thread * size], 1, spec, 1);
+  }
+}
+
+// Set the culling threshold from the largest vertex amplitude, where the amplitude of a
+// triangle is the sum of its three vertex amplitudes. Return NULL when the culling is
+// disabled.
+static inline MRS_culling *__set_culling_threshold(MRS_workspace *workspace,
+                                                   double max_amplitude) {
+  if (workspace->culling.cutoff <= 0.0) return NULL;
+  workspace->culling.threshold = 3.0 * workspace->culling.cutoff * max_amplitude;
+  return &workspace->culling;
+}
+
+// The largest absolute amplitude.
+static inline double __max_amplitude(int size, double *amp) {
+  return fabs(amp[cblas_idamax(size, amp, 1)]);
+}
+
+#ifdef _OPENMP
+// Add the culling counts of a thread to the culling counts of the workspace.
+static inline void __reduce_culling(MRS_culling *culling_t, MRS_culling *culling) {
+#pragma omp critical
+  {
+    culling->triangles += culling_t->triangles;
+    culling->discarded += culling_t->discarded;
+    culling->total += culling_t->total;
+  }
+}
+#endif
+
+// The minimum and maximum of the frequencies.
+static inline void __frequency_extrema(unsigned int n, double *freq, double *f_min,
+                                       double *f_max) {
+  *f_min = *f_max = *freq;
+  while (n-- > 0) {
+    if (*freq < *f_min) *f_min = *freq;
+    if (*freq > *f_max) *f_max = *freq;
+    freq++;
+  }
+}
+
+// True if the frequencies between f_min and f_max, offset by the given offset, overlap
+// the bins of the spectrum. The bounds are one bin wider than the spectrum, matching
+// the clipping of the triangle and delta interpolations.
+static inline bool __in_window(double offset, double f_min, double f_max, int count) {
+  return offset + f_max > -1.0 && offset + f_min < count + 1.0;
+}
+
+// Interpolate the frequencies of an octant onto the spectrum. The orientations of a
+// scheme without a triangle mesh, with a zero integration density, are binned, the
+// orientations along a meridian are interpolated over the segments of the meridian, and
+// the frequencies of the analytic scheme are integrated along β. The meridian segments
+// and the analytic nodes are not culled.
+static inline void __interpolate(double *spec, double *freq,
+                                 MRS_averaging_scheme *scheme, double *amp, int count,
+                                 MRS_culling *culling) {
+  if (scheme->integration_density == 0) {
+    histogramInterpolation(spec, freq, scheme->octant_orientations, amp, count);
+    return;
+  }
+  if (scheme->integration_volume == 3) {
+    meridianInterpolation(spec, freq, scheme->octant_orientations - 1, amp, count);
+    return;
+  }
+  if (scheme->integration_volume == 4) {
+    analyticInterpolation(spec, freq, scheme->integration_density, amp, count);
+    return;
+  }
+  octahedronCulledInterpolation(spec, freq, scheme->integration_density, amp, 1, count,
+                                culling);
+}
+
+// The two-dimensional __interpolate, where the analytic scheme, which is only
+// integrated along β in one dimension, is binned, and the triangles of the mesh are
+// rasterized by area when rasterization is 1.
+static inline void __interpolate_2D(double *spec, double *freq0, double *freq1,
+                                    MRS_averaging_scheme *scheme, double *amp,
+                                    int count0, int count1, MRS_culling *culling,
+                                    unsigned int rasterization) {
+  if (scheme->integration_density == 0 || scheme->integration_volume == 4) {
+    histogramInterpolation2D(spec, freq0, freq1, scheme->octant_orientations, amp,
+                             count0, count1);
+    return;
+  }
+  if (scheme->integration_volume == 3) {
+    meridianInterpolation2D(spec, freq0, freq1, scheme->octant_orientations - 1, amp,
+                            count0, count1);
+    return;
+  }
+  if (rasterization == 1) {
+    octahedronRasterization2D(spec, freq0, freq1, scheme->integration_density, amp, 1,
+                              count0, count1, culling);
+    return;
+  }
+  octahedronCulledInterpolation2D(spec, freq0, freq1, scheme->integration_density, amp,
+                                  1, count0, count1, culling);
+}
+
+// Collect the sideband orders whose frequencies overlap the spectral window of the
+// dimension, and return the number of collected orders.
+static inline unsigned int __sidebands_in_window(MRS_dimension *dimension,
+                                                 MRS_plan *plan, double offset_0,
+                                                 double f_min, double f_max,
+                                                 unsigned int *orders) {
+  unsigned int i, n_orders = 0;
+  double offset;
+  for (i = 0; i < plan->number_of_sidebands; i++) {
+    offset = offset_0 + plan->vr_freq[i] * dimension->inverse_increment;
+    if (__in_window(offset, f_min, f_max, dimension->count)) orders[n_orders++] = i;
+  }
+  return n_orders;
+}
+
+#ifdef _OPENMP
+// Interpolate the sidebands x octants in parallel over the per-thread spectra.
+static void __1D_parallel_interpolation(MRS_dimension *dimensions,
+                                        MRS_averaging_scheme *scheme,
+                                        MRS_workspace *workspace, MRS_plan *plan,
+                                        double offset_0, unsigned int *orders,
+                                        unsigned int n_orders, MRS_culling *culling,
+                                        double *spec) {
+  int task, n_tasks = n_orders * plan->n_octants;
+  int size = dimensions->count;
+  unsigned int npts = scheme->octant_orientations;
+  double *thread_spectra = MRS_get_workspace_thread_spectra(workspace, size);
+
+#pragma omp parallel num_threads(workspace->n_threads)
+  {
+    unsigned int i, j, thread = omp_get_thread_num();
+    double offset, *spec_t = &thread_spectra[thread * size],
+                   *freq_t = &workspace->thread_frequencies[3 * thread * npts];
+    MRS_culling culling_t, *cull_t = NULL;
+    if (culling != NULL) {
+      culling_t = (MRS_culling){culling->cutoff, culling->threshold, 0, 0.0, 0.0};
+      cull_t = &culling_t;
+    }
+
+#pragma omp for schedule(static)
+    for (task = 0; task < n_tasks; task++) {
+      i = orders[task / plan->n_octants];
+      j = task % plan->n_octants;
+      offset = offset_0 + plan->vr_freq[i] * dimensions->inverse_increment;
+      vm_double_add_offset(npts, &dimensions->local_frequency[j * npts], offset, freq_t);
+      __interpolate(
+          spec_t, freq_t, scheme,
+          &dimensions->events->freq_amplitude[i * scheme->total_orientations + j * npts],
+          size, cull_t);
+    }
+    if (cull_t != NULL) __reduce_culling(cull_t, culling);
+  }
+  __reduce_thread_spectra(workspace->n_threads, size, thread_spectra, spec);
+}
+#endif
+
+// The largest frequency spread and the largest deviation from the linear
+// interpolation, in bins, of a triangle interpolated without refinement, and the most
+// triangles of a level of the refinement.
+#define REFINEMENT_SPREAD 1.0
+#define REFINEMENT_DEVIATION 0.005
+#define REFINEMENT_TRIANGLES 4096
+
+// True if the triangles of the octants are adaptively refined. Only the spectra without
+// sidebands are refined, because the sideband amplitudes at new orientations require
+// the γ-averaging of the plan.
+static inline bool __refine(MRS_workspace *workspace, MRS_averaging_scheme *scheme,
+                            MRS_plan *plan) {
+  return workspace->refinement.depth != 0 && plan->number_of_sidebands == 1 &&
+         scheme->integration_density != 0 && scheme->integration_volume < 2;
+}
+
+/**
+ * Evaluate the frequencies at `n` vertices over the octants. The vertices are records
+ * of `size` doubles, [x, y, z, w, f_0, ..., f_{n_octants-1}], where (x, y, z) is a
+ * point on the face x + y + z = 1 of the octahedron, w is the amplitude of the vertex,
+ * and f_j is the frequency over the octant j, evaluated from the tensors of the
+ * refinement.
+ */
+static void __vertex_frequencies(MRS_refinement *refinement, unsigned int n,
+                                 unsigned int n_octants, unsigned int size,
+                                 double *vertex, double *scratch) {
+  unsigned int i, j;
+  double r_xy, r, *v, *w2, *w4;
+  double *exp_Im_alpha = scratch, *exp_I_alpha = &exp_Im_alpha[6 * n];
+  double *exp_I_beta = &exp_Im_alpha[8 * n];
+  double *wigner_2j = &exp_I_beta[2 * n], *wigner_4j = &wigner_2j[15 * n];
+
+  w2 = &wigner_4j[45 * n];
+  w4 = &w2[6 * n * n_octants];
+
+  // The direction cosines of the vertices.
+  for (i = 0, v = vertex; i < n; i++, v += size) {
+    r_xy = sqrt(v[0] * v[0] + v[1] * v[1]);
+    r = sqrt(r_xy * r_xy + v[2] * v[2]);
+    exp_I_alpha[2 * i] = (r_xy != 0.0) ? v[0] / r_xy : 1.0;
+    exp_I_alpha[2 * i + 1] = (r_xy != 0.0) ? v[1] / r_xy : 0.0;
+    exp_I_beta[2 * i] = v[2] / r;
+    exp_I_beta[2 * i + 1] = r_xy / r;
+  }
+
+  get_exp_Im_alpha(n, refinement->fourth_rank, exp_Im_alpha);
+  wigner_d_matrices_from_exp_I_beta(2, n, true, exp_I_beta, wigner_2j);
+  if (refinement->fourth_rank) {
+    wigner_d_matrices_from_exp_I_beta(4, n, true, exp_I_beta, wigner_4j);
+  }
+  __batch_wigner_rotation(n, n_octants, wigner_2j, refinement->R2, wigner_4j,
+                          refinement->R4, (complex128 *)exp_Im_alpha, (complex128 *)w2,
+                          refinement->fourth_rank ? (complex128 *)w4 : NULL);
+
+  // The real part of the m=0 components of the rotated tensors.
+  for (j = 0; j < n_octants; j++) {
+    for (i = 0, v = vertex; i < n; i++, v += size) {
+      v[4 + j] = w2[6 * (j * n + i) + 4];
+      if (refinement->fourth_rank) v[4 + j] += w4[10 * (j * n + i) + 8];
+    }
+  }
+}
+
+/**
+ * True if the triangle, offset by the given offset, is within the spectral window, and
+ * its frequencies spread over more than REFINEMENT_SPREAD bins, or deviate from the
+ * linear interpolation by more than REFINEMENT_DEVIATION bins, over any octant. The
+ * deviation of a triangle, stored after its vertices, is estimated from the deviation
+ * of the midpoints of its parent, which scales as the square of the edge length.
+ */
+static inline bool __refine_triangle(double *triangle, unsigned int size,
+                                     unsigned int n_octants, double offset, int count) {
+  unsigned int j;
+  double f_min, f_max, *f_a = &triangle[4], *f_b = &f_a[size], *f_c = &f_b[size];
+  for (j = 0; j < n_octants; j++) {
+    f_min = fmin(f_a[j], fmin(f_b[j], f_c[j]));
+    f_max = fmax(f_a[j], fmax(f_b[j], f_c[j]));
+    if (!__in_window(offset, f_min, f_max, count)) continue;
+    if (f_max - f_min > REFINEMENT_SPREAD || triangle[3 * size] > REFINEMENT_DEVIATION)
+      return true;
+  }
+  return false;
+}
+
+// The largest deviation of the frequencies at the midpoints of the edges of the
+// triangle from the mean frequencies at the vertices of the edges, over the octants.
+static inline double __midpoint_deviation(double *triangle, double *midpoints,
+                                          unsigned int size, unsigned int n_octants) {
+  unsigned int j, k;
+  double deviation = 0.0, *a, *b, *ab;
+  for (k = 0; k < 3; k++) {
+    a = &triangle[k * size + 4];
+    b = &triangle[((k + 1) % 3) * size + 4];
+    ab = &midpoints[k * size + 4];
+    for (j = 0; j < n_octants; j++) {
+      deviation = fmax(deviation, fabs(ab[j] - 0.5 * (a[j] + b[j])));
+    }
+  }
+  return deviation;
+}
+
+// Interpolate the triangle over the octants, where the amplitude of the triangle is the
+// sum of its vertex amplitudes scaled by the area of the triangle.
+static inline void __deposit_triangle(double *triangle, unsigned int size,
+                                      unsigned int n_octants, double offset,
+                                      double area, int count, double *spec) {
+  unsigned int j;
+  double f_a, f_b, f_c, *v_b = &triangle[size], *v_c = &v_b[size];
+  double amp = (triangle[3] + v_b[3] + v_c[3]) * area;
+  for (j = 0; j < n_octants; j++) {
+    f_a = triangle[4 + j] + offset;
+    f_b = v_b[4 + j] + offset;
+    f_c = v_c[4 + j] + offset;
+    triangle_interpolation(&f_a, &f_b, &f_c, &amp, spec, &count);
+  }
+}
+
+// The midpoint of the edge (a, b) on the face of the octahedron. The amplitude of a
+// vertex scales as 1/r^3, where r is the distance of the vertex from the origin.
+static inline void __edge_midpoint(double *a, double *b, double *ab) {
+  double r_a, r_b, r_ab;
+  ab[0] = 0.5 * (a[0] + b[0]);
+  ab[1] = 0.5 * (a[1] + b[1]);
+  ab[2] = 0.5 * (a[2] + b[2]);
+  r_a = a[0] * a[0] + a[1] * a[1] + a[2] * a[2];
+  r_b = b[0] * b[0] + b[1] * b[1] + b[2] * b[2];
+  r_ab = ab[0] * ab[0] + ab[1] * ab[1] + ab[2] * ab[2];
+  r_a *= sqrt(r_a);
+  r_b *= sqrt(r_b);
+  r_ab *= sqrt(r_ab);
+  ab[3] = 0.5 * (a[3] * r_a + b[3] * r_b) / r_ab;
+}
+
+// Copy the vertices a, b, and c, and the deviation to the triangle.
+static inline void __set_triangle(double *a, double *b, double *c, double deviation,
+                                  unsigned int size, double *triangle) {
+  memcpy(triangle, a, size * sizeof(double));
+  memcpy(&triangle[size], b, size * sizeof(double));
+  memcpy(&triangle[2 * size], c, size * sizeof(double));
+  triangle[3 * size] = deviation;
+}
+
+/**
+ * Refine the `n` triangles of the list breadth first. At every level, the unresolved
+ * triangles, see __refine_triangle, are subdivided into four triangles at the midpoints
+ * of their edges, and the remaining triangles are interpolated.
+ */
+static void __refine_triangles(MRS_refinement *refinement, unsigned int n,
+                               unsigned int n_octants, double offset, int count,
+                               double *triangles, double *children, double *midpoints,
+                               double *spec) {
+  unsigned int t, n_refine, level = 0, size = 4 + n_octants, tri = 3 * size + 1;
+  double area = 1.0, deviation, *triangle, *mid, *temp;
+
+  while (n != 0) {
+    // Interpolate the resolved triangles and move the others to the front of the list.
+    n_refine = 0;
+    for (t = 0; t < n; t++) {
+      triangle = &triangles[t * tri];
+      if (level < refinement->depth &&
+          __refine_triangle(triangle, size, n_octants, offset, count)) {
+        temp = &triangles[n_refine++ * tri];
+        if (temp != triangle) memcpy(temp, triangle, tri * sizeof(double));
+        continue;
+      }
+      __deposit_triangle(triangle, size, n_octants, offset, area, count, spec);
+    }
+    if (n_refine == 0) return;
+
+    // The midpoints of the edges (a, b), (b, c), and (c, a) of the triangles.
+    for (t = 0; t < n_refine; t++) {
+      triangle = &triangles[t * tri];
+      mid = &midpoints[3 * t * size];
+      __edge_midpoint(triangle, &triangle[size], mid);
+      __edge_midpoint(&triangle[size], &triangle[2 * size], &mid[size]);
+      __edge_midpoint(&triangle[2 * size], triangle, &mid[2 * size]);
+    }
+    __vertex_frequencies(refinement, 3 * n_refine, n_octants, size, midpoints,
+                         &midpoints[3 * n_refine * size]);
+    refinement->triangles += n_refine;
+    refinement->orientations += 3 * n_refine;
+
+    // Subdivide the triangles (a, b, c) into (a, ab, ca), (ab, b, bc), (ca, bc, c),
+    // and (ab, bc, ca), whose deviations are a quarter of the midpoint deviation.
+    for (t = 0; t < n_refine; t++) {
+      triangle = &triangles[t * tri];
+      mid = &midpoints[3 * t * size];
+      temp = &children[4 * t * tri];
+      deviation = 0.25 * __midpoint_deviation(triangle, mid, size, n_octants);
+      __set_triangle(triangle, mid, &mid[2 * size], deviation, size, temp);
+      __set_triangle(mid, &triangle[size], &mid[size], deviation, size, &temp[tri]);
+      __set_triangle(&mid[2 * size], &mid[size], &triangle[2 * size], deviation, size,
+                     &temp[2 * tri]);
+      __set_triangle(mid, &mid[size], &mid[2 * size], deviation, size, &temp[3 * tri]);
+    }
+    temp = triangles;
+    triangles = children;
+    children = temp;
+    n = 4 * n_refine;
+    area *= 0.25;
+    level++;
+  }
+}
+
+// Set the vertex of the octahedron mesh at row j and column i, with index k.
+static inline void __mesh_vertex(MRS_dimension *dimensions, unsigned int nt,
+                                 unsigned int npts, unsigned int n_octants,
+                                 unsigned int i, unsigned int j, unsigned int k,
+                                 double *amps, double *vertex) {
+  unsigned int octant;
+  vertex[0] = (double)(nt - i - j) / nt;
+  vertex[1] = (double)i / nt;
+  vertex[2] = (double)j / nt;
+  vertex[3] = amps[k];
+  for (octant = 0; octant < n_octants; octant++) {
+    vertex[4 + octant] = dimensions->local_frequency[octant * npts + k];
+  }
+}
+
+/**
+ * Interpolate the octants of the octahedron mesh with the adaptive refinement of the
+ * triangles. The triangles of the mesh are refined in chunks, such that the triangles
+ * of every level of the refinement fit in REFINEMENT_TRIANGLES, except when the depth
+ * alone requires more.
+ */
+static void __refined_interpolation(MRS_dimension *dimensions,
+                                    MRS_averaging_scheme *scheme,
+                                    MRS_workspace *workspace, MRS_plan *plan,
+                                    double offset, double *spec) {
+  MRS_refinement *refinement = &workspace->refinement;
+  unsigned int j, k, start, next, n = 0, nt = scheme->integration_density;
+  unsigned int npts = scheme->octant_orientations, n_octants = plan->n_octants;
+  unsigned int size = 4 + n_octants, tri = 3 * size + 1;
+  unsigned int chunk = 1, capacity, n_mid;
+  double *triangles, *children, *scratch, *amps = dimensions->events->freq_amplitude;
+
+  // The coarse triangles of a chunk, where REFINEMENT_TRIANGLES is 4^6.
+  if (refinement->depth < 6) chunk = REFINEMENT_TRIANGLES >> (2 * refinement->depth);
+  capacity = chunk << (2 * refinement->depth);
+  triangles = MRS_get_workspace_buffer(workspace, MRS_BUFFER_TRIANGLES,
+                                       2 * capacity * tri * sizeof(double));
+  children = &triangles[capacity * tri];
+
+  // The midpoint vertices and the scratch of their frequencies, where the number of
+  // midpoints is three times the most triangles subdivided at a level.
+  n_mid = 3 * capacity / 4;
+  scratch = MRS_get_workspace_buffer(
+      workspace, MRS_BUFFER_REFINEMENT,
+      (size + 70 + 16 * n_octants) * n_mid * sizeof(double));
+
+  // The triangles of the rows of the mesh, as in the octahedron interpolation. The
+  // deviation of the mesh triangles is unknown, and the triangles within the spectral
+  // window are subdivided at least once.
+  for (j = 0, start = 0; j < nt; j++, start = next) {
+    next = start + nt - j + 1;
+    for (k = 0; k < nt - j; k++) {
+      __mesh_vertex(dimensions, nt, npts, n_octants, k, j, start + k, amps,
+                    &triangles[n * tri]);
+      __mesh_vertex(dimensions, nt, npts, n_octants, k + 1, j, start + k + 1, amps,
+                    &triangles[n * tri + size]);
+      __mesh_vertex(dimensions, nt, npts, n_octants, k, j + 1, next + k, amps,
+                    &triangles[n * tri + 2 * size]);
+      triangles[n * tri + 3 * size] = INFINITY;
+      if (++n == chunk) {
+        __refine_triangles(refinement, n, n_octants, offset, dimensions->count,
+                           triangles, children, scratch, spec);
+        n = 0;
+      }
+      if (k + 1 == nt - j) continue;
+      __mesh_vertex(dimensions, nt, npts, n_octants, k + 1, j, start + k + 1, amps,
+                    &triangles[n * tri]);
+      __mesh_vertex(dimensions, nt, npts, n_octants, k, j + 1, next + k, amps,
+                    &triangles[n * tri + size]);
+      __mesh_vertex(dimensions, nt, npts, n_octants, k + 1, j + 1, next + k + 1, amps,
+                    &triangles[n * tri + 2 * size]);
+      triangles[n * tri + 3 * size] = INFINITY;
+      if (++n == chunk) {
+        __refine_triangles(refinement, n, n_octants, offset, dimensions->count,
+                           triangles, children, scratch, spec);
+        n = 0;
+      }
+    }
+  }
+  if (n != 0) {
+    __refine_triangles(refinement, n, n_octants, offset, dimensions->count, triangles,
+                       children, scratch, spec);
+  }
+}
+
 static inline void __1D_averaging(MRS_dimension *dimensions,
                                   MRS_averaging_scheme *scheme,
-                                  MRS_fftw_scheme *fftw_scheme, double *spec) {
-  unsigned int i, j, k1, address;
+                                  MRS_fftw_scheme *fftw_scheme,
+                                  MRS_workspace *workspace, double *spec) {
+  unsigned int i, j, k1, address, n, n_orders;
   unsigned int nt = scheme->integration_density, npts = scheme->octant_orientations;
 
-  double offset_0, offset;
+  double offset_0, offset, f_min = 0.0, f_max = 0.0;
   double *freq = dimensions->local_frequency,
          *amps = dimensions->events->freq_amplitude;
 
   bool delta_interpolation = false;
   MRS_plan *plan = dimensions->events->plan;
+  MRS_culling *culling;
+  unsigned int *orders = MRS_get_workspace_buffer(
+      workspace, MRS_BUFFER_ORDERS, plan->number_of_sidebands * sizeof(unsigned int));
 
   /**
    * If the number of sidebands is 1, the sideband amplitude at every
@@ -57,67 +514,233 @@ static inline void __1D_averaging(MRS_dimension *dimensions,
   }
 
   offset_0 = dimensions->normalize_offset + dimensions->R0_offset;
-  if (fabs(*freq - freq[nt]) < TOL && fabs(*freq - freq[npts - 1]) < TOL)
+  // the vertices of the octant, or the diagonal of the nine analytic orientations.
+  k1 = (scheme->integration_volume == 4) ? npts / 2 : nt;
+  if (nt != 0 && fabs(*freq - freq[k1]) < TOL && fabs(*freq - freq[npts - 1]) < TOL)
     delta_interpolation = true;
 
+  /* Only the sideband orders within the spectral window are interpolated. */
   if (delta_interpolation) {
     offset_0 += *freq;
-    for (i = 0; i < plan->number_of_sidebands; i++) {
+  } else {
+    __frequency_extrema(plan->n_octants * npts, freq, &f_min, &f_max);
+  }
+  n_orders = __sidebands_in_window(dimensions, plan, offset_0, f_min, f_max, orders);
+  workspace->sidebands_interpolated += n_orders;
+  workspace->sidebands_skipped += plan->number_of_sidebands - n_orders;
+
+  /* The triangles without sidebands are refined where they are unresolved. */
+  if (!delta_interpolation && __refine(workspace, scheme, plan)) {
+    if (n_orders != 0) {
+      offset = offset_0 + plan->vr_freq[*orders] * dimensions->inverse_increment;
+      __refined_interpolation(dimensions, scheme, workspace, plan, offset, spec);
+    }
+    return;
+  }
+
+  if (delta_interpolation) {
+    for (n = 0; n < n_orders; n++) {
+      i = orders[n];
       offset = offset_0 + plan->vr_freq[i] * dimensions->inverse_increment;
-      if ((int)offset >= 0 && (int)offset <= dimensions->count) {
-        k1 = i * scheme->total_orientations;
-        j = 0;
-        while (j++ < plan->n_octants) {
+      k1 = i * scheme->total_orientations;
+      j = 0;
+      while (j++ < plan->n_octants) {
+        if (scheme->integration_volume == 3) {
+          meridianDeltaInterpolation(npts - 1, &offset, &amps[k1], dimensions->count,
+                                     spec);
+        } else if (scheme->integration_volume == 4) {
+          analyticDeltaInterpolation(&offset, &amps[k1], dimensions->count, spec);
+        } else {
           octahedronDeltaInterpolation(nt, &offset, &amps[k1], 1, dimensions->count,
                                        spec);
-          k1 += npts;
         }
+        k1 += npts;
       }
     }
     return;
   }
 
-  for (i = 0; i < plan->number_of_sidebands; i++) {
+  /* Skip the triangles with an amplitude below the culling threshold. */
+  culling = __set_culling_threshold(
+      workspace,
+      __max_amplitude(plan->number_of_sidebands * scheme->total_orientations, amps));
+
+#ifdef _OPENMP
+  if (workspace->n_threads > 1) {
+    __1D_parallel_interpolation(dimensions, scheme, workspace, plan, offset_0, orders,
+                                n_orders, culling, spec);
+    return;
+  }
+#endif
+
+  for (n = 0; n < n_orders; n++) {
+    i = orders[n];
     offset = offset_0 + plan->vr_freq[i] * dimensions->inverse_increment;
-    if ((int)offset >= 0 && (int)offset <= dimensions->count) {
-      k1 = i * scheme->total_orientations;
-      address = 0;
-      for (j = 0; j < plan->n_octants; j++) {
-        // Add offset(isotropic + sideband_order) to the local frequencies.
-        vm_double_add_offset(npts, &freq[address], offset, dimensions->freq_offset);
-        // Perform tenting on every sideband order over all orientations.
-        octahedronInterpolation(spec, dimensions->freq_offset, nt, &amps[k1], 1,
-                                dimensions->count);
-        k1 += npts;
-        address += npts;
-      }
+    k1 = i * scheme->total_orientations;
+    address = 0;
+    for (j = 0; j < plan->n_octants; j++) {
+      // Add offset(isotropic + sideband_order) to the local frequencies.
+      vm_double_add_offset(npts, &freq[address], offset, dimensions->freq_offset);
+      // Perform tenting on every sideband order over all orientations.
+      __interpolate(spec, dimensions->freq_offset, scheme, &amps[k1], dimensions->count,
+                    culling);
+      k1 += npts;
+      address += npts;
     }
   }
 }
 
 void one_dimensional_averaging(MRS_dimension *dimensions, MRS_averaging_scheme *scheme,
-                               MRS_fftw_scheme *fftw_scheme, double *spec) {
+                               MRS_fftw_scheme *fftw_scheme, MRS_workspace *workspace,
+                               double *spec) {
   // multiply amplitudes from all events to the amplitude array from the first event.
   if (dimensions->n_events != 1) {
     __get_multi_event_amplitudes(dimensions->n_events, dimensions->events,
                                  dimensions->events->plan->size);
   }
-  __1D_averaging(dimensions, scheme, fftw_scheme, spec);
+  __1D_averaging(dimensions, scheme, fftw_scheme, workspace, spec);
+}
+
+// The scaled and sheared offsets of the sideband pair (i, k).
+static inline void __pair_offsets(MRS_dimension *dimensions, MRS_plan *planA,
+                                  MRS_plan *planB, double offset0, double offset1,
+                                  unsigned int i, unsigned int k, double *affine_matrix,
+                                  double *norm0, double *norm1) {
+  double offsetB = offset1 + planB->vr_freq[k] * dimensions[1].inverse_increment;
+  *norm0 = offset0 + planA->vr_freq[i] * dimensions[0].inverse_increment;
+  *norm0 *= affine_matrix[0];
+  *norm0 += affine_matrix[1] * offsetB;
+  *norm1 = offsetB * affine_matrix[3];
+  *norm1 += affine_matrix[2] * *norm0;
+  *norm0 += dimensions[0].normalize_offset;
+  *norm1 += dimensions[1].normalize_offset;
+}
+
+/**
+ * Collect the sideband pairs, as i * number_of_sidebands + k, whose frequencies overlap
+ * the two-dimensional spectral window, and return the number of collected pairs. When
+ * the offset along a dimension is independent of the sideband order of the other
+ * dimension, the orders along the dimension are pruned before pairing.
+ */
+static unsigned int __sideband_pairs_in_window(MRS_dimension *dimensions,
+                                               MRS_averaging_scheme *scheme,
+                                               MRS_workspace *workspace,
+                                               MRS_plan *planA, MRS_plan *planB,
+                                               double offset0, double offset1,
+                                               unsigned int number_of_sidebands,
+                                               double *affine_matrix,
+                                               unsigned int *pairs) {
+  unsigned int i, k, n0, n1, n_orders0 = 0, n_orders1 = 0, n_pairs = 0;
+  unsigned int size = planA->n_octants * scheme->octant_orientations;
+  unsigned int *orders0 = MRS_get_workspace_buffer(
+      workspace, MRS_BUFFER_ORDERS, 2 * number_of_sidebands * sizeof(unsigned int));
+  unsigned int *orders1 = &orders0[number_of_sidebands];
+  double min0, max0, min1, max1, norm0, norm1;
+
+  __frequency_extrema(size, dimensions[0].local_frequency, &min0, &max0);
+  __frequency_extrema(size, dimensions[1].local_frequency, &min1, &max1);
+
+  for (i = 0; i < number_of_sidebands; i++) {
+    __pair_offsets(dimensions, planA, planB, offset0, offset1, i, 0, affine_matrix,
+                   &norm0, &norm1);
+    if (affine_matrix[1] != 0 || __in_window(norm0, min0, max0, dimensions[0].count))
+      orders0[n_orders0++] = i;
+  }
+  for (k = 0; k < number_of_sidebands; k++) {
+    __pair_offsets(dimensions, planA, planB, offset0, offset1, 0, k, affine_matrix,
+                   &norm0, &norm1);
+    if (affine_matrix[2] != 0 || __in_window(norm1, min1, max1, dimensions[1].count))
+      orders1[n_orders1++] = k;
+  }
+
+  for (n0 = 0; n0 < n_orders0; n0++) {
+    i = orders0[n0];
+    for (n1 = 0; n1 < n_orders1; n1++) {
+      k = orders1[n1];
+      __pair_offsets(dimensions, planA, planB, offset0, offset1, i, k, affine_matrix,
+                     &norm0, &norm1);
+      if (__in_window(norm0, min0, max0, dimensions[0].count) &&
+          __in_window(norm1, min1, max1, dimensions[1].count)) {
+        pairs[n_pairs++] = i * number_of_sidebands + k;
+      }
+    }
+  }
+  return n_pairs;
 }
 
+#ifdef _OPENMP
+// Interpolate the sideband pairs x octants in parallel over the per-thread spectra.
+static void __2D_parallel_interpolation(MRS_dimension *dimensions,
+                                        MRS_averaging_scheme *scheme,
+                                        MRS_workspace *workspace, MRS_plan *planA,
+                                        MRS_plan *planB, double *freq_ampA,
+                                        double *freq_ampB, double offset0, double offset1,
+                                        unsigned int number_of_sidebands,
+                                        unsigned int *pairs, unsigned int n_pairs,
+                                        double *affine_matrix, MRS_culling *culling,
+                                        double *spec) {
+  int task, n_tasks = n_pairs * planA->n_octants;
+  int size = dimensions[0].count * dimensions[1].count;
+  unsigned int npts = scheme->octant_orientations;
+  double *thread_spectra = MRS_get_workspace_thread_spectra(workspace, size);
+
+#pragma omp parallel num_threads(workspace->n_threads)
+  {
+    unsigned int i, k, j, pair, address, thread = omp_get_thread_num();
+    double norm0, norm1;
+    double *spec_t = &thread_spectra[thread * size];
+    double *freq0_t = &workspace->thread_frequencies[3 * thread * npts];
+    double *freq1_t = &freq0_t[npts], *amp_t = &freq0_t[2 * npts];
+    MRS_culling culling_t, *cull_t = NULL;
+    if (culling != NULL) {
+      culling_t = (MRS_culling){culling->cutoff, culling->threshold, 0, 0.0, 0.0};
+      cull_t = &culling_t;
+    }
+
+#pragma omp for schedule(static)
+    for (task = 0; task < n_tasks; task++) {
+      pair = pairs[task / planA->n_octants];
+      i = pair / number_of_sidebands;
+      k = pair % number_of_sidebands;
+      j = task % planA->n_octants;
+
+      __pair_offsets(dimensions, planA, planB, offset0, offset1, i, k, affine_matrix,
+                     &norm0, &norm1);
+      address = j * npts;
+      vm_double_add_offset(npts, &dimensions[0].local_frequency[address], norm0,
+                           freq0_t);
+      vm_double_add_offset(npts, &dimensions[1].local_frequency[address], norm1,
+                           freq1_t);
+      vm_double_multiply(npts, &freq_ampA[i * scheme->total_orientations + address],
+                         &freq_ampB[k * scheme->total_orientations + address], amp_t);
+      __interpolate_2D(spec_t, freq0_t, freq1_t, scheme, amp_t, dimensions[0].count,
+                       dimensions[1].count, cull_t, workspace->rasterization);
+    }
+    if (cull_t != NULL) __reduce_culling(cull_t, culling);
+  }
+  __reduce_thread_spectra(workspace->n_threads, size, thread_spectra, spec);
+}
+#endif
+
 void two_dimensional_averaging(MRS_dimension *dimensions, MRS_averaging_scheme *scheme,
-                               MRS_fftw_scheme *fftw_scheme, double *spec,
-                               unsigned int number_of_sidebands,
+                               MRS_fftw_scheme *fftw_scheme, MRS_workspace *workspace,
+                               double *spec, unsigned int number_of_sidebands,
                                double *affine_matrix) {
-  unsigned int i, k, j, evt;
+  unsigned int i, k, j, n, evt, n_pairs;
   unsigned int step_vector_i = 0, step_vector_k = 0, address;
   MRS_plan *planA, *planB;
   MRS_event *event;
+  MRS_culling *culling;
   int size = scheme->total_orientations * number_of_sidebands;
-  double *freq_ampA = malloc_double(size);
-  double *freq_ampB = malloc_double(size);
-  double *freq_amp = malloc_double(scheme->total_orientations);
-  double offset0, offset1, offsetA, offsetB;
+  double *freq_ampA = MRS_get_workspace_buffer(
+      workspace, MRS_BUFFER_AMPLITUDES,
+      (2 * size + scheme->total_orientations) * sizeof(double));
+  double *freq_ampB = &freq_ampA[size];
+  double *freq_amp = &freq_ampB[size];
+  unsigned int *pairs = MRS_get_workspace_buffer(
+      workspace, MRS_BUFFER_PAIRS,
+      number_of_sidebands * number_of_sidebands * sizeof(unsigned int));
+  double offset0, offset1;
   double *dim0, *dim1;
   double norm0, norm1;
 
@@ -173,58 +796,50 @@ void two_dimensional_averaging(MRS_dimension *dimensions, MRS_averaging_scheme *
                 &freq_ampB[j], scheme->octant_orientations);
   }
 
-  for (i = 0; i < number_of_sidebands; i++) {
-    offsetA = offset0 + planA->vr_freq[i] * dimensions[0].inverse_increment;
-    for (k = 0; k < number_of_sidebands; k++) {
-      offsetB = offset1 + planB->vr_freq[k] * dimensions[1].inverse_increment;
-
-      norm0 = offsetA;
-      norm1 = offsetB;
-
-      // scale and shear the offsets
-      norm0 *= affine_matrix[0];
-      norm0 += affine_matrix[1] * offsetB;
-
-      norm1 *= affine_matrix[3];
-      norm1 += affine_matrix[2] * norm0;
-
-      norm0 += dimensions[0].normalize_offset;
-      norm1 += dimensions[1].normalize_offset;
-
-      if ((int)norm0 >= 0 && (int)norm0 <= dimensions[0].count) {
-        step_vector_i = i * scheme->total_orientations;
-        // for (k = 0; k < number_of_sidebands; k++) {
-        //   offsetB =
-        //       offset1 + plan->vr_freq[k] * dimensions[1].inverse_increment;
-        //   norm1 = offsetB + dimensions[1].normalize_offset;
-        if ((int)norm1 >= 0 && (int)norm1 <= dimensions[1].count) {
-          step_vector_k = k * scheme->total_orientations;
-
-          // step_vector = 0;
-          for (j = 0; j < planA->n_octants; j++) {
-            address = j * scheme->octant_orientations;
-            // Add offset(isotropic + sideband_order) to the local frequency
-            // from [n to n+octant_orientation]
-            vm_double_add_offset(scheme->octant_orientations, &dim0[address], norm0,
-                                 dimensions[0].freq_offset);
-            vm_double_add_offset(scheme->octant_orientations, &dim1[address], norm1,
-                                 dimensions[1].freq_offset);
-
-            vm_double_multiply(scheme->total_orientations,
-                               &freq_ampA[step_vector_i + address],
-                               &freq_ampB[step_vector_k + address], freq_amp);
-            // Perform tenting on every sideband order over all orientations
-            octahedronInterpolation2D(spec, dimensions[0].freq_offset,
-                                      dimensions[1].freq_offset,
-                                      scheme->integration_density, freq_amp, 1,
-                                      dimensions[0].count, dimensions[1].count);
-            // step_vector += scheme->octant_orientations;
-          }
-        }
-      }
+  /* Only the sideband pairs within the spectral window are interpolated. */
+  n_pairs = __sideband_pairs_in_window(dimensions, scheme, workspace, planA, planB,
+                                       offset0, offset1, number_of_sidebands,
+                                       affine_matrix, pairs);
+  workspace->sidebands_interpolated += n_pairs;
+  workspace->sidebands_skipped += number_of_sidebands * number_of_sidebands - n_pairs;
+
+  /* Skip the triangles with an amplitude below the culling threshold. */
+  culling = __set_culling_threshold(
+      workspace, __max_amplitude(size, freq_ampA) * __max_amplitude(size, freq_ampB));
+
+#ifdef _OPENMP
+  if (workspace->n_threads > 1) {
+    __2D_parallel_interpolation(dimensions, scheme, workspace, planA, planB, freq_ampA,
+                                freq_ampB, offset0, offset1, number_of_sidebands, pairs,
+                                n_pairs, affine_matrix, culling, spec);
+    return;
+  }
+#endif
+
+  for (n = 0; n < n_pairs; n++) {
+    i = pairs[n] / number_of_sidebands;
+    k = pairs[n] % number_of_sidebands;
+    __pair_offsets(dimensions, planA, planB, offset0, offset1, i, k, affine_matrix,
+                   &norm0, &norm1);
+    step_vector_i = i * scheme->total_orientations;
+    step_vector_k = k * scheme->total_orientations;
+
+    for (j = 0; j < planA->n_octants; j++) {
+      address = j * scheme->octant_orientations;
+      // Add offset(isotropic + sideband_order) to the local frequency
+      // from [n to n+octant_orientation]
+      vm_double_add_offset(scheme->octant_orientations, &dim0[address], norm0,
+                           dimensions[0].freq_offset);
+      vm_double_add_offset(scheme->octant_orientations, &dim1[address], norm1,
+                           dimensions[1].freq_offset);
+
+      vm_double_multiply(scheme->octant_orientations,
+                         &freq_ampA[step_vector_i + address],
+                         &freq_ampB[step_vector_k + address], freq_amp);
+      // Perform tenting on every sideband order over all orientations
+      __interpolate_2D(spec, dimensions[0].freq_offset, dimensions[1].freq_offset,
+                       scheme, freq_amp, dimensions[0].count, dimensions[1].count,
+                       culling, workspace->rasterization);
     }
   }
-  free(freq_amp);
-  free(freq_ampA);
-  free(freq_ampB);
 }
@@ -478,157 +478,159 @@ int triangle_interpolation2D(double *freq11, double *freq12, double *freq13,
   return 0;
 }
 
-void rasterization(double *grid, double *v0, double *v1, double *v2, int rows,
-                   int columns) {
-  double A12, B12, C12, A20, B20, C20, A01, B01, C01;
-  double minX, minY, maxX, maxY, w0, w1, w2;
-  double w0_row, w1_row, w2_row;
-  int i, j, i_, minX_, minY_, maxX_, maxY_;
-
-  minX = fmin(fmin(v0[0], v1[0]), v2[0]);
-  minY = fmin(fmin(v0[1], v1[1]), v2[1]);
-  maxX = fmax(fmax(v0[0], v1[0]), v2[0]);
-  maxY = fmax(fmax(v0[1], v1[1]), v2[1]);
-
-  // clip against screen bounds
-  minX_ = (int)fmax(minX, 0.);
-  minY_ = (int)fmax(minY, 0.);
-  maxX_ = (int)fmin(maxX, (double)rows - 1.);
-  maxY_ = (int)fmin(maxY, (double)columns - 1.);
-
-  A12 = (v2[0] - v1[0]);
-  B12 = (v2[1] - v1[1]);
-  C12 = -A12 * v1[1] + B12 * v1[0];
-  A20 = (v0[0] - v2[0]);
-  B20 = (v0[1] - v2[1]);
-  C20 = -A20 * v2[1] + B20 * v2[0];
-  A01 = (v1[0] - v0[0]);
-  B01 = (v1[1] - v0[1]);
-  C01 = -A01 * v0[1] + B01 * v0[0];
-
-  w0_row = A12 * minY - B12 * minX + C12;
-  w1_row = A20 * minY - B20 * minX + C20;
-  w2_row = A01 * minY - B01 * minX + C01;
-
-  // Rasterizer
-  for (i = minY_; i <= maxY_; i++) {
-    // Determine barycentric coordinates
-    w0 = w0_row;
-    w1 = w1_row;
-    w2 = w2_row;
-
-    i_ = rows * i;
-    for (j = minX_; j <= maxX_; j++) {
-      // If p is on or inside all edges, render pixel.
-      if ((int)w0 >= 0 && (int)w1 >= 0 && (int)w2 >= 0) {
-        grid[i_ + j] += 1.;  //(w0+w1+w2);
-      }
-      if ((int)w0 <= 0 && (int)w1 <= 0 && (int)w2 <= 0) {
-        grid[i_ + j] += -1.;  //(w0+w1+w2);
-      }
-      // i_++;
-
-      w0 -= B12;
-      w1 -= B20;
-      w2 -= B01;
-    }
-    w0_row += A12;
-    w1_row += A20;
-    w2_row += A01;
-  }
-}
-
-// static inline void get_KL(
-//             double *v0,
-//             double *v1,
-//             double *x,
-//             double *y)
-// {
-//   double K[2] =
-// }
-// def get_KL(self, x0, y0, x1, y1, eps = 1e-5):
-//     self.x0, self.y0, self.x1, self.y1 = x0, y0, x1, y1
-//     Kx, Ky, Lx, Ly = 0, 0, 0, 0
-//     for sec in self.clip(0, 1, 1, 0):
-//         v1 = Point(sec[0], sec[1])
-//         v0 = Point(sec[2], sec[3])
-//         if abs(v0.x - 1) < eps and abs(v1.x - 1) < eps \
-//         or abs(v0.y - 1) < eps and abs(v1.y - 1) < eps:
-//             continue
-
-//         Kx += 1./4 * (v0.y - v1.y)
-//         Ky += 1./4 * (v1.x - v0.x)
-//         Lx += 1./8 * (v0.y-v1.y) * (v0.x+v1.x)
-//         Ly += 1./8 * (v1.x-v0.x) * (v0.y+v1.y)
-//     return Point(Kx, Ky), Point(Lx, Ly)
-
-// static inline void clip(
-//             double left,
-//             double right,
-//             double bottom,
-//             double top,
-//             double *p0,
-//             double *p1,
-//             double *clipped_lines
-//             )
-// {
-//   int edge, i;
-//   double t0=0, t1=1, r;
-//   double delta_x = p1[0] - p0[0], delta_y=p1[1]-p0[1], p, q;
-
-//   for(edge=0; edge<4; edge++){
-//     if(edge ==0){
-//       p = -delta_x;
-//       q = -(left - p0[0]);
-//     }
-//     else if(edge ==1){
-//       p = delta_x;
-//       q = (right - p0[0]);
-//     }
-//     else if(edge ==2){
-//       p = delta_y;
-//       q = (bottom - p0[1]);
-//     }
-//     else if(edge ==3){
-//       p = -delta_y;
-//       q = -(top - p0[1]);
-//     }
-//     if(p == 0 && q < 0) return 0;
-//     if (p < 0){
-//       r = q / (double)p;
-//       if(r > t1)  return 0;
-//       if(r > t0) t0 = r;  // line is clipped!
-//     }
-//     else if(p > 0){
-//       r = q / (double)p;
-//       if(r < t0) return 0;
-//       if(r < t1)  t1 = r;   // line is clipped!
-//     }
-//   }
-// }
-
-//     def clip(self, left, right, bottom, top):
-//         t0, t1 = 0, 1
-//         xdelta = self.x1 - self.x0
-//         ydelta = self.y1 - self.y0
-//         for edge in range(4): #traverse through left, right, bottom, top
-//         edges.
-//             if   edge == 0:   p, q = -xdelta, -(left-self.x0)
-//             elif edge == 1:   p, q =  xdelta,  (right-self.x0)
-//             elif edge == 2:   p, q =  ydelta,  (bottom-self.y0)
-//             elif edge == 3:   p, q = -ydelta, -(top-self.y0)
-//             if p == 0 and q < 0:    return []
-//             if p < 0:
-//                 r = q / float(p)
-//                 if r > t1:          return []
-//                 elif r > t0:        t0 = r   # line is clipped!
-//             elif p > 0:
-//                 r = q / float(p)
-//                 if r < t0:          return []
-//                 elif r < t1:        t1 = r   # line is clipped!
-//         clipped_line = (self.x0 + t0*xdelta, self.y0 + t0*ydelta,
-//                         self.x0 + t1*xdelta, self.y0 + t1*ydelta)
-//         return [clipped_line]
+// Clip the convex polygon of n (row, column) vertices to the half-plane where the
+// coordinate along the axis is at most (sign = 1), or at least (sign = -1), the cut.
+// Return the number of vertices of the clipped polygon.
+static inline int __clip_polygon(const double *poly, int n, int axis, double cut,
+                                 double sign, double *clipped) {
+  int i, k = 0;
+  const double *a, *b = &poly[2 * (n - 1)];
+  double da, db = sign * (b[axis] - cut), t;
+
+  for (i = 0; i < n; i++) {
+    a = b;
+    da = db;
+    b = &poly[2 * i];
+    db = sign * (b[axis] - cut);
+    if ((da < 0.0 && db > 0.0) || (da > 0.0 && db < 0.0)) {
+      t = da / (da - db);
+      clipped[2 * k] = a[0] + t * (b[0] - a[0]);
+      clipped[2 * k + 1] = a[1] + t * (b[1] - a[1]);
+      k++;
+    }
+    if (db <= 0.0) {
+      clipped[2 * k] = b[0];
+      clipped[2 * k + 1] = b[1];
+      k++;
+    }
+  }
+  return k;
+}
+
+// The width of the convex polygon of n (row, column) vertices along the rows, which
+// is piecewise linear in the column coordinate, at the sorted column coordinates of
+// the vertices.
+static inline void __width_profile(const double *poly, int n, double *y, double *w) {
+  int i, j;
+  const double *a, *b;
+  double x, low, high, column, width;
+
+  for (i = 0; i < n; i++) {
+    // The vertex and the edges crossing its column bound the width.
+    column = poly[2 * i + 1];
+    low = high = poly[2 * i];
+    b = &poly[2 * (n - 1)];
+    for (j = 0; j < n; j++) {
+      a = b;
+      b = &poly[2 * j];
+      if (column <= fmin(a[1], b[1]) || column >= fmax(a[1], b[1])) continue;
+      x = a[0] + (column - a[1]) * (b[0] - a[0]) / (b[1] - a[1]);
+      low = fmin(low, x);
+      high = fmax(high, x);
+    }
+    for (j = 0; j < n; j++) {
+      if (poly[2 * j + 1] != column) continue;
+      low = fmin(low, poly[2 * j]);
+      high = fmax(high, poly[2 * j]);
+    }
+    width = high - low;
+
+    for (j = i; j > 0 && y[j - 1] > column; j--) {
+      y[j] = y[j - 1];
+      w[j] = w[j - 1];
+    }
+    y[j] = column;
+    w[j] = width;
+  }
+}
+
+// The area of the polygon below the column coordinate c, from the width profile of
+// the polygon, where the area below y[*k] is held in *area. The coordinate c is
+// non-decreasing over the successive calls.
+static inline double __area_below(double c, const double *y, const double *w, int n,
+                                  int *k, double *area) {
+  double t, width;
+  if (c <= y[0]) return 0.0;
+  while (*k < n - 1 && y[*k + 1] <= c) {
+    *area += 0.5 * (y[*k + 1] - y[*k]) * (w[*k] + w[*k + 1]);
+    (*k)++;
+  }
+  if (*k == n - 1) return *area;
+  t = c - y[*k];
+  width = w[*k] + t * (w[*k + 1] - w[*k]) / (y[*k + 1] - y[*k]);
+  return *area + 0.5 * t * (w[*k] + width);
+}
+
+void rasterization(double *grid, double *v0, double *v1, double *v2, double *amp,
+                   int rows, int columns) {
+  int p, q, p_min, p_max, q_min, q_max, n_half, n_strip, k;
+  double triangle[6] = {v0[0], v0[1], v1[0], v1[1], v2[0], v2[1]};
+  double half[10], strip_buffer[10], *lower, *strip, y[5], w[5];
+  double min0, max0, min1, max1, area, scale, swept, below, cumulative;
+
+  min0 = fmin(fmin(v0[0], v1[0]), v2[0]);
+  max0 = fmax(fmax(v0[0], v1[0]), v2[0]);
+  min1 = fmin(fmin(v0[1], v1[1]), v2[1]);
+  max1 = fmax(fmax(v0[1], v1[1]), v2[1]);
+  if (max0 < 0.0 || min0 >= rows || max1 < 0.0 || min1 >= columns) return;
+
+  // The bin p holds the frequencies from p to p + 1.
+  p_min = (int)fmax(floor(min0), 0.0);
+  p_max = (int)fmin(floor(max0), rows - 1.0);
+  q_min = (int)fmax(floor(min1), 0.0);
+
+  // The triangles without an area are the delta lines along a dimension, or the
+  // collinear triangles, and are interpolated as the tent strips.
+  area = 0.5 * fabs((v1[0] - v0[0]) * (v2[1] - v0[1]) -
+                    (v1[1] - v0[1]) * (v2[0] - v0[0]));
+  if (max0 - min0 < TOL || max1 - min1 < TOL ||
+      area <= TOL * (max0 - min0) * (max1 - min1)) {
+    triangle_interpolation2D(&v0[0], &v1[0], &v2[0], &v0[1], &v1[1], &v2[1], amp, grid,
+                             rows, columns);
+    return;
+  }
+
+  // The triangle within a single bin.
+  if (floor(min0) == floor(max0) && floor(min1) == floor(max1)) {
+    grid[p_min * columns + q_min] += *amp;
+    return;
+  }
+
+  // The amplitude is uniform over the triangle, and every bin receives the amplitude
+  // in proportion to the area of its overlap with the triangle. The triangle is
+  // clipped to every row, and the row polygon is swept along the columns, where the
+  // bin holds the difference of the areas of the row polygon below its two edges.
+  scale = *amp / area;
+  for (p = p_min; p <= p_max; p++) {
+    // The triangle is only clipped at the row edges that cross the triangle.
+    lower = triangle;
+    n_half = 3;
+    if (min0 < p) {
+      n_half = __clip_polygon(triangle, 3, 0, (double)p, -1.0, half);
+      lower = half;
+    }
+    strip = lower;
+    n_strip = n_half;
+    if (max0 > p + 1.0) {
+      n_strip = __clip_polygon(lower, n_half, 0, p + 1.0, 1.0, strip_buffer);
+      strip = strip_buffer;
+    }
+    if (n_strip < 3) continue;
+
+    __width_profile(strip, n_strip, y, w);
+    q_min = (int)fmax(floor(y[0]), 0.0);
+    q_max = (int)fmin(floor(y[n_strip - 1]), columns - 1.0);
+
+    k = 0;
+    swept = 0.0;
+    below = __area_below((double)q_min, y, w, n_strip, &k, &swept);
+    for (q = q_min; q <= q_max; q++) {
+      cumulative = __area_below(q + 1.0, y, w, n_strip, &k, &swept);
+      grid[p * columns + q] += scale * (cumulative - below);
+      below = cumulative;
+    }
+  }
+}
 
 void triangle_interpolation(double *freq1, double *freq2, double *freq3, double *amp,
                             double *spec, int *points) {
@@ -638,8 +640,7 @@ void triangle_interpolation(double *freq1, double *freq2, double *freq3, double
   __triangle_interpolation(freq1, freq2, freq3, amp, spec, points);
 }
 
-void octahedronDeltaInterpolation(const unsigned int nt, double *freq, double *amp,
-                                  int stride, int n_spec, double *spec) {
+double octahedronAmplitudeSum(const unsigned int nt, double *amp, int stride) {
   int i = 0, j = 0, local_index, n_pts = (nt + 1) * (nt + 2) / 2;
   unsigned int int_i_stride = 0, int_j_stride = 0;
   double amp1, temp, *amp_address;
@@ -664,11 +665,360 @@ void octahedronDeltaInterpolation(const unsigned int nt, double *freq, double *a
     int_i_stride += stride;
     int_j_stride += stride;
   }
+  return amp1;
+}
+
+void octahedronDeltaInterpolation(const unsigned int nt, double *freq, double *amp,
+                                  int stride, int n_spec, double *spec) {
+  double amp1 = octahedronAmplitudeSum(nt, amp, stride);
   return delta_fn_interpolation(freq, &n_spec, &amp1, spec);
 }
 
-void octahedronInterpolation(double *spec, double *freq, const unsigned int nt,
-                             double *amp, int stride, int m) {
+void histogramInterpolation(double *spec, double *freq, const unsigned int n,
+                            double *amp, int m) {
+  unsigned int i;
+  for (i = 0; i < n; i++) delta_fn_interpolation(&freq[i], &m, &amp[i], spec);
+}
+
+void histogramInterpolation2D(double *spec, double *freq1, double *freq2,
+                              const unsigned int n, double *amp, int m0, int m1) {
+  unsigned int i;
+  int p, q, row, col;
+  double x, y, wx[2], wy[2];
+
+  for (i = 0; i < n; i++) {
+    // The bin p holds the frequencies from p to p + 1, centered at p + 0.5.
+    x = freq1[i] - 0.5;
+    y = freq2[i] - 0.5;
+    if (x <= -1.0 || y <= -1.0 || x >= m0 || y >= m1) continue;
+    p = (int)floor(x);
+    q = (int)floor(y);
+    wx[1] = x - p;
+    wy[1] = y - q;
+    wx[0] = 1.0 - wx[1];
+    wy[0] = 1.0 - wy[1];
+    for (row = 0; row < 2; row++) {
+      if (p + row < 0 || p + row >= m0) continue;
+      for (col = 0; col < 2; col++) {
+        if (q + col < 0 || q + col >= m1) continue;
+        spec[(p + row) * m1 + q + col] += amp[i] * wx[row] * wy[col];
+      }
+    }
+  }
+}
+
+double meridianAmplitudeSum(const unsigned int nt, double *amp) {
+  unsigned int i;
+  double amp1 = 0.0;
+  for (i = 0; i < nt; i++) amp1 += amp[i] + amp[i + 1];
+  return amp1;
+}
+
+void meridianDeltaInterpolation(const unsigned int nt, double *freq, double *amp,
+                                int n_spec, double *spec) {
+  double amp1 = meridianAmplitudeSum(nt, amp);
+  return delta_fn_interpolation(freq, &n_spec, &amp1, spec);
+}
+
+// The amplitude of a segment, between the line parameters t0 and t1, where the density
+// varies linearly from 2 * amp0 at t = 0 to 2 * amp1 at t = 1, and the total amplitude
+// of the segment is amp0 + amp1.
+static inline double __segment_amplitude(double t0, double t1, double amp0,
+                                         double amp1) {
+  return (t1 - t0) * (2.0 * amp0 + (amp1 - amp0) * (t0 + t1));
+}
+
+// Interpolate the segment from the frequency f0, with the amplitude amp0, to the
+// frequency f1, with the amplitude amp1, where the bin p holds the frequencies from p
+// to p + 1.
+static inline void __segment_interpolation(double f0, double f1, double amp0,
+                                           double amp1, double *spec, int m) {
+  int p, p_max;
+  double t, t_next, inverse_df, temp;
+  if (f0 > f1) {
+    temp = f0, f0 = f1, f1 = temp;
+    temp = amp0, amp0 = amp1, amp1 = temp;
+  }
+  if (f1 < 0.0 || f0 >= m) return;
+
+  p = (int)floor(f0);
+  p_max = (int)floor(f1);
+  if (p == p_max) {
+    spec[p] += amp0 + amp1;
+    return;
+  }
+
+  inverse_df = 1.0 / (f1 - f0);
+  t = 0.0;
+  if (p < 0) {
+    p = 0;
+    t = -f0 * inverse_df;
+  }
+  if (p_max >= m) p_max = m - 1;
+  for (; p <= p_max; p++) {
+    t_next = fmin((p + 1 - f0) * inverse_df, 1.0);
+    spec[p] += __segment_amplitude(t, t_next, amp0, amp1);
+    t = t_next;
+  }
+}
+
+void meridianInterpolation(double *spec, double *freq, const unsigned int nt,
+                           double *amp, int m) {
+  unsigned int i;
+  for (i = 0; i < nt; i++) {
+    __segment_interpolation(freq[i], freq[i + 1], amp[i], amp[i + 1], spec, m);
+  }
+}
+
+// Interpolate the segment from (x0, y0) to (x1, y1). The line is traversed bin by bin,
+// where the line enters and leaves a bin at the line parameters t and t_next.
+static inline void __segment_interpolation_2D(double x0, double y0, double x1,
+                                              double y1, double amp0, double amp1,
+                                              double *spec, int m0, int m1) {
+  int p = (int)floor(x0), q = (int)floor(y0), p_end = (int)floor(x1),
+      q_end = (int)floor(y1);
+  int step_p = (x1 > x0) ? 1 : -1, step_q = (y1 > y0) ? 1 : -1;
+  double t = 0.0, t_next;
+  double t_p = INFINITY, t_q = INFINITY, dt_p = INFINITY, dt_q = INFINITY;
+
+  if (p != p_end) {
+    dt_p = 1.0 / fabs(x1 - x0);
+    t_p = ((step_p > 0) ? (p + 1 - x0) : (x0 - p)) * dt_p;
+  }
+  if (q != q_end) {
+    dt_q = 1.0 / fabs(y1 - y0);
+    t_q = ((step_q > 0) ? (q + 1 - y0) : (y0 - q)) * dt_q;
+  }
+
+  while (t < 1.0) {
+    t_next = fmin(fmin(t_p, t_q), 1.0);
+    if (p >= 0 && p < m0 && q >= 0 && q < m1) {
+      spec[p * m1 + q] += __segment_amplitude(t, t_next, amp0, amp1);
+    }
+    t = t_next;
+    if (t_p <= t_q) {
+      p += step_p;
+      t_p += dt_p;
+    } else {
+      q += step_q;
+      t_q += dt_q;
+    }
+  }
+}
+
+// The bin p of a delta function at x, and the neighbouring bin, which receives the
+// returned fraction of the amplitude, as in delta_fn_interpolation.
+static inline double __delta_split(double x, int *p, int *neighbour) {
+  double diff;
+  *p = (int)floor(x);
+  diff = x - *p - 0.5;
+  *neighbour = *p + ((diff < 0.0) ? -1 : 1);
+  return (fabs(diff) < TOL) ? 0.0 : fabs(diff);
+}
+
+// True if the frequencies along the meridian are constant, within TOL.
+static inline bool __is_constant(double *freq, const unsigned int nt) {
+  unsigned int i;
+  double f_min = freq[0], f_max = freq[0];
+  for (i = 1; i <= nt; i++) {
+    f_min = fmin(f_min, freq[i]);
+    f_max = fmax(f_max, freq[i]);
+  }
+  return f_max - f_min < TOL;
+}
+
+// A delta function at (x, y), split between the four nearest bins, as in
+// delta_fn_interpolation along both dimensions.
+static inline void __delta_interpolation_2D(double x, double y, double amp,
+                                            double *spec, int m0, int m1) {
+  int p[2], q[2], row, col;
+  double wx[2], wy[2];
+  wx[1] = __delta_split(x, &p[0], &p[1]);
+  wy[1] = __delta_split(y, &q[0], &q[1]);
+  wx[0] = 1.0 - wx[1];
+  wy[0] = 1.0 - wy[1];
+  for (row = 0; row < 2; row++) {
+    if (wx[row] == 0.0 || p[row] < 0 || p[row] >= m0) continue;
+    for (col = 0; col < 2; col++) {
+      if (wy[col] == 0.0 || q[col] < 0 || q[col] >= m1) continue;
+      spec[p[row] * m1 + q[col]] += amp * wx[row] * wy[col];
+    }
+  }
+}
+
+void meridianInterpolation2D(double *spec, double *freq1, double *freq2,
+                             const unsigned int nt, double *amp, int m0, int m1) {
+  unsigned int i;
+  int p, neighbour;
+  double w;
+
+  // A constant frequency along both dimensions, such as a sideband of a spinning
+  // sideband correlation, is a delta function in the 2D grid.
+  if (__is_constant(freq1, nt) && __is_constant(freq2, nt)) {
+    __delta_interpolation_2D(freq1[0], freq2[0], meridianAmplitudeSum(nt, amp), spec,
+                             m0, m1);
+    return;
+  }
+
+  // A constant frequency along the first dimension is a delta function, which is split
+  // between the two nearest rows.
+  if (__is_constant(freq1, nt)) {
+    w = __delta_split(freq1[0], &p, &neighbour);
+    for (i = 0; i < nt; i++) {
+      if (p >= 0 && p < m0) {
+        __segment_interpolation(freq2[i], freq2[i + 1], (1 - w) * amp[i],
+                                (1 - w) * amp[i + 1], &spec[p * m1], m1);
+      }
+      if (w != 0.0 && neighbour >= 0 && neighbour < m0) {
+        __segment_interpolation(freq2[i], freq2[i + 1], w * amp[i], w * amp[i + 1],
+                                &spec[neighbour * m1], m1);
+      }
+    }
+    return;
+  }
+
+  // likewise, a constant frequency along the second dimension is split between the two
+  // nearest columns, traversed at the center of the columns.
+  if (__is_constant(freq2, nt)) {
+    w = __delta_split(freq2[0], &p, &neighbour);
+    for (i = 0; i < nt; i++) {
+      __segment_interpolation_2D(freq1[i], p + 0.5, freq1[i + 1], p + 0.5,
+                                 (1 - w) * amp[i], (1 - w) * amp[i + 1], spec, m0, m1);
+      if (w == 0.0) continue;
+      __segment_interpolation_2D(freq1[i], neighbour + 0.5, freq1[i + 1],
+                                 neighbour + 0.5, w * amp[i], w * amp[i + 1], spec, m0,
+                                 m1);
+    }
+    return;
+  }
+
+  for (i = 0; i < nt; i++) {
+    __segment_interpolation_2D(freq1[i], freq2[i], freq1[i + 1], freq2[i + 1], amp[i],
+                               amp[i + 1], spec, m0, m1);
+  }
+}
+
+void analyticDeltaInterpolation(double *freq, double *amp, int n_spec, double *spec) {
+  double amp1 = cblas_dasum(9, amp, 1);
+  return delta_fn_interpolation(freq, &n_spec, &amp1, spec);
+}
+
+// The root of c0 + c1 s + c2 s^2 = x, within the monotonic piece from s0 to s1, using
+// the numerically stable form of the two roots.
+static inline double __piece_root(double x, double s0, double s1, double c0, double c1,
+                                  double c2) {
+  double d = c0 - x, q, r0, r1, mid = 0.5 * (s0 + s1);
+  if (fabs(c2) <= TOL * fabs(c1)) return fmin(fmax(-d / c1, s0), s1);
+  q = -0.5 * (c1 + copysign(sqrt(fmax(c1 * c1 - 4.0 * c2 * d, 0.0)), c1));
+  r0 = q / c2;
+  r1 = (q != 0.0) ? d / q : r0;
+  r0 = (fabs(r0 - mid) < fabs(r1 - mid)) ? r0 : r1;
+  return fmin(fmax(r0, s0), s1);
+}
+
+// Add the cos(β) measure of the frequencies, f(s) = c0 + c1 s + c2 s^2, where
+// s = cos²(β), over the monotonic piece from s0 to s1, to the bins of the spectrum. The
+// measure of the frequencies below x is the difference of sqrt(s) at the ends of the
+// part of the piece below x, and the bins receive the differences of the measure at the
+// bin edges.
+static inline void __analytic_piece(double s0, double s1, double c0, double c1,
+                                    double c2, double amp, double *spec, int m) {
+  int p, p_max;
+  bool increasing;
+  double u0 = sqrt(s0), u1 = sqrt(s1), f0, f1, f_min, f_max, x, below, below_next;
+  f0 = c0 + s0 * (c1 + c2 * s0);
+  f1 = c0 + s1 * (c1 + c2 * s1);
+  increasing = f1 > f0;
+  f_min = fmin(f0, f1);
+  f_max = fmax(f0, f1);
+  if (f_max < 0.0 || f_min >= m) return;
+
+  p = (int)floor(f_min);
+  p_max = (int)floor(f_max);
+  if (p == p_max) {
+    spec[p] += amp * (u1 - u0);
+    return;
+  }
+
+  below = 0.0;
+  if (p < 0) {
+    p = 0;
+    x = sqrt(__piece_root(0.0, s0, s1, c0, c1, c2));
+    below = increasing ? x - u0 : u1 - x;
+  }
+  if (p_max >= m) p_max = m - 1;
+  for (; p <= p_max; p++) {
+    x = p + 1;
+    below_next = u1 - u0;
+    if (x < f_max) {
+      x = sqrt(__piece_root(x, s0, s1, c0, c1, c2));
+      below_next = increasing ? x - u0 : u1 - x;
+    }
+    spec[p] += amp * (below_next - below);
+    below = below_next;
+  }
+}
+
+// The nodes of α per bin of frequency excursion along α, such that the edges of the
+// lineshape of a node move by at most 1/ALPHA_NODES_PER_BIN of a bin between nodes.
+#define ALPHA_NODES_PER_BIN 8.0
+
+void analyticInterpolation(double *spec, double *freq, const unsigned int nt,
+                           double *amp, int m) {
+  unsigned int i, j, n_alpha;
+  double a[3], b[3], c[3], f[3], alpha, cos_2alpha, cos_4alpha;
+  double c0, c1, c2, s_vertex, amp1, drift = 0.0;
+
+  // the a + b cos(2α) + c cos(4α) form of the frequency at cos²(β) = 0, 1/2, and 1,
+  // from the frequencies at α = 0, π/4, and π/2.
+  for (j = 0; j < 3; j++) {
+    b[j] = 0.5 * (freq[j] - freq[6 + j]);
+    a[j] = 0.25 * (freq[j] + freq[6 + j]) + 0.5 * freq[3 + j];
+    c[j] = 0.25 * (freq[j] + freq[6 + j]) - 0.5 * freq[3 + j];
+    drift = fmax(drift, fabs(b[j]) + 2.0 * fabs(c[j]));
+  }
+
+  // π drift bounds the excursion of the frequency along α, in bins.
+  n_alpha = (unsigned int)fmax((double)nt, ALPHA_NODES_PER_BIN * CONST_PI * drift);
+  n_alpha = (n_alpha > 65536) ? 65536 : n_alpha;
+  amp1 = cblas_dasum(9, amp, 1) / (double)n_alpha;
+
+  for (i = 0; i < n_alpha; i++) {
+    alpha = 0.5 * CONST_PI * ((double)i + 0.5) / (double)n_alpha;
+    cos_2alpha = cos(2.0 * alpha);
+    cos_4alpha = cos(4.0 * alpha);
+    for (j = 0; j < 3; j++) f[j] = a[j] + b[j] * cos_2alpha + c[j] * cos_4alpha;
+
+    // the quadratic in cos²(β) through the frequencies at cos²(β) = 0, 1/2, and 1.
+    c0 = f[0];
+    c2 = 2.0 * (f[0] - 2.0 * f[1] + f[2]);
+    c1 = f[2] - f[0] - c2;
+
+    // the frequency is monotonic on either side of the vertex of the quadratic.
+    s_vertex = (c2 != 0.0) ? -0.5 * c1 / c2 : -1.0;
+    if (s_vertex > 0.0 && s_vertex < 1.0) {
+      __analytic_piece(0.0, s_vertex, c0, c1, c2, amp1, spec, m);
+      __analytic_piece(s_vertex, 1.0, c0, c1, c2, amp1, spec, m);
+      continue;
+    }
+    __analytic_piece(0.0, 1.0, c0, c1, c2, amp1, spec, m);
+  }
+}
+
+// True if the triangle amplitude is not below the culling threshold. The amplitudes of
+// the skipped triangles are accumulated in the culling struct.
+static inline bool __keep_triangle(double amp, MRS_culling *culling) {
+  if (culling == NULL) return true;
+  culling->total += amp;
+  if (fabs(amp) >= culling->threshold) return true;
+  culling->triangles++;
+  culling->discarded += amp;
+  return false;
+}
+
+static inline void __octahedron_interpolation(double *spec, double *freq,
+                                              const unsigned int nt, double *amp,
+                                              int stride, int m, MRS_culling *culling) {
   int i = 0, j = 0, local_index, n_pts = (nt + 1) * (nt + 2) / 2;
   unsigned int int_i_stride = 0, int_j_stride = 0;
   double amp1, temp, *amp_address, *freq_address;
@@ -682,12 +1032,15 @@ void octahedronInterpolation(double *spec, double *freq, const unsigned int nt,
     temp = amp[int_i_stride + stride] + amp_address[int_j_stride];
     amp1 = temp + amp[int_i_stride];
 
-    __triangle_interpolation(&freq[i], &freq[i + 1], &freq_address[j], &amp1, spec, &m);
+    if (__keep_triangle(amp1, culling))
+      __triangle_interpolation(&freq[i], &freq[i + 1], &freq_address[j], &amp1, spec,
+                               &m);
 
     if (i < local_index) {
       temp += amp_address[int_j_stride + stride];
-      __triangle_interpolation(&freq[i + 1], &freq_address[j], &freq_address[j + 1],
-                               &temp, spec, &m);
+      if (__keep_triangle(temp, culling))
+        __triangle_interpolation(&freq[i + 1], &freq_address[j], &freq_address[j + 1],
+                                 &temp, spec, &m);
     } else {
       local_index = j + nt;
       i++;
@@ -700,8 +1053,261 @@ void octahedronInterpolation(double *spec, double *freq, const unsigned int nt,
   }
 }
 
-void octahedronInterpolation2D(double *spec, double *freq1, double *freq2, int nt,
-                               double *amp, int stride, int m0, int m1) {
+// Batched triangle interpolation. The octahedron mesh is traversed row by row, and the
+// up and down triangles between two adjacent rows of vertices are gathered in batches.
+// The sorted frequencies, the bin indexes, and the clipping flags of a batch are
+// evaluated in one branchless loop, compiled for several instruction sets and selected
+// at runtime. The triangles are then deposited onto the spectrum in the same order as
+// the scalar kernel.
+
+#define TRIANGLE_BATCH 128
+
+#define CLIP_LEFT1 1
+#define CLIP_RIGHT1 2
+#define CLIP_LEFT2 4
+#define CLIP_RIGHT2 8
+#define SINGLE_BIN 16
+#define OUTSIDE 32
+
+typedef struct triangle_set {
+  double fmin[TRIANGLE_BATCH], fmid[TRIANGLE_BATCH], fmax[TRIANGLE_BATCH];
+  double amp[TRIANGLE_BATCH], top[TRIANGLE_BATCH];
+  int p[TRIANGLE_BATCH], pmid[TRIANGLE_BATCH], pmax[TRIANGLE_BATCH];
+  int flags[TRIANGLE_BATCH];
+} triangle_set;
+
+typedef struct triangle_batch {
+  int n_up, n_down;
+  triangle_set up, down;
+} triangle_batch;
+
+typedef void (*triangle_batch_kernel)(const double *freq0, const double *freq1,
+                                      const double *amp0, const double *amp1,
+                                      int stride, int points, triangle_batch *batch);
+
+#define MIN(a, b) ((a) < (b) ? (a) : (b))
+#define MAX(a, b) ((a) > (b) ? (a) : (b))
+
+static inline __attribute__((always_inline)) void __sort_and_clip(
+    double a, double b, double c, double amp, int points, triangle_set *restrict set,
+    int k) {
+  int p, pmid, pmax;
+  double lo, hi, fmin, fmid, fmax;
+
+  // a sorting network, exact for the min, mid, and max values.
+  lo = MIN(a, b);
+  hi = MAX(a, b);
+  fmin = MIN(lo, c);
+  fmax = MAX(hi, c);
+  fmid = MAX(lo, MIN(hi, c));
+
+  set->fmin[k] = fmin;
+  set->fmid[k] = fmid;
+  set->fmax[k] = fmax;
+  set->amp[k] = amp;
+  set->top[k] = amp * 2.0 / (fmax - fmin);
+
+  p = (int)fmin;
+  pmid = (int)fmid;
+  pmax = (int)fmax;
+  set->flags[k] = (p < 0) | ((pmid >= points) << 1) | ((pmid < 0) << 2) |
+                  ((pmax >= points) << 3) | ((p == pmax) << 4) |
+                  (((p > points) | (pmax < 0)) << 5);
+  set->p[k] = MAX(p, 0);
+  set->pmid[k] = MAX(MIN(pmid, points), 0);
+  set->pmax[k] = MIN(pmax, points);
+}
+
+// The up triangles (k, k+1, k') and the down triangles (k+1, k', k'+1) between the
+// vertices k of a row and the vertices k' of the next row.
+static inline __attribute__((always_inline)) void __sort_and_clip_batch(
+    const double *restrict freq0, const double *restrict freq1,
+    const double *restrict amp0, const double *restrict amp1, int stride, int points,
+    triangle_batch *restrict batch) {
+  int k;
+  double temp;
+
+  for (k = 0; k < batch->n_up; k++) {
+    temp = amp0[(k + 1) * stride] + amp1[k * stride];
+    __sort_and_clip(freq0[k], freq0[k + 1], freq1[k], temp + amp0[k * stride], points,
+                    &batch->up, k);
+  }
+  for (k = 0; k < batch->n_down; k++) {
+    temp = amp0[(k + 1) * stride] + amp1[k * stride];
+    __sort_and_clip(freq0[k + 1], freq1[k], freq1[k + 1], temp + amp1[(k + 1) * stride],
+                    points, &batch->down, k);
+  }
+}
+
+#define TRIANGLE_BATCH_KERNEL(name)                                               \
+  static void name(const double *freq0, const double *freq1, const double *amp0, \
+                   const double *amp1, int stride, int points,                   \
+                   triangle_batch *batch) {                                      \
+    __sort_and_clip_batch(freq0, freq1, amp0, amp1, stride, points, batch);      \
+  }
+
+TRIANGLE_BATCH_KERNEL(__sort_and_clip_batch_generic)
+
+#if defined(__GNUC__) && (defined(__x86_64__) || defined(__i386__))
+#define X86_DISPATCH
+__attribute__((target("sse4.1"))) TRIANGLE_BATCH_KERNEL(__sort_and_clip_batch_sse41)
+__attribute__((target("avx2"))) TRIANGLE_BATCH_KERNEL(__sort_and_clip_batch_avx2)
+__attribute__((target("avx512f"))) TRIANGLE_BATCH_KERNEL(__sort_and_clip_batch_avx512)
+#endif
+
+static const char *isa_names[] = {"scalar", "generic", "sse4.1", "avx2", "avx512f"};
+
+static int interpolation_isa = -1;
+
+int MRS_interpolation_isa_supported(int isa) {
+  switch (isa) {
+  case MRS_ISA_SCALAR:
+  case MRS_ISA_GENERIC:
+    return 1;
+#ifdef X86_DISPATCH
+  case MRS_ISA_SSE41:
+    return __builtin_cpu_supports("sse4.1");
+  case MRS_ISA_AVX2:
+    return __builtin_cpu_supports("avx2");
+  case MRS_ISA_AVX512:
+    return __builtin_cpu_supports("avx512f");
+#endif
+  default:
+    return 0;
+  }
+}
+
+int MRS_set_interpolation_isa(int isa) {
+  if (isa < 0 || isa > MRS_ISA_AVX512) isa = MRS_ISA_AVX512;
+  while (!MRS_interpolation_isa_supported(isa)) isa--;
+  interpolation_isa = isa;
+  return isa;
+}
+
+int MRS_get_interpolation_isa() {
+  if (interpolation_isa < 0) return MRS_set_interpolation_isa(-1);
+  return interpolation_isa;
+}
+
+const char *MRS_interpolation_isa_name(int isa) {
+  if (isa < 0 || isa > MRS_ISA_AVX512) return "unknown";
+  return isa_names[isa];
+}
+
+static inline triangle_batch_kernel __batch_kernel(int isa) {
+  switch (isa) {
+#ifdef X86_DISPATCH
+  case MRS_ISA_SSE41:
+    return __sort_and_clip_batch_sse41;
+  case MRS_ISA_AVX2:
+    return __sort_and_clip_batch_avx2;
+  case MRS_ISA_AVX512:
+    return __sort_and_clip_batch_avx512;
+#endif
+  default:
+    return __sort_and_clip_batch_generic;
+  }
+}
+
+static inline void __deposit_triangle(triangle_set *set, int k, double *spec,
+                                      MRS_culling *culling) {
+  int flags = set->flags[k];
+  double f[3];
+
+  if (!__keep_triangle(set->amp[k], culling)) return;
+  if (flags & SINGLE_BIN) {
+    if (!(flags & (CLIP_LEFT1 | CLIP_RIGHT1))) spec[set->p[k]] += set->amp[k];
+    return;
+  }
+  if (flags & OUTSIDE) return;
+
+  f[0] = set->fmin[k];
+  f[1] = set->fmid[k];
+  f[2] = set->fmax[k];
+  left_triangle_interpolate(set->p[k], set->pmid[k], flags & CLIP_LEFT1,
+                            flags & CLIP_RIGHT1, set->top[k], f, spec);
+  right_triangle_interpolate(set->pmid[k], set->pmax[k], flags & CLIP_LEFT2,
+                             flags & CLIP_RIGHT2, set->top[k], f, spec);
+}
+
+static inline void __octahedron_batch_interpolation(double *spec, double *freq,
+                                                    const unsigned int nt, double *amp,
+                                                    int stride, int m,
+                                                    MRS_culling *culling,
+                                                    triangle_batch_kernel kernel) {
+  int row, k, k0, n_up, start = 0, next;
+  triangle_batch batch;
+
+  for (row = 0; row < (int)nt; row++) {
+    n_up = nt - row;
+    next = start + n_up + 1;
+    for (k0 = 0; k0 < n_up; k0 += TRIANGLE_BATCH) {
+      batch.n_up = MIN(TRIANGLE_BATCH, n_up - k0);
+      batch.n_down = MIN(TRIANGLE_BATCH, n_up - 1 - k0);
+      kernel(&freq[start + k0], &freq[next + k0], &amp[(start + k0) * stride],
+             &amp[(next + k0) * stride], stride, m, &batch);
+
+      for (k = 0; k < batch.n_up; k++) {
+        __deposit_triangle(&batch.up, k, spec, culling);
+        if (k < batch.n_down) __deposit_triangle(&batch.down, k, spec, culling);
+      }
+    }
+    start = next;
+  }
+}
+
+static inline void __octahedron_interpolation_dispatch(double *spec, double *freq,
+                                                       const unsigned int nt,
+                                                       double *amp, int stride, int m,
+                                                       MRS_culling *culling) {
+  int isa = MRS_get_interpolation_isa();
+  if (isa == MRS_ISA_SCALAR) {
+    __octahedron_interpolation(spec, freq, nt, amp, stride, m, culling);
+    return;
+  }
+  __octahedron_batch_interpolation(spec, freq, nt, amp, stride, m, culling,
+                                   __batch_kernel(isa));
+}
+
+void octahedronScalarInterpolation(double *spec, double *freq, const unsigned int nt,
+                                   double *amp, int stride, int m) {
+  __octahedron_interpolation(spec, freq, nt, amp, stride, m, NULL);
+}
+
+void octahedronInterpolation(double *spec, double *freq, const unsigned int nt,
+                             double *amp, int stride, int m) {
+  __octahedron_interpolation_dispatch(spec, freq, nt, amp, stride, m, NULL);
+}
+
+void octahedronCulledInterpolation(double *spec, double *freq, const unsigned int nt,
+                                   double *amp, int stride, int m,
+                                   MRS_culling *culling) {
+  __octahedron_interpolation_dispatch(spec, freq, nt, amp, stride, m, culling);
+}
+
+// Interpolate a triangle of the mesh onto the 2D grid as the tent strips, or, when
+// exact, rasterize the triangle by the area of its overlap with every bin.
+static inline void __triangle_2D(double *f11, double *f12, double *f13, double *f21,
+                                 double *f22, double *f23, double *amp, double *spec,
+                                 int m0, int m1, bool exact) {
+  double v0[2], v1[2], v2[2];
+  if (!exact) {
+    triangle_interpolation2D(f11, f12, f13, f21, f22, f23, amp, spec, m0, m1);
+    return;
+  }
+  v0[0] = *f11;
+  v0[1] = *f21;
+  v1[0] = *f12;
+  v1[1] = *f22;
+  v2[0] = *f13;
+  v2[1] = *f23;
+  rasterization(spec, v0, v1, v2, amp, m0, m1);
+}
+
+static inline void __octahedron_interpolation_2D(double *spec, double *freq1,
+                                                 double *freq2, int nt, double *amp,
+                                                 int stride, int m0, int m1,
+                                                 MRS_culling *culling, bool exact) {
   int i = 0, j = 0, local_index, n_pts = (nt + 1) * (nt + 2) / 2;
   unsigned int int_i_stride = 0, int_j_stride = 0;
   double amp1, temp, *amp_address, *freq1_address, *freq2_address;
@@ -717,14 +1323,16 @@ void octahedronInterpolation2D(double *spec, double *freq1, double *freq2, int n
     temp = amp[int_i_stride + stride] + amp_address[int_j_stride];
     amp1 = temp + amp[int_i_stride];
 
-    triangle_interpolation2D(&freq1[i], &freq1[i + 1], &freq1_address[j], &freq2[i],
-                             &freq2[i + 1], &freq2_address[j], &amp1, spec, m0, m1);
+    if (__keep_triangle(amp1, culling))
+      __triangle_2D(&freq1[i], &freq1[i + 1], &freq1_address[j], &freq2[i],
+                    &freq2[i + 1], &freq2_address[j], &amp1, spec, m0, m1, exact);
 
     if (i < local_index) {
       temp += amp_address[int_j_stride + stride];
-      triangle_interpolation2D(&freq1[i + 1], &freq1_address[j], &freq1_address[j + 1],
-                               &freq2[i + 1], &freq2_address[j], &freq2_address[j + 1],
-                               &temp, spec, m0, m1);
+      if (__keep_triangle(temp, culling))
+        __triangle_2D(&freq1[i + 1], &freq1_address[j], &freq1_address[j + 1],
+                      &freq2[i + 1], &freq2_address[j], &freq2_address[j + 1], &temp,
+                      spec, m0, m1, exact);
     } else {
       local_index = j + nt;
       i++;
@@ -736,3 +1344,28 @@ void octahedronInterpolation2D(double *spec, double *freq1, double *freq2, int n
     int_j_stride += stride;
   }
 }
+
+void octahedronInterpolation2D(double *spec, double *freq1, double *freq2, int nt,
+                               double *amp, int stride, int m0, int m1) {
+  __octahedron_interpolation_2D(spec, freq1, freq2, nt, amp, stride, m0, m1, NULL,
+                                false);
+}
+
+void octahedronCulledInterpolation2D(double *spec, double *freq1, double *freq2, int nt,
+                                     double *amp, int stride, int m0, int m1,
+                                     MRS_culling *culling) {
+  if (culling == NULL) {
+    __octahedron_interpolation_2D(spec, freq1, freq2, nt, amp, stride, m0, m1, NULL,
+                                  false);
+    return;
+  }
+  __octahedron_interpolation_2D(spec, freq1, freq2, nt, amp, stride, m0, m1, culling,
+                                false);
+}
+
+void octahedronRasterization2D(double *spec, double *freq1, double *freq2, int nt,
+                               double *amp, int stride, int m0, int m1,
+                               MRS_culling *culling) {
+  __octahedron_interpolation_2D(spec, freq1, freq2, nt, amp, stride, m0, m1, culling,
+                                true);
+}
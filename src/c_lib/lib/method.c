@@ -9,19 +9,21 @@
 
 #include "method.h"
 
-/* free the buffer and pre-calculated tables from the mrsimulator plan. */
+/* Release the event reference to the plan and free the event buffer. */
 void MRS_free_event(MRS_event *the_event) {
-  if (!the_event->plan) {
-    MRS_free_plan(the_event->plan);
-  }
+  MRS_release_plan(the_event->plan);
+  the_event->plan = NULL;
   free(the_event->freq_amplitude);
 }
 
+/* Set the event and its plan. The event shares the given plan, when the sample rotation
+ * frequency and the rotor angle match, otherwise, the event owns an updated copy. */
 static inline void MRS_set_event(MRS_event *event, double fraction,
                                  double magnetic_flux_density_in_T,
                                  double sample_rotation_frequency_in_Hz,
                                  double rotor_angle_in_rad, double increment,
                                  MRS_plan *plan) {
+  MRS_plan *new_plan;
   event->fraction = fraction;
   event->sample_rotation_frequency_in_Hz = sample_rotation_frequency_in_Hz;
   event->rotor_angle_in_rad = rotor_angle_in_rad;
@@ -29,28 +31,22 @@ static inline void MRS_set_event(MRS_event *event, double fraction,
 
   if (sample_rotation_frequency_in_Hz == plan->sample_rotation_frequency_in_Hz &&
       rotor_angle_in_rad == plan->rotor_angle_in_rad) {
+    plan->ref_count++;
     event->plan = plan;
     return;
   }
 
-  if (sample_rotation_frequency_in_Hz != plan->sample_rotation_frequency_in_Hz &&
-      rotor_angle_in_rad == plan->rotor_angle_in_rad) {
-    MRS_plan *new_plan = MRS_copy_plan(plan);
+  new_plan = MRS_copy_plan(plan);
+  if (sample_rotation_frequency_in_Hz != plan->sample_rotation_frequency_in_Hz) {
+    // The update from the sample rotation frequency also updates the rotor angle.
+    new_plan->rotor_angle_in_rad = rotor_angle_in_rad;
     MRS_plan_update_from_sample_rotation_frequency_in_Hz(
         new_plan, increment, sample_rotation_frequency_in_Hz);
-    event->plan = new_plan;
-    return;
-  }
-
-  if (sample_rotation_frequency_in_Hz == plan->sample_rotation_frequency_in_Hz &&
-      rotor_angle_in_rad != plan->rotor_angle_in_rad) {
-    MRS_plan *new_plan = MRS_copy_plan(plan);
+  } else {
     MRS_plan_update_from_rotor_angle_in_rad(new_plan, rotor_angle_in_rad,
                                             plan->allow_fourth_rank);
-    event->plan = new_plan;
-    return;
   }
-  return;
+  event->plan = new_plan;
 }
 
 MRS_dimension *MRS_dimension_malloc(int n) {
@@ -58,15 +54,50 @@ MRS_dimension *MRS_dimension_malloc(int n) {
   return dimensions;
 }
 
+void MRS_update_dimension_coordinates(MRS_dimension *dimension, int count,
+                                      double coordinates_offset, double increment) {
+  dimension->count = count;
+  dimension->coordinates_offset = coordinates_offset;
+  dimension->increment = increment;
+  dimension->inverse_increment = 1.0 / increment;
+  dimension->normalize_offset =
+      0.5 - (coordinates_offset * dimension->inverse_increment);
+}
+
+int MRS_update_dimension_rotor_angles(MRS_dimension *dimension,
+                                      double *rotor_angle_in_rad) {
+  unsigned int i, j;
+  int n_updates = 0;
+  MRS_plan *plan;
+
+  /* Events with the same plan must share the new rotor angle for an in-place update. */
+  for (i = 0; i < dimension->n_events; i++) {
+    for (j = 0; j < i; j++) {
+      if (dimension->events[j].plan == dimension->events[i].plan &&
+          rotor_angle_in_rad[j] != rotor_angle_in_rad[i]) {
+        return -1;
+      }
+    }
+  }
+
+  for (i = 0; i < dimension->n_events; i++) {
+    dimension->events[i].rotor_angle_in_rad = rotor_angle_in_rad[i];
+    plan = dimension->events[i].plan;
+    if (plan->rotor_angle_in_rad == rotor_angle_in_rad[i]) continue;
+
+    MRS_plan_update_from_rotor_angle_in_rad(plan, rotor_angle_in_rad[i],
+                                            plan->allow_fourth_rank);
+    n_updates++;
+  }
+  return n_updates;
+}
+
 static inline void create_plans_for_events_in_dimension(
     MRS_dimension *dimension, MRS_averaging_scheme *scheme, int count, double increment,
     double coordinates_offset, int n_events, double *fraction,
     double *sample_rotation_frequency_in_Hz, double *rotor_angle_in_rad,
     double *magnetic_flux_density_in_T, unsigned int number_of_sidebands) {
   int i;
-  dimension->count = count;
-  dimension->coordinates_offset = coordinates_offset;
-  dimension->increment = increment;
   dimension->n_events = n_events;
   dimension->events = (MRS_event *)malloc(n_events * sizeof(MRS_event));
 
@@ -81,9 +112,10 @@ static inline void create_plans_for_events_in_dimension(
                   *sample_rotation_frequency_in_Hz++, *rotor_angle_in_rad++, increment,
                   the_plan);
   }
-  dimension->inverse_increment = 1.0 / increment;
-  dimension->normalize_offset =
-      0.5 - (coordinates_offset * dimension->inverse_increment);
+  // The events hold their own references to the plan.
+  MRS_release_plan(the_plan);
+
+  MRS_update_dimension_coordinates(dimension, count, coordinates_offset, increment);
   dimension->R0_offset = 0.0;
   /* buffer to hold the local frequencies and frequency offset. The buffer   *
    * is useful when the rotor angle is off magic angle (54.735 deg). */
@@ -137,7 +169,9 @@ void MRS_free_dimension(MRS_dimension *dimensions, unsigned int n) {
     for (evt = 0; evt < dimension->n_events; evt++) {
       MRS_free_event(&dimension->events[evt]);
     }
+    free(dimension->events);
     free(dimension->local_frequency);
     free(dimension->freq_offset);
   }
+  free(dimensions);
 }
@@ -13,27 +13,44 @@ double ONE[] = {1.0, 0.0};
 double ZERO[] = {0.0, 0.0};
 
 /**
- * Free the buffers and pre-calculated tables from the mrsimulator plan.
+ * Free the buffers and pre-calculated tables from the mrsimulator plan, and the plan.
  */
 void MRS_free_plan(MRS_plan *the_plan) {
-  if (!the_plan->vr_freq) free(the_plan->vr_freq);
-  if (!the_plan->wigner_d2m0_vector) free(the_plan->wigner_d2m0_vector);
-  if (!the_plan->wigner_d4m0_vector) free(the_plan->wigner_d4m0_vector);
-  if (!the_plan->norm_amplitudes) free(the_plan->norm_amplitudes);
-  if (!the_plan->pre_phase) free(the_plan->pre_phase);
-  if (!the_plan->pre_phase_2) free(the_plan->pre_phase_2);
-  if (!the_plan->pre_phase_4) free(the_plan->pre_phase_4);
+  if (the_plan == NULL) return;
+  free(the_plan->vr_freq);
+  free(the_plan->wigner_d2m0_vector);
+  free(the_plan->wigner_d4m0_vector);
+  free(the_plan->norm_amplitudes);
+  free(the_plan->pre_phase);
+  free(the_plan->pre_phase_2);
+  free(the_plan->pre_phase_4);
+  free(the_plan);
+}
+
+/**
+ * Release a reference to the mrsimulator plan, and free the plan with the last
+ * reference.
+ */
+void MRS_release_plan(MRS_plan *the_plan) {
+  if (the_plan == NULL) return;
+  if (--the_plan->ref_count > 0) return;
+  MRS_free_plan(the_plan);
 }
 
 /**
  * Free the memory from the mrsimulator plan associated with the wigner
- * d^l_{m,0}(rotor_angle_in_rad) vectors. Here, l=2 or 4.
+ * d^l_{m,0}(rotor_angle_in_rad) vectors, here, l=2 or 4, and the sideband phase
+ * multipliers, pre_phase_2 and pre_phase_4, scaled by these vectors.
  */
 void MRS_plan_free_rotor_angle_in_rad(MRS_plan *plan) {
   free(plan->wigner_d2m0_vector);
   free(plan->wigner_d4m0_vector);
+  free(plan->pre_phase_2);
+  free(plan->pre_phase_4);
   plan->wigner_d2m0_vector = NULL;
   plan->wigner_d4m0_vector = NULL;
+  plan->pre_phase_2 = NULL;
+  plan->pre_phase_4 = NULL;
 }
 
 /**
@@ -56,6 +73,8 @@ MRS_plan *MRS_create_plan(MRS_averaging_scheme *scheme,
                           double rotor_angle_in_rad, double increment,
                           bool allow_fourth_rank) {
   MRS_plan *plan = malloc(sizeof(MRS_plan));
+  plan->ref_count = 1;
+  plan->averaging_scheme = scheme;
   plan->number_of_sidebands = number_of_sidebands;
   plan->sample_rotation_frequency_in_Hz = sample_rotation_frequency_in_Hz;
   plan->rotor_angle_in_rad = rotor_angle_in_rad;
@@ -86,8 +105,32 @@ MRS_plan *MRS_create_plan(MRS_averaging_scheme *scheme,
                                  plan->n_octants));
   cblas_dscal(scheme->octant_orientations, scale, plan->norm_amplitudes, 1);
 
+  /**
+   * The frequencies of an isotropic spin system are the same at every orientation, and
+   * the triangle amplitudes from all octants add to a single delta function. The
+   * orientations of a scheme without a triangle mesh, and of the analytic scheme, are
+   * added individually, and the orientations along a meridian add as segments.
+   */
+  if (scheme->integration_density == 0 || scheme->integration_volume == 4) {
+    plan->isotropic_amplitude =
+        cblas_dasum(scheme->octant_orientations, plan->norm_amplitudes, 1);
+  } else if (scheme->integration_volume == 3) {
+    plan->isotropic_amplitude =
+        meridianAmplitudeSum(scheme->octant_orientations - 1, plan->norm_amplitudes);
+  } else {
+    plan->isotropic_amplitude =
+        plan->n_octants *
+        octahedronAmplitudeSum(scheme->integration_density, plan->norm_amplitudes, 1);
+  }
+
   plan->size = scheme->total_orientations * plan->number_of_sidebands;
 
+  plan->vr_freq = NULL;
+  plan->pre_phase = NULL;
+  plan->wigner_d2m0_vector = NULL;
+  plan->wigner_d4m0_vector = NULL;
+  plan->pre_phase_2 = NULL;
+  plan->pre_phase_4 = NULL;
   MRS_plan_update_from_sample_rotation_frequency_in_Hz(plan, increment,
                                                        sample_rotation_frequency_in_Hz);
 
@@ -103,6 +146,7 @@ void MRS_plan_update_from_sample_rotation_frequency_in_Hz(
   // double increment_inverse = 1.0 / increment;
   plan->sample_rotation_frequency_in_Hz = sample_rotation_frequency_in_Hz;
 
+  free(plan->vr_freq);
   plan->vr_freq = __get_frequency_in_FFT_order(plan->number_of_sidebands,
                                                sample_rotation_frequency_in_Hz);
   // cblas_dscal(plan->number_of_sidebands, increment_inverse, plan->vr_freq,
@@ -115,6 +159,7 @@ void MRS_plan_update_from_sample_rotation_frequency_in_Hz(
    * @see __get_components()
    */
   size_4 = 4 * plan->number_of_sidebands;
+  free(plan->pre_phase);
   plan->pre_phase = malloc_complex128(size_4);
   __get_components(plan->number_of_sidebands, sample_rotation_frequency_in_Hz,
                    (double *)plan->pre_phase);
@@ -135,6 +180,7 @@ void MRS_plan_update_from_rotor_angle_in_rad(MRS_plan *plan, double rotor_angle_
                                              bool allow_fourth_rank) {
   unsigned int size_2, size_4, i, j;
   plan->rotor_angle_in_rad = rotor_angle_in_rad;
+  MRS_plan_free_rotor_angle_in_rad(plan);
   /**
    * Calculate wigner-2j d^2_{m,0} vector where m ∈ [-2, 2]. This vector is used to
    * rotate the second-rank tensors from the rotor frame to the lab frame.
@@ -207,29 +253,104 @@ void MRS_plan_update_from_rotor_angle_in_rad(MRS_plan *plan, double rotor_angle_
   }
 }
 
+/* Return a copy of the `n` values of the array, or NULL for a NULL array. */
+static inline void *__copy_buffer(const void *buffer, size_t n) {
+  if (buffer == NULL) return NULL;
+  void *copy = malloc(n);
+  memcpy(copy, buffer, n);
+  return copy;
+}
+
 /**
- * Returns a copy of the mrsimulator plan.
+ * Returns a copy of the mrsimulator plan. The copy owns its buffers and tables.
  */
 MRS_plan *MRS_copy_plan(MRS_plan *plan) {
+  size_t n = plan->number_of_sidebands;
+  size_t n_amplitudes = plan->averaging_scheme->octant_orientations;
   MRS_plan *new_plan = malloc(sizeof(MRS_plan));
-  new_plan->averaging_scheme = plan->averaging_scheme;
-  new_plan->number_of_sidebands = plan->number_of_sidebands;
-  new_plan->sample_rotation_frequency_in_Hz = plan->sample_rotation_frequency_in_Hz;
-  new_plan->rotor_angle_in_rad = plan->rotor_angle_in_rad;
-  new_plan->vr_freq = plan->vr_freq;
-  new_plan->allow_fourth_rank = plan->allow_fourth_rank;
-  new_plan->size = plan->size;
-  new_plan->n_octants = plan->n_octants;
-  new_plan->norm_amplitudes = plan->norm_amplitudes;
-  new_plan->wigner_d2m0_vector = plan->wigner_d2m0_vector;
-  new_plan->wigner_d4m0_vector = plan->wigner_d4m0_vector;
-  new_plan->pre_phase = plan->pre_phase;
-  new_plan->pre_phase_2 = plan->pre_phase_2;
-  new_plan->pre_phase_4 = plan->pre_phase_4;
-  new_plan->buffer = plan->buffer;
+  *new_plan = *plan;
+  new_plan->ref_count = 1;
+  new_plan->vr_freq = __copy_buffer(plan->vr_freq, n * sizeof(double));
+  new_plan->norm_amplitudes =
+      __copy_buffer(plan->norm_amplitudes, n_amplitudes * sizeof(double));
+  new_plan->wigner_d2m0_vector =
+      __copy_buffer(plan->wigner_d2m0_vector, 5 * sizeof(double));
+  new_plan->wigner_d4m0_vector =
+      __copy_buffer(plan->wigner_d4m0_vector, 9 * sizeof(double));
+  new_plan->pre_phase = __copy_buffer(plan->pre_phase, 4 * n * sizeof(complex128));
+  new_plan->pre_phase_2 = __copy_buffer(plan->pre_phase_2, 2 * n * sizeof(complex128));
+  new_plan->pre_phase_4 = __copy_buffer(plan->pre_phase_4, 4 * n * sizeof(complex128));
   return new_plan;
 }
 
+/* The number of orientations per block of the sideband phase sweep. */
+#define PHASE_BLOCK 256
+
+/**
+ * Evaluate the sideband phase exponents, exp(I phase), of all orientations and
+ * sidebands, and write them into the fftw input, `vector`, of single or double
+ * precision. The orientations are swept in blocks. For every block and sideband, the
+ * phase is summed from the second- and fourth-rank terms into a small buffer, and the
+ * imaginary exponential of the buffer is written into the row of the sideband.
+ *
+ * The phase at orientation i and sideband j is the sum of Eqs. (2) and (4) of
+ * MRS_get_amplitudes_from_plan(),
+ *
+ *      phase[i, j] = \sum_{m=1}^2 imag(w2[i, m] * pre_phase_2[m, j])
+ *                  + \sum_{m=1}^4 imag(w4[i, m] * pre_phase_4[m, j]),
+ *
+ * where imag(a * b) = real(a) * imag(b) + imag(a) * real(b). The second sum is skipped
+ * when w4 is NULL.
+ */
+static void __sideband_phase_exponents(unsigned int number_of_sidebands,
+                                       unsigned int total,
+                                       const complex128 *pre_phase_2,
+                                       const complex128 *w2,
+                                       const complex128 *pre_phase_4,
+                                       const complex128 *w4, bool single_precision,
+                                       void *vector) {
+  unsigned int i, i0, j, m, n_block;
+  double phase[PHASE_BLOCK], p2[4], p4[8];
+  const double *w2_, *w4_;
+  size_t row;
+
+  for (i0 = 0; i0 < total; i0 += PHASE_BLOCK) {
+    n_block = (total - i0 < PHASE_BLOCK) ? total - i0 : PHASE_BLOCK;
+    for (j = 0; j < number_of_sidebands; j++) {
+      for (m = 0; m < 2; m++) {
+        p2[2 * m] = pre_phase_2[m * number_of_sidebands + j][1];
+        p2[2 * m + 1] = pre_phase_2[m * number_of_sidebands + j][0];
+      }
+      w2_ = (const double *)&w2[3 * i0];
+      for (i = 0; i < n_block; i++) {
+        phase[i] = w2_[0] * p2[0] + w2_[1] * p2[1] + w2_[2] * p2[2] + w2_[3] * p2[3];
+        w2_ += 6;
+      }
+
+      if (w4 != NULL) {
+        for (m = 0; m < 4; m++) {
+          p4[2 * m] = pre_phase_4[m * number_of_sidebands + j][1];
+          p4[2 * m + 1] = pre_phase_4[m * number_of_sidebands + j][0];
+        }
+        w4_ = (const double *)&w4[5 * i0];
+        for (i = 0; i < n_block; i++) {
+          phase[i] += w4_[0] * p4[0] + w4_[1] * p4[1] + w4_[2] * p4[2] +
+                      w4_[3] * p4[3] + w4_[4] * p4[4] + w4_[5] * p4[5] +
+                      w4_[6] * p4[6] + w4_[7] * p4[7];
+          w4_ += 10;
+        }
+      }
+
+      row = (size_t)j * total + i0;
+      if (single_precision) {
+        vm_float_exp_imag(n_block, phase, &((complex64 *)vector)[row]);
+      } else {
+        vm_double_exp_imag(n_block, phase, &((complex128 *)vector)[row]);
+      }
+    }
+  }
+}
+
 /**
  * The function evaluates the amplitudes at every orientation and at every sideband per
  * orientation. This is done in two steps.
@@ -239,7 +360,8 @@ MRS_plan *MRS_copy_plan(MRS_plan *plan) {
  *    https://doi.org/10.1006/jmre.1998.1427.
  */
 void MRS_get_amplitudes_from_plan(MRS_averaging_scheme *scheme, MRS_plan *plan,
-                                  MRS_fftw_scheme *fftw_scheme, bool refresh) {
+                                  MRS_fftw_scheme *fftw_scheme,
+                                  MRS_workspace *workspace, bool refresh) {
   /* If the number of sidebands is 1, the sideband amplitude at every sideband order is
    * one. In this case, return null,
    */
@@ -276,70 +398,44 @@ void MRS_get_amplitudes_from_plan(MRS_averaging_scheme *scheme, MRS_plan *plan,
    * factor 2 in Eq. (2). For computation efficiency, this factor is added to the
    * `pre_phase_2` term in the one-time computation step.
    *
-   * Here, `pre_phase_2` is pre-calculated and stored in the plan. The calculated
-   * product is stored in the fftw_scheme as a complex double array under the variable
-   * name `vector`, which is interpreted as a row major matrix of shape
+   * Similarly, the exponent of the sideband phase w.r.t the fourth-rank tensor
+   * components is given as,
+   *
+   * w4(Θ) * d^4_{m, 0}(rotor_angle_in_rad) * 2πI[(exp(I m ωr t) - 1)/(I m ωr)]
+   * |-----lab frame 4th rank tensors-----|
+   *         |-------------------------- pre_phase_4--------------------------|
+   *
+   * which, following the same symmetry, simplifies to
+   *
+   *         res[i, j] = \sum_{m=1}^4 2*imag(w4[i, m] * pre_phase_4[m, j]).         (4)
+   *
+   * Here, `pre_phase_2` and `pre_phase_4` are pre-calculated and stored in the plan.
+   * The sideband phase, exp(I res), is evaluated in a single sweep over the
+   * orientations, and is stored in the fftw_scheme as a complex array under the
+   * variable name `vector`, which is interpreted as a row major matrix of shape
    * `number_of_sidebands` x `total_orientations` with `total_orientations` as the
    * leading dimension.
    */
-  cblas_zgemm(CblasRowMajor, CblasTrans, CblasTrans, plan->number_of_sidebands,
-              scheme->total_orientations, 2, ONE, (double *)(plan->pre_phase_2),
-              plan->number_of_sidebands, (double *)(scheme->w2), 3, ZERO,
-              (double *)(fftw_scheme->vector), scheme->total_orientations);
-
-  if (scheme->w4 != NULL) {
-    /**
-     * Similarly, evaluate the exponent of the sideband phase w.r.t the fourth-rank
-     * tensor components. The exponent is given as,
-     *
-     * w4(Θ) * d^4_{m, 0}(rotor_angle_in_rad) * 2πI[(exp(I m ωr t) - 1)/(I m ωr)]
-     * |-----lab frame 4th rank tensors-----|
-     *         |-------------------------- pre_phase_4--------------------------|
-     *
-     * * A given element of this product is given as the summation,
-     *
-     *           res[i, j] = \sum_{m=-4}^4 w4[i, m] * pre_phase_4[m, j],            (3)
-     *
-     * where the following symmetry holds,
-     *
-     *    w2[i, m] * pre_phase_2[m, j] = conj(w4[i, -m] * pre_phase_4[-m, j]).
-     *
-     * The above symmetry simplifies Eq (3) to
-     *
-     *         res[i, j] = \sum_{m=1}^4 2*imag(w4[i, m] * pre_phase_4[m, j]).       (4)
-     *
-     * From Eq(2), we find that evaluting half the calculations is sufficient. Since
-     * pre_phase_4[0, j] is zero, the m=0 term is dropped from Eq. (4). Notice the
-     * scaling factor 2 in Eq. (4). For computation efficiency, this factor is added to
-     * the `pre_phase_4` term in the one-time computation step.
-     *
-     * where `pre_phase_4` is pre-calculated and stored in the plan. This operation will
-     * add and update the values stored in the variable `vector`.
-     */
-    cblas_zgemm(CblasRowMajor, CblasTrans, CblasTrans, plan->number_of_sidebands,
-                scheme->total_orientations, 4, ONE, (double *)(plan->pre_phase_4),
-                plan->number_of_sidebands, (double *)(scheme->w4), 5, ONE,
-                (double *)(fftw_scheme->vector), scheme->total_orientations);
-  }
+  __sideband_phase_exponents(plan->number_of_sidebands, scheme->total_orientations,
+                             plan->pre_phase_2, workspace->w2, plan->pre_phase_4,
+                             workspace->fourth_rank ? workspace->w4 : NULL,
+                             fftw_scheme->single_precision,
+                             fftw_scheme->single_precision
+                                 ? (void *)fftw_scheme->vector_f
+                                 : (void *)fftw_scheme->vector);
 
   /**
-   * Evaluate the sideband phase -> exp(vector). Since the real part of the complex data
-   * is zero, evaluate the exponential for only the imaginary part. The evaluated value
-   * is overwritten on the variable `vector`. */
-  vm_double_complex_exp_imag_only(plan->size, fftw_scheme->vector, fftw_scheme->vector);
-
-  /**
-   * Evaluate the Fourier transform of the variable, `vector`, -> fft(vector). The fft
-   * operation again updates the values of the array, `vector`. */
+   * Evaluate the Fourier transform of the variable, `vector`, -> fft(vector), followed
+   * by the absolute value square of the `vector` array. The absolute value square is
+   * stored as the real part of the `vector` array in the same pass, and the imaginary
+   * part is now garbage. This method avoids creating new arrays. */
+  if (fftw_scheme->single_precision) {
+    fftwf_execute(fftw_scheme->the_fftwf_plan);
+    vm_float_complex_abs_square_inplace(plan->size, fftw_scheme->vector_f);
+    return;
+  }
   fftw_execute(fftw_scheme->the_fftw_plan);
-
-  /**
-   * Evaluate the absolute value square of the `vector` array. The absolute value square
-   * is stores as the real part of the `vector` array. The imaginary part is now
-   * garbage. This method avoids creating new arrays. */
-  vm_double_square_inplace(2 * plan->size, (double *)fftw_scheme->vector);
-  cblas_daxpy(plan->size, 1.0, (double *)fftw_scheme->vector + 1, 2,
-              (double *)fftw_scheme->vector, 2);
+  vm_double_complex_abs_square_inplace(plan->size, fftw_scheme->vector);
 
   /* Scaling the absolute value square with the powder scheme weights. Only the real
    * part is scaled and the imaginary part is left as is.
@@ -399,6 +495,119 @@ void MRS_get_amplitudes_from_plan(MRS_averaging_scheme *scheme, MRS_plan *plan,
 //   }
 // }
 
+/**
+ * Orthogonalize the `tensor` of length `size` against the `n` orthonormal tensors of
+ * the basis, and append it to the basis when its norm exceeds `tol`. Return the new
+ * number of basis tensors.
+ */
+static unsigned int __append_to_tensor_basis(unsigned int size, unsigned int n,
+                                             double *basis, const double *tensor,
+                                             double tol) {
+  unsigned int k, pass;
+  double norm, *next = &basis[n * size];
+
+  cblas_dcopy(size, tensor, 1, next, 1);
+  // Orthogonalize twice for a numerically orthonormal basis.
+  for (pass = 0; pass < 2; pass++) {
+    for (k = 0; k < n; k++) {
+      cblas_daxpy(size, -cblas_ddot(size, &basis[k * size], 1, next, 1),
+                  &basis[k * size], 1, next, 1);
+    }
+  }
+  norm = cblas_dnrm2(size, next, 1);
+  if (norm <= tol) return n;
+  cblas_dscal(size, 1.0 / norm, next, 1);
+  return n + 1;
+}
+
+/**
+ * Build the orthonormal basis spanning the `n_tensors` tensors, each of length `size`.
+ * Return the number of basis tensors, or zero when `max_basis` tensors are needed, in
+ * which case the basis is no smaller than the tensor space.
+ */
+static unsigned int __tensor_basis(unsigned int size, unsigned int n_tensors,
+                                   const double *tensors, unsigned int max_basis,
+                                   double *basis) {
+  unsigned int t, n = 0;
+  double norm, tol = 0.0;
+
+  for (t = 0; t < n_tensors; t++) {
+    norm = cblas_dnrm2(size, &tensors[t * size], 1);
+    if (norm > tol) tol = norm;
+  }
+  tol *= 1e-12;
+  for (t = 0; t < n_tensors && n < max_basis; t++) {
+    n = __append_to_tensor_basis(size, n, basis, &tensors[t * size], tol);
+  }
+  return (n == max_basis) ? 0 : n;
+}
+
+void MRS_set_workspace_tensor_basis(MRS_averaging_scheme *scheme,
+                                    MRS_workspace *workspace, unsigned int n_octants,
+                                    unsigned int n_tensors, complex128 *R2,
+                                    complex128 *R4) {
+  unsigned int k, n2 = 0, n4 = 0;
+  unsigned int size2 = 3 * scheme->total_orientations;
+  unsigned int size4 = 5 * scheme->total_orientations;
+  complex128 *w4;
+
+  /**
+   * The rotation of a tensor over the orientations costs about the same as the linear
+   * combination of five rotated second-rank, or nine rotated fourth-rank, basis
+   * tensors. A basis of n tensors is only used when its rotations and the n-term
+   * combinations for all transitions cost less than rotating every transition.
+   */
+  n2 = __tensor_basis(10, n_tensors, (double *)R2, 5, workspace->basis2);
+  if (n2 * (1.0 + n_tensors / 5.0) >= n_tensors) n2 = 0;
+  if (R4 != NULL && workspace->w4 != NULL) {
+    n4 = __tensor_basis(18, n_tensors, (double *)R4, 9, workspace->basis4);
+    if (n4 * (1.0 + n_tensors / 9.0) >= n_tensors) n4 = 0;
+  }
+
+  if (n2 != 0 && workspace->basis_w2 == NULL) {
+    workspace->basis_w2 = malloc_complex128(5 * size2);
+  }
+  if (n4 != 0 && workspace->basis_w4 == NULL) {
+    workspace->basis_w4 = malloc_complex128(9 * size4);
+  }
+
+  /* Rotate the basis tensors from the common frame to the rotor frame over all the
+   * orientations. The second-rank rotations beyond the basis are written to w2. */
+  for (k = 0; k < n2 || k < n4; k++) {
+    w4 = (k < n4) ? &workspace->basis_w4[k * size4] : NULL;
+    __batch_wigner_rotation(
+        scheme->octant_orientations, n_octants, scheme->wigner_2j_matrices,
+        (complex128 *)&workspace->basis2[(k < n2) ? 10 * k : 0],
+        scheme->wigner_4j_matrices, (complex128 *)&workspace->basis4[18 * k],
+        scheme->exp_Im_alpha,
+        (k < n2) ? &workspace->basis_w2[k * size2] : workspace->w2, w4);
+  }
+  workspace->n_basis2 = n2;
+  workspace->n_basis4 = n4;
+}
+
+/**
+ * Evaluate the rotated tensor, w, as the linear combination of the `n_basis` rotated
+ * basis tensors, `basis_w`, each of length `size`. The coefficients are the
+ * projections of the tensor, R, of length `r_size`, onto the basis tensors.
+ */
+static inline void __rotate_from_tensor_basis(unsigned int size, unsigned int n_basis,
+                                              const double *basis,
+                                              const complex128 *basis_w,
+                                              unsigned int r_size, const complex128 *R,
+                                              complex128 *w) {
+  unsigned int k;
+  double coefficient;
+
+  vm_double_zeros(2 * size, (double *)w);
+  for (k = 0; k < n_basis; k++) {
+    coefficient = cblas_ddot(r_size, &basis[k * r_size], 1, (double *)R, 1);
+    if (coefficient == 0.0) continue;
+    cblas_daxpy(2 * size, coefficient, (double *)&basis_w[k * size], 1, (double *)w,
+                1);
+  }
+}
+
 /**
  * Get the lab-frame normalized frequency contributions from the zeroth, second,
  * fourth-rank tensors. Here, normalization refers to dividing the calculated
@@ -406,18 +615,62 @@ void MRS_get_amplitudes_from_plan(MRS_averaging_scheme *scheme, MRS_plan *plan,
  * makes binning of frequencies on the spectrum faster as bins can then be of 1 unit
  * increments.
  */
+/* Accumulate the R2 and R4 tensors of the dimension in the units of the frequencies. */
+static inline void __accumulate_refinement_tensors(MRS_plan *plan,
+                                                   MRS_workspace *workspace,
+                                                   complex128 *R2, complex128 *R4,
+                                                   bool refresh, MRS_dimension *dim,
+                                                   double fraction) {
+  MRS_refinement *refinement = &workspace->refinement;
+  double scale;
+
+  if (refresh) {
+    vm_double_zeros(10, (double *)refinement->R2);
+    vm_double_zeros(18, (double *)refinement->R4);
+    refinement->fourth_rank = false;
+  }
+
+  scale = dim->inverse_increment * plan->wigner_d2m0_vector[2] * fraction;
+  cblas_daxpy(10, scale, (double *)R2, 1, (double *)refinement->R2, 1);
+  if (workspace->fourth_rank) {
+    scale = dim->inverse_increment * plan->wigner_d4m0_vector[4] * fraction;
+    cblas_daxpy(18, scale, (double *)R4, 1, (double *)refinement->R4, 1);
+    refinement->fourth_rank = true;
+  }
+}
+
 void MRS_get_normalized_frequencies_from_plan(MRS_averaging_scheme *scheme,
-                                              MRS_plan *plan, double R0, complex128 *R2,
+                                              MRS_plan *plan, MRS_workspace *workspace,
+                                              double R0, complex128 *R2,
                                               complex128 *R4, bool refresh,
                                               MRS_dimension *dim, double fraction) {
   /**
    * Rotate the R2 and R4 components from the common frame to the rotor frame over all
-   * the orientations. The componets are stored in w2 and w4 of the averaging scheme,
+   * the orientations. The componets are stored in w2 and w4 of the workspace,
    * respectively.
    */
-  __batch_wigner_rotation(scheme->octant_orientations, plan->n_octants,
-                          scheme->wigner_2j_matrices, R2, scheme->wigner_4j_matrices,
-                          R4, scheme->exp_Im_alpha, scheme->w2, scheme->w4);
+  bool basis4 = workspace->fourth_rank && workspace->n_basis4 != 0;
+  bool basis2 = workspace->n_basis2 != 0 && (basis4 || !workspace->fourth_rank);
+
+  if (!basis2) {
+    __batch_wigner_rotation(scheme->octant_orientations, plan->n_octants,
+                            scheme->wigner_2j_matrices, R2, scheme->wigner_4j_matrices,
+                            R4, scheme->exp_Im_alpha, workspace->w2,
+                            (workspace->fourth_rank && !basis4) ? workspace->w4 : NULL);
+  }
+
+  /* When the workspace holds the tensor basis of the spin system, the rotated tensors
+   * are linear combinations of the rotated basis tensors. */
+  if (basis2) {
+    __rotate_from_tensor_basis(3 * scheme->total_orientations, workspace->n_basis2,
+                               workspace->basis2, workspace->basis_w2, 10, R2,
+                               workspace->w2);
+  }
+  if (basis4) {
+    __rotate_from_tensor_basis(5 * scheme->total_orientations, workspace->n_basis4,
+                               workspace->basis4, workspace->basis_w4, 18, R4,
+                               workspace->w4);
+  }
 
   /* If refresh is true, zero the local_frequencies before update. */
   if (refresh) {
@@ -428,6 +681,12 @@ void MRS_get_normalized_frequencies_from_plan(MRS_averaging_scheme *scheme,
   /* Normalized the isotropic frequency contribution from the zeroth-rank tensor. */
   dim->R0_offset += R0 * dim->inverse_increment * fraction;
 
+  /* The refinement evaluates the frequencies at new orientations from the normalized
+   * tensors of the dimension. */
+  if (workspace->refinement.depth != 0) {
+    __accumulate_refinement_tensors(plan, workspace, R2, R4, refresh, dim, fraction);
+  }
+
   /**
    * Rotate the w2 and w4 components from the rotor-frame to the lab-frame. Since only
    * the zeroth-order is relevent in the lab-frame, only evalute the R20 and R40
@@ -437,16 +696,16 @@ void MRS_get_normalized_frequencies_from_plan(MRS_averaging_scheme *scheme,
 
   /* Normalized local anisotropic frequency contributions from the 2nd-rank tensor. */
   plan->buffer = dim->inverse_increment * plan->wigner_d2m0_vector[2] * fraction;
-  cblas_daxpy(scheme->total_orientations, plan->buffer, (double *)&(scheme->w2[2]), 6,
-              dim->local_frequency, 1);
-  if (plan->allow_fourth_rank) {
+  cblas_daxpy(scheme->total_orientations, plan->buffer, (double *)&(workspace->w2[2]),
+              6, dim->local_frequency, 1);
+  if (workspace->fourth_rank) {
     /**
      * Similarly, calculate the normalized local anisotropic frequency contributions
      * from the fourth-rank tensor. `wigner_d2m0_vector[4] = d^4(0,0)(rotor_angle)`.
      */
     plan->buffer = dim->inverse_increment * plan->wigner_d4m0_vector[4] * fraction;
-    cblas_daxpy(scheme->total_orientations, plan->buffer, (double *)&scheme->w4[4], 10,
-                dim->local_frequency, 1);
+    cblas_daxpy(scheme->total_orientations, plan->buffer, (double *)&workspace->w4[4],
+                10, dim->local_frequency, 1);
   }
 }
 
@@ -506,18 +765,22 @@ static inline void MRS_rotate_single_site_interaction_components(
       vm_double_add_inplace(10, (double *)R2_temp, (double *)R2);
     }
 
-    /*  Upto the second order */
-    if (allow_fourth_rank) {
+    /*  Upto the second order. The fourth-rank components are only added when the plan
+     * allows the fourth-rank tensors. */
+    if (freq_contrib[0] || freq_contrib[1] || (freq_contrib[2] && allow_fourth_rank)) {
       FCF_2nd_order_electric_quadrupole_tensor_components(
           R0_temp, R2_temp, R4_temp, sites->spin[i], larmor_freq_in_MHz * 1e6,
           sites->quadrupolar_Cq_in_Hz[i], sites->quadrupolar_eta[i],
           &sites->quadrupolar_orientation[3 * i], *mf, *mi);
 
       // in-place update the R0, R2, and R4 components.
-      if (*freq_contrib++) *R0 += *R0_temp;
-      if (*freq_contrib++) vm_double_add_inplace(10, (double *)R2_temp, (double *)R2);
-      if (*freq_contrib++) vm_double_add_inplace(18, (double *)R4_temp, (double *)R4);
+      if (freq_contrib[0]) *R0 += *R0_temp;
+      if (freq_contrib[1]) vm_double_add_inplace(10, (double *)R2_temp, (double *)R2);
+      if (freq_contrib[2] && allow_fourth_rank) {
+        vm_double_add_inplace(18, (double *)R4_temp, (double *)R4);
+      }
     }
+    freq_contrib += 3;
     mi++;
     mf++;
   }
@@ -9,6 +9,8 @@
 
 #include "schemes.h"
 
+#include <string.h>
+
 static inline void averaging_scheme_setup(MRS_averaging_scheme *scheme,
                                           complex128 *exp_I_beta,
                                           bool allow_fourth_rank) {
@@ -99,20 +101,6 @@ static inline void averaging_scheme_setup(MRS_averaging_scheme *scheme,
     }
   }
   free(exp_I_beta);
-  /* -------------------------------------------------------------------------------- */
-
-  /* Setting up buffers and tables for processing the second rank tensors. . */
-  /* ................................................................................ */
-  /* w2 is the buffer for storing the frequencies calculated from the second-rank
-   * tensors. Only calcuate the -2, -1, and 0 tensor components.*/
-  scheme->w2 = malloc_complex128(3 * scheme->total_orientations);
-
-  scheme->w4 = NULL;
-  if (allow_fourth_rank) {
-    /* w4 is the buffer for storing the frequencies calculated from the fourth-rank
-     * tensors. Only calcuate the -4, -3, -2, -1, and 0 tensor components.*/
-    scheme->w4 = malloc_complex128(5 * scheme->total_orientations);
-  }
 }
 
 /* Free the memory from the mrsimulator plan associated with the spherical averaging
@@ -120,12 +108,69 @@ static inline void averaging_scheme_setup(MRS_averaging_scheme *scheme,
 void MRS_free_averaging_scheme(MRS_averaging_scheme *scheme) {
   free(scheme->amplitudes);
   free(scheme->exp_Im_alpha);
-  free(scheme->w2);
-  free(scheme->w4);
   free(scheme->wigner_2j_matrices);
   free(scheme->wigner_4j_matrices);
 }
 
+/* The number of unique orientations over an octant, the meridian, or the analytic
+ * scheme. */
+static inline unsigned int __octant_orientations(unsigned int integration_density,
+                                                 unsigned int integration_volume) {
+  if (integration_volume == 3) return 4 * integration_density + 1;
+  if (integration_volume == 4) return 9;
+  return ((integration_density + 1) * (integration_density + 2)) / 2;
+}
+
+/**
+ * The orientations along the meridian, α = 0, from β = 0 to π/2 over 4 nt segments of
+ * equal β, where nt is the integration density. The frequencies of a set of coaxial
+ * and axially symmetric tensors only depend on β. The amplitude of an orientation is
+ * the sin(β) density of the solid angle, which varies linearly along every segment,
+ * and the amplitudes are normalized so that the segments, each the sum of its two
+ * vertex amplitudes, add to 3π, the sum of the triangle amplitudes over an octant of
+ * the octahedral scheme.
+ */
+static void __meridian_setup(unsigned int nt, complex128 *exp_I_alpha,
+                             complex128 *exp_I_beta, double *amp) {
+  unsigned int i;
+  double beta, sum = 0.0;
+  nt *= 4;
+  for (i = 0; i <= nt; i++) {
+    beta = 0.5 * CONST_PI * (double)i / (double)nt;
+    ((double *)exp_I_alpha)[2 * i] = 1.0;
+    ((double *)exp_I_alpha)[2 * i + 1] = 0.0;
+    ((double *)exp_I_beta)[2 * i] = cos(beta);
+    ((double *)exp_I_beta)[2 * i + 1] = sin(beta);
+    amp[i] = sin(beta);
+    sum += (i == 0 || i == nt) ? amp[i] : 2.0 * amp[i];
+  }
+  cblas_dscal(nt + 1, 3.0 * CONST_PI / sum, amp, 1);
+}
+
+/**
+ * The nine orientations at α = 0, π/4, and π/2, and cos²(β) = 0, 1/2, and 1, of the
+ * analytic scheme. In the common principal axis system of the tensors, the frequency is
+ * a quadratic in cos²(β), whose coefficients are of the form a + b cos(2α) + c cos(4α).
+ * The frequencies at the nine orientations determine the frequency at every
+ * orientation, which is integrated analytically along β at no fewer than
+ * integration_density nodes of α. The amplitudes add to 3π, as over an octant of the octahedral scheme.
+ */
+static void __analytic_setup(complex128 *exp_I_alpha, complex128 *exp_I_beta,
+                             double *amp) {
+  unsigned int i, j, k;
+  double alpha, beta[3] = {0.5 * CONST_PI, 0.25 * CONST_PI, 0.0};
+  for (k = 0, i = 0; i < 3; i++) {
+    alpha = 0.25 * CONST_PI * (double)i;
+    for (j = 0; j < 3; j++, k++) {
+      ((double *)exp_I_alpha)[2 * k] = cos(alpha);
+      ((double *)exp_I_alpha)[2 * k + 1] = sin(alpha);
+      ((double *)exp_I_beta)[2 * k] = cos(beta[j]);
+      ((double *)exp_I_beta)[2 * k + 1] = sin(beta[j]);
+      amp[k] = CONST_PI / 3.0;
+    }
+  }
+}
+
 /* Create a new orientation averaging scheme. */
 MRS_averaging_scheme *MRS_create_averaging_scheme(unsigned int integration_density,
                                                   bool allow_fourth_rank,
@@ -135,9 +180,10 @@ MRS_averaging_scheme *MRS_create_averaging_scheme(unsigned int integration_densi
   scheme->integration_density = integration_density;
   scheme->integration_volume = integration_volume;
   scheme->allow_fourth_rank = allow_fourth_rank;
+  scheme->ref_count = 1;
 
   scheme->octant_orientations =
-      ((integration_density + 1) * (integration_density + 2)) / 2;
+      __octant_orientations(integration_density, integration_volume);
 
   /* Calculate α, β, and weights over the positive octant. .......................... */
   /* ................................................................................ */
@@ -146,44 +192,363 @@ MRS_averaging_scheme *MRS_create_averaging_scheme(unsigned int integration_densi
   complex128 *exp_I_beta = malloc_complex128(scheme->octant_orientations);
   scheme->amplitudes = malloc_double(scheme->octant_orientations);
 
-  averaging_setup(integration_density,
-                  &scheme->exp_Im_alpha[3 * scheme->octant_orientations], exp_I_beta,
-                  scheme->amplitudes);
+  if (integration_volume == 3) {
+    __meridian_setup(integration_density,
+                     &scheme->exp_Im_alpha[3 * scheme->octant_orientations],
+                     exp_I_beta, scheme->amplitudes);
+  } else if (integration_volume == 4) {
+    __analytic_setup(&scheme->exp_Im_alpha[3 * scheme->octant_orientations],
+                     exp_I_beta, scheme->amplitudes);
+  } else {
+    averaging_setup(integration_density,
+                    &scheme->exp_Im_alpha[3 * scheme->octant_orientations],
+                    exp_I_beta, scheme->amplitudes);
+  }
 
   averaging_scheme_setup(scheme, exp_I_beta, allow_fourth_rank);
   return scheme;
 }
 
-/* Create a new orientation averaging scheme. */
+/* Create a new orientation averaging scheme from the given α, β, and weights. */
 MRS_averaging_scheme *MRS_create_averaging_scheme_from_alpha_beta(
     double *alpha, double *beta, double *weight, unsigned int n_angles,
     bool allow_fourth_rank) {
+  unsigned int i;
   MRS_averaging_scheme *scheme = malloc(sizeof(MRS_averaging_scheme));
 
-  scheme->octant_orientations = n_angles;
+  /* The orientations have no triangle mesh, which is marked by a zero integration
+   * density, and are used as given, over a single octant. */
+  scheme->integration_density = 0;
   scheme->integration_volume = 0;
-  scheme->total_orientations = n_angles;
+  scheme->allow_fourth_rank = allow_fourth_rank;
+  scheme->ref_count = 1;
+  scheme->octant_orientations = n_angles;
+
+  // The 4 * octant_orientations memory allocation is for m=4, 3, 2, and1
+  scheme->exp_Im_alpha = malloc_complex128(4 * n_angles);
+  complex128 *exp_I_beta = malloc_complex128(n_angles);
+  double *exp_I_alpha = (double *)&scheme->exp_Im_alpha[3 * n_angles];
+
+  /* The weights are normalized to 3π, the sum of the triangle amplitudes over an
+   * octant of the octahedral scheme, so that the spectra from the two schemes have the
+   * same scale. */
+  scheme->amplitudes = malloc_double(n_angles);
+  cblas_dcopy(n_angles, weight, 1, scheme->amplitudes, 1);
+  cblas_dscal(n_angles, 3.0 * CONST_PI / cblas_dasum(n_angles, weight, 1),
+              scheme->amplitudes, 1);
+
+  /* Calculate cos(α) + isin(α) and cos(β) + isin(β). ................................ */
+  for (i = 0; i < n_angles; i++) {
+    exp_I_alpha[2 * i] = cos(alpha[i]);
+    exp_I_alpha[2 * i + 1] = sin(alpha[i]);
+    ((double *)exp_I_beta)[2 * i] = cos(beta[i]);
+    ((double *)exp_I_beta)[2 * i + 1] = sin(beta[i]);
+  }
+
+  averaging_scheme_setup(scheme, exp_I_beta, allow_fourth_rank);
+  return scheme;
+}
 
-  scheme->exp_Im_alpha = malloc_complex128(4 * scheme->total_orientations);
-  complex128 *exp_I_beta = malloc_complex128(scheme->total_orientations);
-  scheme->amplitudes = weight;
+/* ---------------------------------------------------------------------------------- */
+/* Averaging scheme cache ........................................................... */
+/* .................................................................................. */
 
-  /* Calculate cos(α) + isin(α) from α. ............................................. */
-  vm_cosine_I_sine(n_angles, alpha,
-                   scheme->exp_Im_alpha[3 * scheme->octant_orientations]);
+/* The size of the second and fourth-rank wigner matrix tables. */
+static inline void __wigner_table_sizes(MRS_averaging_scheme *scheme, size_t *size_2,
+                                        size_t *size_4) {
+  *size_2 = 15 * (size_t)scheme->octant_orientations;
+  *size_4 = 45 * (size_t)scheme->octant_orientations;
+  if (scheme->integration_volume == 2) {
+    *size_2 *= 2;
+    *size_4 *= 2;
+  }
+  if (!scheme->allow_fourth_rank) *size_4 = 0;
+}
 
-  /* Calculate cos(β) + isin(β) from β. ............................................. */
-  vm_cosine_I_sine(n_angles, beta, exp_I_beta);
+size_t MRS_averaging_scheme_nbytes(MRS_averaging_scheme *scheme) {
+  size_t size_2, size_4, nbytes = sizeof(MRS_averaging_scheme);
+  __wigner_table_sizes(scheme, &size_2, &size_4);
+  nbytes += (size_2 + size_4 + scheme->octant_orientations) * sizeof(double);
+  nbytes += 4 * (size_t)scheme->octant_orientations * sizeof(complex128);
+  return nbytes;
+}
 
-  averaging_scheme_setup(scheme, exp_I_beta, allow_fourth_rank);
+typedef struct __scheme_cache_entry {
+  MRS_averaging_scheme *scheme;
+  size_t nbytes;
+  unsigned long last_used;
+  struct __scheme_cache_entry *next;
+} __scheme_cache_entry;
+
+static __scheme_cache_entry *__scheme_cache = NULL;
+static char *__scheme_cache_directory = NULL;
+static unsigned long __scheme_cache_clock = 0;
+static MRS_averaging_scheme_cache_info __scheme_cache_info = {0, 0, 256 << 20,
+                                                              0, 0, 0, 0};
+
+/* The on-disk tier stores the tables of a scheme as a raw binary file. The header holds
+ * the scheme key, which is verified on load. */
+static const char __scheme_file_magic[8] = "MRSASC1";
+
+static inline char *__scheme_filename(unsigned int integration_density,
+                                      bool allow_fourth_rank,
+                                      unsigned int integration_volume) {
+  size_t length = strlen(__scheme_cache_directory) + 64;
+  char *filename = malloc(length);
+  snprintf(filename, length, "%s/scheme_%u_%u_%u.bin", __scheme_cache_directory,
+           integration_density, (unsigned int)allow_fourth_rank, integration_volume);
+  return filename;
+}
+
+static MRS_averaging_scheme *__load_averaging_scheme(unsigned int integration_density,
+                                                     bool allow_fourth_rank,
+                                                     unsigned int integration_volume) {
+  char magic[8], *filename;
+  unsigned int header[4];
+  size_t size_2, size_4, n_read = 0, n_expected;
+  MRS_averaging_scheme *scheme;
+  FILE *file;
+
+  filename = __scheme_filename(integration_density, allow_fourth_rank,
+                               integration_volume);
+  file = fopen(filename, "rb");
+  free(filename);
+  if (file == NULL) return NULL;
+
+  if (fread(magic, 1, 8, file) != 8 || memcmp(magic, __scheme_file_magic, 8) != 0 ||
+      fread(header, sizeof(unsigned int), 4, file) != 4 ||
+      header[0] != integration_density || header[1] != (unsigned int)allow_fourth_rank ||
+      header[2] != integration_volume ||
+      header[3] != __octant_orientations(integration_density, integration_volume)) {
+    fclose(file);
+    return NULL;
+  }
+
+  scheme = malloc(sizeof(MRS_averaging_scheme));
+  scheme->integration_density = integration_density;
+  scheme->integration_volume = integration_volume;
+  scheme->allow_fourth_rank = allow_fourth_rank;
+  scheme->ref_count = 1;
+  scheme->octant_orientations = header[3];
+  scheme->total_orientations = header[3];
+  if (integration_volume == 1) scheme->total_orientations *= 4;
+  if (integration_volume == 2) scheme->total_orientations *= 8;
+  __wigner_table_sizes(scheme, &size_2, &size_4);
+
+  scheme->amplitudes = malloc_double(scheme->octant_orientations);
+  scheme->exp_Im_alpha = malloc_complex128(4 * scheme->octant_orientations);
+  scheme->wigner_2j_matrices = malloc_double(size_2);
+  scheme->wigner_4j_matrices = (size_4 != 0) ? malloc_double(size_4) : NULL;
+
+  n_read += fread(scheme->amplitudes, sizeof(double), scheme->octant_orientations, file);
+  n_read += fread(scheme->exp_Im_alpha, sizeof(complex128),
+                  4 * scheme->octant_orientations, file);
+  n_read += fread(scheme->wigner_2j_matrices, sizeof(double), size_2, file);
+  if (size_4 != 0) {
+    n_read += fread(scheme->wigner_4j_matrices, sizeof(double), size_4, file);
+  }
+  fclose(file);
+
+  n_expected = 5 * (size_t)scheme->octant_orientations + size_2 + size_4;
+  if (n_read != n_expected) {
+    MRS_free_averaging_scheme(scheme);
+    free(scheme);
+    return NULL;
+  }
   return scheme;
 }
 
+static void __save_averaging_scheme(MRS_averaging_scheme *scheme) {
+  char *filename, *temp_filename;
+  unsigned int header[4] = {scheme->integration_density,
+                            (unsigned int)scheme->allow_fourth_rank,
+                            scheme->integration_volume, scheme->octant_orientations};
+  size_t size_2, size_4, length;
+  bool status = true;
+  FILE *file;
+
+  __wigner_table_sizes(scheme, &size_2, &size_4);
+  filename = __scheme_filename(scheme->integration_density, scheme->allow_fourth_rank,
+                               scheme->integration_volume);
+
+  // Write to a temporary file first so that concurrent processes never read a
+  // partially written scheme.
+  length = strlen(filename) + 32;
+  temp_filename = malloc(length);
+  snprintf(temp_filename, length, "%s.%lx%lx.tmp", filename, (unsigned long)time(NULL),
+           (unsigned long)(size_t)scheme ^ (unsigned long)clock());
+
+  file = fopen(temp_filename, "wb");
+  if (file != NULL) {
+    status &= fwrite(__scheme_file_magic, 1, 8, file) == 8;
+    status &= fwrite(header, sizeof(unsigned int), 4, file) == 4;
+    status &= fwrite(scheme->amplitudes, sizeof(double), scheme->octant_orientations,
+                     file) == scheme->octant_orientations;
+    status &= fwrite(scheme->exp_Im_alpha, sizeof(complex128),
+                     4 * scheme->octant_orientations,
+                     file) == 4 * scheme->octant_orientations;
+    status &= fwrite(scheme->wigner_2j_matrices, sizeof(double), size_2, file) == size_2;
+    if (size_4 != 0) {
+      status &=
+          fwrite(scheme->wigner_4j_matrices, sizeof(double), size_4, file) == size_4;
+    }
+    status &= fclose(file) == 0;
+    if (!status || rename(temp_filename, filename) != 0) remove(temp_filename);
+  }
+  free(temp_filename);
+  free(filename);
+}
+
+/* Evict the least recently used, unreferenced schemes until the cache fits within the
+ * memory limit. With `max_nbytes` of zero, every unreferenced scheme is evicted. */
+static void __evict_averaging_schemes(size_t max_nbytes) {
+  __scheme_cache_entry **link, **lru_link;
+  __scheme_cache_entry *entry;
+
+  while (__scheme_cache_info.nbytes > max_nbytes) {
+    lru_link = NULL;
+    for (link = &__scheme_cache; *link != NULL; link = &(*link)->next) {
+      // The cache holds one reference. Schemes in use by other owners stay.
+      if ((*link)->scheme->ref_count > 1) continue;
+      if (lru_link == NULL || (*link)->last_used < (*lru_link)->last_used) {
+        lru_link = link;
+      }
+    }
+    if (lru_link == NULL) return;
+
+    entry = *lru_link;
+    *lru_link = entry->next;
+    __scheme_cache_info.nbytes -= entry->nbytes;
+    __scheme_cache_info.entries--;
+    __scheme_cache_info.evictions++;
+    MRS_release_averaging_scheme(entry->scheme);
+    free(entry);
+  }
+}
+
+MRS_averaging_scheme *MRS_get_averaging_scheme(unsigned int integration_density,
+                                               bool allow_fourth_rank,
+                                               unsigned int integration_volume) {
+  __scheme_cache_entry *entry;
+  MRS_averaging_scheme *scheme = NULL;
+
+  for (entry = __scheme_cache; entry != NULL; entry = entry->next) {
+    scheme = entry->scheme;
+    if (scheme->integration_density == integration_density &&
+        scheme->allow_fourth_rank == allow_fourth_rank &&
+        scheme->integration_volume == integration_volume) {
+      entry->last_used = ++__scheme_cache_clock;
+      scheme->ref_count++;
+      __scheme_cache_info.hits++;
+      return scheme;
+    }
+  }
+
+  scheme = NULL;
+  if (__scheme_cache_directory != NULL) {
+    scheme = __load_averaging_scheme(integration_density, allow_fourth_rank,
+                                     integration_volume);
+    if (scheme != NULL) __scheme_cache_info.disk_hits++;
+  }
+  if (scheme == NULL) {
+    scheme = MRS_create_averaging_scheme(integration_density, allow_fourth_rank,
+                                         integration_volume);
+    __scheme_cache_info.misses++;
+    if (__scheme_cache_directory != NULL) __save_averaging_scheme(scheme);
+  }
+
+  // The cache keeps one reference, and the caller gets the other.
+  scheme->ref_count++;
+  entry = malloc(sizeof(__scheme_cache_entry));
+  entry->scheme = scheme;
+  entry->nbytes = MRS_averaging_scheme_nbytes(scheme);
+  entry->last_used = ++__scheme_cache_clock;
+  entry->next = __scheme_cache;
+  __scheme_cache = entry;
+  __scheme_cache_info.nbytes += entry->nbytes;
+  __scheme_cache_info.entries++;
+
+  __evict_averaging_schemes(__scheme_cache_info.max_nbytes);
+  return scheme;
+}
+
+void MRS_release_averaging_scheme(MRS_averaging_scheme *scheme) {
+  if (scheme == NULL) return;
+  if (--scheme->ref_count > 0) {
+    // Trim the cache when a scheme, which exceeded the memory limit while in use,
+    // becomes unreferenced.
+    if (scheme->ref_count == 1 &&
+        __scheme_cache_info.nbytes > __scheme_cache_info.max_nbytes) {
+      __evict_averaging_schemes(__scheme_cache_info.max_nbytes);
+    }
+    return;
+  }
+  MRS_free_averaging_scheme(scheme);
+  free(scheme);
+}
+
+void MRS_set_averaging_scheme_cache_limit(size_t max_nbytes) {
+  __scheme_cache_info.max_nbytes = max_nbytes;
+  __evict_averaging_schemes(max_nbytes);
+}
+
+void MRS_set_averaging_scheme_cache_directory(const char *directory) {
+  free(__scheme_cache_directory);
+  __scheme_cache_directory = NULL;
+  if (directory != NULL && directory[0] != '\0') {
+    __scheme_cache_directory = malloc(strlen(directory) + 1);
+    strcpy(__scheme_cache_directory, directory);
+  }
+}
+
+void MRS_clear_averaging_scheme_cache() { __evict_averaging_schemes(0); }
+
+MRS_averaging_scheme_cache_info MRS_get_averaging_scheme_cache_info() {
+  return __scheme_cache_info;
+}
+
 /* ---------------------------------------------------------------------------------- */
 /* fftw routine setup ............................................................... */
 /* .................................................................................. */
+/* The fftw planner flags for the estimate, measure, and patient planner efforts. */
+static const unsigned int __fftw_planner_flags[] = {FFTW_ESTIMATE, FFTW_MEASURE,
+                                                    FFTW_PATIENT};
+
+/* The threaded fftw is opt-in, and only used for transforms of at least
+ * __fftw_threads_min_size complex values. */
+static unsigned int __fftw_threads = 1;
+static unsigned int __fftw_threads_min_size = 4194304;
+static bool __fftw_threads_initialized = false;
+
+bool MRS_fftw_threads_enabled() {
+#ifdef USE_FFTW_THREADS
+  return true;
+#else
+  return false;
+#endif
+}
+
+void MRS_set_fftw_threads(unsigned int n_threads, unsigned int min_size) {
+#ifdef USE_FFTW_THREADS
+  if (!__fftw_threads_initialized && n_threads > 1) {
+    __fftw_threads_initialized = (fftw_init_threads() != 0);
+  }
+  if (!__fftw_threads_initialized) n_threads = 1;
+#else
+  n_threads = 1;
+#endif
+  __fftw_threads = (n_threads == 0) ? 1 : n_threads;
+  __fftw_threads_min_size = min_size;
+}
+
+unsigned int MRS_get_fftw_threads(unsigned int size, unsigned int max_threads) {
+  if (size < __fftw_threads_min_size || max_threads == 0) return 1;
+  return (__fftw_threads < max_threads) ? __fftw_threads : max_threads;
+}
+
 MRS_fftw_scheme *create_fftw_scheme(unsigned int total_orientations,
-                                    unsigned int number_of_sidebands) {
+                                    unsigned int number_of_sidebands,
+                                    unsigned int planner, unsigned int n_threads) {
   unsigned int size = total_orientations * number_of_sidebands;
   int nssb = (int)number_of_sidebands;
   MRS_fftw_scheme *fftw_scheme = malloc(sizeof(MRS_fftw_scheme));
@@ -193,24 +558,159 @@ MRS_fftw_scheme *create_fftw_scheme(unsigned int total_orientations,
   // malloc_complex128(plan->size);
   // gettimeofday(&fft_setup_time, NULL);
 
-  // int fftw_thread = fftw_init_threads();
-  // if (fftw_thread == 0) {
-  //   printf("failed to initialize fftw threading");
-  // }
-  // fftw_plan_with_nthreads(2);
+  fftw_scheme->n_threads = 1;
+  fftw_scheme->single_precision = false;
+  fftw_scheme->vector_f = NULL;
+#ifdef USE_FFTW_THREADS
+  if (__fftw_threads_initialized) {
+    fftw_scheme->n_threads = (n_threads == 0) ? 1 : n_threads;
+    fftw_plan_with_nthreads(fftw_scheme->n_threads);
+  }
+#endif
 
+  /* The measure and patient planners overwrite the vector while planning. The vector
+   * is initialized before every transform, and the plans are re-used from the fftw
+   * wisdom when available. */
+  if (planner > 2) planner = 2;
   fftw_scheme->the_fftw_plan = fftw_plan_many_dft(
       1, &nssb, total_orientations, fftw_scheme->vector, NULL, total_orientations, 1,
-      fftw_scheme->vector, NULL, total_orientations, 1, FFTW_FORWARD, FFTW_ESTIMATE);
-
-  // char *filename = "128_sidebands.wisdom";
-  // int status = fftw_export_wisdom_to_filename(filename);
-  // printf("file save status %i \n", status);
+      fftw_scheme->vector, NULL, total_orientations, 1, FFTW_FORWARD,
+      __fftw_planner_flags[planner]);
   /* ----------------------------------------------------------------------- */
   return fftw_scheme;
 }
 
+MRS_fftw_scheme *create_fftwf_scheme(unsigned int total_orientations,
+                                     unsigned int number_of_sidebands,
+                                     unsigned int planner) {
+  unsigned int size = total_orientations * number_of_sidebands;
+  int nssb = (int)number_of_sidebands;
+  MRS_fftw_scheme *fftw_scheme = malloc(sizeof(MRS_fftw_scheme));
+
+  fftw_scheme->n_threads = 1;
+  fftw_scheme->single_precision = true;
+  fftw_scheme->vector = NULL;
+  fftw_scheme->vector_f = (fftwf_complex *)fftwf_malloc(sizeof(fftwf_complex) * size);
+
+  if (planner > 2) planner = 2;
+  fftw_scheme->the_fftwf_plan = fftwf_plan_many_dft(
+      1, &nssb, total_orientations, fftw_scheme->vector_f, NULL, total_orientations, 1,
+      fftw_scheme->vector_f, NULL, total_orientations, 1, FFTW_FORWARD,
+      __fftw_planner_flags[planner]);
+  return fftw_scheme;
+}
+
 void MRS_free_fftw_scheme(MRS_fftw_scheme *fftw_scheme) {
-  fftw_destroy_plan(fftw_scheme->the_fftw_plan);
-  fftw_free(fftw_scheme->vector);
+  if (fftw_scheme->single_precision) {
+    fftwf_destroy_plan(fftw_scheme->the_fftwf_plan);
+    fftwf_free(fftw_scheme->vector_f);
+  } else {
+    fftw_destroy_plan(fftw_scheme->the_fftw_plan);
+    fftw_free(fftw_scheme->vector);
+  }
+  free(fftw_scheme);
+}
+
+/* ---------------------------------------------------------------------------------- */
+/* workspace setup .................................................................. */
+/* .................................................................................. */
+MRS_workspace *MRS_create_workspace(MRS_averaging_scheme *scheme) {
+  unsigned int i;
+  MRS_workspace *workspace = malloc(sizeof(MRS_workspace));
+
+  /* w2 is the buffer for storing the frequencies calculated from the second-rank
+   * tensors. Only calcuate the -2, -1, and 0 tensor components.*/
+  workspace->w2 = malloc_complex128(3 * scheme->total_orientations);
+
+  workspace->w4 = NULL;
+  if (scheme->allow_fourth_rank) {
+    /* w4 is the buffer for storing the frequencies calculated from the fourth-rank
+     * tensors. Only calcuate the -4, -3, -2, -1, and 0 tensor components.*/
+    workspace->w4 = malloc_complex128(5 * scheme->total_orientations);
+  }
+  workspace->fourth_rank = scheme->allow_fourth_rank;
+  workspace->n_basis2 = 0;
+  workspace->n_basis4 = 0;
+  workspace->basis_w2 = NULL;
+  workspace->basis_w4 = NULL;
+
+  workspace->n_threads = 1;
+  workspace->sidebands_interpolated = 0;
+  workspace->sidebands_skipped = 0;
+  workspace->pathways_simulated = 0;
+  workspace->pathways_merged = 0;
+  workspace->culling = (MRS_culling){0.0, 0.0, 0, 0.0, 0.0};
+  workspace->refinement.depth = 0;
+  workspace->refinement.triangles = 0;
+  workspace->refinement.orientations = 0;
+  workspace->refinement.fourth_rank = false;
+  workspace->rasterization = 0;
+  workspace->thread_frequencies = NULL;
+  workspace->thread_spectra = NULL;
+  workspace->spectrum_size = 0;
+  for (i = 0; i < MRS_WORKSPACE_BUFFERS; i++) {
+    workspace->buffers[i] = NULL;
+    workspace->buffer_nbytes[i] = 0;
+  }
+  return workspace;
+}
+
+void MRS_free_workspace(MRS_workspace *workspace) {
+  unsigned int i;
+  if (workspace == NULL) return;
+  for (i = 0; i < MRS_WORKSPACE_BUFFERS; i++) free(workspace->buffers[i]);
+  free(workspace->w2);
+  free(workspace->w4);
+  free(workspace->basis_w2);
+  free(workspace->basis_w4);
+  free(workspace->thread_frequencies);
+  free(workspace->thread_spectra);
+  free(workspace);
+}
+
+void MRS_set_workspace_threads(MRS_workspace *workspace, MRS_averaging_scheme *scheme,
+                               unsigned int n_threads) {
+  if (n_threads == 0) n_threads = 1;
+  if (n_threads == workspace->n_threads) return;
+
+  free(workspace->thread_frequencies);
+  free(workspace->thread_spectra);
+  workspace->thread_frequencies = NULL;
+  workspace->thread_spectra = NULL;
+  workspace->spectrum_size = 0;
+  workspace->n_threads = n_threads;
+  if (n_threads == 1) return;
+
+  /* Every thread holds the frequencies along the two dimensions and the amplitudes
+   * over the orientations of an octant. */
+  workspace->thread_frequencies =
+      malloc_double(3 * n_threads * scheme->octant_orientations);
+}
+
+double *MRS_get_workspace_thread_spectra(MRS_workspace *workspace, unsigned int size) {
+  if (size > workspace->spectrum_size) {
+    free(workspace->thread_spectra);
+    workspace->thread_spectra = malloc_double(workspace->n_threads * size);
+    workspace->spectrum_size = size;
+  }
+  vm_double_zeros(workspace->n_threads * size, workspace->thread_spectra);
+  return workspace->thread_spectra;
+}
+
+void *MRS_get_workspace_buffer(MRS_workspace *workspace, MRS_workspace_buffer buffer,
+                               size_t nbytes) {
+  if (nbytes > workspace->buffer_nbytes[buffer]) {
+    free(workspace->buffers[buffer]);
+    workspace->buffers[buffer] = malloc(nbytes);
+    workspace->buffer_nbytes[buffer] = nbytes;
+  }
+  return workspace->buffers[buffer];
+}
+
+bool MRS_openmp_enabled(void) {
+#ifdef _OPENMP
+  return true;
+#else
+  return false;
+#endif
 }
@@ -9,6 +9,8 @@
 
 #include "simulation.h"
 
+#include <stdint.h>
+
 #include "frequency_averaging.h"
 
 /**
@@ -49,6 +51,7 @@ void __mrsimulator_core(
     MRS_dimension *dimensions,     // Pointer to MRS_dimension structure.
     MRS_fftw_scheme *fftw_scheme,  // Pointer to the fftw scheme.
     MRS_averaging_scheme *scheme,  // Pointer to the powder averaging scheme.
+    MRS_workspace *workspace,      // Pointer to the workspace buffers.
     bool interpolation,            // If true, perform a 1D interpolation.
 
     /**
@@ -78,15 +81,13 @@ void __mrsimulator_core(
   int dim;
   double B0_in_T, fraction;
 
-  // Allocate memory for zeroth, second, and fourth-rank tensor components.
+  // The zeroth, second, and fourth-rank tensor components.
   double R0 = 0.0;
-  complex128 *R2 = malloc_complex128(5);
-  complex128 *R4 = malloc_complex128(9);
+  complex128 R2[5], R4[9];
 
-  // Allocate memory for zeroth, second, and fourth-rank temporary tensor components.
+  // The zeroth, second, and fourth-rank temporary tensor components.
   double R0_temp = 0.0;
-  complex128 *R2_temp = malloc_complex128(5);
-  complex128 *R4_temp = malloc_complex128(9);
+  complex128 R2_temp[5], R4_temp[9];
 
   double *spec_site_ptr;
   // `transition_increment` is the step size to the next transition within the pathway.
@@ -132,16 +133,24 @@ void __mrsimulator_core(
       // The number 6 comes from the six types of pre-listed freq contributions.
       freq_contrib += FREQ_CONTRIB_INCREMENT;
 
+      /* Skip the fourth-rank rotation and sideband phase when the R4 components of the
+       * event are zero, for example, from the sites with a zero quadrupolar coupling. */
+      workspace->fourth_rank = workspace->w4 != NULL && plan->allow_fourth_rank &&
+                               cblas_dasum(18, (double *)R4, 1) != 0.0;
+
       /* Get frequencies and amplitudes per octant .................................. */
       /* IMPORTANT: Always evalute the frequencies before the amplitudes. */
-      MRS_get_normalized_frequencies_from_plan(scheme, plan, R0, R2, R4, refresh,
-                                               &dimensions[dim], fraction);
-      MRS_get_amplitudes_from_plan(scheme, plan, fftw_scheme, 1);
+      MRS_get_normalized_frequencies_from_plan(scheme, plan, workspace, R0, R2, R4,
+                                               refresh, &dimensions[dim], fraction);
+      MRS_get_amplitudes_from_plan(scheme, plan, fftw_scheme, workspace, 1);
 
       /* Copy the amplitudes from the `fftw_scheme->vector` to the
        * `event->freq_amplitude` for each event within the dimension. If the number of
        * sidebands is 1, skip, because `fftw_scheme->vector` is not evaluated.*/
-      if (plan->number_of_sidebands != 1) {
+      if (plan->number_of_sidebands != 1 && fftw_scheme->single_precision) {
+        vm_float_to_double(plan->size, (float *)fftw_scheme->vector_f, 2,
+                           event->freq_amplitude);
+      } else if (plan->number_of_sidebands != 1) {
         cblas_dcopy(plan->size, (double *)fftw_scheme->vector, 2, event->freq_amplitude,
                     1);
       }
@@ -150,26 +159,349 @@ void __mrsimulator_core(
     }  // end events
   }    // end dimensions
 
-  free(R2);
-  free(R4);
-  free(R2_temp);
-  free(R4_temp);
-
   /* ---------------------------------------------------------------------
    *              Delta and triangle tenting interpolation
    */
 
   switch (n_dimension) {
   case 1:
-    one_dimensional_averaging(dimensions, scheme, fftw_scheme, spec);
+    one_dimensional_averaging(dimensions, scheme, fftw_scheme, workspace, spec);
     break;
   case 2:
-    two_dimensional_averaging(dimensions, scheme, fftw_scheme, spec,
+    two_dimensional_averaging(dimensions, scheme, fftw_scheme, workspace, spec,
                               plan->number_of_sidebands, affine_matrix);
     break;
   }
 }
 
+// True when the spin system has no anisotropic tensors. The frequencies of an isotropic
+// spin system are the same at every orientation and every rotor phase.
+static inline bool __is_isotropic(site_struct *sites, coupling_struct *couplings) {
+  unsigned int i;
+  for (i = 0; i < sites->number_of_sites; i++) {
+    if (sites->shielding_symmetric_zeta_in_ppm[i] != 0.0) return false;
+    if (sites->quadrupolar_Cq_in_Hz[i] != 0.0) return false;
+  }
+  for (i = 0; i < couplings->number_of_couplings; i++) {
+    if (couplings->j_symmetric_zeta_in_Hz[i] != 0.0) return false;
+    if (couplings->dipolar_coupling_in_Hz[i] != 0.0) return false;
+  }
+  return true;
+}
+
+/**
+ * Add the delta function of an isotropic spin system transition pathway to the
+ * spectrum. Only the R0 components are evaluated, and the orientation averaging, the
+ * sideband transform, and the interpolation are skipped. The amplitude matches the
+ * triangle interpolation of the constant frequencies, where the unnormalized centerband
+ * amplitude of every event with sidebands is the number of sidebands squared.
+ */
+static void __mrsimulator_isotropic(double *spec, site_struct *sites,
+                                    coupling_struct *couplings,
+                                    float *transition_pathway, int n_dimension,
+                                    MRS_dimension *dimensions, MRS_workspace *workspace,
+                                    bool *freq_contrib, double *affine_matrix) {
+  unsigned int evt, n_sidebands;
+  int dim;
+  double R0, R0_temp, amp, offset[2] = {0.0, 0.0}, norm0, norm1, offset_b;
+  complex128 R2[5], R4[9], R2_temp[5], R4_temp[9];
+  int transition_increment = 2 * sites->number_of_sites;
+  MRS_plan *plan = dimensions[0].events[0].plan;
+  MRS_event *event;
+
+  n_sidebands = plan->number_of_sidebands;
+  amp = plan->isotropic_amplitude;
+  for (dim = 0; dim < n_dimension; dim++) {
+    for (evt = 0; evt < dimensions[dim].n_events; evt++) {
+      event = &dimensions[dim].events[evt];
+      __zero_components(&R0, R2, R4);
+      MRS_rotate_components_from_PAS_to_common_frame(
+          sites, couplings, transition_pathway, false, &R0, R2, R4, &R0_temp, R2_temp,
+          R4_temp, event->magnetic_flux_density_in_T, freq_contrib);
+      offset[dim] += R0 * dimensions[dim].inverse_increment * event->fraction;
+      if (n_sidebands != 1) amp *= (double)n_sidebands * (double)n_sidebands;
+      freq_contrib += FREQ_CONTRIB_INCREMENT;
+      transition_pathway += transition_increment;
+    }
+  }
+
+  switch (n_dimension) {
+  case 1:
+    norm0 = offset[0] + dimensions[0].normalize_offset +
+            plan->vr_freq[0] * dimensions[0].inverse_increment;
+    workspace->sidebands_skipped += n_sidebands - 1;
+    if (!(norm0 > -1.0 && norm0 < dimensions[0].count + 1.0)) {
+      workspace->sidebands_skipped++;
+      return;
+    }
+    workspace->sidebands_interpolated++;
+    triangle_interpolation(&norm0, &norm0, &norm0, &amp, spec, &dimensions[0].count);
+    break;
+  case 2:
+    offset_b = offset[1] + plan->vr_freq[0] * dimensions[1].inverse_increment;
+    norm0 = offset[0] + plan->vr_freq[0] * dimensions[0].inverse_increment;
+    norm0 = affine_matrix[0] * norm0 + affine_matrix[1] * offset_b;
+    norm1 = affine_matrix[3] * offset_b + affine_matrix[2] * norm0;
+    norm0 += dimensions[0].normalize_offset;
+    norm1 += dimensions[1].normalize_offset;
+    workspace->sidebands_skipped += n_sidebands * n_sidebands - 1;
+    if (!(norm0 > -1.0 && norm0 < dimensions[0].count + 1.0 && norm1 > -1.0 &&
+          norm1 < dimensions[1].count + 1.0)) {
+      workspace->sidebands_skipped++;
+      return;
+    }
+    workspace->sidebands_interpolated++;
+    triangle_interpolation2D(&norm0, &norm0, &norm0, &norm1, &norm1, &norm1, &amp, spec,
+                             dimensions[0].count, dimensions[1].count);
+    break;
+  }
+}
+
+/**
+ * Evaluate the R0, R2, and R4 components of every transition of the `n_pathways`
+ * transition pathways, ordered as pathway x event. Return true if the plan of any event
+ * allows the fourth-rank components.
+ */
+static bool __pathway_components(site_struct *sites, coupling_struct *couplings,
+                                 float *transition_pathway, unsigned int n_pathways,
+                                 int n_dimension, MRS_dimension *dimensions,
+                                 bool *freq_contrib, double *R0, complex128 *R2,
+                                 complex128 *R4) {
+  unsigned int j, evt, t = 0;
+  int dim;
+  bool fourth_rank = false, *contrib;
+  double R0_temp;
+  complex128 R2_temp[5], R4_temp[9];
+  int transition_increment = 2 * sites->number_of_sites;
+  MRS_event *event;
+
+  for (j = 0; j < n_pathways; j++) {
+    contrib = freq_contrib;
+    for (dim = 0; dim < n_dimension; dim++) {
+      for (evt = 0; evt < dimensions[dim].n_events; evt++) {
+        event = &dimensions[dim].events[evt];
+        __zero_components(&R0[t], &R2[5 * t], &R4[9 * t]);
+        MRS_rotate_components_from_PAS_to_common_frame(
+            sites, couplings, transition_pathway, event->plan->allow_fourth_rank,
+            &R0[t], &R2[5 * t], &R4[9 * t], &R0_temp, R2_temp, R4_temp,
+            event->magnetic_flux_density_in_T, contrib);
+        if (event->plan->allow_fourth_rank) fourth_rank = true;
+        contrib += FREQ_CONTRIB_INCREMENT;
+        transition_pathway += transition_increment;
+        t++;
+      }
+    }
+  }
+  return fourth_rank;
+}
+
+// FNV-1a hash of the components, rounded to multiples of the quantum.
+static inline uint64_t __components_hash(unsigned int size, const double *components,
+                                         double quantum) {
+  unsigned int i;
+  uint64_t hash = 14695981039346656037ULL;
+  for (i = 0; i < size; i++) {
+    hash ^= (uint64_t)llround(components[i] / quantum);
+    hash *= 1099511628211ULL;
+  }
+  return hash;
+}
+
+// True if the components are equal within the quantum.
+static inline bool __components_equal(unsigned int size, const double *a,
+                                      const double *b, double quantum) {
+  unsigned int i;
+  for (i = 0; i < size; i++) {
+    if (fabs(a[i] - b[i]) > quantum) return false;
+  }
+  return true;
+}
+
+/**
+ * Merge the transition pathways with identical components over all events, which
+ * produce identical spectra. The pathways are hashed from their components, rounded to
+ * a fraction of the largest component, and the pathways in the same hash slot are
+ * compared within the same tolerance. On return, `multiplicity[j]` is the number of
+ * pathways represented by the pathway `j`, which is zero for the merged pathways.
+ * Return the number of distinct pathways.
+ */
+static unsigned int __merge_pathways(unsigned int n_pathways, unsigned int n_events,
+                                     double *R0, complex128 *R2, complex128 *R4,
+                                     MRS_workspace *workspace,
+                                     unsigned int *multiplicity) {
+  unsigned int j, k, slot, n_slots = 1, n_distinct = 0, size = 29 * n_events;
+  double quantum, *key_j, *key;
+  unsigned int *table;
+
+  key = MRS_get_workspace_buffer(workspace, MRS_BUFFER_PATHWAY_KEYS,
+                                 size * n_pathways * sizeof(double));
+
+  /* The components of a pathway, packed as the R0, R2, and R4 of all events. */
+  for (j = 0; j < n_pathways; j++) {
+    key_j = &key[j * size];
+    cblas_dcopy(n_events, &R0[j * n_events], 1, key_j, 1);
+    cblas_dcopy(10 * n_events, (double *)&R2[5 * j * n_events], 1, &key_j[n_events], 1);
+    cblas_dcopy(18 * n_events, (double *)&R4[9 * j * n_events], 1,
+                &key_j[11 * n_events], 1);
+  }
+  quantum = 1e-10 * fabs(key[cblas_idamax(size * n_pathways, key, 1)]);
+  if (quantum == 0.0) quantum = 1.0;
+
+  while (n_slots < 2 * n_pathways) n_slots <<= 1;
+  table = MRS_get_workspace_buffer(workspace, MRS_BUFFER_PATHWAY_TABLE,
+                                   n_slots * sizeof(unsigned int));
+  for (slot = 0; slot < n_slots; slot++) table[slot] = n_pathways;
+
+  for (j = 0; j < n_pathways; j++) {
+    key_j = &key[j * size];
+    multiplicity[j] = 1;
+    slot = __components_hash(size, key_j, quantum) & (n_slots - 1);
+    while ((k = table[slot]) != n_pathways) {
+      if (__components_equal(size, &key[k * size], key_j, quantum)) {
+        multiplicity[k]++;
+        multiplicity[j] = 0;
+        break;
+      }
+      slot = (slot + 1) & (n_slots - 1);
+    }
+    if (multiplicity[j] != 0) {
+      table[slot] = j;
+      n_distinct++;
+    }
+  }
+  return n_distinct;
+}
+
+// Calculate spectra from a batch of spin systems.
+void __mrsimulator_batch(double *spec, bool decompose_spectrum,
+                         unsigned int n_spin_systems, site_struct *sites,
+                         coupling_struct *couplings, float *transition_pathways,
+                         unsigned int *pathway_offset, unsigned int *pathway_count,
+                         double *weights, int n_dimension, MRS_dimension *dimensions,
+                         MRS_fftw_scheme *fftw_scheme, MRS_averaging_scheme *scheme,
+                         MRS_workspace *workspace, bool interpolation,
+                         bool *freq_contrib, double *affine_matrix) {
+  unsigned int i, j, n_events = 0, n_pathways, n_tensors, pathway_increment;
+  unsigned int *multiplicity;
+  int dim, size = 1;
+  bool isotropic, fourth_rank;
+  float *transition_pathway;
+  double *amp, *pathway_amp, *R0;
+  complex128 *R2, *R4;
+
+  for (dim = 0; dim < n_dimension; dim++) {
+    size *= dimensions[dim].count;
+    n_events += dimensions[dim].n_events;
+  }
+
+  /* The scratch buffers are held by the workspace arena, and re-used by every spin
+   * system, transition pathway, and later simulation with the workspace. */
+  amp = MRS_get_workspace_buffer(workspace, MRS_BUFFER_SPECTRUM, size * sizeof(double));
+
+  for (i = 0; i < n_spin_systems; i++) {
+    vm_double_zeros(size, amp);
+    isotropic =
+        interpolation && n_dimension <= 2 && __is_isotropic(&sites[i], &couplings[i]);
+
+    // The pathway has one transition per event, and every transition holds the
+    // initial and final quantum numbers of all sites.
+    n_pathways = pathway_count[i];
+    pathway_increment = 2 * sites[i].number_of_sites * n_events;
+    transition_pathway = &transition_pathways[pathway_offset[i]];
+    multiplicity = MRS_get_workspace_buffer(workspace, MRS_BUFFER_MULTIPLICITY,
+                                            n_pathways * sizeof(unsigned int));
+    for (j = 0; j < n_pathways; j++) multiplicity[j] = 1;
+
+    if (!isotropic && n_pathways * n_events > 1) {
+      /* The tensor basis and the distinct pathways of the spin system. */
+      n_tensors = n_pathways * n_events;
+      R0 = MRS_get_workspace_buffer(workspace, MRS_BUFFER_COMPONENTS,
+                                    29 * n_tensors * sizeof(double));
+      R2 = (complex128 *)&R0[n_tensors];
+      R4 = (complex128 *)&R0[11 * n_tensors];
+      fourth_rank =
+          __pathway_components(&sites[i], &couplings[i], transition_pathway,
+                               n_pathways, n_dimension, dimensions, freq_contrib, R0,
+                               R2, R4);
+      MRS_set_workspace_tensor_basis(scheme, workspace,
+                                     dimensions[0].events[0].plan->n_octants,
+                                     n_tensors, R2, fourth_rank ? R4 : NULL);
+      if (n_pathways > 1) {
+        workspace->pathways_merged +=
+            n_pathways - __merge_pathways(n_pathways, n_events, R0, R2, R4, workspace,
+                                          multiplicity);
+      }
+    }
+
+    for (j = 0; j < n_pathways; j++) {
+      if (isotropic) {
+        __mrsimulator_isotropic(amp, &sites[i], &couplings[i], transition_pathway,
+                                n_dimension, dimensions, workspace, freq_contrib,
+                                affine_matrix);
+      } else if (multiplicity[j] == 1) {
+        __mrsimulator_core(amp, &sites[i], &couplings[i], transition_pathway,
+                           n_dimension, dimensions, fftw_scheme, scheme, workspace,
+                           interpolation, freq_contrib, affine_matrix);
+      } else if (multiplicity[j] > 1) {
+        /* A merged pathway is simulated once and weighted by its multiplicity. */
+        pathway_amp = MRS_get_workspace_buffer(
+            workspace, MRS_BUFFER_PATHWAY_SPECTRUM, size * sizeof(double));
+        vm_double_zeros(size, pathway_amp);
+        __mrsimulator_core(pathway_amp, &sites[i], &couplings[i], transition_pathway,
+                           n_dimension, dimensions, fftw_scheme, scheme, workspace,
+                           interpolation, freq_contrib, affine_matrix);
+        cblas_daxpy(size, (double)multiplicity[j], pathway_amp, 1, amp, 1);
+      }
+      if (multiplicity[j] != 0) workspace->pathways_simulated++;
+      transition_pathway += pathway_increment;
+    }
+    workspace->n_basis2 = 0;
+    workspace->n_basis4 = 0;
+
+    cblas_daxpy(size, weights[i], amp, 1, spec, 1);
+    if (decompose_spectrum) spec += size;
+  }
+}
+
+// Bound the anisotropic frequencies of a batch of spin systems per event.
+void __mrsimulator_anisotropy(double *anisotropy, unsigned int n_spin_systems,
+                              site_struct *sites, coupling_struct *couplings,
+                              float *transition_pathways, unsigned int *pathway_offset,
+                              unsigned int *pathway_count, unsigned int n_events,
+                              double *magnetic_flux_density_in_T,
+                              bool allow_fourth_rank, bool *freq_contrib) {
+  unsigned int i, j, evt, transition_increment;
+  float *transition_pathway;
+  double R0 = 0.0, R0_temp = 0.0, bound;
+  complex128 R2[5], R2_temp[5], R4[9], R4_temp[9];
+
+  for (i = 0; i < n_spin_systems; i++) {
+    vm_double_zeros(n_events, &anisotropy[i * n_events]);
+    transition_increment = 2 * sites[i].number_of_sites;
+    transition_pathway = &transition_pathways[pathway_offset[i]];
+
+    for (j = 0; j < pathway_count[i]; j++) {
+      for (evt = 0; evt < n_events; evt++) {
+        __zero_components(&R0, R2, R4);
+        MRS_rotate_components_from_PAS_to_common_frame(
+            &sites[i], &couplings[i], transition_pathway, allow_fourth_rank, &R0, R2,
+            R4, &R0_temp, R2_temp, R4_temp, magnetic_flux_density_in_T[evt],
+            &freq_contrib[evt * FREQ_CONTRIB_INCREMENT]);
+
+        /* The rotations are unitary, and the anisotropic frequency at any orientation
+         * and rotor phase is bounded by sqrt(2l+1) times the norm of the rank l
+         * components. */
+        bound = sqrt(5.0) * cblas_dnrm2(10, (double *)R2, 1);
+        if (allow_fourth_rank) bound += 3.0 * cblas_dnrm2(18, (double *)R4, 1);
+        if (bound > anisotropy[i * n_events + evt]) {
+          anisotropy[i * n_events + evt] = bound;
+        }
+        transition_pathway += transition_increment;
+      }
+    }
+  }
+}
+
 void mrsimulator_core(
     // spectrum information and related amplitude
     double *spec,                // The amplitude of the spectrum.
@@ -218,7 +550,8 @@ void mrsimulator_core(
       integration_density, allow_fourth_rank, integration_volume);
 
   MRS_fftw_scheme *fftw_scheme =
-      create_fftw_scheme(scheme->total_orientations, number_of_sidebands);
+      create_fftw_scheme(scheme->total_orientations, number_of_sidebands, 0, 1);
+  MRS_workspace *workspace = MRS_create_workspace(scheme);
 
   // gettimeofday(&all_site_time, NULL);
   __mrsimulator_core(
@@ -229,8 +562,8 @@ void mrsimulator_core(
       couplings,           // Pointer to a list of couplings within a spin system.
       transition_pathway,  // Pointer to a list of transition.
 
-      n_dimension, dimensions, fftw_scheme, scheme, interpolation, freq_contrib,
-      affine_matrix);
+      n_dimension, dimensions, fftw_scheme, scheme, workspace, interpolation,
+      freq_contrib, affine_matrix);
 
   // gettimeofday(&end, NULL);
   // clock_time = (double)(end.tv_usec - begin.tv_usec) / 1000000. +
@@ -239,7 +572,8 @@ void mrsimulator_core(
   // cpu_time_[0] += clock_time;
 
   /* clean up */
+  MRS_free_workspace(workspace);
   MRS_free_fftw_scheme(fftw_scheme);
-  MRS_free_averaging_scheme(scheme);
+  MRS_release_averaging_scheme(scheme);
   // MRS_free_plan(plan);
 }
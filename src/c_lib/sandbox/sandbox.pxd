@@ -26,6 +26,7 @@ cdef extern from "schemes.h":
                             bool_t allow_fourth_rank)
 
     void MRS_free_averaging_scheme(MRS_averaging_scheme *scheme)
+    void MRS_release_averaging_scheme(MRS_averaging_scheme *scheme)
 
 cdef extern from "mrsimulator.h":
 
@@ -41,6 +42,7 @@ cdef extern from "mrsimulator.h":
                           double rotor_angle_in_rad, double increment,
                           bool_t allow_fourth_rank)
     void MRS_free_plan(MRS_plan *plan)
+    void MRS_release_plan(MRS_plan *plan)
     void MRS_get_amplitudes_from_plan(MRS_plan *plan, double complex *R2,
                                   double complex *R4)
     void MRS_get_frequencies_from_plan(MRS_plan *plan, double R0)
@@ -99,11 +99,14 @@ cdef class AveragingScheme:
 
     @integration_density.setter
     def integration_density(self, value):
+        cdef clib.MRS_averaging_scheme *scheme
         if isinstance(value, int):
             if value > 0:
-                self.scheme = clib.MRS_create_averaging_scheme(value,
+                scheme = clib.MRS_create_averaging_scheme(value,
                                 self.allow_fourth_rank,
                                 self.scheme.integration_volume)
+                clib.MRS_release_averaging_scheme(self.scheme)
+                self.scheme = scheme
                 return
         raise ValueError(f"Expecting a positive integer, found {value}.")
 
@@ -114,12 +117,14 @@ cdef class AveragingScheme:
 
     @integration_volume.setter
     def integration_volume(self, value):
+        cdef clib.MRS_averaging_scheme *scheme
         if value in __integration_volume_enum__.keys():
-            self.scheme.integration_volume = __integration_volume_enum__[value]
-            self.scheme = clib.MRS_create_averaging_scheme(
+            scheme = clib.MRS_create_averaging_scheme(
                     self.scheme.integration_density,
-                    self.allow_fourth_rank, value
+                    self.allow_fourth_rank, __integration_volume_enum__[value]
                 )
+            clib.MRS_release_averaging_scheme(self.scheme)
+            self.scheme = scheme
             return
         raise ValueError(
             (
@@ -155,8 +160,8 @@ cdef class AveragingScheme:
             self.interpolation
         )
 
-    def __del__(self):
-        clib.MRS_free_averaging_scheme(self.scheme)
+    def __dealloc__(self):
+        clib.MRS_release_averaging_scheme(self.scheme)
 
 
 cdef class MRSPlan:
@@ -170,6 +175,9 @@ cdef class MRSPlan:
                         number_of_sidebands, sample_rotation_frequency_in_Hz,
                         rotor_angle_in_rad, increment, allow_fourth_rank)
 
+    def __dealloc__(self):
+        clib.MRS_release_plan(self.plan)
+
     @property
     def number_of_sidebands(self):
         return self.plan.number_of_sidebands
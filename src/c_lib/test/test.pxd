@@ -11,6 +11,12 @@ from libcpp cimport bool as bool_t
 
 cdef extern from "tables/trig.h":
     void generate_table()
+    void MRS_set_trig_method(int method)
+    int MRS_get_trig_method()
+
+cdef extern from "config.h":
+    void vm_double_exp_imag(int count, const double *x, void *res)
+    void vm_cosine_I_sine(int count, const double *x, void *res)
 
 cdef extern from "angular_momentum.h":
     void wigner_d_matrices(const int l, const int n, const double *angle, double *wigner)
@@ -66,6 +72,15 @@ cdef extern from "interpolation.h":
         int m0,
         int m1)
 
+    void rasterization(
+        double *grid,
+        double *v0,
+        double *v1,
+        double *v2,
+        double *amp,
+        int rows,
+        int columns)
+
     void octahedronInterpolation(
         double *spec,
         double *freq,
@@ -74,6 +89,19 @@ cdef extern from "interpolation.h":
         int stride,
         int m)
 
+    void octahedronScalarInterpolation(
+        double *spec,
+        double *freq,
+        int nt,
+        double *amp,
+        int stride,
+        int m)
+
+    int MRS_interpolation_isa_supported(int isa)
+    int MRS_set_interpolation_isa(int isa)
+    int MRS_get_interpolation_isa()
+    const char *MRS_interpolation_isa_name(int isa)
+
 cdef extern from "mrsimulator.h":
     void __get_components(
         unsigned int number_of_sidebands,
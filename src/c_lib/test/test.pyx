@@ -113,6 +113,41 @@ def get_exp_Im_alpha(int n, np.ndarray[double] cos_alpha, bool_t allow_fourth_ra
     return exp_Im_alpha
 
 
+_trig_methods = ["table", "polynomial"]
+
+
+def set_trig_method(method):
+    """Select the evaluation of the sines and cosines, ``table`` or ``polynomial``."""
+    clib.MRS_set_trig_method(_trig_methods.index(method))
+
+
+def get_trig_method():
+    """The evaluation of the sines and cosines."""
+    return _trig_methods[clib.MRS_get_trig_method()]
+
+
+cdef void _exp_imag(int count, double *x, double complex *res):
+    clib.vm_double_exp_imag(count, x, res)
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def exp_imag(np.ndarray[double] x):
+    """The exponent exp(I x) of the elements of x."""
+    cdef np.ndarray[double complex] res = np.empty(x.size, dtype=np.complex128)
+    _exp_imag(x.size, &x[0], &res[0])
+    return res
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def cosine_I_sine(np.ndarray[double] x):
+    """The cos(x) + I sin(|x|) of the elements of x."""
+    cdef np.ndarray[double complex] res = np.empty(x.size, dtype=np.complex128)
+    clib.vm_cosine_I_sine(x.size, &x[0], &res[0])
+    return res
+
+
 @cython.boundscheck(False)
 @cython.wraparound(False)
 def pre_phase_components(unsigned int number_of_sidebands, double sample_rotation_frequency_in_Hz):
@@ -175,6 +210,45 @@ def octahedronInterpolation(np.ndarray[double] spec, np.ndarray[double, ndim=2]
         clib.octahedronInterpolation(&spec[0], &freq[i,0], nt, &amp[i,0], stride, spec.size)
 
 
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def octahedronScalarInterpolation(
+        np.ndarray[double] spec,
+        np.ndarray[double, ndim=2] freq,
+        int nt,
+        np.ndarray[double, ndim=2] amp,
+        int stride=1):
+    cdef int i
+    cdef int number_of_sidebands = amp.shape[0]
+    for i in range(number_of_sidebands):
+        clib.octahedronScalarInterpolation(
+            &spec[0], &freq[i,0], nt, &amp[i,0], stride, spec.size
+        )
+
+
+_isa_names = ["scalar", "generic", "sse4.1", "avx2", "avx512f"]
+
+
+def supported_interpolation_isa():
+    """The instruction sets of the triangle interpolation supported by the cpu."""
+    return [
+        name for i, name in enumerate(_isa_names)
+        if clib.MRS_interpolation_isa_supported(i)
+    ]
+
+
+def set_interpolation_isa(name=None):
+    """Select the instruction set of the triangle interpolation. None selects the best
+    supported. Returns the name of the selected instruction set."""
+    cdef int isa = -1 if name is None else _isa_names.index(name)
+    return clib.MRS_interpolation_isa_name(clib.MRS_set_interpolation_isa(isa)).decode()
+
+
+def get_interpolation_isa():
+    """The name of the instruction set of the triangle interpolation."""
+    return clib.MRS_interpolation_isa_name(clib.MRS_get_interpolation_isa()).decode()
+
+
 @cython.boundscheck(False)
 @cython.wraparound(False)
 def triangle_interpolation(vector, np.ndarray[double, ndim=1] spectrum_amp,
@@ -238,6 +312,27 @@ def triangle_interpolation2D(vector1, vector2, np.ndarray[double, ndim=2] spectr
     clib.triangle_interpolation2D(f11, f12, f13, f21, f22, f23, &amp_[0],
                 &spectrum_amp[0, 0], shape[0], shape[1])
 
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def rasterization(vector1, vector2, np.ndarray[double, ndim=2] spectrum_amp,
+                  double amp=1):
+    r"""
+    Rasterize the triangle with the vertices (vector1[i], vector2[i]) by the area of
+    its overlap with every bin of the 2D grid.
+
+    :ivar vector1: 1-D array of the three row coordinates.
+    :ivar vector2: 1-D array of the three column coordinates.
+    :ivar spectrum_amp: A numpy array of amplitudes. This array is the output.
+    """
+    cdef np.ndarray[double, ndim=2] vertices = np.ascontiguousarray(
+        np.asarray([vector1, vector2], dtype=np.float64).T
+    )
+    cdef np.ndarray[double, ndim=1] amp_ = np.asarray([amp])
+
+    clib.rasterization(&spectrum_amp[0, 0], &vertices[0, 0], &vertices[1, 0],
+                &vertices[2, 0], &amp_[0], spectrum_amp.shape[0], spectrum_amp.shape[1])
+
 @cython.boundscheck(False)
 @cython.wraparound(False)
 def __batch_wigner_rotation(unsigned int octant_orientations,
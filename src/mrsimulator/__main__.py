@@ -13,10 +13,21 @@ class Main:
     def get_args(self, opts):
         for opt, arg in opts:
             if opt == "-h":  # help
-                print("--benchmark=<option=l0,l1,l2>")
+                print(
+                    "--benchmark=<option=l0,l1,l2,trig,quadrature,beta_averaging,"
+                    "analytic_static,refinement,rasterization>"
+                )
                 break
             if opt == "--benchmark":  # benchmark
-                if int(arg[-1]) > 2:
+                options = [
+                    "trig",
+                    "quadrature",
+                    "beta_averaging",
+                    "analytic_static",
+                    "refinement",
+                    "rasterization",
+                ]
+                if arg not in options and int(arg[-1]) > 2:
                     allow = [f"l{i}" for i in range(3)]
                     print(f"Allowed levels are {', '.join(allow)}")
                     sys.exit(2)
@@ -9,6 +9,8 @@ from mrsimulator import Site
 from mrsimulator import SpinSystem
 from mrsimulator.methods import BlochDecayCentralTransitionSpectrum
 from mrsimulator.methods import BlochDecaySpectrum
+from mrsimulator.methods import Method2D
+from mrsimulator.methods import ThreeQ_VAS
 
 # import platform
 # os_system = platform.system()
@@ -173,6 +175,214 @@ def level_n_CSA_static(n):
     return sim_csa_static, sim_quad_static, sim_csa_mas, sim_csa_vas, sim_quad_mas
 
 
+def trig(n=1000000, repeat=20, bound=1000.0):
+    """Maximum error of the table and polynomial sines and cosines, and the run time of
+    a spinning sideband simulation with each."""
+    import mrsimulator.tests.tests as clib
+    from mrsimulator.base_model import get_trig_method, set_trig_method
+
+    x = np.random.uniform(-bound, bound, size=n)
+    exact = np.exp(1j * x)
+    site = Site(isotope="29Si", shielding_symmetric={"zeta": 80, "eta": 0.4})
+    method = BlochDecaySpectrum(
+        channels=["29Si"],
+        rotor_frequency=1000,
+        spectral_dimensions=[dict(count=2048, spectral_width=1e5)],
+    )
+    sim = generate_simulator([SpinSystem(sites=[site])], method)
+    sim.config.number_of_sidebands = 64
+    sim.config.integration_density = 70
+
+    default = get_trig_method()
+    print("\nTrig benchmark.")
+    print(f"exp(I x) of {n} random x in [-{bound}, {bound}], and a 64 sideband MAS")
+    print(f"simulation, best of {repeat} runs.")
+    for name in ["table", "polynomial"]:
+        clib.set_trig_method(name)
+        set_trig_method(name)
+        error = np.abs(clib.exp_imag(x) - exact).max()
+        t = min(timeit.repeat(lambda: execute(sim), number=1, repeat=repeat))
+        print(f"{name:<12}{error:>10.2e} max error{t * 1e3:>10.3f} ms")
+    clib.set_trig_method(default)
+    set_trig_method(default)
+
+
+def quadrature(repeat=5):
+    """Number of orientations, error, and run time of the octahedron, zcw, and
+    repulsion quadratures, relative to a spinning sideband simulation over the
+    octahedral mesh of integration density 400."""
+    site = Site(isotope="29Si", shielding_symmetric={"zeta": 80, "eta": 0.4})
+    method = BlochDecaySpectrum(
+        channels=["29Si"],
+        rotor_frequency=1000,
+        spectral_dimensions=[dict(count=2048, spectral_width=1e5)],
+    )
+    sim = generate_simulator([SpinSystem(sites=[site])], method)
+    sim.config.number_of_sidebands = 64
+    sim.config.integration_density = 400
+    sim.run()
+    reference = sim.methods[0].simulation.y[0].components[0].copy()
+
+    sizes = {
+        "octahedron": [10, 20, 40, 70],
+        "zcw": [100, 300, 1000, 3000],
+        "repulsion": [100, 300, 1000, 3000],
+    }
+    print("\nQuadrature benchmark.")
+    print("Maximum error relative to the maximum of a 64 sideband MAS simulation over")
+    print(f"the octahedral mesh of integration density 400, best of {repeat} runs.")
+    for name, items in sizes.items():
+        sim.config.quadrature = name
+        for n in items:
+            if name == "octahedron":
+                sim.config.integration_density = n
+            else:
+                sim.config.quadrature_orientations = n
+            t = min(timeit.repeat(lambda: execute(sim), number=1, repeat=repeat))
+            spectrum = sim.methods[0].simulation.y[0].components[0]
+            error = np.abs(spectrum - reference).max() / reference.max()
+            count = sim.config.get_orientations_count()
+            print(f"{name:<12}{count:>8} orientations{error:>10.2e}{t * 1e3:>10.3f} ms")
+
+
+def beta_averaging(repeat=5):
+    """Error and run time of the static lineshape of a uniaxial shielding tensor,
+    averaged over the octant and over the meridian, relative to the octant of
+    integration density 400."""
+    site = Site(isotope="29Si", shielding_symmetric={"zeta": 80, "eta": 0})
+    method = BlochDecaySpectrum(
+        channels=["29Si"], spectral_dimensions=[dict(count=2048, spectral_width=5e4)]
+    )
+    sim = generate_simulator([SpinSystem(sites=[site])], method)
+    sim.config.number_of_sidebands = 1
+    sim.config.integration_density = 400
+    sim.config.beta_averaging = False
+    sim.run()
+    reference = sim.methods[0].simulation.y[0].components[0].copy()
+
+    print("\nBeta averaging benchmark.")
+    print("Sum of the absolute error relative to the sum of a static simulation over")
+    print(f"the octant of integration density 400, best of {repeat} runs.")
+    for beta_averaging in [False, True]:
+        name = "meridian" if beta_averaging else "octant"
+        sim.config.beta_averaging = beta_averaging
+        for n in [10, 20, 40, 70]:
+            sim.config.integration_density = n
+            t = min(timeit.repeat(lambda: execute(sim), number=1, repeat=repeat))
+            spectrum = sim.methods[0].simulation.y[0].components[0]
+            error = np.abs(spectrum - reference).sum() / reference.sum()
+            count = 4 * n + 1 if beta_averaging else (n + 1) * (n + 2) // 2
+            print(f"{name:<12}{count:>8} orientations{error:>10.2e}{t * 1e3:>10.3f} ms")
+
+
+def analytic_static(repeat=5):
+    """Error and run time of the static central transition lineshape of a quadrupolar
+    site, with a shielding tensor in the quadrupolar frame, over the hemisphere and
+    integrated analytically, relative to the hemisphere of integration density 400."""
+    euler = dict(alpha=0.3, beta=1.1, gamma=0.7)
+    site = Site(
+        isotope="27Al",
+        isotropic_chemical_shift=10,
+        shielding_symmetric=dict(zeta=50, eta=0.5, **euler),
+        quadrupolar=dict(Cq=4e6, eta=0.3, **euler),
+    )
+    method = BlochDecayCentralTransitionSpectrum(
+        channels=["27Al"], spectral_dimensions=[dict(count=2048, spectral_width=1e5)]
+    )
+    sim = generate_simulator([SpinSystem(sites=[site])], method)
+    sim.config.number_of_sidebands = 1
+    sim.config.integration_volume = "hemisphere"
+    sim.config.integration_density = 400
+    sim.run()
+    reference = sim.methods[0].simulation.y[0].components[0].copy()
+
+    print("\nAnalytic static lineshape benchmark.")
+    print("Sum of the absolute error relative to the sum of a static simulation over")
+    print(f"the hemisphere of integration density 400, best of {repeat} runs.")
+    for analytic_static in [False, True]:
+        name = "analytic" if analytic_static else "hemisphere"
+        sim.config.analytic_static = analytic_static
+        for n in [10, 20, 40, 70]:
+            sim.config.integration_density = n
+            t = min(timeit.repeat(lambda: execute(sim), number=1, repeat=repeat))
+            spectrum = sim.methods[0].simulation.y[0].components[0]
+            error = np.abs(spectrum - reference).sum() / reference.sum()
+            count = 9 if analytic_static else 2 * (n + 1) * (n + 2)
+            print(f"{name:<12}{count:>8} orientations{error:>10.2e}{t * 1e3:>10.3f} ms")
+
+
+def refinement(repeat=5):
+    """Error and run time of the static central transition lineshape of a quadrupolar
+    site over the uniform and the adaptively refined octant, relative to the octant of
+    integration density 600."""
+    site = Site(isotope="27Al", quadrupolar=dict(Cq=4e6, eta=0.3))
+    method = BlochDecayCentralTransitionSpectrum(
+        channels=["27Al"], spectral_dimensions=[dict(count=1024, spectral_width=5e4)]
+    )
+    sim = generate_simulator([SpinSystem(sites=[site])], method)
+    sim.config.number_of_sidebands = 1
+    sim.config.integration_density = 600
+    sim.run()
+    reference = sim.methods[0].simulation.y[0].components[0].copy()
+
+    print("\nAdaptive refinement benchmark.")
+    print("Sum of the absolute error relative to the sum of a static simulation over")
+    print(f"the octant of integration density 600, best of {repeat} runs.")
+    for n, depth in [(40, 0), (70, 0), (150, 0), (16, 2), (16, 3), (16, 4), (32, 3)]:
+        sim.config.integration_density = n
+        sim.config.refinement_depth = depth
+        plans = sim.compile()
+        sim.run(plans=plans)
+        count = (n + 1) * (n + 2) // 2 + plans[0].refinement["orientations"]
+        t = min(timeit.repeat(lambda: execute(sim), number=1, repeat=repeat))
+        spectrum = sim.methods[0].simulation.y[0].components[0]
+        error = np.abs(spectrum - reference).sum() / reference.sum()
+        name = f"{n}/{depth}"
+        print(f"{name:<12}{count:>8} orientations{error:>10.2e}{t * 1e3:>10.3f} ms")
+
+
+def rasterization(repeat=5):
+    """Error and run time of the two-dimensional spectra of a quadrupolar site with the
+    tent and the exact rasterization of the triangles, relative to the tent
+    rasterization at integration density 600."""
+    quadrupolar = dict(Cq=3e6, eta=0.4)
+    site = Site(isotope="87Rb", isotropic_chemical_shift=-10, quadrupolar=quadrupolar)
+    dimensions = [
+        dict(count=512, spectral_width=3e4, reference_offset=-5e3),
+        dict(count=512, spectral_width=1.5e4, reference_offset=-4e3),
+    ]
+    events = [
+        dict(rotor_angle=angle, transition_query={"P": [[-1]], "D": [[0]]})
+        for angle in [np.pi / 2, 0.9553166]
+    ]
+    switched_angle = Method2D(
+        channels=["87Rb"],
+        spectral_dimensions=[
+            dict(**dim, events=[event]) for dim, event in zip(dimensions, events)
+        ],
+    )
+    three_q_vas = ThreeQ_VAS(channels=["87Rb"], spectral_dimensions=dimensions)
+
+    print("\nRasterization benchmark.")
+    print("Sum of the absolute error relative to the sum of a simulation with the tent")
+    print(f"rasterization at integration density 600, best of {repeat} runs.")
+    for label, method in [("switched", switched_angle), ("3QMAS", three_q_vas)]:
+        sim = generate_simulator([SpinSystem(sites=[site])], method)
+        sim.config.number_of_sidebands = 1
+        sim.config.integration_density = 600
+        sim.run()
+        reference = sim.methods[0].simulation.y[0].components[0].copy()
+        for rasterization in ["tent", "exact"]:
+            sim.config.rasterization = rasterization
+            for n in [20, 70, 150, 300]:
+                sim.config.integration_density = n
+                t = min(timeit.repeat(lambda: execute(sim), number=1, repeat=repeat))
+                spectrum = sim.methods[0].simulation.y[0].components[0]
+                error = np.abs(spectrum - reference).sum() / reference.sum()
+                name = f"{label}/{rasterization}"
+                print(f"{name:<16}{n:>4} density{error:>10.2e}{t * 1e3:>10.3f} ms")
+
+
 class Benchmark:
     @staticmethod
     def prep():
@@ -189,3 +399,27 @@ class Benchmark:
     @staticmethod
     def l2(n_jobs):
         blocks(5, "level_n_CSA_static", 10000, 2, n_jobs)
+
+    @staticmethod
+    def trig(n_jobs):
+        trig()
+
+    @staticmethod
+    def quadrature(n_jobs):
+        quadrature()
+
+    @staticmethod
+    def beta_averaging(n_jobs):
+        beta_averaging()
+
+    @staticmethod
+    def analytic_static(n_jobs):
+        analytic_static()
+
+    @staticmethod
+    def refinement(n_jobs):
+        refinement()
+
+    @staticmethod
+    def rasterization(n_jobs):
+        rasterization()
@@ -15,6 +15,7 @@ from mrsimulator import methods as NamedMethods
 from mrsimulator import Site
 from mrsimulator import SpinSystem
 from mrsimulator.base_model import one_d_spectrum
+from mrsimulator.base_model import SimulationPlan
 from mrsimulator.method import Method
 from mrsimulator.spin_system.isotope import Isotope
 from mrsimulator.utils import flatten_dict
@@ -86,8 +87,19 @@ class Simulator(BaseModel):
 
         - ``number_of_sidebands``,
         - ``integration_density``,
-        - ``integration_volume``, and
-        - ``decompose_spectrum``
+        - ``integration_tolerance``,
+        - ``amplitude_cutoff``,
+        - ``integration_volume``,
+        - ``quadrature``,
+        - ``quadrature_orientations``,
+        - ``beta_averaging``,
+        - ``analytic_static``,
+        - ``refinement_depth``,
+        - ``rasterization``,
+        - ``decompose_spectrum``,
+        - ``parallelism``,
+        - ``fftw_planner``, and
+        - ``precision``
 
         Example
         -------
@@ -307,10 +319,21 @@ class Simulator(BaseModel):
         -------
 
         >>> pprint(sim.json())
-        {'config': {'decompose_spectrum': 'none',
+        {'config': {'amplitude_cutoff': 0.0,
+                    'analytic_static': False,
+                    'beta_averaging': False,
+                    'decompose_spectrum': 'none',
+                    'fftw_planner': 'estimate',
                     'integration_density': 70,
+                    'integration_tolerance': 0.002,
                     'integration_volume': 'octant',
-                    'number_of_sidebands': 64},
+                    'number_of_sidebands': 64,
+                    'parallelism': 'spin_system',
+                    'precision': 'double',
+                    'quadrature': 'octahedron',
+                    'quadrature_orientations': 987,
+                    'rasterization': 'tent',
+                    'refinement_depth': 0},
          'spin_systems': [{'abundance': '100.0 %',
                            'sites': [{'isotope': '13C',
                                       'isotropic_chemical_shift': '20.0 ppm',
@@ -401,11 +424,64 @@ class Simulator(BaseModel):
                 allow_nan=False,
             )
 
+    def compile(self, method_index: list = None) -> dict:
+        """Compile persistent simulation plans for the methods.
+
+        A simulation plan holds the orientation averaging scheme, the fftw scheme, and
+        the spectral dimensions of a method across simulations. When passed to the
+        :meth:`~mrsimulator.Simulator.run` method, the plans are updated in place, and
+        only the parts invalidated by a changed method or config attribute are rebuilt.
+        Use the plans for repeated simulations, such as in a least-squares fit.
+
+        Args:
+            method_index: An integer or a list of integers. If provided, only the
+                plans corresponding to the methods at the given index/indexes are
+                compiled. The default is None, `i.e.`, the plans for all methods are
+                compiled.
+
+        Returns:
+            A dict of SimulationPlan objects keyed by the method index. When the
+            number of sidebands or the integration density is ``auto``, the values are
+            dicts of SimulationPlan objects keyed by the (number of sidebands,
+            integration density), which are populated at run.
+
+        Example
+        -------
+
+        >>> plans = sim.compile() # doctest:+SKIP
+        >>> sim.run(plans=plans) # doctest:+SKIP
+        """
+        if method_index is None:
+            method_index = np.arange(len(self.methods))
+        if isinstance(method_index, int):
+            method_index = [method_index]
+
+        kwargs_dict = self.config.get_int_dict()
+        kwargs_dict.pop("decompose_spectrum")
+        kwargs_dict.pop("parallelism")
+        kwargs_dict.pop("integration_tolerance")
+        kwargs_dict.pop("beta_averaging")
+        kwargs_dict.pop("analytic_static")
+        kwargs_dict["fftw_threads"] = __CPU_count__
+
+        # with the automatic number of sidebands or integration density, the plans are
+        # keyed by the (number of sidebands, integration density), and are created at
+        # run for every group of spin systems.
+        auto_keys = ["number_of_sidebands", "integration_density"]
+        if 0 in [kwargs_dict[key] for key in auto_keys]:
+            return {int(index): {} for index in method_index}
+        return {
+            int(index): SimulationPlan(method=self.methods[index], **kwargs_dict)
+            for index in method_index
+        }
+
     def run(
         self,
         method_index: list = None,
         n_jobs: int = 1,
         pack_as_csdm: bool = True,
+        plans: dict = None,
+        backend: str = "processes",
         **kwargs,
     ):
         """Run the simulation and compute spectrum.
@@ -423,6 +499,13 @@ class Simulator(BaseModel):
                 The simulations are stored as the value of the
                 :attr:`~mrsimulator.Method.simulation` attribute of the corresponding
                 method.
+            dict plans: A dict of simulation plans from the
+                :meth:`~mrsimulator.Simulator.compile` method. The plans are re-used
+                when ``n_jobs`` is 1. The default is None.
+            str backend: The parallel backend, either ``processes`` or ``threads``.
+                The ``threads`` backend releases the GIL during the simulation, where
+                each thread simulates a chunk of spin systems with its own simulation
+                plan. The default is ``processes``.
 
         Example
         -------
@@ -434,27 +517,37 @@ class Simulator(BaseModel):
             method_index = np.arange(len(self.methods))
         if isinstance(method_index, int):
             method_index = [method_index]
+        if backend not in ["processes", "threads"]:
+            raise ValueError(
+                f"Unrecognized backend `{backend}`. "
+                "Valid backends are `processes` and `threads`."
+            )
+        kwargs_dict = self.config.get_int_dict()
+        n_jobs, n_threads, fftw_threads = get_parallel_jobs(
+            n_jobs, kwargs_dict.pop("parallelism")
+        )
+
+        plans = {} if plans is None or n_jobs != 1 else plans
         for index in method_index:
             method = self.methods[index]
             spin_sys = get_chunks(self.spin_systems, n_jobs)
-            kwargs_dict = self.config.get_int_dict()
+            plan = plans.get(int(index), None)
             jobs = (
                 delayed(one_d_spectrum)(
-                    method=method, spin_systems=sys, **kwargs_dict, **kwargs
+                    method=method,
+                    spin_systems=sys,
+                    plan=plan,
+                    n_threads=n_threads,
+                    fftw_threads=fftw_threads,
+                    **kwargs_dict,
+                    **kwargs,
                 )
                 for sys in spin_sys
             )
             amp = Parallel(
                 n_jobs=n_jobs,
                 verbose=verbose,
-                backend="loky",
-                # **{
-                #     "backend": {
-                #         "threads": "threading",
-                #         "processes": "multithreading",
-                #         None: None,
-                #     }["threads"]
-                # },
+                backend={"threads": "threading", "processes": "loky"}[backend],
             )(jobs)
 
             # self.indexes.append(indexes)
@@ -572,10 +665,11 @@ class Simulator(BaseModel):
             if new.dimensions[-1].origin_offset != 0:
                 new.dimensions[-1].to("ppm", "nmr_frequency_ratio")
 
+        numeric_type = "float32" if self.config.precision == "single" else "float64"
         dependent_variable = {
             "type": "internal",
             "quantity_type": "scalar",
-            "numeric_type": "float64",
+            "numeric_type": numeric_type,
         }
         for index, datum in enumerate(data):
             if len(datum) == 0:
@@ -676,3 +770,21 @@ def get_chunks(items_list, n_jobs):
         chunks[i] += chunks[i - 1]
 
     return [items_list[chunks[i] : chunks[i + 1]] for i in range(n_jobs)]
+
+
+def get_parallel_jobs(n_jobs, parallelism):
+    """Return the number of parallel jobs, and the simulation and fftw threads per job.
+
+    Args:
+        (int) n_jobs: The number of jobs, where a negative value counts back from the
+            number of cores, `i.e.`, -1 is all cores.
+        (int) parallelism: The integer parallelism of the simulation config. With the
+            simulation parallelism, 1, the jobs are the threads within a simulation,
+            which are also the threads of the fftw when more than one.
+    """
+    if n_jobs < 0:
+        n_jobs += __CPU_count__ + 1
+    fftw_threads = max(__CPU_count__ // n_jobs, 1)
+    if parallelism == 1:
+        return 1, n_jobs, n_jobs if n_jobs > 1 else fftw_threads
+    return n_jobs, 1, fftw_threads
@@ -1,16 +1,37 @@
 # -*- coding: utf-8 -*-
 """Base ConfigSimulator class."""
 # from mrsimulator.sandbox import AveragingScheme
+from typing import Dict
+from typing import List
+from typing import Union
+
 from pydantic import BaseModel
+from pydantic import conint
 from pydantic import Field
+from pydantic import validator
 from typing_extensions import Literal
 
+from .quadrature import get_quadrature
+from .quadrature import zcw_size
+
 __author__ = "Deepansh Srivastava"
 __email__ = "srivastava.89@osu.edu"
 
 # decompose spectrum
 __decompose_spectrum_enum__ = {"none": 0, "spin_system": 1}
 
+# parallelism
+__parallelism_enum__ = {"spin_system": 0, "simulation": 1}
+
+# fftw planner
+__fftw_planner_enum__ = {"estimate": 0, "measure": 1, "patient": 2}
+
+# precision
+__precision_enum__ = {"double": 0, "single": 1}
+
+# rasterization
+__rasterization_enum__ = {"tent": 0, "exact": 1}
+
 # integration volume
 __integration_volume_enum__ = {"octant": 0, "hemisphere": 1}
 __integration_volume_octants__ = [1, 4]
@@ -23,10 +44,13 @@ class ConfigSimulator(BaseModel):
     Attributes
     ----------
 
-    number_of_sidebands: int (optional).
+    number_of_sidebands: int or "auto" (optional).
         The value is the requested number of sidebands that will be computed in the
         simulation. The value cannot be zero or negative. The default value
-        is 64.
+        is 64. When the value is ``auto``, the number of sidebands is estimated for
+        every spin system from the magnitude of its second- and fourth-rank frequency
+        components relative to the rotor frequency. The spin systems are then grouped by
+        the estimated number of sidebands, and each group is simulated separately.
 
     integration_volume: enum (optional).
         The value is the volume over which the solid-state spectral frequency
@@ -35,7 +59,7 @@ class ConfigSimulator(BaseModel):
         - ``octant`` (default), and
         - ``hemisphere``
 
-    integration_density: int (optional).
+    integration_density: int or "auto" (optional).
         The value represents the integration density or equivalently the number of
         orientations over which the frequency integration is performed within a given
         volume. If :math:`n` is the integration_density, then the total number of
@@ -45,7 +69,100 @@ class ConfigSimulator(BaseModel):
             n_\text{octants} \frac{(n+1)(n+2)}{2},
 
         where :math:`n_\text{octants}` is the number of octants in the given volume.
-        The default value is 70.
+        The default value is 70. When the value is ``auto``, the integration density is
+        the smallest density for which the spectrum of a spin system agrees with the
+        spectrum at twice the density within the ``integration_tolerance``. The density
+        is searched once for every method and anisotropy class of the spin systems, and
+        the result is re-used in later simulations.
+
+    quadrature: enum or dict (optional).
+        The orientation quadrature of the powder averaging. The valid literals of this
+        enumeration are
+
+        - ``octahedron`` (default): The orientations of the octahedral mesh from the
+          ``integration_density``, whose frequencies are interpolated over the mesh
+          triangles.
+        - ``zcw``: The Zaremba-Conroy-Wolfsberg orientations.
+        - ``repulsion``: The REPULSION orientations, relaxed by the electrostatic
+          repulsion of the orientations, and weighted by the area of their Voronoi
+          cells.
+
+        The value may also be a dict with the ``alpha`` and ``beta`` lists of angles in
+        radians, and an optional ``weight`` list, of a user-defined quadrature. The
+        ``zcw``, ``repulsion``, and user-defined orientations have no triangle mesh,
+        and their frequencies are binned onto the spectrum. With few orientations, they
+        reach the accuracy of the octahedral mesh in spinning sideband simulations, but
+        need many more orientations for the static and second-order quadrupolar
+        lineshapes, where the binned frequencies are noisy. The ``zcw`` and
+        ``repulsion`` orientations cover the ``integration_volume``, and the
+        user-defined orientations are used as given.
+
+    quadrature_orientations: int (optional).
+        The number of orientations of the ``zcw`` and ``repulsion`` quadratures. The
+        ``zcw`` orientations are rounded up to the next number of the sequence 21, 34,
+        55, 89, ... The default value is 987.
+
+    beta_averaging: bool (optional).
+        If true, the spin systems whose frequencies only depend on the polar angle β of
+        the powder orientation are averaged over the orientations along a meridian. The
+        frequencies only depend on β when all anisotropic tensors of a spin system are
+        axially symmetric, with a zero asymmetry, and share the Euler angles, for
+        example, the uniaxial shielding, quadrupolar, and dipolar tensors. The meridian
+        holds :math:`4n+1` orientations, where :math:`n` is the integration_density,
+        instead of the :math:`n_\text{octants}(n+1)(n+2)/2` orientations of the
+        octahedral mesh. The value is not used with the ``zcw``, ``repulsion``, and
+        user-defined quadratures. The default value is False.
+
+    analytic_static: bool (optional).
+        If true, the static spectra of the one-dimensional methods are integrated
+        analytically along the polar angle β for the spin systems whose anisotropic
+        tensors share a principal axis system, for example, a site with a shielding
+        and a quadrupolar tensor at the same Euler angles. The first-order shielding
+        and second-order quadrupolar powder patterns are then evaluated as the
+        bin-integrated intensities over the spectral grid, from nine orientations
+        instead of the octahedral mesh. The value takes precedence over
+        ``beta_averaging``, and is not used with the ``zcw``, ``repulsion``, and
+        user-defined quadratures. The default value is False.
+
+    refinement_depth: int (optional).
+        The maximum number of times the triangles of the octahedral mesh are subdivided
+        into four triangles at the midpoints of their edges, for the static and the
+        infinite spinning spectra of the one-dimensional methods. A triangle is
+        subdivided when its frequencies spread over more than a bin, or deviate from
+        the linear interpolation at the midpoints of the edges of its parent, such that
+        the mesh is only refined where the lineshape is unresolved. The refinement
+        starts from the integration_density mesh, which may then be coarser than the
+        mesh without refinement. The number of subdivided triangles is reported by the
+        ``refinement`` attribute of the plans from the
+        :meth:`~mrsimulator.Simulator.compile` method. The value is between 0 and 6.
+        The default value is 0, `i.e.`, no refinement.
+
+    rasterization: enum (optional).
+        The interpolation of the triangles of the octahedral mesh onto the grid of the
+        two-dimensional spectra. The valid literals of this enumeration are
+
+        - ``tent`` (default): Every triangle is split into strips along the rows of the
+          grid, and every strip is interpolated as a tent along the columns.
+        - ``exact``: Every triangle is rasterized by the area of its overlap with every
+          bin of the grid, where the amplitude of the triangle is uniform over the
+          triangle in the frequency plane. The triangles within a single bin are
+          deposited whole, which favors the large grids of the MQMAS, STMAS, and PASS
+          spectra.
+
+    integration_tolerance: float (optional).
+        The relative tolerance of the ``auto`` integration density, given as the sum of
+        the absolute difference between the spectra at a density and twice the density,
+        relative to the sum of the absolute spectrum. The default value is 0.002.
+
+    amplitude_cutoff: float (optional).
+        The interpolation triangles of the orientation averaging, whose amplitude is
+        below the cutoff relative to the largest triangle amplitude of a spin system,
+        are skipped. The skipped triangles arise from the weak high-order sidebands and
+        weak transitions, and contribute little to the spectrum. The value is between 0
+        and 1. The default value is 0, `i.e.`, every triangle is interpolated. The
+        number of skipped triangles, and the discarded intensity, are reported by the
+        ``culling`` attribute of the plans from the
+        :meth:`~mrsimulator.Simulator.compile` method.
 
     decompose_spectrum: enum (optional).
         The value specifies how a simulation result is decomposed into an array of
@@ -57,6 +174,46 @@ class ConfigSimulator(BaseModel):
           is an array of spectra, where each spectrum arises from a spin system within
           the Simulator object.
 
+    parallelism: enum (optional).
+        The value specifies how the ``n_jobs`` workers of the
+        :meth:`~mrsimulator.Simulator.run` method are distributed. The valid literals
+        of this enumeration are
+
+        - ``spin_system`` (default): When the value is `spin_system`, the spin systems
+          are divided into chunks, which are simulated in parallel.
+        - ``simulation``: When the value is `simulation`, the spin systems are
+          simulated one after another, where each simulation runs the sidebands and
+          octants in parallel over ``n_jobs`` OpenMP threads. The per-thread spectra
+          are summed in thread order, making the result deterministic for a given
+          number of threads. The simulation runs on a single thread unless
+          mrsimulator is compiled with OpenMP.
+
+    fftw_planner: enum (optional).
+        The planner effort of the fftw transform over the sidebands. The valid literals
+        of this enumeration are
+
+        - ``estimate`` (default): A heuristic plan without measurements.
+        - ``measure``: The fastest plan from the measured run times of a few
+          candidate algorithms.
+        - ``patient``: The fastest plan from a wider search of candidate algorithms.
+
+        The measured plans are expensive to create. Set a wisdom directory with the
+        ``mrsimulator.base_model.set_fftw_wisdom_directory()`` function, and save the
+        plans with ``mrsimulator.base_model.save_fftw_wisdom()``, to re-use the plans
+        across processes and sessions.
+
+    precision: enum (optional).
+        The floating-point precision of the simulation. The valid literals of this
+        enumeration are
+
+        - ``double`` (default): The simulation is in double precision, and the spectra
+          are float64 arrays.
+        - ``single``: The sideband phases, exponents, and fftw transforms over all
+          orientations are evaluated in single precision, and the spectra are float32
+          arrays. The single precision halves the memory traffic of the sideband
+          evaluation, at a relative lineshape error of about 1e-7, which is adequate
+          for fitting and for generating large datasets.
+
     Example
     -------
 
@@ -65,24 +222,77 @@ class ConfigSimulator(BaseModel):
     >>> a.config.integration_density = 96
     >>> a.config.integration_volume = 'hemisphere'
     >>> a.config.decompose_spectrum = 'spin_system'
+    >>> a.config.parallelism = 'simulation'
+    >>> a.config.fftw_planner = 'measure'
+    >>> a.config.precision = 'single'
     """
 
-    number_of_sidebands: int = Field(default=64, gt=0)
+    number_of_sidebands: Union[conint(gt=0), Literal["auto"]] = Field(default=64)
     integration_volume: Literal["octant", "hemisphere"] = "octant"
-    integration_density: int = Field(default=70, gt=0)
+    integration_density: Union[conint(gt=0), Literal["auto"]] = Field(default=70)
+    quadrature: Union[
+        Literal["octahedron", "zcw", "repulsion"], Dict[str, List[float]]
+    ] = "octahedron"
+    quadrature_orientations: conint(gt=0) = Field(default=987)
+    beta_averaging: bool = False
+    analytic_static: bool = False
+    refinement_depth: conint(ge=0, le=6) = Field(default=0)
+    rasterization: Literal["tent", "exact"] = "tent"
+    integration_tolerance: float = Field(default=0.002, gt=0)
+    amplitude_cutoff: float = Field(default=0.0, ge=0, lt=1)
     decompose_spectrum: Literal["none", "spin_system"] = "none"
+    parallelism: Literal["spin_system", "simulation"] = "spin_system"
+    fftw_planner: Literal["estimate", "measure", "patient"] = "estimate"
+    precision: Literal["double", "single"] = "double"
 
     class Config:
         validate_assignment = True
 
+    @validator("quadrature")
+    def validate_quadrature(cls, v):
+        if isinstance(v, str):
+            return v
+        if "alpha" not in v or "beta" not in v:
+            raise ValueError("The quadrature requires the `alpha` and `beta` angles.")
+        if set(v) - {"alpha", "beta", "weight"}:
+            raise ValueError(
+                "The allowed quadrature keys are `alpha`, `beta`, and `weight`."
+            )
+        sizes = {len(item) for item in v.values()}
+        if len(sizes) != 1 or 0 in sizes:
+            raise ValueError(
+                "The quadrature `alpha`, `beta`, and `weight` must be non-empty lists "
+                "of the same length."
+            )
+        if "weight" in v and min(v["weight"]) < 0:
+            raise ValueError("The quadrature weights must be non-negative.")
+        return v
+
     def get_int_dict(self):
         py_dict = self.dict()
+        if self.number_of_sidebands == "auto":
+            py_dict["number_of_sidebands"] = 0
+        if self.integration_density == "auto":
+            py_dict["integration_density"] = 0
         py_dict["integration_volume"] = __integration_volume_enum__[
             self.integration_volume
         ]
+        # The quadratures other than the octahedron are passed as the alpha, beta, and
+        # weight arrays, and do not use the integration density.
+        py_dict["quadrature"] = get_quadrature(
+            self.quadrature,
+            py_dict.pop("quadrature_orientations"),
+            py_dict["integration_volume"],
+        )
+        if py_dict["quadrature"] is not None:
+            py_dict["integration_density"] = 1
         py_dict["decompose_spectrum"] = __decompose_spectrum_enum__[
             self.decompose_spectrum
         ]
+        py_dict["parallelism"] = __parallelism_enum__[self.parallelism]
+        py_dict["fftw_planner"] = __fftw_planner_enum__[self.fftw_planner]
+        py_dict["precision"] = __precision_enum__[self.precision]
+        py_dict["rasterization"] = __rasterization_enum__[self.rasterization]
         return py_dict
 
     # averaging scheme. This contains the c pointer used in frequency evaluation
@@ -109,6 +319,17 @@ class ConfigSimulator(BaseModel):
         >>> a.config.get_orientations_count() # (4 * 21 * 22 / 2) = 924
         924
         """
+        if self.quadrature == "zcw":
+            return zcw_size(self.quadrature_orientations)
+        if self.quadrature == "repulsion":
+            return self.quadrature_orientations
+        if isinstance(self.quadrature, dict):
+            return len(self.quadrature["alpha"])
+        if self.integration_density == "auto":
+            raise ValueError(
+                "The number of orientations is chosen at the simulation when the "
+                "integration_density is `auto`."
+            )
         n = self.integration_density
         vol = __integration_volume_octants__[
             __integration_volume_enum__[self.integration_volume]
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""Orientation quadratures for the powder averaging."""
+from functools import lru_cache
+
+import numpy as np
+
+__author__ = "Deepansh Srivastava"
+__email__ = "srivastava.89@osu.edu"
+
+# The (c1, c2, c3) constants of the ZCW angles over the octant and the hemisphere.
+__zcw_constants__ = [(-1, 1, 4), (-1, 1, 1)]
+
+# The symmetry images of a point over the octant and the hemisphere.
+__symmetry_images__ = [
+    np.array([[i, j, k] for i in (1, -1) for j in (1, -1) for k in (1, -1)]),
+    np.array([[1, 1, 1], [-1, -1, -1]]),
+]
+
+
+def _zcw_numbers(n):
+    """The smallest number of ZCW orientations, N, not less than n, and the generator,
+    g. N and g are the M+2 and M-th numbers of the sequence 8, 13, 21, 34, ..., where
+    every number is the sum of the previous two."""
+    g, g1, size = 8, 13, 21
+    while size < n:
+        g, g1, size = g1, size, g1 + size
+    return size, g
+
+
+def zcw_size(n):
+    """Return the smallest number of ZCW orientations, from the sequence 21, 34, 55,
+    89, ..., not less than n."""
+    return _zcw_numbers(n)[0]
+
+
+@lru_cache(maxsize=16)
+def zcw_angles(n, integration_volume=0):
+    r"""The Zaremba-Conroy-Wolfsberg (ZCW) angles and weights.
+
+    The :math:`N` orientations, where :math:`N` is the number of orientations from the
+    :func:`zcw_size` function, are given as
+
+    .. math::
+        \alpha_j = \frac{2\pi}{c_3} \text{mod}\left(\frac{j g}{N}, 1\right), \quad
+        \beta_j = \arccos\left(c_1\left(c_2\,\text{mod}\left(\frac{j}{N}, 1\right) -
+        1\right)\right),
+
+    where :math:`g` is the Fibonacci number two places below :math:`N`, and the
+    constants :math:`(c_1, c_2, c_3)` are :math:`(-1, 1, 4)` over the octant and
+    :math:`(-1, 1, 1)` over the hemisphere. The weights are equal. See M. Eden and M. H.
+    Levitt, J. Magn. Reson. 132, 220 (1998).
+
+    Args:
+        int n: The minimum number of orientations.
+        int integration_volume: 0 for the octant and 1 for the hemisphere.
+
+    Returns:
+        A tuple of the alpha, beta, and weight arrays.
+    """
+    size, g = _zcw_numbers(n)
+    c1, c2, c3 = __zcw_constants__[integration_volume]
+    j = np.arange(size)
+    alpha = 2 * np.pi / c3 * np.mod(j * g / size, 1)
+    beta = np.arccos(c1 * (c2 * np.mod(j / size, 1) - 1))
+    weight = np.full(size, 1.0 / size)
+    return alpha, beta, weight
+
+
+def _to_angles(points):
+    """The alpha and beta angles of the unit vectors."""
+    alpha = np.mod(np.arctan2(points[:, 1], points[:, 0]), 2 * np.pi)
+    beta = np.arccos(np.clip(points[:, 2], -1, 1))
+    return alpha, beta
+
+
+def _to_points(alpha, beta):
+    """The unit vectors of the alpha and beta angles."""
+    sin_beta = np.sin(beta)
+    return np.stack(
+        [sin_beta * np.cos(alpha), sin_beta * np.sin(alpha), np.cos(beta)], axis=1
+    )
+
+
+@lru_cache(maxsize=16)
+def repulsion_angles(n, integration_volume=0, iterations=40):
+    """The REPULSION angles and weights.
+
+    The n orientations, starting from a Fibonacci lattice, are relaxed by the
+    electrostatic repulsion from the nearest orientations and their symmetry images over
+    the sphere, and weighted by the area of their Voronoi cells, after M. Bak and N. C.
+    Nielsen, J. Magn. Reson. 125, 132 (1997).
+
+    Args:
+        int n: The number of orientations.
+        int integration_volume: 0 for the octant and 1 for the hemisphere.
+        int iterations: The number of relaxation steps.
+
+    Returns:
+        A tuple of the alpha, beta, and weight arrays.
+    """
+    from scipy.spatial import cKDTree
+    from scipy.spatial import SphericalVoronoi
+
+    images = __symmetry_images__[integration_volume]
+    c3 = __zcw_constants__[integration_volume][2]
+    j = np.arange(n) + 0.5
+    alpha = 2 * np.pi / c3 * np.mod(j * (np.sqrt(5) - 1) / 2, 1)
+    points = _to_points(alpha, np.arccos(1 - j / n))
+
+    # the step size is a fraction of the mean distance between the points.
+    step = 0.2 * np.sqrt(4 * np.pi / (images.shape[0] * n))
+    for _ in range(iterations):
+        charges = np.concatenate([points * image for image in images])
+        distance, index = cKDTree(charges).query(points, k=13)
+        diff = points[:, None, :] - charges[index[:, 1:]]
+        force = np.sum(diff / distance[:, 1:, None] ** 3, axis=1)
+
+        # the tangential component of the force moves the points on the sphere.
+        force -= np.sum(force * points, axis=1)[:, None] * points
+        points += step * force / np.linalg.norm(force, axis=1).max()
+        points /= np.linalg.norm(points, axis=1)[:, None]
+        step *= 0.9
+
+        # fold the points back into the octant or hemisphere.
+        if integration_volume == 0:
+            points = np.abs(points)
+        else:
+            points[points[:, 2] < 0] *= -1
+
+    charges = np.concatenate([points * image for image in images])
+    weight = SphericalVoronoi(charges, threshold=1e-12).calculate_areas()[:n]
+    alpha, beta = _to_angles(points)
+    return alpha, beta, weight / weight.sum()
+
+
+def get_quadrature(quadrature, n, integration_volume=0):
+    """Return the alpha, beta, and weight arrays of the quadrature, or None for the
+    octahedron quadrature.
+
+    Args:
+        quadrature: The literal ``octahedron``, ``zcw``, or ``repulsion``, or a dict
+            with the ``alpha`` and ``beta`` angles in radians, and optionally, the
+            ``weight`` of the orientations.
+        int n: The number of orientations of the zcw and repulsion quadratures.
+        int integration_volume: 0 for the octant and 1 for the hemisphere.
+    """
+    if quadrature == "octahedron":
+        return None
+    if quadrature == "zcw":
+        return zcw_angles(n, integration_volume)
+    if quadrature == "repulsion":
+        return repulsion_angles(n, integration_volume)
+
+    alpha = np.asarray(quadrature["alpha"], dtype=np.float64)
+    beta = np.asarray(quadrature["beta"], dtype=np.float64)
+    weight = quadrature.get("weight", None)
+    weight = np.ones(alpha.size) if weight is None else weight
+    return alpha, beta, np.asarray(weight, dtype=np.float64)
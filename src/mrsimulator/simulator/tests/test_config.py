@@ -33,6 +33,15 @@ def test_config():
     with pytest.raises(ValueError, match=f".*{error}.*"):
         a.config.number_of_sidebands = 0
 
+    a.config.number_of_sidebands = "auto"
+    assert a.config.number_of_sidebands == "auto"
+    assert a.config.get_int_dict()["number_of_sidebands"] == 0
+
+    error = "unexpected value; permitted: 'auto'"
+    with pytest.raises(ValueError, match=f".*{error}.*"):
+        a.config.number_of_sidebands = "many"
+    a.config.number_of_sidebands = 10
+
     # integration density
     assert a.config.integration_density == 70
     a.config.integration_density = 20
@@ -46,6 +55,31 @@ def test_config():
     with pytest.raises(ValueError, match=f".*{error}.*"):
         a.config.integration_density = {}
 
+    a.config.integration_density = "auto"
+    assert a.config.get_int_dict()["integration_density"] == 0
+    error = "The number of orientations is chosen at the simulation"
+    with pytest.raises(ValueError, match=f".*{error}.*"):
+        a.config.get_orientations_count()
+    a.config.integration_density = 20
+
+    # integration tolerance
+    assert a.config.integration_tolerance == 0.002
+    a.config.integration_tolerance = 1e-4
+    assert a.config.integration_tolerance == 1e-4
+
+    error = "ensure this value is greater than 0"
+    with pytest.raises(ValueError, match=f".*{error}.*"):
+        a.config.integration_tolerance = 0
+
+    # amplitude cutoff
+    assert a.config.amplitude_cutoff == 0
+    a.config.amplitude_cutoff = 0.01
+    assert a.config.amplitude_cutoff == 0.01
+
+    error = "ensure this value is less than 1"
+    with pytest.raises(ValueError, match=f".*{error}.*"):
+        a.config.amplitude_cutoff = 1
+
     # integration volume
     assert a.config.integration_volume == "octant"
     a.config.integration_volume = "hemisphere"
@@ -64,12 +98,78 @@ def test_config():
     with pytest.raises(ValueError, match=f".*{error}.*"):
         a.config.decompose_spectrum = "haha"
 
+    # parallelism
+    assert a.config.parallelism == "spin_system"
+    a.config.parallelism = "simulation"
+    assert a.config.parallelism == "simulation"
+
+    error = "unexpected value; permitted: 'spin_system', 'simulation'"
+    with pytest.raises(ValueError, match=f".*{error}.*"):
+        a.config.parallelism = "octant"
+
+    # fftw planner
+    assert a.config.fftw_planner == "estimate"
+    a.config.fftw_planner = "patient"
+    assert a.config.fftw_planner == "patient"
+
+    error = "unexpected value; permitted: 'estimate', 'measure', 'patient'"
+    with pytest.raises(ValueError, match=f".*{error}.*"):
+        a.config.fftw_planner = "exhaustive"
+
+    # precision
+    assert a.config.precision == "double"
+    a.config.precision = "single"
+    assert a.config.precision == "single"
+
+    error = "unexpected value; permitted: 'double', 'single'"
+    with pytest.raises(ValueError, match=f".*{error}.*"):
+        a.config.precision = "half"
+
+    # beta averaging
+    assert a.config.beta_averaging is False
+    a.config.beta_averaging = True
+    assert a.config.beta_averaging is True
+
+    # analytic static lineshapes
+    assert a.config.analytic_static is False
+    a.config.analytic_static = True
+    assert a.config.analytic_static is True
+
+    # refinement depth
+    assert a.config.refinement_depth == 0
+    a.config.refinement_depth = 3
+    assert a.config.refinement_depth == 3
+
+    error = "ensure this value is less than or equal to 6"
+    with pytest.raises(ValueError, match=f".*{error}.*"):
+        a.config.refinement_depth = 7
+
+    # rasterization
+    assert a.config.rasterization == "tent"
+    a.config.rasterization = "exact"
+    assert a.config.rasterization == "exact"
+
+    error = "unexpected value; permitted: 'tent', 'exact'"
+    with pytest.raises(ValueError, match=f".*{error}.*"):
+        a.config.rasterization = "histogram"
+
     # overall
     assert a.config.dict() == {
         "decompose_spectrum": "spin_system",
         "number_of_sidebands": 10,
         "integration_volume": "hemisphere",
         "integration_density": 20,
+        "integration_tolerance": 1e-4,
+        "amplitude_cutoff": 0.01,
+        "parallelism": "simulation",
+        "fftw_planner": "patient",
+        "precision": "single",
+        "quadrature": "octahedron",
+        "quadrature_orientations": 987,
+        "beta_averaging": True,
+        "analytic_static": True,
+        "refinement_depth": 3,
+        "rasterization": "exact",
     }
 
     assert a.config.get_int_dict() == {
@@ -77,6 +177,16 @@ def test_config():
         "number_of_sidebands": 10,
         "integration_volume": 1,
         "integration_density": 20,
+        "integration_tolerance": 1e-4,
+        "amplitude_cutoff": 0.01,
+        "parallelism": 1,
+        "fftw_planner": 2,
+        "precision": 1,
+        "quadrature": None,
+        "beta_averaging": True,
+        "analytic_static": True,
+        "refinement_depth": 3,
+        "rasterization": 1,
     }
 
     assert b != a
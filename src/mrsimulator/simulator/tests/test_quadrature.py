@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""Test for the orientation quadratures."""
+import numpy as np
+import pytest
+from mrsimulator import Simulator
+from mrsimulator import Site
+from mrsimulator import SpinSystem
+from mrsimulator.methods import BlochDecaySpectrum
+from mrsimulator.methods import ThreeQ_VAS
+from mrsimulator.simulator.quadrature import get_quadrature
+from mrsimulator.simulator.quadrature import repulsion_angles
+from mrsimulator.simulator.quadrature import zcw_angles
+from mrsimulator.simulator.quadrature import zcw_size
+
+
+def test_zcw_angles():
+    assert zcw_size(1) == 21
+    assert zcw_size(21) == 21
+    assert zcw_size(22) == 34
+    assert zcw_size(1000) == 1597
+
+    alpha, beta, weight = zcw_angles(100)
+    assert alpha.size == beta.size == weight.size == 144
+    assert np.all((alpha >= 0) & (alpha < np.pi / 2))
+    assert np.all((beta >= 0) & (beta <= np.pi / 2))
+    np.testing.assert_allclose(weight.sum(), 1)
+
+    alpha, beta, _ = zcw_angles(100, 1)
+    assert np.all((alpha >= 0) & (alpha < 2 * np.pi))
+    assert np.all((beta >= 0) & (beta <= np.pi / 2))
+    assert alpha.max() > 3 * np.pi / 2
+
+
+@pytest.mark.parametrize("volume, alpha_max", [(0, np.pi / 2), (1, 2 * np.pi)])
+def test_repulsion_angles(volume, alpha_max):
+    alpha, beta, weight = repulsion_angles(200, volume)
+    assert alpha.size == beta.size == weight.size == 200
+    assert np.all((alpha >= 0) & (alpha <= alpha_max))
+    assert np.all((beta >= 0) & (beta <= np.pi / 2))
+    assert np.all(weight > 0)
+    np.testing.assert_allclose(weight.sum(), 1)
+
+    # the Voronoi weights of the relaxed orientations are nearly equal.
+    assert weight.max() / weight.min() < 2
+
+
+def test_get_quadrature():
+    assert get_quadrature("octahedron", 100) is None
+    for item, ref in zip(get_quadrature("zcw", 100), zcw_angles(100)):
+        np.testing.assert_equal(item, ref)
+
+    alpha, beta, weight = get_quadrature({"alpha": [0, 1], "beta": [0.5, 1]}, 100)
+    np.testing.assert_equal(alpha, [0, 1])
+    np.testing.assert_equal(beta, [0.5, 1])
+    np.testing.assert_equal(weight, [1, 1])
+
+
+def test_config_quadrature():
+    sim = Simulator()
+    assert sim.config.quadrature == "octahedron"
+    assert sim.config.quadrature_orientations == 987
+
+    sim.config.quadrature = "zcw"
+    sim.config.quadrature_orientations = 100
+    assert sim.config.get_orientations_count() == 144
+    sim.config.quadrature = "repulsion"
+    assert sim.config.get_orientations_count() == 100
+    sim.config.quadrature = {"alpha": [0, 1, 2], "beta": [0, 1, 1.5]}
+    assert sim.config.get_orientations_count() == 3
+
+    error = "unexpected value; permitted: 'octahedron', 'zcw', 'repulsion'"
+    with pytest.raises(ValueError, match=f".*{error}.*"):
+        sim.config.quadrature = "lebedev"
+
+    error = "The quadrature requires the `alpha` and `beta` angles"
+    with pytest.raises(ValueError, match=f".*{error}.*"):
+        sim.config.quadrature = {"alpha": [0, 1]}
+
+    error = "The allowed quadrature keys are `alpha`, `beta`, and `weight`"
+    with pytest.raises(ValueError, match=f".*{error}.*"):
+        sim.config.quadrature = {"alpha": [0], "beta": [0], "gamma": [0]}
+
+    error = "must be non-empty lists of the same length"
+    with pytest.raises(ValueError, match=f".*{error}.*"):
+        sim.config.quadrature = {"alpha": [0, 1], "beta": [0]}
+    with pytest.raises(ValueError, match=f".*{error}.*"):
+        sim.config.quadrature = {"alpha": [], "beta": []}
+
+    error = "The quadrature weights must be non-negative"
+    with pytest.raises(ValueError, match=f".*{error}.*"):
+        sim.config.quadrature = {"alpha": [0, 1], "beta": [0, 1], "weight": [1, -1]}
+
+    sim.config.quadrature = "zcw"
+    int_dict = sim.config.get_int_dict()
+    assert "quadrature_orientations" not in int_dict
+    assert int_dict["integration_density"] == 1
+    assert int_dict["quadrature"][0].size == 144
+
+
+def setup_mas_simulator():
+    site = Site(isotope="29Si", shielding_symmetric={"zeta": 80, "eta": 0.4})
+    method = BlochDecaySpectrum(
+        channels=["29Si"],
+        rotor_frequency=1000,
+        spectral_dimensions=[{"count": 1024, "spectral_width": 5e4}],
+    )
+    sim = Simulator(spin_systems=[SpinSystem(sites=[site])], methods=[method])
+    sim.config.number_of_sidebands = 32
+    return sim
+
+
+def simulate(sim):
+    sim.run()
+    return sim.methods[0].simulation.y[0].components[0].copy()
+
+
+def test_quadrature_sideband_simulation():
+    sim = setup_mas_simulator()
+    sim.config.integration_density = 120
+    reference = simulate(sim)
+
+    for quadrature in ["zcw", "repulsion"]:
+        sim.config.quadrature = quadrature
+        sim.config.quadrature_orientations = 1000
+        spectrum = simulate(sim)
+
+        # the total intensity is conserved by the normalized weights.
+        np.testing.assert_allclose(spectrum.sum(), reference.sum(), rtol=1e-3)
+        np.testing.assert_allclose(spectrum, reference, atol=5e-3 * reference.max())
+
+    # the user-defined quadrature from the zcw angles reproduces the zcw spectrum.
+    sim.config.quadrature = "zcw"
+    zcw = simulate(sim)
+    alpha, beta, weight = zcw_angles(1000)
+    sim.config.quadrature = {
+        "alpha": alpha.tolist(),
+        "beta": beta.tolist(),
+        "weight": (2 * weight).tolist(),
+    }
+    np.testing.assert_allclose(simulate(sim), zcw, atol=1e-12 * zcw.max())
+
+
+def test_quadrature_hemisphere_simulation():
+    sim = setup_mas_simulator()
+    sim.spin_systems[0].sites[0].shielding_symmetric.alpha = 0.5
+    sim.spin_systems[0].sites[0].shielding_symmetric.beta = 1.0
+    sim.config.integration_volume = "hemisphere"
+    reference = simulate(sim)
+
+    sim.config.quadrature = "repulsion"
+    sim.config.quadrature_orientations = 2000
+    spectrum = simulate(sim)
+    np.testing.assert_allclose(spectrum.sum(), reference.sum(), rtol=1e-3)
+    np.testing.assert_allclose(spectrum, reference, atol=5e-3 * reference.max())
+
+
+def test_quadrature_2D_simulation():
+    site = Site(isotope="87Rb", quadrupolar={"Cq": 3e6, "eta": 0.2})
+    method = ThreeQ_VAS(
+        channels=["87Rb"],
+        spectral_dimensions=[
+            {"count": 128, "spectral_width": 2e4},
+            {"count": 128, "spectral_width": 2e4},
+        ],
+    )
+    sim = Simulator(spin_systems=[SpinSystem(sites=[site])], methods=[method])
+    sim.config.integration_density = 120
+    reference = simulate(sim)
+
+    sim.config.quadrature = "repulsion"
+    sim.config.quadrature_orientations = 1000
+    spectrum = simulate(sim)
+    np.testing.assert_allclose(spectrum.sum(), reference.sum(), rtol=1e-3)
@@ -10,11 +10,24 @@ from mrsimulator import Coupling
 from mrsimulator import Simulator
 from mrsimulator import Site
 from mrsimulator import SpinSystem
+from mrsimulator.base_model import _allow_fourth_rank
+from mrsimulator.base_model import batch_spectrum
+from mrsimulator.base_model import clear_integration_density_cache
+from mrsimulator.base_model import estimate_integration_density
+from mrsimulator.base_model import estimate_number_of_sidebands
+from mrsimulator.base_model import integration_density_cache_info
+from mrsimulator.base_model import pack_spin_systems
+from mrsimulator.base_model import SimulationPlan
+from mrsimulator.base_model import take_spin_systems
 from mrsimulator.method.frequency_contrib import freq_default
 from mrsimulator.methods import BlochDecayCTSpectrum
 from mrsimulator.methods import BlochDecaySpectrum
+from mrsimulator.methods import Method1D
+from mrsimulator.methods import SSB2D
+from mrsimulator.methods import ThreeQ_VAS
 from mrsimulator.simulator import __CPU_count__
 from mrsimulator.simulator import get_chunks
+from mrsimulator.simulator import get_parallel_jobs
 from mrsimulator.simulator import Sites
 from mrsimulator.spin_system.tests.test_spin_systems import generate_isotopes
 from mrsimulator.utils.collection import single_site_system_generator
@@ -52,8 +65,19 @@ def test_equality():
         "config": {
             "decompose_spectrum": "none",
             "integration_density": 70,
+            "integration_tolerance": 0.002,
+            "amplitude_cutoff": 0.0,
             "integration_volume": "octant",
             "number_of_sidebands": 64,
+            "parallelism": "spin_system",
+            "fftw_planner": "estimate",
+            "precision": "double",
+            "quadrature": "octahedron",
+            "quadrature_orientations": 987,
+            "beta_averaging": False,
+            "analytic_static": False,
+            "refinement_depth": 0,
+            "rasterization": "tent",
         },
     }
     assert c.json(include_methods=True) == result
@@ -66,7 +90,18 @@ def test_equality():
             "number_of_sidebands": 64,
             "integration_volume": "octant",
             "integration_density": 70,
+            "integration_tolerance": 0.002,
+            "amplitude_cutoff": 0.0,
             "decompose_spectrum": "none",
+            "parallelism": "spin_system",
+            "fftw_planner": "estimate",
+            "precision": "double",
+            "quadrature": "octahedron",
+            "quadrature_orientations": 987,
+            "beta_averaging": False,
+            "analytic_static": False,
+            "refinement_depth": 0,
+            "rasterization": "tent",
         },
     }
 
@@ -152,8 +187,19 @@ def test_simulator_1():
         "config": {
             "decompose_spectrum": "none",
             "integration_density": 70,
+            "integration_tolerance": 0.002,
+            "amplitude_cutoff": 0.0,
             "integration_volume": "octant",
             "number_of_sidebands": 64,
+            "parallelism": "spin_system",
+            "fftw_planner": "estimate",
+            "precision": "double",
+            "quadrature": "octahedron",
+            "quadrature_orientations": 987,
+            "beta_averaging": False,
+            "analytic_static": False,
+            "refinement_depth": 0,
+            "rasterization": "tent",
         },
     }
 
@@ -391,3 +437,551 @@ def test_parallel_chunks():
         lst[i] += 1
     items_list = np.arange(85).tolist()
     check_chunks(items_list, -1, lst)
+
+
+def test_parallel_jobs():
+    assert get_parallel_jobs(4, 0) == (4, 1, max(__CPU_count__ // 4, 1))
+    assert get_parallel_jobs(4, 1) == (1, 4, 4)
+    assert get_parallel_jobs(1, 1) == (1, 1, __CPU_count__)
+    assert get_parallel_jobs(-1, 0) == (__CPU_count__, 1, 1)
+    assert get_parallel_jobs(-1, 1) == (1, __CPU_count__, __CPU_count__)
+
+
+def test_compiled_plans():
+    site = Site(
+        isotope="27Al",
+        isotropic_chemical_shift=10,
+        shielding_symmetric={"zeta": 20, "eta": 0.3},
+        quadrupolar={"Cq": 3.2e6, "eta": 0.5},
+    )
+    method = BlochDecayCTSpectrum(
+        channels=["27Al"],
+        rotor_frequency=5000,
+        spectral_dimensions=[{"count": 512, "spectral_width": 50000}],
+    )
+    sim = Simulator(spin_systems=[SpinSystem(sites=[site])], methods=[method])
+    plans = sim.compile()
+    assert list(plans.keys()) == [0]
+    plan = plans[0]
+    rebuilds = {
+        "averaging_scheme": 1, "fftw_scheme": 1, "dimensions": 1, "rotor_angle": 0
+    }
+    assert plan.rebuilds == rebuilds
+
+    def check_against_uncompiled():
+        sim.run(plans=plans)
+        compiled = sim.methods[0].simulation.y[0].components[0]
+        sim.run()
+        reference = sim.methods[0].simulation.y[0].components[0]
+        np.testing.assert_allclose(compiled, reference, atol=1e-12)
+
+    check_against_uncompiled()
+    assert plan.rebuilds == rebuilds
+
+    # change in the coordinates is updated in place.
+    sim.methods[0].spectral_dimensions[0].spectral_width = 40000
+    sim.methods[0].spectral_dimensions[0].reference_offset = 1000
+    check_against_uncompiled()
+    assert plan.rebuilds == rebuilds
+
+    # change in the rotor angle only updates the event plans.
+    sim.methods[0].spectral_dimensions[0].events[0].rotor_angle = 0.9
+    check_against_uncompiled()
+    rebuilds["rotor_angle"] += 1
+    assert plan.rebuilds == rebuilds
+
+    # change in the rotor frequency re-creates the dimensions.
+    sim.methods[0].spectral_dimensions[0].events[0].rotor_frequency = 3000
+    check_against_uncompiled()
+    rebuilds["dimensions"] += 1
+    assert plan.rebuilds == rebuilds
+
+    # change in the config re-creates all structures.
+    sim.config.integration_density = 50
+    check_against_uncompiled()
+    for key in ["averaging_scheme", "fftw_scheme", "dimensions"]:
+        rebuilds[key] += 1
+    assert plan.rebuilds == rebuilds
+
+
+def test_threads_backend():
+    sites = single_site_system_generator(
+        isotopes="27Al",
+        isotropic_chemical_shifts=np.random.normal(0, 10, 39),
+        shielding_symmetric={"zeta": 20, "eta": 0.3},
+        quadrupolar={"Cq": 3.2e6, "eta": 0.5},
+    )
+    sites += [SpinSystem(sites=[Site(isotope="13C")])]
+    method = BlochDecayCTSpectrum(
+        channels=["27Al"],
+        rotor_frequency=5000,
+        spectral_dimensions=[{"count": 512, "spectral_width": 50000}],
+    )
+    sim = Simulator(spin_systems=sites, methods=[method])
+
+    sim.run(n_jobs=1)
+    reference = sim.methods[0].simulation.y[0].components[0]
+    sim.run(n_jobs=4, backend="threads")
+    threads = sim.methods[0].simulation.y[0].components[0]
+    np.testing.assert_allclose(threads, reference, atol=1e-12)
+
+    sim.config.decompose_spectrum = "spin_system"
+    sim.run(n_jobs=4, backend="threads")
+    assert len(sim.methods[0].simulation.y) == 39
+    decomposed = sum(item.components[0] for item in sim.methods[0].simulation.y)
+    np.testing.assert_allclose(decomposed, reference, atol=1e-12)
+
+    # the octants of the hemisphere are rotated from the shared cached scheme.
+    sites = single_site_system_generator(
+        isotopes="29Si",
+        isotropic_chemical_shifts=np.random.normal(-90, 10, 64),
+        shielding_symmetric={"zeta": 80, "eta": 0.4},
+    )
+    method = BlochDecaySpectrum(
+        channels=["29Si"], spectral_dimensions=[{"count": 1024, "spectral_width": 5e4}]
+    )
+    sim = Simulator(spin_systems=sites, methods=[method])
+    sim.config.integration_volume = "hemisphere"
+    sim.run(n_jobs=1)
+    reference = sim.methods[0].simulation.y[0].components[0]
+    for _ in range(10):
+        sim.run(n_jobs=4, backend="threads")
+        threads = sim.methods[0].simulation.y[0].components[0]
+        np.testing.assert_allclose(threads, reference, atol=1e-12 * reference.max())
+
+    error = "Unrecognized backend `mpi`."
+    with pytest.raises(ValueError, match=error):
+        sim.run(backend="mpi")
+
+
+def test_batch_spectrum():
+    site = Site(isotope="1H", shielding_symmetric={"zeta": 10, "eta": 0.1})
+    spin_systems = [
+        SpinSystem(sites=[site], abundance=50),
+        SpinSystem(sites=[Site(isotope="13C")]),
+        SpinSystem(sites=[site, site], couplings=[{"site_index": [0, 1], "D": 500}]),
+    ]
+    method = BlochDecaySpectrum(
+        channels=["1H"], spectral_dimensions=[{"count": 256, "spectral_width": 5000}]
+    )
+    packed = pack_spin_systems(method, spin_systems)
+    np.testing.assert_equal(packed["index"], [0, 2])
+    np.testing.assert_equal(packed["site_offset"], [0, 1, 3])
+    np.testing.assert_equal(packed["coupling_offset"], [0, 0, 1])
+    np.testing.assert_equal(packed["site_index"], [0, 1])
+    np.testing.assert_equal(packed["pathway_count"], [1, 4])
+
+    plan = SimulationPlan()
+    plan.update(method)
+    amp = batch_spectrum(packed, plan, decompose_spectrum=1)
+    assert amp.shape == (2, 256)
+    total = batch_spectrum(packed, plan)
+    np.testing.assert_allclose(amp.sum(axis=0), total[0], atol=1e-12)
+
+
+def test_fourth_rank_skip():
+    csa = {"zeta": 50, "eta": 0.3}
+    spin_systems = [
+        SpinSystem(sites=[Site(isotope="27Al", shielding_symmetric=csa)]),
+        SpinSystem(
+            sites=[
+                Site(
+                    isotope="27Al",
+                    shielding_symmetric=csa,
+                    quadrupolar={"Cq": 3e5, "eta": 0.4},
+                )
+            ]
+        ),
+    ]
+    kwargs = dict(channels=["27Al"], rotor_frequency=5000)
+    dims = [{"count": 512, "spectral_width": 2e5}]
+    method = BlochDecaySpectrum(spectral_dimensions=dims, **kwargs)
+    freq_contrib = ["Shielding1_0", "Shielding1_2", "Quad1_2"]
+    first_order = BlochDecaySpectrum(
+        spectral_dimensions=[{**dims[0], "events": [{"freq_contrib": freq_contrib}]}],
+        **kwargs,
+    )
+    assert _allow_fourth_rank(method)
+    assert not _allow_fourth_rank(first_order)
+    assert not _allow_fourth_rank(method, pack_spin_systems(method, spin_systems[:1]))
+
+    # The fourth-rank tensors are skipped per spin system, with or without the
+    # fourth-rank tables of the plan.
+    for mth, selection in [(method, [0]), (first_order, [0, 1])]:
+        packed = pack_spin_systems(mth, [spin_systems[i] for i in selection])
+        plan = SimulationPlan()
+        plan.update(mth, fourth_rank=True)
+        amp = batch_spectrum(packed, plan, decompose_spectrum=1)
+        plan.update(mth, fourth_rank=False)
+        assert plan.rebuilds["averaging_scheme"] == (2 if mth is method else 1)
+        reduced = batch_spectrum(packed, plan, decompose_spectrum=1)
+        np.testing.assert_allclose(reduced, amp, atol=1e-12 * amp.max())
+
+
+def test_simulation_parallelism():
+    site = Site(
+        isotope="87Rb",
+        isotropic_chemical_shift=-9,
+        shielding_symmetric={"zeta": 100, "eta": 0.2},
+        quadrupolar={"Cq": 3.5e6, "eta": 0.36},
+    )
+    methods = [
+        BlochDecayCTSpectrum(
+            channels=["87Rb"],
+            rotor_frequency=2000,
+            spectral_dimensions=[{"count": 1024, "spectral_width": 1e5}],
+        ),
+        ThreeQ_VAS(
+            channels=["87Rb"],
+            spectral_dimensions=[
+                {"count": 64, "spectral_width": 1e4, "reference_offset": -5e3},
+                {"count": 128, "spectral_width": 1e4, "reference_offset": -4e3},
+            ],
+        ),
+    ]
+    sim = Simulator(spin_systems=[SpinSystem(sites=[site])], methods=methods)
+    sim.config.integration_volume = "hemisphere"
+    sim.config.number_of_sidebands = 8
+
+    def spectra():
+        return [item.simulation.y[0].components[0] for item in sim.methods]
+
+    sim.run()
+    reference = spectra()
+
+    sim.config.parallelism = "simulation"
+    sim.run(n_jobs=4)
+    parallel = spectra()
+    for ref, res in zip(reference, parallel):
+        np.testing.assert_allclose(res, ref, atol=1e-12 * ref.max())
+
+    # per-thread spectra are summed in thread order.
+    sim.run(n_jobs=4)
+    for res, res_again in zip(parallel, spectra()):
+        np.testing.assert_array_equal(res, res_again)
+
+
+def test_auto_number_of_sidebands():
+    spin_systems = [
+        SpinSystem(
+            sites=[
+                Site(
+                    isotope="29Si",
+                    isotropic_chemical_shift=-90 + i,
+                    shielding_symmetric={"zeta": zeta, "eta": 0.3},
+                )
+            ]
+        )
+        for i, zeta in enumerate([10, 40, 80, 150])
+    ]
+    method = BlochDecaySpectrum(
+        channels=["29Si"],
+        magnetic_flux_density=9.4,
+        rotor_frequency=10000,
+        spectral_dimensions=[
+            {"count": 2048, "spectral_width": 1e5, "reference_offset": -7000}
+        ],
+    )
+    packed = pack_spin_systems(method, spin_systems)
+    sidebands = estimate_number_of_sidebands(method, packed)
+    np.testing.assert_equal(sidebands, [1, 2, 4, 8])
+    assert estimate_number_of_sidebands(method, packed, max_sidebands=2).max() == 2
+
+    selection = take_spin_systems(packed, [1, 3])
+    np.testing.assert_equal(selection["index"], [1, 3])
+    np.testing.assert_equal(selection["zeta"], packed["zeta"][[1, 3]])
+
+    static = method.copy(deep=True)
+    static.spectral_dimensions[0].events[0].rotor_frequency = 0
+    np.testing.assert_equal(estimate_number_of_sidebands(static, packed), 1)
+
+    sim = Simulator(spin_systems=spin_systems, methods=[method])
+    sim.config.number_of_sidebands = 256
+    sim.run()
+    reference = sim.methods[0].simulation.y[0].components[0]
+
+    sim.config.number_of_sidebands = "auto"
+    plans = sim.compile()
+    sim.run(plans=plans)
+    auto = sim.methods[0].simulation.y[0].components[0]
+    np.testing.assert_allclose(auto, reference, atol=0.02 * reference.max())
+    assert sorted(plans[0].keys()) == [(1, 70), (2, 70), (4, 70), (8, 70)]
+
+    sim.config.decompose_spectrum = "spin_system"
+    sim.run()
+    assert len(sim.methods[0].simulation.y) == 4
+    decomposed = sum(item.components[0] for item in sim.methods[0].simulation.y)
+    np.testing.assert_allclose(decomposed, auto, atol=1e-12)
+
+
+def test_auto_integration_density():
+    spin_systems = [
+        SpinSystem(
+            sites=[
+                Site(
+                    isotope="13C",
+                    isotropic_chemical_shift=10 * i,
+                    shielding_symmetric={"zeta": zeta, "eta": 0.5},
+                )
+            ]
+        )
+        for i, zeta in enumerate([5, 50, 52])
+    ]
+    spin_systems += [
+        SpinSystem(sites=[Site(isotope="13C", isotropic_chemical_shift=-30)])
+    ]
+    method = BlochDecaySpectrum(
+        channels=["13C"], spectral_dimensions=[{"count": 1024, "spectral_width": 25000}]
+    )
+    packed = pack_spin_systems(method, spin_systems)
+
+    # the last two anisotropic spin systems share an anisotropy class.
+    clear_integration_density_cache()
+    densities = estimate_integration_density(method, packed, 0.002)
+    assert densities[1] == densities[2]
+    assert densities[0] < densities[1]
+    assert integration_density_cache_info() == {"entries": 3, "hits": 0, "misses": 3}
+
+    # a tighter tolerance requires a larger density.
+    tight = estimate_integration_density(method, packed, 0.0005)
+    assert np.all(tight >= densities)
+    capped = estimate_integration_density(method, packed, 1e-9, max_density=24)
+    assert np.all(capped == 24)
+
+    sim = Simulator(spin_systems=spin_systems, methods=[method])
+    sim.config.integration_density = 256
+    sim.run()
+    reference = sim.methods[0].simulation.y[0].components[0]
+
+    # the searched densities are re-used.
+    sim.config.integration_density = "auto"
+    plans = sim.compile()
+    info = integration_density_cache_info()
+    sim.run(plans=plans)
+    assert integration_density_cache_info()["hits"] == info["hits"] + 3
+    assert integration_density_cache_info()["misses"] == info["misses"]
+    assert sorted(plans[0].keys()) == [(64, d) for d in sorted(set(densities))]
+
+    auto = sim.methods[0].simulation.y[0].components[0]
+    assert np.abs(auto - reference).sum() < 0.002 * np.abs(reference).sum()
+
+
+def test_sidebands_outside_window():
+    site = Site(isotope="27Al", quadrupolar={"Cq": 8e6, "eta": 0.2})
+    kwargs = dict(channels=["27Al"], rotor_frequency=4000, magnetic_flux_density=4.7)
+    wide = BlochDecayCTSpectrum(
+        spectral_dimensions=[{"count": 1024, "spectral_width": 102400}], **kwargs
+    )
+    narrow = BlochDecayCTSpectrum(
+        spectral_dimensions=[
+            {"count": 64, "spectral_width": 6400, "reference_offset": -18000}
+        ],
+        **kwargs,
+    )
+    sim = Simulator(spin_systems=[SpinSystem(sites=[site])], methods=[wide, narrow])
+    plans = sim.compile()
+    sim.run(plans=plans)
+
+    # only the sidebands within the spectral window are interpolated.
+    assert plans[0].sideband_counts == {"interpolated": 30, "skipped": 34}
+    assert plans[1].sideband_counts == {"interpolated": 5, "skipped": 59}
+
+    # the first bin also collects the frequencies within a bin below the window.
+    reference = sim.methods[0].simulation.y[0].components[0][301:364]
+    narrow = sim.methods[1].simulation.y[0].components[0][1:]
+    np.testing.assert_allclose(narrow, reference, atol=1e-12 * reference.max())
+
+    site = Site(isotope="13C", shielding_symmetric={"zeta": 70, "eta": 0.2})
+    method = SSB2D(
+        channels=["13C"],
+        rotor_frequency=1500,
+        spectral_dimensions=[
+            {"count": 32, "spectral_width": 48000},
+            {"count": 256, "spectral_width": 20000},
+        ],
+    )
+    sim = Simulator(spin_systems=[SpinSystem(sites=[site])], methods=[method])
+    sim.config.number_of_sidebands = 32
+    plans = sim.compile()
+    sim.run(plans=plans)
+    counts = plans[0].sideband_counts
+    assert counts["interpolated"] + counts["skipped"] == 32 * 32
+    assert counts["skipped"] > counts["interpolated"]
+
+
+def test_amplitude_cutoff():
+    site = Site(isotope="27Al", quadrupolar={"Cq": 5e6, "eta": 0.2})
+    method = BlochDecayCTSpectrum(
+        channels=["27Al"],
+        rotor_frequency=3000,
+        rotor_angle=0.9,
+        spectral_dimensions=[{"count": 1024, "spectral_width": 2e5}],
+    )
+    sim = Simulator(spin_systems=[SpinSystem(sites=[site])], methods=[method])
+    plans = sim.compile()
+    sim.run(plans=plans)
+    reference = sim.methods[0].simulation.y[0].components[0]
+    assert plans[0].culling == {"triangles": 0, "discarded": 0.0, "total": 0.0}
+
+    sim.config.amplitude_cutoff = 1e-3
+    plans = sim.compile()
+    sim.run(plans=plans)
+    culled = sim.methods[0].simulation.y[0].components[0]
+    culling = plans[0].culling
+    assert culling["triangles"] > 0
+
+    # the discarded fraction of the intensity is the change in the spectrum.
+    fraction = culling["discarded"] / culling["total"]
+    assert 0 < fraction < 0.01
+    difference = np.abs(culled - reference).sum() / np.abs(reference).sum()
+    np.testing.assert_allclose(difference, fraction, rtol=1e-6)
+
+
+def test_single_precision():
+    sites = [
+        Site(isotope="13C", isotropic_chemical_shift=i * 10, shielding_symmetric=sym)
+        for i, sym in enumerate([{"zeta": 80, "eta": 0.3}, {"zeta": -40, "eta": 0.9}])
+    ]
+    method = BlochDecaySpectrum(
+        channels=["13C"],
+        rotor_frequency=1500,
+        spectral_dimensions=[{"count": 1024, "spectral_width": 5e4}],
+    )
+    sim = Simulator(
+        spin_systems=[SpinSystem(sites=[site]) for site in sites], methods=[method]
+    )
+    sim.run()
+    reference = sim.methods[0].simulation
+    assert reference.y[0].components.dtype == np.float64
+
+    sim.config.precision = "single"
+    sim.run()
+    spectrum = sim.methods[0].simulation.y[0].components[0]
+    assert spectrum.dtype == np.float32
+
+    reference = reference.y[0].components[0]
+    np.testing.assert_allclose(spectrum, reference, atol=1e-6 * reference.max())
+
+
+def test_isotropic_spin_systems():
+    def spin_systems(zeta):
+        sites = [
+            Site(
+                isotope="27Al",
+                isotropic_chemical_shift=i * 7.3 - 10,
+                shielding_symmetric={"zeta": zeta, "eta": 0.3},
+                quadrupolar={"Cq": zeta, "eta": 0.2},
+            )
+            for i in range(4)
+        ]
+        return [SpinSystem(sites=[s], abundance=i + 1) for i, s in enumerate(sites)]
+
+    methods = [
+        BlochDecaySpectrum(
+            channels=["27Al"],
+            rotor_frequency=rotor_frequency,
+            spectral_dimensions=[{"count": 512, "spectral_width": 5e3}],
+        )
+        for rotor_frequency in [0, 1000]
+    ]
+    methods += [
+        BlochDecayCTSpectrum(
+            channels=["27Al"],
+            rotor_frequency=800,
+            spectral_dimensions=[{"count": 256, "spectral_width": 8e3}],
+        ),
+        ThreeQ_VAS(
+            channels=["27Al"],
+            spectral_dimensions=[
+                {"count": 64, "spectral_width": 5e3},
+                {"count": 64, "spectral_width": 5e3},
+            ],
+        ),
+    ]
+
+    # the isotropic spin systems skip the powder averaging; a vanishing anisotropy
+    # takes the full path with all frequencies within the delta tolerance.
+    spectra = []
+    for zeta in [0, 1e-9]:
+        sim = Simulator(spin_systems=spin_systems(zeta), methods=methods)
+        sim.run()
+        spectra.append([mth.simulation.y[0].components[0] for mth in sim.methods])
+
+    for isotropic, anisotropic in zip(*spectra):
+        assert anisotropic.sum() > 0
+        atol = 1e-7 * anisotropic.max()
+        np.testing.assert_allclose(isotropic, anisotropic, atol=atol)
+
+
+def test_tensor_basis_of_transitions():
+    site = Site(
+        isotope="93Nb",
+        isotropic_chemical_shift=-10,
+        shielding_symmetric={"zeta": 30, "eta": 0.4},
+        quadrupolar={"Cq": 2e6, "eta": 0.3, "alpha": 0.3, "beta": 1.1, "gamma": 0.2},
+    )
+
+    def method(query):
+        return Method1D(
+            channels=["93Nb"],
+            magnetic_flux_density=9.4,
+            rotor_frequency=rotor_frequency,
+            spectral_dimensions=[
+                {
+                    "count": 2048,
+                    "spectral_width": 2e6,
+                    "events": [{"transition_query": query}],
+                }
+            ],
+        )
+
+    # the nine transitions share the rotated tensors of the site, while every single
+    # transition method rotates the tensors of its transition.
+    for rotor_frequency in [0, 15e3]:
+        methods = [method({"P": {"channel-1": [[-1]]}})]
+        methods += [
+            method({"P": {"channel-1": [[-1]]}, "D": {"channel-1": [[d]]}})
+            for d in range(-8, 9, 2)
+        ]
+        sim = Simulator(spin_systems=[SpinSystem(sites=[site])], methods=methods)
+        sim.run()
+        spectra = [mth.simulation.y[0].components[0] for mth in sim.methods]
+        np.testing.assert_allclose(
+            spectra[0], np.sum(spectra[1:], axis=0), atol=1e-10 * spectra[0].max()
+        )
+
+
+def test_merged_pathways():
+    def spin_system(delta_j):
+        sites = [
+            Site(
+                isotope="13C",
+                isotropic_chemical_shift=10,
+                shielding_symmetric={"zeta": 40, "eta": 0.2},
+            ),
+            Site(isotope="1H", isotropic_chemical_shift=1),
+            Site(isotope="1H", isotropic_chemical_shift=2),
+        ]
+        couplings = [
+            Coupling(site_index=[0, 1], isotropic_j=150),
+            Coupling(site_index=[0, 2], isotropic_j=150 + delta_j),
+        ]
+        return SpinSystem(sites=sites, couplings=couplings)
+
+    method = BlochDecaySpectrum(
+        channels=["13C"],
+        rotor_frequency=2000,
+        spectral_dimensions=[{"count": 1024, "spectral_width": 2e4}],
+    )
+
+    # the two 13C transitions with the 1H spins in opposite states are degenerate when
+    # the couplings are equal, and are simulated once with twice the weight.
+    spectra = []
+    for delta_j, counts in [(0, [3, 1]), (1e-5, [4, 0])]:
+        sim = Simulator(spin_systems=[spin_system(delta_j)], methods=[method])
+        plans = sim.compile()
+        sim.run(plans=plans)
+        assert plans[0].pathway_counts == dict(zip(["simulated", "merged"], counts))
+        spectra.append(sim.methods[0].simulation.y[0].components[0])
+
+    np.testing.assert_allclose(spectra[0], spectra[1], atol=1e-4 * spectra[1].max())
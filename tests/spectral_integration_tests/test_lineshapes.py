@@ -120,6 +120,23 @@ def test_pure_shielding_sideband_simpson():
         )
 
 
+def test_pure_shielding_sideband_simpson_quadratures():
+    error_message = (
+        "failed to compare shielding sidebands with simpson simulation from file"
+    )
+    path_ = path.join(SIMPSON_TEST_PATH, "shielding_sidebands")
+    for quadrature in ["zcw", "repulsion"]:
+        for i in range(8):
+            message = f"{error_message} test0{i}.json with {quadrature} quadrature"
+            filename = path.join(path_, f"test{i:02d}", f"test{i:02d}.json")
+            data_mrsimulator, data_source = c_setup(
+                filename, quadrature=quadrature, quadrature_orientations=1000
+            )
+            np.testing.assert_almost_equal(
+                data_mrsimulator, data_source, decimal=3, err_msg=message
+            )
+
+
 def test_pure_quadrupolar_sidebands_simpson():
     error_message = (
         "failed to compare quadrupolar sidebands with simpson simulation from file"
@@ -106,6 +106,8 @@ def simulator_setup(
     integration_volume="octant",
     integration_density=120,
     number_of_sidebands=90,
+    quadrature="octahedron",
+    quadrature_orientations=987,
 ):
     methods = [Method.parse_dict_with_units(_) for _ in data_object["methods"]]
 
@@ -119,6 +121,8 @@ def simulator_setup(
     s1.config.integration_density = integration_density
     s1.config.number_of_sidebands = number_of_sidebands
     s1.config.integration_volume = integration_volume
+    s1.config.quadrature = quadrature
+    s1.config.quadrature_orientations = quadrature_orientations
 
     return s1
 
@@ -150,13 +154,20 @@ def c_setup(
     integration_volume="octant",
     integration_density=120,
     number_of_sidebands=90,
+    quadrature="octahedron",
+    quadrature_orientations=987,
 ):
     # mrsimulator
     data_object, data_source = get_data(filename)
     data_source /= data_source.sum()
 
     sim = simulator_setup(
-        data_object, integration_volume, integration_density, number_of_sidebands
+        data_object,
+        integration_volume,
+        integration_density,
+        number_of_sidebands,
+        quadrature,
+        quadrature_orientations,
     )
     data_mrsimulator = simulator_process(sim, data_object)
     return data_mrsimulator, data_source
@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""Test for the analytic static lineshapes of the coaxial spin systems."""
+import numpy as np
+from mrsimulator import Coupling
+from mrsimulator import Simulator
+from mrsimulator import Site
+from mrsimulator import SpinSystem
+from mrsimulator.base_model import is_coaxial
+from mrsimulator.base_model import one_d_spectrum
+from mrsimulator.base_model import pack_spin_systems
+from mrsimulator.base_model import SimulationPlan
+from mrsimulator.methods import BlochDecayCTSpectrum
+from mrsimulator.methods import BlochDecaySpectrum
+from mrsimulator.methods import ThreeQ_VAS
+
+euler = {"alpha": 0.3, "beta": 1.1, "gamma": 0.7}
+
+
+def bloch_decay(rotor_frequency=0):
+    return BlochDecaySpectrum(
+        channels=["29Si"],
+        rotor_frequency=rotor_frequency,
+        spectral_dimensions=[{"count": 1024, "spectral_width": 5e4}],
+    )
+
+
+def central_transition():
+    return BlochDecayCTSpectrum(
+        channels=["27Al"],
+        spectral_dimensions=[{"count": 1024, "spectral_width": 1e5}],
+    )
+
+
+def shielding_site(eta):
+    return Site(
+        isotope="29Si",
+        isotropic_chemical_shift=-10,
+        shielding_symmetric={"zeta": 80, "eta": eta, **euler},
+    )
+
+
+def quadrupolar_site(eta, shielding=None):
+    site = Site(
+        isotope="27Al",
+        isotropic_chemical_shift=10,
+        quadrupolar={"Cq": 4e6, "eta": eta, **euler},
+    )
+    if shielding is not None:
+        site.shielding_symmetric = shielding
+    return site
+
+
+def test_is_coaxial():
+    spin_systems = [
+        SpinSystem(sites=[shielding_site(0.4)]),
+        SpinSystem(sites=[Site(isotope="29Si", isotropic_chemical_shift=10)]),
+        SpinSystem(
+            sites=[
+                Site(isotope="29Si", shielding_symmetric={"zeta": 80, "eta": 0.5}),
+                Site(isotope="29Si", shielding_symmetric={"zeta": 40, "beta": 1.0}),
+            ]
+        ),
+        SpinSystem(
+            sites=[shielding_site(0.2), shielding_site(0.9)],
+            couplings=[Coupling(site_index=[0, 1], dipolar={"D": 500, **euler})],
+        ),
+    ]
+    packed = pack_spin_systems(bloch_decay(), spin_systems)
+    np.testing.assert_equal(is_coaxial(packed), [True, False, False, True])
+
+    # the shared quadrupolar and shielding frame.
+    shielding = {"zeta": 50, "eta": 0.5, **euler}
+    spin_systems = [
+        SpinSystem(sites=[quadrupolar_site(0.3, shielding)]),
+        SpinSystem(sites=[quadrupolar_site(0.3, {**shielding, "gamma": 0.1})]),
+    ]
+    packed = pack_spin_systems(central_transition(), spin_systems)
+    np.testing.assert_equal(is_coaxial(packed), [True, False])
+
+
+def relative_error(method, spin_systems, integration_density=70):
+    kwargs = {"number_of_sidebands": 1, "beta_averaging": False}
+    reference = one_d_spectrum(
+        method, spin_systems, integration_density=256, integration_volume=1, **kwargs
+    )
+    spectrum = one_d_spectrum(
+        method,
+        spin_systems,
+        integration_density=integration_density,
+        analytic_static=True,
+        **kwargs,
+    )
+    np.testing.assert_allclose(spectrum.sum(), reference.sum(), rtol=1e-4)
+    return np.abs(spectrum - reference).sum() / np.abs(reference).sum()
+
+
+def test_shielding_lineshapes():
+    for eta in [0, 0.4, 1.0]:
+        spin_systems = [SpinSystem(sites=[shielding_site(eta)])]
+        for density in [8, 70]:
+            assert relative_error(bloch_decay(), spin_systems, density) < 1e-3
+
+
+def test_quadrupolar_lineshapes():
+    for eta in [0, 0.3, 0.8]:
+        spin_systems = [SpinSystem(sites=[quadrupolar_site(eta)])]
+        assert relative_error(central_transition(), spin_systems) < 1e-3
+
+    # the shielding and quadrupolar tensors in a common frame.
+    shielding = {"zeta": 50, "eta": 0.5, **euler}
+    spin_systems = [SpinSystem(sites=[quadrupolar_site(0.3, shielding)])]
+    assert relative_error(central_transition(), spin_systems) < 1e-3
+
+
+def test_unmatched_spin_systems():
+    kwargs = {"number_of_sidebands": 64, "integration_density": 70}
+    spin_systems = [
+        SpinSystem(
+            sites=[
+                Site(isotope="29Si", shielding_symmetric={"zeta": 80, "eta": 0.5}),
+                Site(isotope="29Si", shielding_symmetric={"zeta": 40, "beta": 1.0}),
+            ]
+        )
+    ]
+
+    # the spin systems with tensors in different frames, and the spinning and
+    # two-dimensional methods, are not integrated analytically.
+    site = Site(isotope="87Rb", quadrupolar={"Cq": 3e6, "eta": 0.4})
+    three_q_vas = ThreeQ_VAS(
+        channels=["87Rb"],
+        spectral_dimensions=[{"count": 128, "spectral_width": 2e4}] * 2,
+    )
+    for method, systems in [
+        (bloch_decay(), spin_systems),
+        (bloch_decay(2000), [SpinSystem(sites=[shielding_site(0.4)])]),
+        (three_q_vas, [SpinSystem(sites=[site])]),
+    ]:
+        plan = SimulationPlan()
+        spectrum = one_d_spectrum(
+            method, systems, analytic_static=True, plan=plan, **kwargs
+        )
+        reference = one_d_spectrum(method, systems, **kwargs)
+        np.testing.assert_allclose(spectrum, reference, atol=1e-12 * reference.max())
+        assert plan.analytic is None
+
+
+def test_analytic_plan():
+    method = bloch_decay()
+    spin_systems = [
+        SpinSystem(sites=[shielding_site(0.4)]),
+        SpinSystem(
+            sites=[
+                Site(isotope="29Si", shielding_symmetric={"zeta": 80, "eta": 0.5}),
+                Site(isotope="29Si", shielding_symmetric={"zeta": 40, "beta": 1.0}),
+            ]
+        ),
+        SpinSystem(sites=[shielding_site(0)]),
+    ]
+    kwargs = {"number_of_sidebands": 1, "integration_density": 70}
+    plan = SimulationPlan()
+    spectra = one_d_spectrum(
+        method,
+        spin_systems,
+        decompose_spectrum=1,
+        analytic_static=True,
+        beta_averaging=True,
+        plan=plan,
+        **kwargs,
+    )
+    assert isinstance(plan.analytic, SimulationPlan)
+    assert plan.analytic.rebuilds["averaging_scheme"] == 1
+
+    # the analytic integration takes precedence over the meridian.
+    assert plan.meridian is None
+
+    # the spin systems are returned in order.
+    for spin_system, spectrum in zip(spin_systems, spectra):
+        single = one_d_spectrum(method, [spin_system], analytic_static=True, **kwargs)
+        np.testing.assert_allclose(spectrum, single, atol=1e-12 * single.max())
+
+    # the plans are re-used.
+    rebuilds = plan.analytic.rebuilds["averaging_scheme"]
+    one_d_spectrum(method, spin_systems, analytic_static=True, plan=plan, **kwargs)
+    assert plan.analytic.rebuilds["averaging_scheme"] == rebuilds
+
+
+def test_auto_integration_density():
+    spin_systems = [SpinSystem(sites=[quadrupolar_site(0.3)])]
+    method = central_transition()
+    reference = one_d_spectrum(
+        method,
+        spin_systems,
+        number_of_sidebands=1,
+        integration_density=256,
+        integration_volume=1,
+        beta_averaging=False,
+    )
+    spectrum = one_d_spectrum(
+        method, spin_systems, integration_density=0, analytic_static=True
+    )
+    assert np.abs(spectrum - reference).sum() / np.abs(reference).sum() < 1e-3
+
+
+def test_simulator_analytic_static():
+    method = central_transition()
+    spin_systems = [SpinSystem(sites=[quadrupolar_site(0.3)])]
+    sim = Simulator(spin_systems=spin_systems, methods=[method])
+    sim.config.integration_volume = "hemisphere"
+    sim.run()
+    hemisphere = sim.methods[0].simulation.y[0].components[0].copy()
+
+    sim.config.analytic_static = True
+    sim.run()
+    analytic = sim.methods[0].simulation.y[0].components[0]
+    reference = one_d_spectrum(
+        method,
+        sim.spin_systems,
+        number_of_sidebands=1,
+        integration_density=70,
+        analytic_static=True,
+    )
+    np.testing.assert_allclose(analytic, reference, atol=1e-12 * analytic.max())
+    error = np.abs(analytic - hemisphere).sum() / np.abs(hemisphere).sum()
+    assert error < 5e-3
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""Test for the process-wide averaging scheme cache."""
+import os
+
+import numpy as np
+from mrsimulator import Simulator
+from mrsimulator import Site
+from mrsimulator import SpinSystem
+from mrsimulator.base_model import averaging_scheme_cache_info
+from mrsimulator.base_model import clear_averaging_scheme_cache
+from mrsimulator.base_model import set_averaging_scheme_cache_directory
+from mrsimulator.base_model import set_averaging_scheme_cache_limit
+from mrsimulator.methods import BlochDecaySpectrum
+
+
+def setup_simulator(integration_density=40):
+    site = Site(isotope="13C", shielding_symmetric={"zeta": 50, "eta": 0.5})
+    method = BlochDecaySpectrum(
+        channels=["13C"], spectral_dimensions=[{"count": 512, "spectral_width": 25000}]
+    )
+    sim = Simulator(spin_systems=[SpinSystem(sites=[site])], methods=[method])
+    sim.config.integration_density = integration_density
+    return sim
+
+
+def simulate(sim):
+    sim.run()
+    return sim.methods[0].simulation.y[0].components[0]
+
+
+def test_scheme_reuse():
+    clear_averaging_scheme_cache()
+    sim = setup_simulator(41)
+
+    info = averaging_scheme_cache_info()
+    spec_1 = simulate(sim)
+    info_1 = averaging_scheme_cache_info()
+    assert info_1["misses"] == info["misses"] + 1
+    assert info_1["entries"] == info["entries"] + 1
+
+    spec_2 = simulate(sim)
+    info_2 = averaging_scheme_cache_info()
+    assert info_2["hits"] == info_1["hits"] + 1
+    assert info_2["misses"] == info_1["misses"]
+    np.testing.assert_array_equal(spec_1, spec_2)
+
+
+def test_scheme_eviction():
+    clear_averaging_scheme_cache()
+    assert averaging_scheme_cache_info()["entries"] == 0
+
+    max_nbytes = averaging_scheme_cache_info()["max_nbytes"]
+    for density in [20, 30, 40]:
+        simulate(setup_simulator(density))
+    assert averaging_scheme_cache_info()["entries"] == 3
+
+    # the least recently used schemes are evicted first.
+    evictions = averaging_scheme_cache_info()["evictions"]
+    set_averaging_scheme_cache_limit(averaging_scheme_cache_info()["nbytes"] - 1)
+    info = averaging_scheme_cache_info()
+    assert info["entries"] == 2
+    assert info["evictions"] == evictions + 1
+
+    simulate(setup_simulator(40))
+    assert averaging_scheme_cache_info()["hits"] == info["hits"] + 1
+
+    simulate(setup_simulator(20))
+    assert averaging_scheme_cache_info()["misses"] == info["misses"] + 1
+
+    set_averaging_scheme_cache_limit(0)
+    assert averaging_scheme_cache_info()["entries"] == 0
+    set_averaging_scheme_cache_limit(max_nbytes)
+
+
+def test_scheme_disk_tier(tmpdir):
+    clear_averaging_scheme_cache()
+    spec_memory = simulate(setup_simulator(33))
+
+    directory = str(tmpdir.mkdir("schemes"))
+    set_averaging_scheme_cache_directory(directory)
+    assert os.environ["MRSIMULATOR_SCHEME_CACHE_DIR"] == directory
+    try:
+        clear_averaging_scheme_cache()
+        simulate(setup_simulator(33))
+        assert len(os.listdir(directory)) == 1
+
+        clear_averaging_scheme_cache()
+        info = averaging_scheme_cache_info()
+        spec_disk = simulate(setup_simulator(33))
+        assert averaging_scheme_cache_info()["disk_hits"] == info["disk_hits"] + 1
+        np.testing.assert_array_equal(spec_memory, spec_disk)
+    finally:
+        set_averaging_scheme_cache_directory(None)
+    assert "MRSIMULATOR_SCHEME_CACHE_DIR" not in os.environ
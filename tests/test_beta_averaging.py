@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""Test for the beta averaging of the axially symmetric spin systems."""
+import numpy as np
+from mrsimulator import Coupling
+from mrsimulator import Simulator
+from mrsimulator import Site
+from mrsimulator import SpinSystem
+from mrsimulator.base_model import is_axially_symmetric
+from mrsimulator.base_model import one_d_spectrum
+from mrsimulator.base_model import pack_spin_systems
+from mrsimulator.base_model import SimulationPlan
+from mrsimulator.methods import BlochDecayCTSpectrum
+from mrsimulator.methods import BlochDecaySpectrum
+from mrsimulator.methods import SSB2D
+from mrsimulator.methods import ThreeQ_VAS
+
+euler = {"alpha": 0.3, "beta": 1.1, "gamma": 0.7}
+
+
+def bloch_decay(channel, rotor_frequency=0, spectral_width=5e4):
+    return BlochDecaySpectrum(
+        channels=[channel],
+        rotor_frequency=rotor_frequency,
+        spectral_dimensions=[{"count": 1024, "spectral_width": spectral_width}],
+    )
+
+
+def quadrupolar_site(eta=0):
+    return Site(
+        isotope="27Al",
+        isotropic_chemical_shift=10,
+        shielding_symmetric={"zeta": 50, "eta": 0, **euler},
+        quadrupolar={"Cq": 4e6, "eta": eta, **euler},
+    )
+
+
+def test_is_axially_symmetric():
+    method = bloch_decay("29Si")
+    spin_systems = [
+        SpinSystem(sites=[Site(isotope="29Si", shielding_symmetric={"zeta": 80})]),
+        SpinSystem(
+            sites=[Site(isotope="29Si", shielding_symmetric={"zeta": 80, **euler})]
+        ),
+        SpinSystem(
+            sites=[Site(isotope="29Si", shielding_symmetric={"zeta": 80, "eta": 0.5})]
+        ),
+        SpinSystem(sites=[Site(isotope="29Si", isotropic_chemical_shift=10)]),
+        SpinSystem(
+            sites=[
+                Site(isotope="29Si", shielding_symmetric={"zeta": 80}),
+                Site(isotope="29Si", shielding_symmetric={"zeta": 40, "beta": 1.0}),
+            ]
+        ),
+        SpinSystem(
+            sites=[
+                Site(isotope="29Si", shielding_symmetric={"zeta": 80, **euler}),
+                Site(isotope="29Si", shielding_symmetric={"zeta": 40, **euler}),
+            ],
+            couplings=[Coupling(site_index=[0, 1], dipolar={"D": 500, **euler})],
+        ),
+        SpinSystem(
+            sites=[Site(isotope="29Si"), Site(isotope="29Si")],
+            couplings=[Coupling(site_index=[0, 1], dipolar={"D": 500, "beta": 1.0})],
+        ),
+    ]
+    packed = pack_spin_systems(method, spin_systems)
+    expected = [True, True, False, False, False, True, True]
+    np.testing.assert_equal(is_axially_symmetric(packed), expected)
+
+    # the shared quadrupolar and shielding frame.
+    method = BlochDecayCTSpectrum(channels=["27Al"])
+    packed = pack_spin_systems(
+        method, [SpinSystem(sites=[quadrupolar_site(eta)]) for eta in [0, 0.2]]
+    )
+    np.testing.assert_equal(is_axially_symmetric(packed), [True, False])
+
+
+def relative_error(method, spin_systems, **kwargs):
+    kwargs = {"number_of_sidebands": 64, "integration_volume": 1, **kwargs}
+    reference = one_d_spectrum(
+        method, spin_systems, integration_density=200, beta_averaging=False, **kwargs
+    )
+    spectrum = one_d_spectrum(
+        method, spin_systems, integration_density=70, beta_averaging=True, **kwargs
+    )
+    np.testing.assert_allclose(spectrum.sum(), reference.sum(), rtol=1e-4)
+    return np.abs(spectrum - reference).sum() / np.abs(reference).sum()
+
+
+def test_shielding_lineshapes():
+    site = Site(isotope="29Si", shielding_symmetric={"zeta": 80, "eta": 0, **euler})
+    spin_systems = [SpinSystem(sites=[site])]
+    assert relative_error(bloch_decay("29Si"), spin_systems) < 1e-3
+    assert relative_error(bloch_decay("29Si", 2000), spin_systems) < 1e-4
+
+
+def test_quadrupolar_lineshapes():
+    spin_systems = [SpinSystem(sites=[quadrupolar_site()])]
+    for rotor_frequency in [0, 15000]:
+        method = BlochDecayCTSpectrum(
+            channels=["27Al"],
+            rotor_frequency=rotor_frequency,
+            spectral_dimensions=[{"count": 1024, "spectral_width": 1e5}],
+        )
+        assert relative_error(method, spin_systems) < 1e-3
+
+
+def test_dipolar_lineshape():
+    sites = [Site(isotope="1H"), Site(isotope="1H", isotropic_chemical_shift=5)]
+    coupling = Coupling(site_index=[0, 1], isotropic_j=10, dipolar={"D": 8000})
+    spin_systems = [SpinSystem(sites=sites, couplings=[coupling])]
+    assert relative_error(bloch_decay("1H"), spin_systems) < 1e-3
+
+
+def test_2D_lineshape():
+    site = Site(isotope="87Rb", quadrupolar={"Cq": 3e6, "eta": 0})
+    method = ThreeQ_VAS(
+        channels=["87Rb"],
+        spectral_dimensions=[{"count": 128, "spectral_width": 2e4}] * 2,
+    )
+    assert relative_error(method, [SpinSystem(sites=[site])]) < 1e-3
+
+
+def test_meridian_plan():
+    method = bloch_decay("29Si")
+    spin_systems = [
+        SpinSystem(sites=[Site(isotope="29Si", shielding_symmetric={"zeta": 80})]),
+        SpinSystem(
+            sites=[Site(isotope="29Si", shielding_symmetric={"zeta": 40, "eta": 0.5})]
+        ),
+    ]
+    kwargs = {
+        "number_of_sidebands": 1,
+        "integration_density": 70,
+        "beta_averaging": True,
+    }
+    plan = SimulationPlan()
+    spectra = one_d_spectrum(
+        method, spin_systems, decompose_spectrum=1, plan=plan, **kwargs
+    )
+    assert isinstance(plan.meridian, SimulationPlan)
+    assert plan.meridian.rebuilds["averaging_scheme"] == 1
+
+    # the spin systems are returned in order.
+    for spin_system, spectrum in zip(spin_systems, spectra):
+        single = one_d_spectrum(method, [spin_system], **kwargs)
+        np.testing.assert_allclose(spectrum, single, atol=1e-12 * single.max())
+
+    # the plans are re-used.
+    rebuilds = plan.meridian.rebuilds["averaging_scheme"]
+    one_d_spectrum(method, spin_systems, plan=plan, **kwargs)
+    assert plan.meridian.rebuilds["averaging_scheme"] == rebuilds
+
+    # the spin systems are averaged over the integration volume without beta averaging.
+    plan = SimulationPlan()
+    kwargs["beta_averaging"] = False
+    one_d_spectrum(method, spin_systems, plan=plan, **kwargs)
+    assert plan.meridian is None
+
+
+def test_simulator_beta_averaging():
+    site = Site(isotope="29Si", shielding_symmetric={"zeta": 80, "eta": 0})
+    method = bloch_decay("29Si")
+    sim = Simulator(spin_systems=[SpinSystem(sites=[site])], methods=[method])
+    sim.config.number_of_sidebands = 1
+    sim.config.beta_averaging = True
+    sim.run()
+    meridian = sim.methods[0].simulation.y[0].components[0].copy()
+
+    sim.config.beta_averaging = False
+    sim.run()
+    octant = sim.methods[0].simulation.y[0].components[0]
+    reference = one_d_spectrum(
+        method,
+        sim.spin_systems,
+        number_of_sidebands=1,
+        integration_volume=0,
+        integration_density=70,
+        beta_averaging=False,
+    )
+    np.testing.assert_allclose(octant, reference, atol=1e-12 * octant.max())
+    assert np.abs(meridian - octant).sum() / np.abs(octant).sum() < 5e-3
+
+
+def test_SSB2D_lineshape():
+    # the sidebands are constant along both dimensions.
+    site = Site(
+        isotope="13C",
+        isotropic_chemical_shift=29,
+        shielding_symmetric={"zeta": -70, "eta": 0},
+    )
+    method = SSB2D(
+        channels=["13C"],
+        magnetic_flux_density=11.7,
+        rotor_frequency=1500,
+        spectral_dimensions=[
+            {"count": 32, "spectral_width": 32 * 1500},
+            {"count": 2048, "spectral_width": 2e4, "reference_offset": 5e3},
+        ],
+    )
+    kwargs = {"number_of_sidebands": 32, "integration_density": 70}
+    spin_systems = [SpinSystem(sites=[site])]
+    reference = one_d_spectrum(
+        method, spin_systems, integration_volume=0, beta_averaging=False, **kwargs
+    )
+    spectrum = one_d_spectrum(method, spin_systems, beta_averaging=True, **kwargs)
+    np.testing.assert_allclose(spectrum.sum(), reference.sum(), rtol=1e-3)
+    np.testing.assert_allclose(spectrum, reference, atol=1e-3 * reference.max())
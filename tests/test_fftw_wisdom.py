@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""Test for the fftw planner, wisdom store, and threads."""
+import os
+
+import numpy as np
+from mrsimulator import Simulator
+from mrsimulator import Site
+from mrsimulator import SpinSystem
+from mrsimulator.base_model import fftw_threads_enabled
+from mrsimulator.base_model import forget_fftw_wisdom
+from mrsimulator.base_model import load_fftw_wisdom
+from mrsimulator.base_model import save_fftw_wisdom
+from mrsimulator.base_model import set_fftw_threads
+from mrsimulator.base_model import set_fftw_wisdom_directory
+from mrsimulator.methods import BlochDecaySpectrum
+from mrsimulator.simulator import __CPU_count__
+
+
+def setup_simulator(fftw_planner):
+    site = Site(isotope="13C", shielding_symmetric={"zeta": 50, "eta": 0.5})
+    method = BlochDecaySpectrum(
+        channels=["13C"],
+        rotor_frequency=1000,
+        spectral_dimensions=[{"count": 512, "spectral_width": 25000}],
+    )
+    sim = Simulator(spin_systems=[SpinSystem(sites=[site])], methods=[method])
+    sim.config.integration_density = 20
+    sim.config.number_of_sidebands = 16
+    sim.config.fftw_planner = fftw_planner
+    return sim
+
+
+def simulate(sim):
+    sim.run()
+    return sim.methods[0].simulation.y[0].components[0]
+
+
+def test_fftw_planner():
+    reference = simulate(setup_simulator("estimate"))
+    for planner in ["measure", "patient"]:
+        spectrum = simulate(setup_simulator(planner))
+        np.testing.assert_allclose(spectrum, reference, atol=1e-12 * reference.max())
+
+
+def test_fftw_wisdom_store(tmpdir):
+    directory = str(tmpdir.mkdir("wisdom"))
+    forget_fftw_wisdom()
+    set_fftw_wisdom_directory(directory)
+    assert os.environ["MRSIMULATOR_FFTW_WISDOM_DIR"] == directory
+    try:
+        # the wisdom of all the transforms of a precision is stored in one file.
+        simulate(setup_simulator("measure"))
+        sim = setup_simulator("measure")
+        sim.config.number_of_sidebands = 32
+        simulate(sim)
+        assert save_fftw_wisdom() == [os.path.join(directory, "fftw.wisdom")]
+
+        forget_fftw_wisdom()
+        assert load_fftw_wisdom() == 1
+        simulate(setup_simulator("measure"))
+
+        # the single precision wisdom is stored separately.
+        sim = setup_simulator("measure")
+        sim.config.precision = "single"
+        simulate(sim)
+        assert save_fftw_wisdom() == [
+            os.path.join(directory, "fftw.wisdom"),
+            os.path.join(directory, "fftwf.wisdom"),
+        ]
+
+        forget_fftw_wisdom()
+        assert load_fftw_wisdom() == 2
+    finally:
+        set_fftw_wisdom_directory(None)
+    assert "MRSIMULATOR_FFTW_WISDOM_DIR" not in os.environ
+    assert load_fftw_wisdom() == 0
+    assert load_fftw_wisdom(directory) == 2
+
+
+def test_fftw_threads():
+    sim = setup_simulator("estimate")
+    reference = simulate(sim)
+    plans = sim.compile()
+    assert plans[0].fftw_threads == 1
+
+    # the transforms smaller than the min_size are not threaded.
+    set_fftw_threads(2)
+    try:
+        assert sim.compile()[0].fftw_threads == 1
+
+        set_fftw_threads(2, min_size=1)
+        plans = sim.compile()
+        n_threads = 2 if fftw_threads_enabled() else 1
+        assert plans[0].fftw_threads == min(n_threads, __CPU_count__)
+
+        sim.run(plans=plans)
+        spectrum = sim.methods[0].simulation.y[0].components[0]
+        np.testing.assert_allclose(spectrum, reference, atol=1e-12 * reference.max())
+    finally:
+        set_fftw_threads(1)
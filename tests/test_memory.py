@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""Test for the memory held by the repeated simulations."""
+import gc
+import os
+
+import psutil
+from mrsimulator import Simulator
+from mrsimulator import Site
+from mrsimulator import SpinSystem
+from mrsimulator.methods import BlochDecaySpectrum
+from mrsimulator.methods import SSB2D
+from mrsimulator.methods import ThreeQ_VAS
+
+
+def rss_growth(sim, n_runs=500, n_warmup=50):
+    """The growth of the resident memory, in bytes, over `n_runs` simulations."""
+    process = psutil.Process(os.getpid())
+    for _ in range(n_warmup):
+        sim.run()
+    gc.collect()
+    rss = process.memory_info().rss
+    for _ in range(n_runs):
+        sim.run()
+    gc.collect()
+    return process.memory_info().rss - rss
+
+
+def setup_simulator(method, isotope, **kwargs):
+    site = Site(isotope=isotope, **kwargs)
+    sim = Simulator(spin_systems=[SpinSystem(sites=[site])], methods=[method])
+    sim.config.integration_density = 20
+    return sim
+
+
+def test_rss_bloch_decay():
+    method = BlochDecaySpectrum(
+        channels=["13C"],
+        rotor_frequency=1000,
+        spectral_dimensions=[{"count": 256, "spectral_width": 25000}],
+    )
+    sim = setup_simulator(method, "13C", shielding_symmetric={"zeta": 50, "eta": 0.5})
+    assert rss_growth(sim) < 2**20
+
+
+def test_rss_multiple_events():
+    # The events of the dimensions with a different rotor frequency or rotor angle
+    # own a copy of the plan.
+    method = SSB2D(
+        channels=["13C"],
+        rotor_frequency=1000,
+        spectral_dimensions=[
+            {"count": 16, "spectral_width": 16000},
+            {"count": 128, "spectral_width": 25000},
+        ],
+    )
+    sim = setup_simulator(method, "13C", shielding_symmetric={"zeta": 50, "eta": 0.5})
+    assert rss_growth(sim) < 2**20
+
+    method = ThreeQ_VAS(
+        channels=["87Rb"],
+        spectral_dimensions=[
+            {"count": 64, "spectral_width": 25000},
+            {"count": 64, "spectral_width": 25000},
+        ],
+    )
+    sim = setup_simulator(method, "87Rb", quadrupolar={"Cq": 3e6, "eta": 0.5})
+    assert rss_growth(sim) < 2**20
+
+
+def test_rss_quadrupolar_transitions():
+    # The scratch buffers of a spin system with many transition pathways are held by
+    # the workspace, and re-used by the later simulations.
+    method = BlochDecaySpectrum(
+        channels=["27Al"],
+        rotor_frequency=5000,
+        spectral_dimensions=[{"count": 512, "spectral_width": 5e5}],
+    )
+    sim = setup_simulator(
+        method,
+        "27Al",
+        shielding_symmetric={"zeta": 20, "eta": 0.3},
+        quadrupolar={"Cq": 2e6, "eta": 0.4, "beta": 0.5},
+    )
+    sim.spin_systems += [
+        SpinSystem(sites=[Site(isotope="27Al", quadrupolar={"Cq": 5e6, "eta": 0.1})])
+    ]
+    assert rss_growth(sim) < 2**20
@@ -173,3 +173,76 @@ def test_triangle_rasterization():
         # plt.show()
 
         assert np.allclose(amp2, amp1.sum(axis=1), atol=1e-15)
+
+
+def test_area_rasterization():
+    # a triangle of area 2 over three bins.
+    amp = np.zeros((4, 4), dtype=np.float64)
+    clib.rasterization([0.0, 2.0, 0.0], [0.0, 0.0, 2.0], amp, 2.0)
+    expected = np.zeros((4, 4))
+    expected[0, :2] = [1.0, 0.5]
+    expected[1, 0] = 0.5
+    assert np.allclose(amp, expected, atol=1e-15)
+
+    # the triangles within the 2D grid are rasterized exactly by the tent strips.
+    rng = np.random.default_rng(42)
+    for size in [0.6, 4.0, 18.0]:
+        for _ in range(50):
+            center = rng.uniform(1 + size / 2, 19 - size / 2, size=2)
+            lst1, lst2 = center[:, np.newaxis] + rng.uniform(-0.5, 0.5, (2, 3)) * size
+            amp1 = np.zeros((20, 20), dtype=np.float64)
+            amp2 = np.zeros((20, 20), dtype=np.float64)
+
+            clib.triangle_interpolation2D(lst1, lst2, amp1)
+            clib.rasterization(lst1, lst2, amp2)
+            assert np.allclose(amp1, amp2, atol=1e-12)
+            assert np.allclose(amp2.sum(), 1.0, atol=1e-12)
+
+    # the area outside the 2D grid is dropped.
+    amp = np.zeros((20, 20), dtype=np.float64)
+    clib.rasterization([-2.0, 2.0, 2.0], [0.0, 0.0, 4.0], amp)
+    assert np.allclose(amp.sum(), 0.75, atol=1e-15)
+
+    # the delta lines along a dimension are interpolated as the tent strips.
+    for list_ in [[[1.5, 1.5, 1.5], [1.5, 6.0, 9.4]], [[1.5, 6.0, 9.4], [4.2] * 3]]:
+        lst1, lst2 = np.asarray(list_)
+        amp1 = np.zeros((20, 20), dtype=np.float64)
+        amp2 = np.zeros((20, 20), dtype=np.float64)
+
+        clib.triangle_interpolation2D(lst1, lst2, amp1)
+        clib.rasterization(lst1, lst2, amp2)
+        assert np.allclose(amp1, amp2, atol=1e-15)
+
+
+def test_batched_octahedron_interpolation():
+    nt = 300  # more triangles per row than the kernel batch size.
+    exp_I_alpha, exp_I_beta, amp = clib.cosine_of_polar_angles_and_amplitudes(nt)
+    cos_alpha, cos_beta = exp_I_alpha.real, exp_I_beta.real
+    amp = np.asarray([amp, amp, amp])
+
+    # smooth frequencies across the spectrum and clipped at both ends, and random
+    # frequencies with triangles spanning many bins.
+    sin2_beta = 1 - cos_beta**2
+    aniso = 0.5 * (3 * cos_beta**2 - 1 - 0.4 * sin2_beta * (2 * cos_alpha**2 - 1))
+    freq = np.asarray([64 + 10 * aniso, 60 * aniso, 64 + 200 * aniso])
+    random_freq = np.random.default_rng(42).uniform(-20, 150, size=freq.shape)
+
+    isa = clib.get_interpolation_isa()
+    supported = clib.supported_interpolation_isa()
+    assert supported[:2] == ["scalar", "generic"]
+    try:
+        for frequencies in [freq, random_freq]:
+            for stride in [1, 2]:
+                reference = np.zeros(128)
+                clib.octahedronScalarInterpolation(
+                    reference, frequencies, nt // stride, amp, stride
+                )
+                for name in supported:
+                    assert clib.set_interpolation_isa(name) == name
+                    spec = np.zeros(128)
+                    clib.octahedronInterpolation(
+                        spec, frequencies, nt // stride, amp, stride
+                    )
+                    np.testing.assert_allclose(spec, reference, rtol=1e-12, atol=1e-12)
+    finally:
+        clib.set_interpolation_isa(isa)
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""Test for the area rasterization of the two-dimensional spectra."""
+import numpy as np
+from mrsimulator import Simulator
+from mrsimulator import Site
+from mrsimulator import SpinSystem
+from mrsimulator.base_model import one_d_spectrum
+from mrsimulator.methods import Method2D
+from mrsimulator.methods import ThreeQ_VAS
+
+site = Site(
+    isotope="87Rb", isotropic_chemical_shift=-10, quadrupolar={"Cq": 3e6, "eta": 0.4}
+)
+dimensions = [
+    {"count": 128, "spectral_width": 3e4, "reference_offset": -5e3},
+    {"count": 128, "spectral_width": 1.5e4, "reference_offset": -4e3},
+]
+
+
+def switched_angle(reference_offset=-4e3):
+    # the central transition at 90 degrees against the magic angle.
+    events = [
+        {"rotor_angle": angle, "transition_query": {"P": [[-1]], "D": [[0]]}}
+        for angle in [np.pi / 2, 0.9553166]
+    ]
+    spectral_dimensions = [
+        dimensions[0],
+        {**dimensions[1], "reference_offset": reference_offset},
+    ]
+    return Method2D(
+        channels=["87Rb"],
+        spectral_dimensions=[
+            {**dim, "events": [event]}
+            for dim, event in zip(spectral_dimensions, events)
+        ],
+    )
+
+
+def test_two_dimensional_spectra():
+    kwargs = {"number_of_sidebands": 1}
+    three_q_vas = ThreeQ_VAS(channels=["87Rb"], spectral_dimensions=dimensions)
+    for method in [switched_angle(), three_q_vas]:
+        for density in [10, 70]:
+            kwargs["integration_density"] = density
+            reference = one_d_spectrum(method, [SpinSystem(sites=[site])], **kwargs)
+            spectrum = one_d_spectrum(
+                method, [SpinSystem(sites=[site])], rasterization=1, **kwargs
+            )
+            np.testing.assert_allclose(
+                spectrum, reference, atol=1e-12 * reference.max()
+            )
+
+    # the lineshape crosses the lower edge of the second dimension, where the tent
+    # strips fold the frequencies within a bin below the window into the first bin.
+    method = switched_angle(reference_offset=2e3)
+    reference = one_d_spectrum(method, [SpinSystem(sites=[site])], **kwargs)
+    spectrum = one_d_spectrum(
+        method, [SpinSystem(sites=[site])], rasterization=1, **kwargs
+    )
+    atol = 1e-12 * reference.max()
+    np.testing.assert_allclose(spectrum[:, 1:], reference[:, 1:], atol=atol)
+    assert np.all(spectrum[:, 0] <= reference[:, 0] + atol)
+    assert spectrum[:, 0].sum() < reference[:, 0].sum()
+
+
+def test_simulator_rasterization():
+    method = switched_angle(reference_offset=2e3)
+    sim = Simulator(spin_systems=[SpinSystem(sites=[site])], methods=[method])
+    sim.config.number_of_sidebands = 1
+    sim.config.rasterization = "exact"
+    sim.run()
+    spectrum = sim.methods[0].simulation.y[0].components[0]
+    reference = one_d_spectrum(
+        method,
+        sim.spin_systems,
+        number_of_sidebands=1,
+        integration_density=70,
+        integration_volume=0,
+        rasterization=1,
+    )
+    np.testing.assert_allclose(spectrum, reference, atol=1e-12 * spectrum.max())
+
+    sim.config.rasterization = "tent"
+    sim.run()
+    tent = sim.methods[0].simulation.y[0].components[0]
+    assert tent[:, 0].sum() > spectrum[:, 0].sum()
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""Test for the adaptive refinement of the octahedral mesh."""
+import numpy as np
+from mrsimulator import Simulator
+from mrsimulator import Site
+from mrsimulator import SpinSystem
+from mrsimulator.base_model import one_d_spectrum
+from mrsimulator.base_model import SimulationPlan
+from mrsimulator.methods import BlochDecayCTSpectrum
+from mrsimulator.methods import BlochDecaySpectrum
+from mrsimulator.methods import ThreeQ_VAS
+
+euler = {"alpha": 0.3, "beta": 1.1, "gamma": 0.7}
+
+
+def bloch_decay(rotor_frequency=0):
+    return BlochDecaySpectrum(
+        channels=["29Si"],
+        rotor_frequency=rotor_frequency,
+        spectral_dimensions=[{"count": 1024, "spectral_width": 2e4}],
+    )
+
+
+def central_transition(rotor_frequency=0):
+    return BlochDecayCTSpectrum(
+        channels=["27Al"],
+        rotor_frequency=rotor_frequency,
+        rotor_angle=0.9553166 if rotor_frequency else 0,
+        spectral_dimensions=[{"count": 1024, "spectral_width": 5e4}],
+    )
+
+
+def shielding_system(**kwargs):
+    shielding = {"zeta": 20, "eta": 0.4, **kwargs}
+    site = Site(
+        isotope="29Si", isotropic_chemical_shift=-10, shielding_symmetric=shielding
+    )
+    return SpinSystem(sites=[site])
+
+
+def quadrupolar_system(**kwargs):
+    quadrupolar = {"Cq": 3e6, "eta": 0.3, **kwargs}
+    site = Site(isotope="27Al", isotropic_chemical_shift=10, quadrupolar=quadrupolar)
+    return SpinSystem(sites=[site])
+
+
+def test_single_subdivision():
+    # a subdivision of every triangle is the mesh of twice the integration density.
+    kwargs = {"number_of_sidebands": 1, "beta_averaging": False}
+    for method, system in [
+        (bloch_decay(), shielding_system(**euler)),
+        (central_transition(), quadrupolar_system(**euler)),
+    ]:
+        for volume in [0, 1]:
+            kwargs["integration_volume"] = volume
+            reference = one_d_spectrum(
+                method, [system], integration_density=40, **kwargs
+            )
+            plan = SimulationPlan()
+            spectrum = one_d_spectrum(
+                method,
+                [system],
+                integration_density=20,
+                refinement_depth=1,
+                plan=plan,
+                **kwargs,
+            )
+            np.testing.assert_allclose(
+                spectrum, reference, atol=1e-12 * reference.max()
+            )
+            assert plan.refinement == {"triangles": 400, "orientations": 1200}
+
+
+def relative_error(method, spin_systems, integration_volume=0):
+    kwargs = {
+        "number_of_sidebands": 1,
+        "beta_averaging": False,
+        "integration_volume": integration_volume,
+    }
+    reference = one_d_spectrum(method, spin_systems, integration_density=400, **kwargs)
+    plan = SimulationPlan()
+    spectrum = one_d_spectrum(
+        method,
+        spin_systems,
+        integration_density=16,
+        refinement_depth=4,
+        plan=plan,
+        **kwargs,
+    )
+    np.testing.assert_allclose(spectrum.sum(), reference.sum(), rtol=1e-3)
+
+    # only the unresolved triangles are subdivided.
+    triangles = plan.refinement["triangles"]
+    assert 0 < triangles < 16**2 * (4**4 - 1) // 3
+    assert plan.refinement["orientations"] == 3 * triangles
+    return np.abs(spectrum - reference).sum() / np.abs(reference).sum()
+
+
+def test_static_lineshapes():
+    assert relative_error(bloch_decay(), [shielding_system()]) < 5e-4
+    assert relative_error(central_transition(), [quadrupolar_system()]) < 1e-3
+
+    # the tensors at non-zero Euler angles, over the hemisphere.
+    systems = [quadrupolar_system(**euler)]
+    assert relative_error(central_transition(), systems, 1) < 1e-3
+
+
+def test_infinite_spinning_lineshape():
+    method = central_transition(rotor_frequency=1e9)
+    assert relative_error(method, [quadrupolar_system()]) < 1e-3
+
+
+def test_unrefined_spectra():
+    kwargs = {"number_of_sidebands": 16, "integration_density": 20}
+    site = Site(isotope="87Rb", quadrupolar={"Cq": 3e6, "eta": 0.4})
+    three_q_vas = ThreeQ_VAS(
+        channels=["87Rb"],
+        spectral_dimensions=[{"count": 128, "spectral_width": 2e4}] * 2,
+    )
+
+    # the spinning sidebands and the two-dimensional methods are not refined.
+    for method, system in [
+        (bloch_decay(2000), shielding_system()),
+        (three_q_vas, SpinSystem(sites=[site])),
+    ]:
+        plan = SimulationPlan()
+        spectrum = one_d_spectrum(
+            method, [system], refinement_depth=3, plan=plan, **kwargs
+        )
+        reference = one_d_spectrum(method, [system], **kwargs)
+        np.testing.assert_allclose(spectrum, reference, atol=1e-12 * reference.max())
+        assert plan.refinement == {"triangles": 0, "orientations": 0}
+
+
+def test_simulator_refinement():
+    method = central_transition()
+    sim = Simulator(spin_systems=[quadrupolar_system()], methods=[method])
+    sim.config.number_of_sidebands = 1
+    sim.config.integration_density = 16
+    sim.config.refinement_depth = 3
+    plans = sim.compile()
+    sim.run(plans=plans)
+    spectrum = sim.methods[0].simulation.y[0].components[0]
+    reference = one_d_spectrum(
+        method,
+        sim.spin_systems,
+        number_of_sidebands=1,
+        integration_density=16,
+        integration_volume=0,
+        refinement_depth=3,
+    )
+    np.testing.assert_allclose(spectrum, reference, atol=1e-12 * spectrum.max())
+    assert plans[0].refinement["triangles"] > 0
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""Test for the table and polynomial sines and cosines."""
+import mrsimulator.tests.tests as clib
+import numpy as np
+import pytest
+from mrsimulator import Simulator
+from mrsimulator import Site
+from mrsimulator import SpinSystem
+from mrsimulator.base_model import get_trig_method
+from mrsimulator.base_model import set_trig_method
+from mrsimulator.methods import BlochDecayCTSpectrum
+from mrsimulator.methods import BlochDecaySpectrum
+
+
+def exp_imag(x, method):
+    default = clib.get_trig_method()
+    clib.set_trig_method(method)
+    try:
+        return clib.exp_imag(x), clib.cosine_I_sine(x)
+    finally:
+        clib.set_trig_method(default)
+
+
+def test_polynomial_exp_imag():
+    x = np.random.uniform(-1000, 1000, size=10000)
+    x[:5] = [0, np.pi / 2, -np.pi, 2 * np.pi, 1e-12]
+    exp_x, cos_I_sin_x = exp_imag(x, "polynomial")
+
+    np.testing.assert_allclose(exp_x, np.exp(1j * x), rtol=0, atol=1e-13)
+
+    # the sine is evaluated at |x|, like the table lookup.
+    cos_I_sin_ref = np.cos(x) + 1j * np.sin(np.abs(x))
+    np.testing.assert_allclose(cos_I_sin_x, cos_I_sin_ref, rtol=0, atol=1e-13)
+
+
+def test_table_exp_imag():
+    # away from the last table entry at 2π.
+    x = np.random.uniform(-6.2, 6.2, size=10000)
+    exp_x, cos_I_sin_x = exp_imag(x, "table")
+    poly_x, poly_cos_I_sin_x = exp_imag(x, "polynomial")
+
+    np.testing.assert_allclose(exp_x, np.exp(1j * x), rtol=0, atol=1e-8)
+    np.testing.assert_allclose(exp_x, poly_x, rtol=0, atol=1e-8)
+    np.testing.assert_allclose(cos_I_sin_x, poly_cos_I_sin_x, rtol=0, atol=1e-8)
+
+
+def test_set_trig_method():
+    default = get_trig_method()
+    try:
+        set_trig_method("polynomial")
+        assert get_trig_method() == "polynomial"
+        set_trig_method("table")
+        assert get_trig_method() == "table"
+
+        error = "blah is an invalid trig method"
+        with pytest.raises(ValueError, match=f".*{error}.*"):
+            set_trig_method("blah")
+        assert get_trig_method() == "table"
+    finally:
+        set_trig_method(default)
+
+
+def simulate(sim, method):
+    default = get_trig_method()
+    set_trig_method(method)
+    try:
+        sim.run()
+    finally:
+        set_trig_method(default)
+    return sim.methods[0].simulation.y[0].components[0].copy()
+
+
+@pytest.mark.parametrize(
+    "site, method",
+    [
+        (
+            Site(isotope="29Si", shielding_symmetric={"zeta": 80, "eta": 0.4}),
+            BlochDecaySpectrum(
+                channels=["29Si"],
+                rotor_frequency=1000,
+                spectral_dimensions=[{"count": 1024, "spectral_width": 5e4}],
+            ),
+        ),
+        (
+            Site(isotope="17O", quadrupolar={"Cq": 5e6, "eta": 0.3}),
+            BlochDecayCTSpectrum(
+                channels=["17O"],
+                rotor_frequency=3000,
+                spectral_dimensions=[{"count": 1024, "spectral_width": 5e4}],
+            ),
+        ),
+    ],
+)
+def test_simulation_trig_methods(site, method):
+    sim = Simulator(spin_systems=[SpinSystem(sites=[site])], methods=[method])
+    sim.config.number_of_sidebands = 32
+    sim.config.integration_density = 20
+
+    table = simulate(sim, "table")
+    polynomial = simulate(sim, "polynomial")
+    np.testing.assert_allclose(polynomial, table, rtol=0, atol=1e-7 * table.max())